@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+缓存存储格式迁移工具
+把已有的csv格式DataFrame缓存转换为 cache_config 中配置的列式格式（parquet/feather）
+"""
+
+import sys
+from pathlib import Path
+
+# 添加项目根目录到路径
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('scripts')
+
+
+def main():
+    """主函数"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="把csv缓存转换为配置的列式存储格式")
+    parser.add_argument("--cache-dir", default=None,
+                        help="缓存目录 (默认: tradingagents/dataflows/data_cache)")
+    parser.add_argument("--type", action="append", dest="data_types",
+                        help="只转换指定数据类型，可重复 (如: --type stock_data --type daily_bars)")
+    parser.add_argument("--dry-run", action="store_true", help="只统计需要转换的缓存，不写入")
+
+    args = parser.parse_args()
+
+    from tradingagents.dataflows.cache_manager import PYARROW_AVAILABLE, StockDataCache
+
+    if not PYARROW_AVAILABLE:
+        logger.error("❌ 未安装pyarrow，无法转换为列式格式: pip install pyarrow")
+        return 1
+
+    cache = StockDataCache(args.cache_dir)
+    result = cache.migrate_storage_format(data_types=args.data_types, dry_run=args.dry_run)
+
+    action = "待转换" if args.dry_run else "已转换"
+    logger.info(f"📦 {action}: {result['converted']} 个, 跳过: {result['skipped']} 个, 失败: {result['failed']} 个")
+    logger.info(f"💾 csv大小: {result['bytes_before'] / 1024 / 1024:.2f} MB")
+    if not args.dry_run and result['converted']:
+        logger.info(f"💾 转换后大小: {result['bytes_after'] / 1024 / 1024:.2f} MB")
+    return 0 if result['failed'] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
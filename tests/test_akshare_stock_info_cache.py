@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AKShare股票信息缓存测试
+
+验证 AKShareProvider.get_stock_info / get_stock_infos 只在A股代码名称表过期时下载一次（并发查询也只下载一次），
+冷启动时查询触发的证券主数据后台刷新不再重复下载名称表，名称表写入证券主数据后新进程直接从磁盘加载，
+批量查询一次返回全部代码，以及下载失败时在重试间隔内不再下载。
+直接运行时对比每次查询都下载整张名称表与使用缓存索引的单次查询耗时。
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+import pandas as pd
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+try:
+    from tradingagents.dataflows import security_master as security_master_module
+    from tradingagents.dataflows.akshare_utils import AKShareProvider
+    from tradingagents.dataflows.security_master import SecurityMaster
+    AKSHARE_UTILS_AVAILABLE = True
+except ImportError as e:
+    print(f"⚠️ AKShare工具模块不可用: {e}")
+    AKSHARE_UTILS_AVAILABLE = False
+
+
+class _FakeAkshare:
+    """模拟 akshare 的 stock_info_a_code_name（5500只股票）以及港股、美股行情表"""
+
+    def __init__(self, delay=0.0, fail=False):
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+        self.spot_calls = {"hk": 0, "us": 0}
+        self.listing = pd.DataFrame({
+            "code": [f"{600000 + i:06d}" for i in range(5500)],
+            "name": [f"测试股份{i}" for i in range(5500)],
+        })
+
+    def stock_info_a_code_name(self):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("network down")
+        return self.listing
+
+    def stock_hk_spot_em(self):
+        self.spot_calls["hk"] += 1
+        return pd.DataFrame({"代码": ["00700"], "名称": ["腾讯控股"]})
+
+    def stock_us_spot_em(self):
+        self.spot_calls["us"] += 1
+        return pd.DataFrame({"代码": ["105.AAPL"], "名称": ["苹果"]})
+
+
+def _provider(ak):
+    provider = AKShareProvider.__new__(AKShareProvider)
+    provider.ak, provider.connected = ak, True
+    return provider
+
+
+class TestStockInfoCache(unittest.TestCase):
+    """A股代码名称表缓存测试"""
+
+    def setUp(self):
+        if not AKSHARE_UTILS_AVAILABLE:
+            self.skipTest("AKShare工具模块不可用")
+        temp = tempfile.TemporaryDirectory()
+        self.addCleanup(temp.cleanup)
+        self.path = os.path.join(temp.name, "security_master.csv")
+        self.master = self._master()
+        self._use_master(self.master)
+
+    def _master(self):
+        return SecurityMaster(self.path, loaders=[], auto_refresh=False)
+
+    def _use_master(self, master):
+        patcher = patch.object(security_master_module, "_security_master", master)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_listing_downloaded_once(self):
+        """重复查询只下载一次名称表"""
+        ak = _FakeAkshare()
+        provider = _provider(ak)
+        for _ in range(10):
+            self.assertEqual(provider.get_stock_info("600001"),
+                             {"symbol": "600001", "name": "测试股份1", "source": "akshare"})
+        self.assertEqual(provider.get_stock_info("999999")["name"], "股票999999")
+        self.assertEqual(ak.calls, 1)
+
+    def test_concurrent_lookups_download_once(self):
+        """多个分析师并发查询时只下载一次"""
+        ak = _FakeAkshare(delay=0.2)
+        provider = _provider(ak)
+        names = []
+        threads = [threading.Thread(target=lambda: names.append(provider.get_stock_info("600002")["name"]))
+                   for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(names, ["测试股份2"] * 3)
+        self.assertEqual(ak.calls, 1)
+
+    def test_cold_start_background_refresh_skips_listing(self):
+        """冷启动时同步下载的名称表记录在证券主数据中，随后的后台刷新只运行其他加载函数"""
+        ak = _FakeAkshare()
+        master = SecurityMaster(self.path, loaders=[security_master_module.load_a_shares_from_akshare,
+                                                    security_master_module._load_hk_from_akshare,
+                                                    security_master_module._load_us_from_akshare])
+        self._use_master(master)
+        with patch.dict(sys.modules, {"akshare": ak}):
+            self.assertEqual(_provider(ak).get_stock_info("600000")["name"], "测试股份0")
+            master.wait_for_refresh(5)
+        self.assertEqual({"a": ak.calls, **ak.spot_calls}, {"a": 1, "hk": 1, "us": 1})
+        self.assertEqual(master.get_name("00700.HK"), "腾讯控股")
+
+        # 后台刷新完成后表已是最新，新的查询不再下载
+        _provider(ak).get_stock_info("600001")
+        self.assertEqual(ak.calls, 1)
+
+    def test_bulk_lookup(self):
+        """批量查询一次返回全部代码"""
+        ak = _FakeAkshare()
+        symbols = [f"{600000 + i:06d}" for i in range(0, 1000, 2)] + ["000000"]
+        infos = _provider(ak).get_stock_infos(symbols)
+        self.assertEqual(list(infos), symbols)
+        self.assertEqual(infos["600998"]["name"], "测试股份998")
+        self.assertEqual(infos["000000"]["name"], "股票000000")
+        self.assertEqual(ak.calls, 1)
+
+    def test_persisted_listing_reused(self):
+        """名称表写入磁盘，新进程在有效期内不再下载"""
+        _provider(_FakeAkshare()).get_stock_info("600001")
+        master = self._master()
+        self.assertEqual(master.get_name("600003"), "测试股份3")
+
+        # 证券主数据完整刷新过（未过期）时不再单独下载
+        master.refresh_seconds = 3600
+        master._updated_at = time.time()
+        self._use_master(master)
+        ak = _FakeAkshare()
+        self.assertEqual(_provider(ak).get_stock_info("600004")["name"], "测试股份4")
+        self.assertEqual(ak.calls, 0)
+
+    def test_expired_listing_redownloaded(self):
+        """超过有效期后重新下载"""
+        ak = _FakeAkshare()
+        provider = _provider(ak)
+        provider.get_stock_info("600001")
+        self.master._loaded_at[security_master_module.load_a_shares_from_akshare] -= 25 * 3600
+        provider.get_stock_info("600001")
+        self.assertEqual(ak.calls, 2)
+
+    def test_failed_download_not_retried_immediately(self):
+        """下载失败时返回默认名称，重试间隔内不再下载"""
+        ak = _FakeAkshare(fail=True)
+        provider = _provider(ak)
+        self.assertEqual(provider.get_stock_info("600001")["name"], "股票600001")
+        self.assertEqual(provider.get_stock_info("600036")["name"], "招商银行")
+        self.assertEqual(ak.calls, 1)
+
+    def test_unrefreshed_master_file_is_stale(self):
+        """未完整刷新过的证券主数据表写入磁盘后，新实例仍视为过期"""
+        master = self._master()
+        master.upsert("688111", "金山办公")
+        self.assertEqual(self._master().get_stats()["updated_at"], 0)
+
+
+def benchmark(lookups=20, download_delay=0.2):
+    """返回 (每次下载名称表的单次查询耗时ms, 使用缓存索引的单次查询耗时ms)
+
+    download_delay 模拟下载5000多行名称表的网络耗时（实际通常为1~3秒）
+    """
+    ak = _FakeAkshare(delay=download_delay)
+    symbols = [f"{600000 + i * 7:06d}" for i in range(lookups)]
+
+    start = time.perf_counter()
+    for symbol in symbols:
+        stock_list = ak.stock_info_a_code_name()
+        stock_list[stock_list['code'] == symbol].iloc[0]['name']
+    uncached_ms = (time.perf_counter() - start) / lookups * 1000
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        master = SecurityMaster(os.path.join(temp_dir, "security_master.csv"), loaders=[], auto_refresh=False)
+        with patch.object(security_master_module, "_security_master", master):
+            provider = _provider(ak)
+            start = time.perf_counter()
+            for symbol in symbols * 50:
+                provider.get_stock_info(symbol)
+            cached_ms = (time.perf_counter() - start) / (lookups * 50) * 1000
+    return uncached_ms, cached_ms
+
+
+if __name__ == "__main__":
+    if not AKSHARE_UTILS_AVAILABLE:
+        sys.exit(1)
+    print("📇 AKShare股票信息查询基准 (5500只股票，模拟200ms下载耗时)")
+    uncached_ms, cached_ms = benchmark()
+    print(f"  每次下载名称表: {uncached_ms:.1f}ms/次")
+    print(f"  缓存索引(含首次下载): {cached_ms:.3f}ms/次")
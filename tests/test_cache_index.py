@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+缓存元数据索引测试
+
+验证 StockDataCache 的查找、过期清理和统计走SQLite索引，不再遍历 *_meta.json，
+以及旧缓存目录首次加载时的索引迁移。
+直接运行时对比遍历元数据文件与索引查找的耗时。
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+import unittest
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest.mock import patch
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+import pandas as pd
+
+try:
+    from tradingagents.dataflows.cache_manager import StockDataCache
+    CACHE_AVAILABLE = True
+except ImportError as e:
+    print(f"⚠️ 缓存管理器不可用: {e}")
+    CACHE_AVAILABLE = False
+
+
+def _sample_frame(rows=5):
+    return pd.DataFrame({"close": range(rows)}, index=pd.date_range("2024-01-01", periods=rows))
+
+
+def _backdate(cache, cache_key, days):
+    """把缓存条目的缓存时间改到 days 天前（同时更新元数据文件和索引）"""
+    metadata = cache._load_metadata(cache_key)
+    metadata['cached_at'] = (datetime.now() - timedelta(days=days)).isoformat()
+    with open(cache._get_metadata_path(cache_key), 'w', encoding='utf-8') as f:
+        json.dump(metadata, f)
+    cache.index.upsert(cache_key, metadata)
+
+
+class TestCacheMetadataIndex(unittest.TestCase):
+    """缓存元数据索引测试"""
+
+    def setUp(self):
+        if not CACHE_AVAILABLE:
+            self.skipTest("缓存管理器不可用")
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = StockDataCache(self.tmp_dir.name)
+
+    def tearDown(self):
+        self.cache.index.close()
+        self.tmp_dir.cleanup()
+
+    def test_partial_match_without_glob(self):
+        """部分匹配查找走索引，不遍历元数据目录"""
+        key = self.cache.save_stock_data("AAPL", _sample_frame(), "2024-01-01", "2024-01-05", "yfinance")
+        self.cache.save_stock_data("MSFT", _sample_frame(), "2024-01-01", "2024-01-05", "yfinance")
+
+        with patch.object(Path, "glob", side_effect=AssertionError("不应遍历目录")):
+            found = self.cache.find_cached_stock_data("AAPL", "2023-01-01", "2023-12-31", "yfinance")
+        self.assertEqual(found, key)
+
+    def test_find_respects_source_and_age(self):
+        """按数据源和缓存时间过滤"""
+        key = self.cache.save_fundamentals_data("000001", "报告", data_source="tushare")
+        self.assertEqual(self.cache.find_cached_fundamentals_data("000001", "tushare"), key)
+        self.assertIsNone(self.cache.find_cached_fundamentals_data("000001", "akshare"))
+
+        _backdate(self.cache, key, days=3)
+        self.assertIsNone(self.cache.find_cached_fundamentals_data("000001", "tushare"))
+
+    def test_missing_metadata_is_dropped_from_index(self):
+        """元数据文件被外部删除后，查找时清理索引记录"""
+        key = self.cache.save_stock_data("AAPL", _sample_frame(), "2024-01-01", "2024-01-05", "yfinance")
+        self.cache._get_metadata_path(key).unlink()
+
+        self.assertIsNone(self.cache.find_cached_stock_data("AAPL", "2023-01-01", "2023-12-31"))
+        self.assertEqual(self.cache.index.count(), 0)
+
+    def test_clear_old_cache(self):
+        """过期清理只删除旧条目，并同步索引"""
+        old_key = self.cache.save_stock_data("AAPL", _sample_frame(), "2024-01-01", "2024-01-05", "yfinance")
+        new_key = self.cache.save_stock_data("AAPL", _sample_frame(), "2024-02-01", "2024-02-05", "yfinance")
+        old_file = Path(self.cache._load_metadata(old_key)['file_path'])
+        _backdate(self.cache, old_key, days=10)
+
+        self.cache.clear_old_cache(max_age_days=7)
+
+        self.assertFalse(old_file.exists())
+        self.assertFalse(self.cache._get_metadata_path(old_key).exists())
+        self.assertEqual([e['cache_key'] for e in self.cache.find_cache_entries()], [new_key])
+
+    def test_stats_from_index(self):
+        """统计信息与原有字段一致"""
+        self.cache.save_stock_data("AAPL", _sample_frame(), "2024-01-01", "2024-01-05", "yfinance")
+        self.cache.save_news_data("AAPL", "news", data_source="finnhub")
+        self.cache.save_fundamentals_data("AAPL", "fundamentals", data_source="finnhub")
+
+        stats = self.cache.get_cache_stats()
+        self.assertEqual(stats['total_files'], 3)
+        self.assertEqual(stats['stock_data_count'], 1)
+        self.assertEqual(stats['news_count'], 1)
+        self.assertEqual(stats['fundamentals_count'], 1)
+        self.assertGreater(self.cache.index.stats_by_type()['stock_data']['size_bytes'], 0)
+
+    def test_existing_metadata_migrated(self):
+        """已有缓存目录首次加载时自动建立索引"""
+        key = self.cache.save_stock_data("AAPL", _sample_frame(), "2024-01-01", "2024-01-05", "yfinance")
+        self.cache.index.close()
+        os.remove(self.cache.metadata_dir / "cache_index.db")
+        (self.cache.metadata_dir / "broken_meta.json").write_text("{", encoding='utf-8')
+
+        reopened = StockDataCache(self.tmp_dir.name)
+        try:
+            self.assertEqual(reopened.index.count(), 1)
+            self.assertEqual(reopened.find_cached_stock_data("AAPL", data_source="yfinance"), key)
+        finally:
+            reopened.index.close()
+
+
+def benchmark(entries=5000, lookups=50):
+    """对比遍历元数据文件与索引查找的耗时，返回 (遍历耗时, 索引耗时)"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = StockDataCache(tmp_dir)
+        now = datetime.now().isoformat()
+        items = []
+        for i in range(entries):
+            symbol = f"{i % 500:06d}"
+            cache_key = f"{symbol}_stock_data_{i:012d}"
+            metadata = {
+                'symbol': symbol, 'data_type': 'stock_data', 'market_type': 'china',
+                'data_source': 'tushare', 'file_path': '', 'file_format': 'csv', 'cached_at': now,
+            }
+            with open(cache._get_metadata_path(cache_key), 'w', encoding='utf-8') as f:
+                json.dump(metadata, f)
+            items.append((cache_key, metadata))
+        cache.index.upsert_many(items)
+
+        start = time.perf_counter()
+        for i in range(lookups):
+            symbol = f"{i:06d}"
+            matches = []
+            for metadata_file in cache.metadata_dir.glob("*_meta.json"):
+                with open(metadata_file, 'r', encoding='utf-8') as f:
+                    metadata = json.load(f)
+                if metadata.get('symbol') == symbol and metadata.get('data_type') == 'stock_data':
+                    matches.append(metadata_file.stem.replace('_meta', ''))
+        glob_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for i in range(lookups):
+            cache.find_cache_entries(symbol=f"{i:06d}", data_type='stock_data', market_type='china')
+        index_time = time.perf_counter() - start
+        cache.index.close()
+
+    return glob_time, index_time
+
+
+if __name__ == "__main__":
+    if not CACHE_AVAILABLE:
+        sys.exit(1)
+    print("🗂️ 缓存元数据查找基准 (5000个条目, 50次查找)")
+    glob_time, index_time = benchmark()
+    print(f"  遍历元数据文件: {glob_time:.3f}s")
+    print(f"  索引查找:       {index_time:.3f}s")
+    print(f"  加速比:         {glob_time / index_time:.1f}x")
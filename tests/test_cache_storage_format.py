@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+缓存列式存储格式测试
+
+验证 StockDataCache 按 cache_config 的 storage_format 写入 parquet/feather，
+保留数据类型，旧的csv缓存仍可读取，并可通过 migrate_storage_format 转换。
+直接运行时对比csv/parquet/feather的加载耗时和磁盘占用。
+"""
+
+import os
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+import numpy as np
+import pandas as pd
+
+try:
+    from tradingagents.dataflows.cache_manager import PYARROW_AVAILABLE, StockDataCache
+    CACHE_AVAILABLE = PYARROW_AVAILABLE
+except ImportError as e:
+    print(f"⚠️ 缓存管理器不可用: {e}")
+    CACHE_AVAILABLE = False
+
+
+def _sample_bars(years=5, seed=0):
+    """生成多年的A股日线数据"""
+    dates = pd.bdate_range(end="2025-06-30", periods=years * 250)
+    rng = np.random.default_rng(seed)
+    close = 10 + rng.standard_normal(len(dates)).cumsum() * 0.1
+    return pd.DataFrame({
+        "ts_code": "000001.SZ",
+        "trade_date": dates,
+        "open": close, "high": close + 0.2, "low": close - 0.2, "close": close,
+        "pct_chg": rng.normal(0, 1.5, len(dates)),
+        "vol": rng.integers(1000, 1_000_000, len(dates)),
+    })
+
+
+class TestCacheStorageFormat(unittest.TestCase):
+    """缓存存储格式测试"""
+
+    def setUp(self):
+        if not CACHE_AVAILABLE:
+            self.skipTest("pyarrow不可用")
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = StockDataCache(self.tmp_dir.name)
+        self.bars = _sample_bars(years=2)
+
+    def tearDown(self):
+        self.cache.index.close()
+        self.tmp_dir.cleanup()
+
+    def _save_as(self, storage_format):
+        self.cache.cache_config['china_stock_data']['storage_format'] = storage_format
+        return self.cache.save_stock_data("000001", self.bars, "2023-01-01", "2025-06-30", "tushare")
+
+    def test_parquet_round_trip_keeps_dtypes(self):
+        """parquet保留索引和列类型"""
+        key = self._save_as('parquet')
+        loaded = self.cache.load_stock_data(key)
+
+        self.assertEqual(self.cache._load_metadata(key)['file_format'], 'parquet')
+        pd.testing.assert_frame_equal(loaded, self.bars)
+
+    def test_feather_round_trip(self):
+        """feather（Arrow IPC）内存映射读取"""
+        key = self._save_as('feather')
+        pd.testing.assert_frame_equal(self.cache.load_stock_data(key), self.bars)
+
+    def test_legacy_csv_still_loads(self):
+        """旧的csv缓存仍按原方式读取"""
+        key = self._save_as('csv')
+        loaded = self.cache.load_stock_data(key)
+
+        self.assertEqual(self.cache._load_metadata(key)['file_format'], 'csv')
+        self.assertEqual(len(loaded), len(self.bars))
+        self.assertAlmostEqual(loaded['close'].iloc[-1], self.bars['close'].iloc[-1])
+
+    def test_format_change_removes_old_file(self):
+        """同一缓存键换格式后不留下旧文件"""
+        key = self._save_as('csv')
+        csv_path = Path(self.cache._load_metadata(key)['file_path'])
+        self._save_as('parquet')
+
+        self.assertFalse(csv_path.exists())
+
+    def test_unsupported_frame_falls_back_to_csv(self):
+        """列式格式无法写入时退回csv"""
+        self.cache.cache_config['china_stock_data']['storage_format'] = 'parquet'
+        mixed = pd.DataFrame({"value": [1, "a", 2.5]})
+        key = self.cache.save_stock_data("000002", mixed, data_source="akshare")
+
+        self.assertEqual(self.cache._load_metadata(key)['file_format'], 'csv')
+        self.assertEqual(len(self.cache.load_stock_data(key)), 3)
+
+    def test_migrate_csv_entries(self):
+        """迁移把csv缓存转换为配置格式，缓存时间不变"""
+        key = self._save_as('csv')
+        cached_at = self.cache._load_metadata(key)['cached_at']
+        text_key = self.cache.save_news_data("000001", "新闻", data_source="akshare")
+
+        self.cache.cache_config['china_stock_data']['storage_format'] = 'parquet'
+        self.assertEqual(self.cache.migrate_storage_format(dry_run=True)['converted'], 1)
+        result = self.cache.migrate_storage_format()
+
+        metadata = self.cache._load_metadata(key)
+        self.assertEqual(result['converted'], 1)
+        self.assertEqual(metadata['file_format'], 'parquet')
+        self.assertEqual(metadata['cached_at'], cached_at)
+        self.assertEqual(self.cache.find_cache_entries(data_type='stock_data')[0]['file_format'], 'parquet')
+        self.assertEqual(len(self.cache.load_stock_data(key)), len(self.bars))
+        self.assertEqual(self.cache._load_metadata(text_key)['file_format'], 'txt')
+
+
+def benchmark(years=10, loads=20):
+    """对比各格式的加载耗时和文件大小，返回 {格式: (单次加载秒数, 字节数)}"""
+    bars = _sample_bars(years=years)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = StockDataCache(tmp_dir)
+        for storage_format in ('csv', 'parquet', 'feather'):
+            cache.cache_config['china_stock_data']['storage_format'] = storage_format
+            key = cache.save_stock_data("000001", bars, data_source=f"tushare_{storage_format}")
+
+            start = time.perf_counter()
+            for _ in range(loads):
+                cache.load_stock_data(key)
+            elapsed = (time.perf_counter() - start) / loads
+
+            size = Path(cache._load_metadata(key)['file_path']).stat().st_size
+            results[storage_format] = (elapsed, size)
+        cache.index.close()
+    return results
+
+
+if __name__ == "__main__":
+    if not CACHE_AVAILABLE:
+        sys.exit(1)
+    print("💾 缓存存储格式基准 (10年日线, 2500行)")
+    results = benchmark()
+    csv_time, csv_size = results['csv']
+    for storage_format, (elapsed, size) in results.items():
+        print(f"  {storage_format:8s} 加载 {elapsed * 1000:7.2f}ms ({csv_time / elapsed:4.1f}x) | "
+              f"大小 {size / 1024:7.1f}KB ({size / csv_size:.0%})")
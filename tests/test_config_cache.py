@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+配置缓存测试
+
+验证 ConfigManager 的定价和设置读取按文件修改时间缓存：重复计算成本不再读取 pricing.json，
+文件被外部修改或通过 save 方法保存后立即生效，返回的设置副本可安全修改，.env 覆盖照常生效。
+直接运行时对比每次解析配置文件与使用缓存时单次 track_usage 的耗时。
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+try:
+    from tradingagents.config.config_manager import ConfigManager, PricingConfig, TokenTracker
+    CONFIG_AVAILABLE = True
+except ImportError as e:
+    print(f"⚠️ 配置管理器不可用: {e}")
+    CONFIG_AVAILABLE = False
+
+
+def _bump_mtime(path):
+    """把文件修改时间推后，避免同一时间粒度内的写入被视为未修改"""
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10_000_000))
+
+
+class TestConfigCache(unittest.TestCase):
+    """定价和设置缓存测试"""
+
+    def setUp(self):
+        if not CONFIG_AVAILABLE:
+            self.skipTest("配置管理器不可用")
+        temp = tempfile.TemporaryDirectory()
+        self.addCleanup(temp.cleanup)
+        self.manager = ConfigManager(temp.name)
+        self.addCleanup(self.manager.usage_ledger.close)
+
+    def test_repeated_cost_does_not_reread_file(self):
+        """重复计算成本只在首次解析定价文件"""
+        expected = self.manager.calculate_cost("dashscope", "qwen-turbo", 1000, 500)
+        with patch("builtins.open", side_effect=AssertionError("不应读取文件")):
+            for _ in range(10):
+                self.assertEqual(self.manager.calculate_cost("dashscope", "qwen-turbo", 1000, 500), expected)
+            self.manager.load_settings()
+
+    def test_external_edit_invalidates(self):
+        """定价文件被外部修改后按新价格计算"""
+        self.manager.calculate_cost("dashscope", "qwen-turbo", 1000, 0)
+        with open(self.manager.pricing_file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        data.append({"provider": "custom", "model_name": "m1", "input_price_per_1k": 2.0,
+                     "output_price_per_1k": 3.0, "currency": "CNY"})
+        with open(self.manager.pricing_file, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        _bump_mtime(self.manager.pricing_file)
+
+        self.assertEqual(self.manager.calculate_cost("custom", "m1", 1000, 1000), 5.0)
+
+    def test_save_pricing_invalidates(self):
+        """save_pricing 后立即按新价格计算，重复配置以第一条为准"""
+        pricing = self.manager.load_pricing()
+        pricing.insert(0, PricingConfig("dashscope", "qwen-turbo", 1.0, 1.0))
+        self.manager.save_pricing(pricing)
+        self.assertEqual(self.manager.calculate_cost("dashscope", "qwen-turbo", 1000, 1000), 2.0)
+        self.assertEqual(self.manager.calculate_cost("unknown", "model", 1000, 1000), 0.0)
+
+    def test_settings_copy_and_save(self):
+        """返回的设置是副本；save_settings 后立即读到新值"""
+        settings = self.manager.load_settings()
+        settings["cost_alert_threshold"] = 1.5
+        self.assertNotEqual(self.manager.load_settings().get("cost_alert_threshold"), 1.5)
+
+        self.manager.save_settings(settings)
+        self.assertEqual(self.manager.load_settings()["cost_alert_threshold"], 1.5)
+
+    def test_env_overrides_still_applied(self):
+        """环境变量覆盖不受缓存影响"""
+        self.manager.load_settings()
+        with patch.dict(os.environ, {"TRADINGAGENTS_LOG_LEVEL": "DEBUG"}):
+            self.assertEqual(self.manager.load_settings()["log_level"], "DEBUG")
+        with patch.dict(os.environ, {"TRADINGAGENTS_LOG_LEVEL": "WARNING"}):
+            self.assertEqual(self.manager.load_settings()["log_level"], "WARNING")
+
+    def test_missing_pricing_file(self):
+        """定价文件被删除时成本为0，恢复后重新生效"""
+        pricing = self.manager.load_pricing()
+        os.remove(self.manager.pricing_file)
+        self.assertEqual(self.manager.calculate_cost("dashscope", "qwen-turbo", 1000, 1000), 0.0)
+        self.manager.save_pricing(pricing)
+        self.assertGreater(self.manager.calculate_cost("dashscope", "qwen-turbo", 1000, 1000), 0)
+
+
+def benchmark(calls=2000):
+    """返回 (每次解析配置文件的单次track_usage耗时ms, 使用缓存的单次耗时ms)"""
+    results = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        manager = ConfigManager(temp_dir)
+        tracker = TokenTracker(manager)
+        for uncached in (True, False):
+            start = time.perf_counter()
+            for i in range(calls):
+                if uncached:
+                    manager._file_cache.clear()
+                tracker.track_usage("dashscope", "qwen-turbo", 1000, 500, session_id=f"s{i % 10}")
+            results.append((time.perf_counter() - start) / calls * 1000)
+        manager.usage_ledger.close()
+    return tuple(results)
+
+
+if __name__ == "__main__":
+    if not CONFIG_AVAILABLE:
+        sys.exit(1)
+    print("💰 track_usage 单次开销基准 (2000次调用)")
+    uncached_ms, cached_ms = benchmark()
+    print(f"  每次解析配置: {uncached_ms:.3f}ms")
+    print(f"  缓存索引:     {cached_ms:.3f}ms")
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+日线存储增量补齐测试
+
+验证 StockDataCache.get_daily_bars 对已覆盖子区间直接返回、只向上游请求缺失的首尾区间，
+以及 Tushare 前复权结果与直接请求一致。
+直接运行时模拟连续多天、不同回溯窗口的分析请求，对比上游调用次数与耗时。
+"""
+
+import os
+import sys
+import tempfile
+import time
+import unittest
+from datetime import datetime, timedelta
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+import numpy as np
+import pandas as pd
+
+try:
+    from tradingagents.dataflows.cache_manager import StockDataCache
+    from tradingagents.dataflows.tushare_utils import TushareProvider
+    CACHE_AVAILABLE = True
+except ImportError as e:
+    print(f"⚠️ 缓存管理器不可用: {e}")
+    CACHE_AVAILABLE = False
+
+
+class StubUpstream:
+    """模拟上游日线接口，记录请求区间"""
+
+    def __init__(self, latency=0.0, seed=0):
+        self.latency = latency
+        self.calls = []
+        dates = pd.bdate_range("2015-01-01", datetime.now())
+        rng = np.random.default_rng(seed)
+        pct_chg = rng.normal(0, 1.5, len(dates)).round(2)
+        close = (10 * np.cumprod(1 + pct_chg / 100)).round(2)
+        self.bars = pd.DataFrame({
+            "ts_code": "000001.SZ",
+            "trade_date": dates.strftime("%Y%m%d"),
+            "open": close, "high": close + 0.1, "low": close - 0.1, "close": close,
+            "pct_chg": pct_chg, "vol": rng.integers(1000, 100000, len(dates)),
+        })
+
+    def fetch(self, start_date, end_date):
+        self.calls.append((start_date, end_date))
+        time.sleep(self.latency)
+        start, end = start_date.replace('-', ''), end_date.replace('-', '')
+        mask = (self.bars["trade_date"] >= start) & (self.bars["trade_date"] <= end)
+        return self.bars[mask].iloc[::-1].reset_index(drop=True)  # 与Tushare一样倒序返回
+
+    def daily(self, ts_code, start_date, end_date):
+        return self.fetch(start_date, end_date)
+
+
+class TestDailyBarStore(unittest.TestCase):
+    """日线存储测试"""
+
+    def setUp(self):
+        if not CACHE_AVAILABLE:
+            self.skipTest("缓存管理器不可用")
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = StockDataCache(self.tmp_dir.name)
+        self.upstream = StubUpstream()
+
+    def tearDown(self):
+        self.cache.index.close()
+        self.tmp_dir.cleanup()
+
+    def _get(self, start_date, end_date):
+        return self.cache.get_daily_bars("000001", start_date, end_date, self.upstream.fetch,
+                                         data_source="tushare", date_column="trade_date")
+
+    def test_contained_subrange_served_from_store(self):
+        """子区间直接从存储返回"""
+        self._get("2023-01-01", "2024-06-30")
+        bars = self._get("2024-01-01", "2024-03-31")
+
+        self.assertEqual(len(self.upstream.calls), 1)
+        self.assertEqual(bars["trade_date"].min(), pd.Timestamp("2024-01-01"))
+        self.assertEqual(bars["trade_date"].max(), pd.Timestamp("2024-03-29"))
+        self.assertTrue(self.cache.daily_bars_cover("000001", "2024-01-01", "2024-03-31"))
+
+    def test_only_missing_head_and_tail_fetched(self):
+        """只请求缺失的首尾区间并合并"""
+        self._get("2024-01-01", "2024-06-30")
+        bars = self._get("2023-12-01", "2024-07-31")
+
+        self.assertEqual(self.upstream.calls[1:], [("2023-12-01", "2023-12-31"), ("2024-07-01", "2024-07-31")])
+        self.assertFalse(bars["trade_date"].duplicated().any())
+        self.assertTrue(bars["trade_date"].is_monotonic_increasing)
+        self.assertEqual(len(bars), len(pd.bdate_range("2023-12-01", "2024-07-31")))
+
+    def test_disjoint_range_replaces_store(self):
+        """不相邻的区间整体重取"""
+        self._get("2020-01-01", "2020-03-31")
+        self._get("2024-01-01", "2024-03-31")
+        self._get("2024-02-01", "2024-02-29")
+
+        self.assertEqual(self.upstream.calls, [("2020-01-01", "2020-03-31"), ("2024-01-01", "2024-03-31")])
+
+    def test_today_is_never_covered(self):
+        """当天日线仍可能变化，每次都重新请求"""
+        today = datetime.now().strftime('%Y-%m-%d')
+        start = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
+        self._get(start, today)
+        self._get(start, today)
+
+        self.assertEqual(self.upstream.calls[1], (today, today))
+        self.assertFalse(self.cache.daily_bars_cover("000001", start, today))
+
+    def test_empty_result_does_not_extend_coverage(self):
+        """空结果不扩展覆盖区间"""
+        self._get("2024-01-01", "2024-06-30")
+        empty = lambda s, e: self.upstream.fetch(s, e).iloc[0:0]
+        self.cache.get_daily_bars("000001", "2024-01-01", "2024-07-31", empty,
+                                  data_source="tushare", date_column="trade_date")
+
+        self.assertFalse(self.cache.daily_bars_cover("000001", "2024-01-01", "2024-07-31"))
+
+    def test_tushare_adjusted_prices_match_direct_fetch(self):
+        """存储拼接后的前复权结果与直接请求该区间一致"""
+        direct = TushareProvider(token="", enable_cache=False)
+        direct.api, direct.connected = self.upstream, True
+
+        stored = TushareProvider(token="", enable_cache=False)
+        stored.api, stored.connected = self.upstream, True
+        stored.enable_cache, stored.cache_manager = True, self.cache
+
+        stored.get_stock_daily("000001", "2023-06-01", "2024-03-31")
+        stored.get_stock_daily("000001", "2023-01-01", "2024-06-30")  # 首尾补齐
+        calls_before = len(self.upstream.calls)
+        from_store = stored.get_stock_daily("000001", "2023-03-01", "2024-05-31")
+        self.assertEqual(len(self.upstream.calls), calls_before)
+
+        expected = direct.get_stock_daily("000001", "2023-03-01", "2024-05-31")
+        pd.testing.assert_frame_equal(from_store, expected, check_dtype=False)
+
+
+def benchmark(days=10, windows=(30, 90, 180, 365), latency=0.2):
+    """模拟连续多天、不同回溯窗口的分析请求，返回 (无存储耗时, 有存储耗时, 请求数, 上游调用次数)"""
+    first_end = datetime.now() - timedelta(days=days + 1)
+    requests = []
+    for day in range(days):
+        end = first_end + timedelta(days=day)
+        for window in windows:
+            requests.append(((end - timedelta(days=window)).strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d')))
+
+    upstream = StubUpstream(latency=latency)
+    start = time.perf_counter()
+    for start_date, end_date in requests:
+        upstream.fetch(start_date, end_date)
+    direct_time = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = StockDataCache(tmp_dir)
+        upstream = StubUpstream(latency=latency)
+        start = time.perf_counter()
+        for start_date, end_date in requests:
+            cache.get_daily_bars("000001", start_date, end_date, upstream.fetch,
+                                 data_source="tushare", date_column="trade_date")
+        store_time = time.perf_counter() - start
+        cache.index.close()
+
+    return direct_time, store_time, len(requests), len(upstream.calls)
+
+
+if __name__ == "__main__":
+    if not CACHE_AVAILABLE:
+        sys.exit(1)
+    print("📅 日线存储基准 (连续10天 x 30/90/180/365天回溯窗口, 上游延迟0.2s)")
+    direct_time, store_time, requests, calls = benchmark()
+    print(f"  每次整段请求: {direct_time:.2f}s ({requests}次上游调用)")
+    print(f"  增量补齐:     {store_time:.2f}s ({calls}次上游调用)")
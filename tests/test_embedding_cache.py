@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+嵌入缓存测试
+
+验证 FinancialSituationMemory 通过 (provider, model, sha256(text)) 缓存嵌入：
+相同文本只请求一次、跨实例（跨运行）复用、不同模型互不干扰、降级零向量不入缓存，
+以及命中率统计。
+直接运行时模拟一次分析中五个角色各自检索记忆，对比有无缓存的嵌入请求数与耗时。
+"""
+
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+try:
+    from tradingagents.agents.utils.embedding_cache import EmbeddingCache
+    from tests.test_memory_batch_embedding import MEMORY_AVAILABLE, StubEmbeddingClient, _make_memory, _vector
+    CACHE_AVAILABLE = MEMORY_AVAILABLE
+except ImportError as e:
+    print(f"⚠️ 嵌入缓存不可用: {e}")
+    CACHE_AVAILABLE = False
+
+
+def _situation(day):
+    return "\n\n".join(f"{role}报告: 第{day}天市场分析" for role in ("市场", "情绪", "新闻", "基本面"))
+
+
+class TestEmbeddingCache(unittest.TestCase):
+    """嵌入缓存测试"""
+
+    def setUp(self):
+        if not CACHE_AVAILABLE:
+            self.skipTest("嵌入缓存不可用")
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, "embedding_cache.db")
+        self.cache = EmbeddingCache(self.db_path)
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp_dir.cleanup()
+
+    def _memory(self, client, cache=None):
+        memory = _make_memory(client)
+        memory.embedding_cache = cache or self.cache
+        return memory
+
+    def test_identical_text_embedded_once(self):
+        """多个记忆集合检索同一情景只请求一次嵌入"""
+        client = StubEmbeddingClient()
+        memories = [self._memory(client) for _ in range(5)]
+        for memory in memories:
+            self.assertEqual(memory.get_embedding(_situation(1)), _vector(_situation(1)))
+
+        self.assertEqual(client.batch_sizes, [1])
+        stats = memories[0].get_cache_stats()
+        self.assertEqual((stats['hits'], stats['misses']), (4, 1))
+        self.assertAlmostEqual(stats['hit_rate'], 0.8)
+
+    def test_persists_across_runs(self):
+        """重新打开缓存后仍命中"""
+        self._memory(StubEmbeddingClient()).get_embeddings([_situation(1), _situation(2)])
+        self.cache.close()
+
+        self.cache = EmbeddingCache(self.db_path)
+        client = StubEmbeddingClient()
+        embeddings = self._memory(client).get_embeddings([_situation(2), _situation(3), _situation(1)])
+
+        self.assertEqual(client.batch_sizes, [1])
+        self.assertEqual(embeddings, [_vector(_situation(d)) for d in (2, 3, 1)])
+        self.assertEqual(self.cache.get_stats()['entries'], 3)
+
+    def test_duplicates_within_batch_requested_once(self):
+        """同一批次内重复文本只请求一次"""
+        client = StubEmbeddingClient()
+        texts = [_situation(1), _situation(2), _situation(1)]
+        embeddings = self._memory(client).get_embeddings(texts)
+
+        self.assertEqual(client.batch_sizes, [2])
+        self.assertEqual(embeddings, [_vector(t) for t in texts])
+
+    def test_model_is_part_of_key(self):
+        """不同嵌入模型互不命中"""
+        self._memory(StubEmbeddingClient()).get_embedding(_situation(1))
+        client = StubEmbeddingClient()
+        memory = self._memory(client)
+        memory.embedding = "text-embedding-3-large"
+        memory.get_embedding(_situation(1))
+
+        self.assertEqual(client.batch_sizes, [1])
+
+    def test_degraded_vectors_not_cached(self):
+        """请求失败降级的零向量不写入缓存"""
+        self._memory(StubEmbeddingClient(fail_on=_situation(1))).get_embedding(_situation(1))
+        self.assertEqual(self.cache.get_stats()['entries'], 0)
+
+        client = StubEmbeddingClient()
+        self.assertEqual(self._memory(client).get_embedding(_situation(1)), _vector(_situation(1)))
+        self.assertEqual(client.batch_sizes, [1])
+
+
+def benchmark(runs=20, roles=5, latency=0.1):
+    """模拟连续多次分析，每次五个角色检索记忆，返回 (无缓存耗时, 有缓存耗时, 无缓存请求数, 有缓存请求数, 命中率)"""
+    client = StubEmbeddingClient(latency=latency)
+    memories = [_make_memory(client) for _ in range(roles)]
+    start = time.perf_counter()
+    for day in range(runs):
+        for memory in memories:
+            memory.get_embedding(_situation(day % 10))
+    uncached_time, uncached_requests = time.perf_counter() - start, len(client.batch_sizes)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache = EmbeddingCache(os.path.join(tmp_dir, "embedding_cache.db"))
+        client = StubEmbeddingClient(latency=latency)
+        memories = [_make_memory(client) for _ in range(roles)]
+        for memory in memories:
+            memory.embedding_cache = cache
+        start = time.perf_counter()
+        for day in range(runs):
+            for memory in memories:
+                memory.get_embedding(_situation(day % 10))
+        cached_time = time.perf_counter() - start
+        hit_rate = cache.get_stats()['hit_rate']
+        cache.close()
+
+    return uncached_time, cached_time, uncached_requests, len(client.batch_sizes), hit_rate
+
+
+if __name__ == "__main__":
+    if not CACHE_AVAILABLE:
+        sys.exit(1)
+    print("📚 嵌入缓存基准 (20次分析 x 5个角色, 10个不同情景, 嵌入延迟100ms)")
+    uncached_time, cached_time, uncached_requests, cached_requests, hit_rate = benchmark()
+    print(f"  无缓存: {uncached_time:.2f}s ({uncached_requests}次请求)")
+    print(f"  有缓存: {cached_time:.2f}s ({cached_requests}次请求, 命中率 {hit_rate:.0%})")
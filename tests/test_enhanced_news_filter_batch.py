@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+增强新闻过滤器批量评分测试
+
+用桩语义模型（确定性字符向量，每次encode有固定开销）验证 EnhancedNewsFilter.filter_news_enhanced
+一次编码全部新闻、用归一化矩阵乘法计算相似度，评分与原有逐条计算一致；
+安装了torch时再用桩分类模型验证按长度排序的补齐小批次推理保持原顺序。
+直接运行时在数百条东方财富格式新闻上对比逐条与批量评分的CPU耗时。
+"""
+
+import os
+import random
+import sys
+import time
+import unittest
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+import numpy as np
+import pandas as pd
+
+try:
+    from tradingagents.utils.enhanced_news_filter import EnhancedNewsFilter
+    FILTER_AVAILABLE = True
+except ImportError as e:
+    print(f"⚠️ 增强新闻过滤器不可用: {e}")
+    FILTER_AVAILABLE = False
+
+try:
+    import torch
+    TORCH_AVAILABLE = True
+except ImportError:
+    TORCH_AVAILABLE = False
+
+
+class StubSentenceModel:
+    """桩语义模型：字符哈希词袋向量，每次调用有固定开销（模拟模型前向的调度成本）"""
+
+    def __init__(self, dim=64, call_overhead=0.002, per_text=0.00005):
+        self.dim = dim
+        self.call_overhead = call_overhead
+        self.per_text = per_text
+        self.calls = 0
+
+    def encode(self, texts, batch_size=32, **kwargs):
+        single = isinstance(texts, str)
+        texts = [texts] if single else list(texts)
+        self.calls += 1
+        time.sleep(self.call_overhead + self.per_text * len(texts))
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for ch in text:
+                vectors[row, ord(ch) % self.dim] += 1.0
+        return vectors[0] if single else vectors
+
+
+if TORCH_AVAILABLE:
+    class StubTokenizer:
+        """桩分词器：按字符编码并补齐到批内最长"""
+
+        def __call__(self, texts, return_tensors="pt", truncation=True, padding=True, max_length=512):
+            texts = [texts] if isinstance(texts, str) else texts
+            ids = [[ord(ch) % 997 + 1 for ch in text[:max_length]] for text in texts]
+            width = max(len(seq) for seq in ids)
+            input_ids = torch.zeros((len(ids), width), dtype=torch.long)
+            mask = torch.zeros((len(ids), width), dtype=torch.long)
+            for row, seq in enumerate(ids):
+                input_ids[row, :len(seq)] = torch.tensor(seq)
+                mask[row, :len(seq)] = 1
+            return {"input_ids": input_ids, "attention_mask": mask}
+
+    class StubClassifier:
+        """桩分类模型：logits只取决于有效token，补齐不影响结果"""
+
+        def __init__(self):
+            self.batch_shapes = []
+
+        def __call__(self, input_ids, attention_mask):
+            self.batch_shapes.append(tuple(input_ids.shape))
+            valid = (input_ids * attention_mask).float()
+            first = (valid % 7).sum(dim=1) / attention_mask.sum(dim=1)
+            return type("Output", (), {"logits": torch.stack([first, 3 - first], dim=1)})()
+
+
+_TEMPLATES = [
+    "{name}发布{year}年年报，净利润同比增长{pct}%",
+    "{name}({code})获北向资金增持{pct}亿元",
+    "{name}召开股东大会，审议分红方案",
+    "白酒板块午后拉升，{name}涨{pct}%",
+    "央行开展{pct}00亿元逆回购操作",
+    "A股三大指数集体收涨，成交额突破万亿",
+    "券商晨会观点：关注消费复苏主线",
+    "{name}新品上市，经销商备货积极",
+]
+
+
+def eastmoney_news(count, name="贵州茅台", code="600519", seed=0):
+    """生成东方财富 get_stock_news_em 格式的合成新闻"""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        title = rng.choice(_TEMPLATES).format(name=name, code=code, year=2020 + i % 5, pct=rng.randint(1, 30))
+        content = title + "。" + "".join(rng.choice("市场分析师认为公司经营稳健业绩增长预期良好") for _ in range(rng.randint(40, 260)))
+        rows.append({"关键词": code, "新闻标题": title, "新闻内容": content,
+                     "发布时间": f"2025-01-{i % 28 + 1:02d} 10:00:00", "文章来源": "东方财富", "新闻链接": ""})
+    return pd.DataFrame(rows)
+
+
+def make_filter(sentence_model=None, tokenizer=None, classifier=None):
+    """创建注入桩模型的增强过滤器（不加载真实模型）"""
+    news_filter = EnhancedNewsFilter("600519", "贵州茅台", use_semantic=False, use_local_model=False)
+    if sentence_model is not None:
+        news_filter.use_semantic = True
+        news_filter.sentence_model = sentence_model
+        news_filter.company_embedding = sentence_model.encode([
+            "贵州茅台", "贵州茅台股票", "贵州茅台公司", "600519", "贵州茅台业绩", "贵州茅台财报"])
+        news_filter._normalize_company_embedding()
+    if classifier is not None:
+        news_filter.use_local_model = True
+        news_filter.tokenizer = tokenizer
+        news_filter.classification_model = classifier
+    return news_filter
+
+
+def _per_row_scores(news_filter, news_df):
+    """原有逐条评分方式：每条新闻单独编码，循环计算余弦相似度（基准对照）"""
+    results = []
+    for _, row in news_df.iterrows():
+        title, content = row.get('新闻标题', ''), row.get('新闻内容', '')
+        rule_score = news_filter.calculate_relevance_score(title, content)
+        semantic_score = 0
+        if news_filter.use_semantic:
+            embedding = news_filter.sentence_model.encode([f"{title} {content[:200]}"])
+            similarities = [
+                np.dot(embedding[0], company) / (np.linalg.norm(embedding[0]) * np.linalg.norm(company))
+                for company in news_filter.company_embedding
+            ]
+            semantic_score = max(0, min(100, max(similarities) * 100))
+        results.append(news_filter.SCORE_WEIGHTS['rule'] * rule_score +
+                       news_filter.SCORE_WEIGHTS['semantic'] * semantic_score)
+    return results
+
+
+class TestEnhancedNewsFilterBatch(unittest.TestCase):
+    """增强新闻过滤器批量评分测试"""
+
+    def setUp(self):
+        if not FILTER_AVAILABLE:
+            self.skipTest("增强新闻过滤器不可用")
+
+    def test_semantic_encoded_once(self):
+        """整批新闻只调用一次语义模型"""
+        model = StubSentenceModel(call_overhead=0, per_text=0)
+        news_filter = make_filter(model)
+        model.calls = 0
+        news_filter.filter_news_enhanced(eastmoney_news(200), min_score=0)
+        self.assertEqual(model.calls, 1)
+
+    def test_scores_match_per_row(self):
+        """批量评分与逐条计算一致"""
+        model = StubSentenceModel(call_overhead=0, per_text=0)
+        news_filter = make_filter(model)
+        news_df = eastmoney_news(120)
+
+        expected = _per_row_scores(news_filter, news_df)
+        scores = news_filter.calculate_enhanced_relevance_scores(
+            news_df['新闻标题'].tolist(), news_df['新闻内容'].tolist())
+        np.testing.assert_allclose(scores['final_score'].to_numpy(), expected, atol=1e-3)
+
+        for i in (0, 7, 63):
+            single = news_filter.calculate_enhanced_relevance_score(
+                news_df['新闻标题'][i], news_df['新闻内容'][i])
+            self.assertAlmostEqual(single['final_score'], expected[i], places=3)
+
+    def test_output_shape_preserved(self):
+        """输出保留原列并追加评分列，按综合评分降序"""
+        news_filter = make_filter(StubSentenceModel(call_overhead=0, per_text=0))
+        news_df = eastmoney_news(80)
+        news_df.index = range(100, 180)
+        result = news_filter.filter_news_enhanced(news_df, min_score=30)
+
+        self.assertGreater(len(result), 0)
+        self.assertLess(len(result), len(news_df))
+        self.assertEqual(list(result.columns),
+                         list(news_df.columns) + ['rule_score', 'semantic_score', 'classification_score', 'final_score'])
+        self.assertTrue(result['final_score'].is_monotonic_decreasing)
+        self.assertTrue((result['final_score'] >= 30).all())
+
+    def test_all_filtered_returns_empty(self):
+        """全部被过滤时返回空DataFrame"""
+        news_filter = make_filter()
+        result = news_filter.filter_news_enhanced(eastmoney_news(10), min_score=101)
+        self.assertTrue(result.empty)
+
+    def test_semantic_failure_falls_back_to_zero(self):
+        """语义模型出错时语义分为0，规则分照常计算"""
+        model = StubSentenceModel(call_overhead=0, per_text=0)
+        news_filter = make_filter(model)
+        model.encode = lambda *args, **kwargs: (_ for _ in ()).throw(RuntimeError("oom"))
+        scores = news_filter.calculate_enhanced_relevance_scores(["贵州茅台发布年报"], ["净利润增长"])
+        self.assertEqual(scores['semantic_score'][0], 0)
+        self.assertGreater(scores['rule_score'][0], 0)
+
+    def test_classifier_padded_batches_keep_order(self):
+        """分类模型按长度排序分批推理，结果与逐条推理一致且保持原顺序"""
+        if not TORCH_AVAILABLE:
+            self.skipTest("torch未安装")
+        classifier = StubClassifier()
+        news_filter = make_filter(tokenizer=StubTokenizer(), classifier=classifier)
+        news_df = eastmoney_news(40)
+        titles, contents = news_df['新闻标题'].tolist(), news_df['新闻内容'].tolist()
+
+        batched = news_filter.classify_news_relevance_batch(titles, contents)
+        self.assertEqual(len(classifier.batch_shapes), 3)
+        singles = [news_filter.classify_news_relevance(t, c) for t, c in zip(titles, contents)]
+        np.testing.assert_allclose(batched, singles, atol=1e-4)
+
+
+def benchmark(count=300, rounds=3):
+    """对比逐条与批量评分，返回 (逐条平均耗时, 批量平均耗时)"""
+    model = StubSentenceModel()
+    news_filter = make_filter(model)
+    news_df = eastmoney_news(count)
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        _per_row_scores(news_filter, news_df)
+    per_row_time = (time.perf_counter() - start) / rounds
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        news_filter.filter_news_enhanced(news_df, min_score=40)
+    batched_time = (time.perf_counter() - start) / rounds
+    return per_row_time, batched_time
+
+
+if __name__ == "__main__":
+    if not FILTER_AVAILABLE:
+        sys.exit(1)
+    print("📰 增强新闻过滤器评分基准 (300条东方财富新闻, 桩语义模型每次调用2ms)")
+    per_row_time, batched_time = benchmark()
+    print(f"  逐条评分: {per_row_time:.3f}s")
+    print(f"  批量评分: {batched_time:.3f}s")
+    print(f"  加速比:   {per_row_time / batched_time:.1f}x")
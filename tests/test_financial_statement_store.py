@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+财务报表存储测试
+
+验证 FinancialStatementStore 的报告期识别、四张报表并发获取且共用截止时间（超时的报表不阻塞返回）、
+最新报告期已是可能披露的最新一期时直接使用存储、可能有新报告期时按间隔重新确认并替换、
+获取失败时沿用存储、只存储了部分报表时补齐缺少的报表以及按报表类型统计耗时；AKShareProvider.get_financial_data 通过存储获取。
+直接运行时对比顺序获取、并发获取和存储命中的耗时。
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from datetime import date
+from unittest.mock import patch
+
+import pandas as pd
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+try:
+    from tradingagents.dataflows import financial_statement_store as store_module
+    from tradingagents.dataflows.financial_statement_store import (
+        FinancialStatementStore, latest_possible_period, report_period
+    )
+    STORE_AVAILABLE = True
+except ImportError as e:
+    print(f"⚠️ 财务报表存储模块不可用: {e}")
+    STORE_AVAILABLE = False
+
+TODAY = date(2026, 10, 18)
+
+
+def _abstract(*periods):
+    """stock_financial_abstract 格式：报告期是列名"""
+    frame = pd.DataFrame({"选项": ["常用指标"], "指标": ["归母净利润"]})
+    for period in periods:
+        frame[period] = [1.0e9]
+    return frame
+
+
+def _sheet(*periods):
+    """*_by_report_em 格式：报告期在 REPORT_DATE 列"""
+    return pd.DataFrame({"SECURITY_CODE": "600036",
+                         "REPORT_DATE": [f"{p[:4]}-{p[4:6]}-{p[6:]} 00:00:00" for p in periods],
+                         "TOTAL_ASSETS": [1.0e12] * len(periods)})
+
+
+class _Upstream:
+    """模拟四张报表的上游接口，记录调用次数"""
+
+    def __init__(self, periods=("20260930", "20260630"), delay=0.0):
+        self.periods = periods
+        self.delay = delay
+        self.calls = {}
+        self.fail = set()
+        self.slow = {}
+        self._lock = threading.Lock()
+
+    def fetchers(self):
+        def fetcher(name, build):
+            def fetch():
+                with self._lock:
+                    self.calls[name] = self.calls.get(name, 0) + 1
+                time.sleep(self.slow.get(name, self.delay))
+                if name in self.fail:
+                    raise ConnectionError("scrape failed")
+                return build(*self.periods)
+            return fetch
+
+        return {
+            "main_indicators": fetcher("main_indicators", _abstract),
+            "balance_sheet": fetcher("balance_sheet", _sheet),
+            "income_statement": fetcher("income_statement", _sheet),
+            "cash_flow": fetcher("cash_flow", _sheet),
+        }
+
+    def total_calls(self):
+        return sum(self.calls.values())
+
+
+class TestReportPeriods(unittest.TestCase):
+    """报告期识别测试"""
+
+    def setUp(self):
+        if not STORE_AVAILABLE:
+            self.skipTest("财务报表存储模块不可用")
+
+    def test_report_period(self):
+        """主要指标取最大的日期列名，三大报表取 REPORT_DATE 最大值"""
+        self.assertEqual(report_period(_abstract("20260630", "20251231")), "20260630")
+        self.assertEqual(report_period(_sheet("20250930", "20260331")), "20260331")
+        self.assertIsNone(report_period(pd.DataFrame()))
+        self.assertIsNone(report_period(pd.DataFrame({"a": [1]})))
+
+    def test_latest_possible_period(self):
+        """截至今天已经结束的最近报告期"""
+        self.assertEqual(latest_possible_period(date(2026, 10, 18)), "20260930")
+        self.assertEqual(latest_possible_period(date(2026, 9, 30)), "20260630")
+        self.assertEqual(latest_possible_period(date(2026, 1, 5)), "20251231")
+
+
+class TestFinancialStatementStore(unittest.TestCase):
+    """财务报表存储测试"""
+
+    def setUp(self):
+        if not STORE_AVAILABLE:
+            self.skipTest("财务报表存储模块不可用")
+        temp = tempfile.TemporaryDirectory()
+        self.addCleanup(temp.cleanup)
+        self.directory = temp.name
+
+    def _store(self, recheck_hours=12):
+        return FinancialStatementStore(self.directory, recheck_hours=recheck_hours)
+
+    def test_statements_fetched_concurrently(self):
+        """四张报表并发获取，总耗时接近最慢的一张"""
+        upstream = _Upstream(delay=0.3)
+        start = time.perf_counter()
+        statements = self._store().get_statements("600036", upstream.fetchers(), today=TODAY)
+        self.assertLess(time.perf_counter() - start, 0.9)
+        self.assertEqual(list(statements), ["main_indicators", "balance_sheet", "income_statement", "cash_flow"])
+
+    def test_shared_deadline(self):
+        """超过截止时间的报表不再等待，其余报表正常返回并记录超时"""
+        upstream = _Upstream()
+        upstream.slow["cash_flow"] = 2.0
+        store = self._store()
+        start = time.perf_counter()
+        statements = store.get_statements("600036", upstream.fetchers(), timeout=0.3, today=TODAY)
+        self.assertLess(time.perf_counter() - start, 1.5)
+        self.assertNotIn("cash_flow", statements)
+        self.assertEqual(len(statements), 3)
+        self.assertEqual(store.get_stats()["statements"]["cash_flow"]["timeouts"], 1)
+
+    def test_up_to_date_served_from_store(self):
+        """已有可能披露的最新报告期时不再请求上游，新实例从磁盘读取"""
+        upstream = _Upstream()
+        store = self._store(recheck_hours=0)
+        first = store.get_statements("600036", upstream.fetchers(), today=TODAY)
+        for _ in range(3):
+            self.assertIs(store.get_statements("600036", upstream.fetchers(), today=TODAY)["balance_sheet"],
+                          first["balance_sheet"])
+        reloaded = self._store(recheck_hours=0).get_statements("600036", upstream.fetchers(), today=TODAY)
+        pd.testing.assert_frame_equal(reloaded["main_indicators"], first["main_indicators"])
+        self.assertEqual(upstream.total_calls(), 4)
+        self.assertEqual(store.get_stats()["store_hits"], 3)
+
+    def test_newer_period_rechecked(self):
+        """可能有新报告期时按间隔重新确认，新报告期替换存储"""
+        upstream = _Upstream(periods=("20260630", "20260331"))
+        store = self._store()
+        store.get_statements("600036", upstream.fetchers(), today=TODAY)
+        store.get_statements("600036", upstream.fetchers(), today=TODAY)
+        self.assertEqual(upstream.total_calls(), 4)  # 间隔内不重复确认
+
+        store.recheck_seconds = 0
+        upstream.periods = ("20260930", "20260630")
+        statements = store.get_statements("600036", upstream.fetchers(), today=TODAY)
+        self.assertEqual(upstream.total_calls(), 8)
+        self.assertEqual(report_period(statements["income_statement"]), "20260930")
+        self.assertEqual(store._load("600036")["latest_period"], "20260930")
+
+    def test_failed_statement_keeps_stored(self):
+        """重新确认时获取失败的报表沿用存储"""
+        upstream = _Upstream(periods=("20260630",))
+        store = self._store(recheck_hours=0)
+        store.get_statements("600036", upstream.fetchers(), today=TODAY)
+        upstream.fail.add("balance_sheet")
+        upstream.periods = ("20260930",)
+        statements = store.get_statements("600036", upstream.fetchers(), today=TODAY)
+        self.assertEqual(report_period(statements["balance_sheet"]), "20260630")
+        self.assertEqual(report_period(statements["cash_flow"]), "20260930")
+        stats = store.get_stats()["statements"]
+        self.assertEqual((stats["balance_sheet"]["fetches"], stats["balance_sheet"]["failures"]), (2, 1))
+
+    def test_partial_entry_completed(self):
+        """只存储了主要指标（行业快照）时，完整请求只补齐缺少的三张报表"""
+        upstream = _Upstream(periods=("20260630",))
+        store = self._store()
+        fetchers = upstream.fetchers()
+        store.get_statements("600036", {"main_indicators": fetchers["main_indicators"]}, today=TODAY)
+        statements = store.get_statements("600036", fetchers, today=TODAY)
+        self.assertEqual(sorted(statements), sorted(fetchers))
+        self.assertEqual(upstream.calls, {"main_indicators": 1, "balance_sheet": 1,
+                                          "income_statement": 1, "cash_flow": 1})
+        self.assertEqual(sorted(store.get_statements("600036", fetchers, today=TODAY)), sorted(fetchers))
+        self.assertEqual(upstream.total_calls(), 4)
+
+    def test_akshare_provider_uses_store(self):
+        """AKShareProvider.get_financial_data 通过存储获取，重复调用不再请求"""
+        try:
+            from tradingagents.dataflows.akshare_utils import AKShareProvider
+        except ImportError as e:
+            self.skipTest(f"AKShare工具模块不可用: {e}")
+        upstream = _Upstream(periods=(latest_possible_period(),))
+        fetchers = upstream.fetchers()
+
+        class FakeAkshare:
+            stock_financial_abstract = staticmethod(lambda symbol: fetchers["main_indicators"]())
+            stock_balance_sheet_by_report_em = staticmethod(lambda symbol: fetchers["balance_sheet"]())
+            stock_profit_sheet_by_report_em = staticmethod(lambda symbol: fetchers["income_statement"]())
+            stock_cash_flow_sheet_by_report_em = staticmethod(lambda symbol: fetchers["cash_flow"]())
+
+        provider = AKShareProvider.__new__(AKShareProvider)
+        provider.ak, provider.connected = FakeAkshare(), True
+        with patch.object(store_module, "_financial_statement_store", self._store()):
+            first = provider.get_financial_data("600036")
+            second = provider.get_financial_data("600036")
+        self.assertEqual(list(first), ["main_indicators", "balance_sheet", "income_statement", "cash_flow"])
+        self.assertEqual(list(second), list(first))
+        self.assertEqual(upstream.total_calls(), 4)
+
+
+def benchmark(delay=0.3):
+    """返回 {方式: 获取四张报表的耗时ms}
+
+    delay 模拟单张报表的抓取耗时（实际通常为1~5秒）
+    """
+    results = {}
+    upstream = _Upstream(delay=delay)
+    start = time.perf_counter()
+    for fetch in upstream.fetchers().values():
+        fetch()
+    results["顺序获取"] = (time.perf_counter() - start) * 1000
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        store = FinancialStatementStore(temp_dir)
+        start = time.perf_counter()
+        store.get_statements("600036", upstream.fetchers(), today=TODAY)
+        results["并发获取"] = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        store.get_statements("600036", upstream.fetchers(), today=TODAY)
+        results["存储命中"] = (time.perf_counter() - start) * 1000
+    return results
+
+
+if __name__ == "__main__":
+    if not STORE_AVAILABLE:
+        sys.exit(1)
+    print("📑 四张财务报表获取耗时基准 (模拟单张300ms)")
+    for label, millis in benchmark().items():
+        print(f"  {label}: {millis:.1f}ms")
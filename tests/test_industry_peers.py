@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+申万行业同业对比测试
+
+验证 compute_peer_statistics 的向量化分位、排名和分布与逐只计算一致（资产负债率越低越好），
+IndustryPeerEngine 通过行业映射找到股票所属的申万三级行业（映射在后台重建，重建完成前按行业提示只查询少数候选行业）、批量获取成分股财务摘要并选取多数成分股已披露的报告期，
+行业快照按报告期缓存（重复对比和新实例都不再请求上游，可能有新报告期时按间隔重建），
+三级行业接口无数据时使用指数成分接口；AShareDataTools 的行业对比报告使用快照中的真实数值。
+直接运行时对比每次逐只请求同业数据与快照查找的耗时。
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from datetime import date
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+try:
+    from tradingagents.dataflows import security_master as security_master_module
+    from tradingagents.dataflows.financial_statement_store import FinancialStatementStore
+    from tradingagents.dataflows.industry_peers import (
+        PEER_METRICS, IndustryPeerEngine, compute_peer_statistics
+    )
+    from tradingagents.dataflows.security_master import SecurityMaster
+    INDUSTRY_PEERS_AVAILABLE = True
+except ImportError as e:
+    print(f"⚠️ 申万行业同业对比模块不可用: {e}")
+    INDUSTRY_PEERS_AVAILABLE = False
+
+TODAY = date(2026, 10, 18)
+BANKS = "851911.SI"
+LIQUOR = "851232.SI"
+
+
+def _metrics(index):
+    """第 index 只成分股的指标值（ROE随序号递增，资产负债率随序号递减）"""
+    return {"roe": 8.0 + index, "roa": 0.5 + index * 0.1, "gross_margin": 30.0 + index,
+            "net_margin": 20.0 + index * 0.5, "debt_ratio": 95.0 - index, "current_ratio": 1.0 + index * 0.1}
+
+
+def _abstract(values, periods):
+    """stock_financial_abstract 格式：选项、指标 + 报告期列（ROE同时出现在常用指标和盈利能力中）"""
+    rows = [("常用指标", "归母净利润", 1.0e9)]
+    rows += [("常用指标", indicator, values[metric]) for metric, (indicator, _, _) in PEER_METRICS.items()]
+    rows.append(("盈利能力", PEER_METRICS["roe"][0], values["roe"]))
+    frame = pd.DataFrame({"选项": [r[0] for r in rows], "指标": [r[1] for r in rows]})
+    for period in periods:
+        frame[period] = [r[2] for r in rows]
+    return frame
+
+
+class _FakeAkshare:
+    """模拟 akshare 的 stock_financial_abstract"""
+
+    def __init__(self, upstream):
+        self.upstream = upstream
+
+    def stock_financial_abstract(self, symbol):
+        return self.upstream.abstract(symbol)
+
+
+class _Upstream:
+    """模拟 AKShareProvider 的申万行业接口和财务摘要，记录调用次数"""
+
+    def __init__(self, banks=10, delay=0.0):
+        self.delay = delay
+        self.industries = {
+            BANKS: ("股份制银行Ⅲ", [f"{600000 + i:06d}" for i in range(banks)]),
+            LIQUOR: ("白酒Ⅲ", ["600519", "000858"]),
+        }
+        self.periods = {code: ("20260630", "20260331") for _, codes in self.industries.values() for code in codes}
+        self.third_level_available = True
+        self.constituents_delay = {}
+        self.calls = {"list": 0, "constituents": 0, "components": 0, "abstract": 0}
+        self.ak = _FakeAkshare(self)
+        self.connected = True
+        self._lock = threading.Lock()
+
+    def _count(self, name):
+        with self._lock:
+            self.calls[name] += 1
+
+    def get_sw_industry_list(self):
+        self._count("list")
+        return pd.DataFrame({"行业代码": list(self.industries),
+                             "行业名称": [name for name, _ in self.industries.values()]})
+
+    def get_sw_industry_constituents(self, industry_code):
+        self._count("constituents")
+        time.sleep(self.constituents_delay.get(industry_code, 0))
+        if not self.third_level_available:
+            return None
+        name, codes = self.industries[industry_code]
+        suffix = lambda code: ".SH" if code.startswith("6") else ".SZ"
+        return pd.DataFrame({"序号": range(1, len(codes) + 1), "股票代码": [c + suffix(c) for c in codes],
+                             "股票简称": [f"银行{c[-2:]}" for c in codes], "申万3级": name})
+
+    def get_sw_components(self, symbol):
+        self._count("components")
+        _, codes = self.industries[f"{symbol}.SI"]
+        return pd.DataFrame({"Code": codes, "Name": [f"银行{c[-2:]}" for c in codes], "Index_Symbol": symbol})
+
+    def abstract(self, symbol):
+        self._count("abstract")
+        time.sleep(self.delay)
+        codes = [codes for _, codes in self.industries.values() if symbol in codes][0]
+        return _abstract(_metrics(codes.index(symbol)), self.periods[symbol])
+
+
+def _naive_statistics(values):
+    """逐只股票、逐个指标计算分位和排名（对照实现）"""
+    percentile, rank = {}, {}
+    for metric in values.columns:
+        higher_better = PEER_METRICS[metric][2]
+        column = values[metric].dropna()
+        for code, value in column.items():
+            better = (column > value).sum() if higher_better else (column < value).sum()
+            not_better = (column < value).sum() if higher_better else (column > value).sum()
+            ties = (column == value).sum()
+            rank[(code, metric)] = better + 1
+            percentile[(code, metric)] = (not_better + (ties + 1) / 2) / len(column) * 100
+    return percentile, rank
+
+
+class TestPeerStatistics(unittest.TestCase):
+    """向量化分位和排名测试"""
+
+    def setUp(self):
+        if not INDUSTRY_PEERS_AVAILABLE:
+            self.skipTest("申万行业同业对比模块不可用")
+
+    def test_matches_naive_loop(self):
+        """分位、排名（含并列和缺失值）与逐只计算一致"""
+        rng = np.random.default_rng(7)
+        values = pd.DataFrame(np.round(rng.normal(10, 5, size=(60, len(PEER_METRICS))), 0),
+                              index=[f"{600000 + i:06d}" for i in range(60)], columns=list(PEER_METRICS))
+        values.iloc[::7, 0] = np.nan
+        computed = compute_peer_statistics(values)
+        percentile, rank = _naive_statistics(values)
+        for (code, metric), expected in rank.items():
+            self.assertEqual(computed["rank"].at[code, metric], expected)
+            self.assertAlmostEqual(computed["percentile"].at[code, metric], percentile[(code, metric)])
+        self.assertTrue(computed["rank"]["roe"].iloc[::7].isna().all())
+        self.assertEqual(computed["stats"].at["roe", "count"], values["roe"].count())
+
+    def test_lower_debt_ratio_ranks_first(self):
+        """资产负债率越低排名越靠前，行业前25%取低分位"""
+        values = pd.DataFrame({"roe": [5.0, 10.0, 15.0, 20.0], "debt_ratio": [90.0, 70.0, 50.0, 30.0]},
+                              index=["a", "b", "c", "d"])
+        computed = compute_peer_statistics(values)
+        self.assertEqual(computed["rank"].loc["d"].tolist(), [1, 1])
+        self.assertEqual(computed["percentile"].loc["a"].tolist(), [25.0, 25.0])
+        self.assertAlmostEqual(computed["stats"].at["roe", "top_quartile"], values["roe"].quantile(0.75))
+        self.assertAlmostEqual(computed["stats"].at["debt_ratio", "top_quartile"], values["debt_ratio"].quantile(0.25))
+
+
+class TestIndustryPeerEngine(unittest.TestCase):
+    """申万行业快照测试"""
+
+    def setUp(self):
+        if not INDUSTRY_PEERS_AVAILABLE:
+            self.skipTest("申万行业同业对比模块不可用")
+        temp = tempfile.TemporaryDirectory()
+        self.addCleanup(temp.cleanup)
+        self.directory = temp.name
+        self.upstream = _Upstream()
+        self.master = SecurityMaster(os.path.join(temp.name, "security_master.csv"), loaders=[], auto_refresh=False)
+        patcher = patch.object(security_master_module, "_security_master", self.master)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _engine(self, recheck_hours=12, warm=True):
+        """warm 时先同步建立行业映射（生产环境中由后台线程完成）"""
+        store = FinancialStatementStore(os.path.join(self.directory, "statements"), recheck_hours=recheck_hours)
+        engine = IndustryPeerEngine(self.upstream, os.path.join(self.directory, "peers"),
+                                    recheck_hours=recheck_hours, statement_store=store)
+        self.addCleanup(engine.wait_for_membership)
+        if warm:
+            engine.refresh_membership()
+        return engine
+
+    def test_compare_from_industry_snapshot(self):
+        """找到所属行业，批量获取全部成分股后给出指标值、分位和排名"""
+        comparison = self._engine().compare("600007", today=TODAY)
+        self.assertEqual((comparison["industry_code"], comparison["industry_name"]), (BANKS, "股份制银行Ⅲ"))
+        self.assertEqual((comparison["period"], comparison["peer_count"]), ("20260630", 10))
+        self.assertEqual(comparison["name"], "银行07")
+        roe, debt = comparison["metrics"]["roe"], comparison["metrics"]["debt_ratio"]
+        self.assertEqual((roe["value"], roe["rank"], roe["percentile"]), (15.0, 3, 80.0))
+        self.assertEqual((debt["value"], debt["rank"]), (88.0, 3))
+        self.assertAlmostEqual(comparison["stats"].at["roe", "mean"], 12.5)
+        self.assertEqual(comparison["snapshot"].top("roe", 2, exclude="600009").index.tolist(), ["600008", "600007"])
+        self.assertEqual(self.upstream.calls["abstract"], 10)
+
+    def test_snapshot_cached_per_period(self):
+        """同一行业的后续对比只是查找，新实例从磁盘读取快照和行业映射"""
+        engine = self._engine(recheck_hours=0)
+        engine.compare("600001", today=TODAY)
+        calls = dict(self.upstream.calls)
+        for code in ("600002", "600003", "600009"):
+            self.assertEqual(engine.compare(code, today=date(2026, 9, 1))["period"], "20260630")
+        self.assertEqual(self._engine(recheck_hours=0, warm=False).compare("600004", today=date(2026, 9, 1))["peer_count"], 10)
+        self.assertEqual(self.upstream.calls, calls)
+        self.assertEqual(engine.get_stats()["snapshot_hits"], 3)
+        self.assertEqual(engine.get_stats()["industries"][BANKS], {"period": "20260630", "peers": 10})
+
+    def test_majority_period(self):
+        """只有少数成分股披露新报告期时，仍按多数成分股已披露的报告期对比"""
+        abstracts = {f"{600000 + i:06d}": _abstract(_metrics(i), ("20260630", "20260331")) for i in range(10)}
+        for code in ("600000", "600001", "600002"):
+            abstracts[code] = _abstract(_metrics(0), ("20260930", "20260630"))
+        self.assertEqual(IndustryPeerEngine._common_period(abstracts), "20260630")
+        for code in ("600003", "600004"):
+            abstracts[code] = _abstract(_metrics(0), ("20260930", "20260630"))
+        self.assertEqual(IndustryPeerEngine._common_period(abstracts), "20260930")
+
+    def test_newer_period_rebuilt(self):
+        """可能有新报告期时按间隔重建快照"""
+        engine = self._engine(recheck_hours=0)
+        engine.compare("600001", today=TODAY)
+        self.upstream.periods = {code: ("20260930", "20260630") for code in self.upstream.periods}
+        comparison = engine.compare("600001", today=TODAY)
+        self.assertEqual(comparison["period"], "20260930")
+        self.assertEqual(engine.get_stats()["snapshot_builds"], 2)
+
+    def test_components_fallback_and_unknown_stock(self):
+        """三级行业接口无数据时使用指数成分接口；不在任何行业中的股票无法对比"""
+        self.upstream.third_level_available = False
+        engine = self._engine()
+        self.assertEqual(engine.compare("000858", today=TODAY)["industry_name"], "白酒Ⅲ")
+        self.assertGreater(self.upstream.calls["components"], 0)
+        self.assertIsNone(engine.compare("300750", today=TODAY))
+
+    def test_cold_start_resolved_from_hint(self):
+        """没有行业映射时按证券主数据的行业提示只查询相符的三级行业，全量映射在后台重建"""
+        self.master.upsert("600007", "银行07", industry="银行", persist=False)
+        self.upstream.constituents_delay[LIQUOR] = 1.0
+        engine = self._engine(warm=False)
+        start = time.perf_counter()
+        comparison = engine.compare("600007", today=TODAY)
+        self.assertLess(time.perf_counter() - start, 0.8)
+        self.assertEqual((comparison["industry_code"], comparison["metrics"]["roe"]["value"]), (BANKS, 15.0))
+        engine.wait_for_membership()
+        self.assertEqual(engine.get_industry("000858"), {"code": LIQUOR, "name": "白酒Ⅲ"})
+        self.assertGreater(engine._membership["built_at"], 0)
+
+    def test_cold_start_without_hint_not_blocking(self):
+        """没有行业提示时不等待全量重建，重建完成后即可对比"""
+        self.upstream.constituents_delay[LIQUOR] = 1.0
+        engine = self._engine(warm=False)
+        start = time.perf_counter()
+        self.assertIsNone(engine.compare("000858", today=TODAY))
+        self.assertLess(time.perf_counter() - start, 0.8)
+        engine.wait_for_membership()
+        self.assertEqual(engine.compare("000858", today=TODAY)["industry_name"], "白酒Ⅲ")
+
+    def test_ashare_tools_report_uses_snapshot(self):
+        """AShareDataTools 行业对比报告来自快照，不再包含写死的行业数据"""
+        try:
+            from tradingagents.analysis_stock_agent.tools import ashare_data_tools
+        except ImportError as e:
+            self.skipTest(f"A股数据工具不可用: {e}")
+        tools = ashare_data_tools.AShareDataTools.__new__(ashare_data_tools.AShareDataTools)
+        tools.industry_mapping = {"银行": "金融业"}
+        tools.data_manager = type("Manager", (), {
+            "get_real_stock_info": lambda self, symbol: ({"symbol": symbol, "name": "测试银行"}, "akshare")})()
+        engine = self._engine()
+        with patch.object(ashare_data_tools, "get_industry_peer_engine", lambda: engine):
+            report = tools.get_ashare_industry_comparison("600007")
+        self.assertIn("股份制银行Ⅲ（申万三级 851911.SI）", report)
+        self.assertIn("| ROE | 15.0% | 12.5% | 12.5% | 14.8% | 3/10（超过80%同行） |", report)
+        self.assertIn("| 银行09(600009) | 17.0%", report)
+        self.assertIn("**行业分类**: 金融业", report)
+        self.assertNotIn("14.1%", report)
+
+
+def benchmark(peers=30, delay=0.05, lookups=20):
+    """返回 {方式: 单次行业对比耗时ms}
+
+    delay 模拟单只股票财务摘要的请求耗时（实际通常为0.5~2秒）
+    """
+    results = {}
+    upstream = _Upstream(banks=peers, delay=delay)
+    codes = upstream.industries[BANKS][1]
+
+    start = time.perf_counter()
+    for _ in range(3):
+        for peer in codes:
+            upstream.abstract(peer)
+        compute_peer_statistics(pd.DataFrame({peer: _metrics(codes.index(peer)) for peer in codes}).T)
+    results["每次逐只请求同业"] = (time.perf_counter() - start) / 3 * 1000
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        store = FinancialStatementStore(os.path.join(temp_dir, "statements"))
+        engine = IndustryPeerEngine(upstream, os.path.join(temp_dir, "peers"), statement_store=store)
+        engine.refresh_membership()
+        start = time.perf_counter()
+        engine.compare(codes[0], today=TODAY)
+        results["首次构建快照(并发)"] = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        for code in codes[:lookups]:
+            engine.compare(code, today=TODAY)
+        results["快照查找"] = (time.perf_counter() - start) / lookups * 1000
+    return results
+
+
+if __name__ == "__main__":
+    if not INDUSTRY_PEERS_AVAILABLE:
+        sys.exit(1)
+    print("🏭 申万行业对比耗时基准 (30只成分股，模拟单只财务摘要50ms)")
+    for label, millis in benchmark().items():
+        print(f"  {label}: {millis:.1f}ms")
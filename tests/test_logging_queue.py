@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+队列日志模式测试
+
+验证 TradingAgentsLogger 的队列模式：根日志器只保留有界队列处理器，文件和结构化日志由后台线程写入且内容完整，
+队列满时按溢出策略丢弃或等待（WARNING及以上不丢弃）；以及 log_tool_call 只在INFO级别启用时格式化参数、
+每个参数只转换一次字符串。
+直接运行时对比同步写文件、队列模式和INFO未启用时被装饰工具的单次调用开销。
+"""
+
+import json
+import logging
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+try:
+    from tradingagents.utils.logging_manager import BoundedQueueHandler, TradingAgentsLogger
+    from tradingagents.utils.tool_logging import log_tool_call
+    LOGGING_AVAILABLE = True
+except ImportError as e:
+    print(f"⚠️ 日志管理器不可用: {e}")
+    LOGGING_AVAILABLE = False
+
+
+def _config(log_dir, queue_enabled, level='DEBUG', overflow='drop_new', max_size=10000):
+    return {
+        'level': level,
+        'format': {
+            'console': '%(asctime)s | %(name)-20s | %(levelname)-8s | %(message)s',
+            'file': '%(asctime)s | %(name)-20s | %(levelname)-8s | %(module)s:%(funcName)s:%(lineno)d | %(message)s',
+        },
+        'handlers': {
+            'console': {'enabled': False},
+            'file': {'enabled': True, 'level': 'DEBUG', 'max_size': '10MB', 'backup_count': 1, 'directory': log_dir},
+            'structured': {'enabled': True, 'level': 'INFO', 'directory': log_dir},
+            'queue': {'enabled': queue_enabled, 'max_size': max_size, 'overflow': overflow},
+        },
+        'loggers': {},
+        'docker': {'enabled': False, 'stdout_only': True},
+    }
+
+
+class _RootLoggerState:
+    """保存并恢复根日志器的处理器和级别"""
+
+    def __enter__(self):
+        root = logging.getLogger()
+        self.handlers, self.level = list(root.handlers), root.level
+        return self
+
+    def __exit__(self, *exc):
+        root = logging.getLogger()
+        for handler in root.handlers:
+            if handler not in self.handlers:
+                handler.close()
+        root.handlers[:] = self.handlers
+        root.setLevel(self.level)
+
+
+def _record(message, level=logging.INFO):
+    return logging.LogRecord("tools", level, __file__, 1, message, None, None)
+
+
+class _CountingArg:
+    """记录 __str__ 调用次数的参数"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __str__(self):
+        self.calls += 1
+        return "x" * 150
+
+
+class TestQueueLogging(unittest.TestCase):
+    """队列日志模式测试"""
+
+    def setUp(self):
+        if not LOGGING_AVAILABLE:
+            self.skipTest("日志管理器不可用")
+        state = _RootLoggerState().__enter__()
+        self.addCleanup(state.__exit__)
+        temp = tempfile.TemporaryDirectory()
+        self.addCleanup(temp.cleanup)
+        self.log_dir = temp.name
+
+    def test_queue_mode_writes_all_records(self):
+        """队列模式下根日志器只有队列处理器，关闭后文件和结构化日志完整"""
+        manager = TradingAgentsLogger(_config(self.log_dir, queue_enabled=True))
+        self.assertEqual([type(h) for h in logging.getLogger().handlers], [BoundedQueueHandler])
+
+        logger = manager.get_logger("tools")
+        for i in range(200):
+            logger.info("消息 %d", i, extra={'session_id': 'abc', 'cost': 0.5})
+        manager.shutdown()
+
+        with open(os.path.join(self.log_dir, "tradingagents.log"), encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        self.assertEqual([line.rsplit("| ", 1)[1] for line in lines], [f"消息 {i}" for i in range(200)])
+
+        with open(os.path.join(self.log_dir, "tradingagents_structured.log"), encoding="utf-8") as f:
+            entries = [json.loads(line) for line in f]
+        self.assertEqual(len(entries), 200)
+        self.assertEqual((entries[-1]['message'], entries[-1]['session_id'], entries[-1]['cost']),
+                         ("消息 199", 'abc', 0.5))
+        self.assertEqual(entries[0]['function'], 'test_queue_mode_writes_all_records')
+
+    def test_exception_traceback_preserved(self):
+        """队列模式下异常堆栈仍写入日志文件"""
+        manager = TradingAgentsLogger(_config(self.log_dir, queue_enabled=True))
+        try:
+            raise ValueError("测试异常")
+        except ValueError:
+            manager.get_logger("tools").error("失败", exc_info=True)
+        manager.shutdown()
+        with open(os.path.join(self.log_dir, "tradingagents.log"), encoding="utf-8") as f:
+            self.assertIn("ValueError: 测试异常", f.read())
+
+    def test_overflow_drop_new(self):
+        """drop_new: 队列满时丢弃新记录并计数"""
+        handler = BoundedQueueHandler(queue.Queue(maxsize=2), 'drop_new')
+        for i in range(5):
+            handler.handle(_record(f"m{i}"))
+        self.assertEqual([handler.queue.get_nowait().msg for _ in range(2)], ["m0", "m1"])
+        self.assertEqual(handler.dropped, 3)
+
+    def test_overflow_drop_oldest(self):
+        """drop_oldest: 队列满时丢弃最旧记录"""
+        handler = BoundedQueueHandler(queue.Queue(maxsize=2), 'drop_oldest')
+        for i in range(5):
+            handler.handle(_record(f"m{i}"))
+        self.assertEqual([handler.queue.get_nowait().msg for _ in range(2)], ["m3", "m4"])
+        self.assertEqual(handler.dropped, 3)
+
+    def test_warnings_never_dropped(self):
+        """队列满时WARNING记录等待空位而不是被丢弃"""
+        handler = BoundedQueueHandler(queue.Queue(maxsize=1), 'drop_new')
+        handler.handle(_record("info"))
+        threading.Timer(0.1, handler.queue.get_nowait).start()
+        handler.handle(_record("warning", logging.WARNING))
+        self.assertEqual(handler.queue.get_nowait().msg, "warning")
+        self.assertEqual(handler.dropped, 0)
+
+    def test_unknown_overflow_policy(self):
+        """未知的溢出策略报错"""
+        with self.assertRaises(ValueError):
+            BoundedQueueHandler(queue.Queue(), 'drop_all')
+
+
+class TestLazyToolLogging(unittest.TestCase):
+    """log_tool_call 参数格式化测试"""
+
+    def setUp(self):
+        if not LOGGING_AVAILABLE:
+            self.skipTest("日志管理器不可用")
+        state = _RootLoggerState().__enter__()
+        self.addCleanup(state.__exit__)
+        temp = tempfile.TemporaryDirectory()
+        self.addCleanup(temp.cleanup)
+        self.log_dir = temp.name
+
+    def test_args_formatted_once_when_enabled(self):
+        """INFO启用时每个参数只转换一次字符串，并按100字符截断"""
+        TradingAgentsLogger(_config(self.log_dir, queue_enabled=False, level='INFO'))
+        captured = []
+        handler = logging.Handler()
+        handler.emit = captured.append
+        logging.getLogger().addHandler(handler)
+
+        arg, kwarg = _CountingArg(), _CountingArg()
+        self.assertEqual(log_tool_call()(lambda a, b=None: 42)(arg, b=kwarg), 42)
+        self.assertEqual((arg.calls, kwarg.calls), (1, 1))
+        args_info = captured[0].args_info
+        self.assertEqual(args_info['args'], ["x" * 100 + "..."])
+        self.assertEqual(args_info['kwargs'], {'b': "x" * 100 + "..."})
+
+    def test_args_not_formatted_when_disabled(self):
+        """INFO未启用时不格式化参数和结果"""
+        TradingAgentsLogger(_config(self.log_dir, queue_enabled=False, level='WARNING'))
+        arg = _CountingArg()
+        self.assertIs(log_tool_call(log_result=True)(lambda a: arg)(arg), arg)
+        self.assertEqual(arg.calls, 0)
+
+
+def benchmark(calls=5000):
+    """返回 {模式: 被装饰工具单次调用开销(微秒)}"""
+    results = {}
+    modes = (("同步写文件", False, 'DEBUG'), ("队列模式", True, 'DEBUG'), ("INFO未启用", False, 'WARNING'))
+    for label, queue_enabled, level in modes:
+        with _RootLoggerState(), tempfile.TemporaryDirectory() as log_dir:
+            manager = TradingAgentsLogger(_config(log_dir, queue_enabled, level=level, max_size=calls * 2 + 10))
+            tool = log_tool_call()(lambda symbol, period="1y": symbol)
+            start = time.perf_counter()
+            for i in range(calls):
+                tool("600036", period="1y")
+            results[label] = (time.perf_counter() - start) / calls * 1e6
+            manager.shutdown()
+    return results
+
+
+if __name__ == "__main__":
+    if not LOGGING_AVAILABLE:
+        sys.exit(1)
+    print("🔧 log_tool_call 单次调用开销基准 (文件日志 + 结构化JSON日志, 5000次调用)")
+    for label, micros in benchmark().items():
+        print(f"  {label}: {micros:.1f}µs")
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+记忆批量嵌入测试
+
+验证 FinancialSituationMemory.add_situations 按提供商上限分批请求嵌入、
+批次间并发有上限、结果顺序与输入一致，以及单批失败时只降级该批次。
+直接运行时模拟带延迟的嵌入服务，对比逐条请求与批量请求回填历史决策的耗时。
+"""
+
+import os
+import sys
+import threading
+import time
+import unittest
+import uuid
+from types import SimpleNamespace
+from unittest.mock import patch
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+try:
+    from tradingagents.agents.utils import memory as memory_module
+    from tradingagents.agents.utils.memory import FinancialSituationMemory
+    MEMORY_AVAILABLE = True
+except ImportError as e:
+    print(f"⚠️ 记忆模块不可用: {e}")
+    MEMORY_AVAILABLE = False
+
+
+def _vector(text):
+    """按文本生成可辨认的向量"""
+    return [float(len(text)), float(sum(map(ord, text)) % 997), 1.0]
+
+
+class StubEmbeddingClient:
+    """模拟OpenAI兼容的嵌入接口，记录每次请求的条数和并发数"""
+
+    def __init__(self, latency=0.0, fail_on=None):
+        self.latency = latency
+        self.fail_on = fail_on
+        self.batch_sizes = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+        self.embeddings = SimpleNamespace(create=self._create)
+
+    def _create(self, model, input):
+        texts = [input] if isinstance(input, str) else list(input)
+        with self._lock:
+            self.batch_sizes.append(len(texts))
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(self.latency)
+            if self.fail_on and self.fail_on in texts:
+                raise ConnectionError("模拟网络错误")
+            # 倒序返回，验证按 index 还原顺序
+            data = [SimpleNamespace(index=i, embedding=_vector(t)) for i, t in enumerate(texts)]
+            return SimpleNamespace(data=data[::-1])
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+def _make_memory(client, **config):
+    """创建使用模拟嵌入客户端的记忆实例"""
+    with patch.dict(os.environ, {"OPENAI_API_KEY": ""}):
+        memory = FinancialSituationMemory(f"test_memory_{uuid.uuid4().hex[:8]}",
+                                          {"llm_provider": "openai", "backend_url": "", **config})
+    memory.client = client
+    return memory
+
+
+def _situations(count):
+    return [(f"情景{i}: 市场波动{'上涨' * (i % 3)}", f"建议{i}") for i in range(count)]
+
+
+class TestMemoryBatchEmbedding(unittest.TestCase):
+    """记忆批量嵌入测试"""
+
+    def setUp(self):
+        if not MEMORY_AVAILABLE:
+            self.skipTest("记忆模块不可用")
+
+    def test_batches_follow_provider_limit(self):
+        """按配置的批次上限切分请求"""
+        client = StubEmbeddingClient()
+        memory = _make_memory(client, embedding_batch_size=8)
+        memory.add_situations(_situations(20))
+
+        self.assertEqual(sorted(client.batch_sizes), [4, 8, 8])
+        self.assertEqual(memory.situation_collection.count(), 20)
+
+    def test_order_preserved(self):
+        """嵌入结果与输入顺序一致"""
+        memory = _make_memory(StubEmbeddingClient(), embedding_batch_size=3)
+        texts = [text for text, _ in _situations(10)]
+
+        self.assertEqual(memory.get_embeddings(texts), [_vector(t) for t in texts])
+        self.assertEqual(memory.get_embedding(texts[4]), _vector(texts[4]))
+
+    def test_concurrency_is_bounded(self):
+        """批次间并发不超过配置上限"""
+        client = StubEmbeddingClient(latency=0.02)
+        memory = _make_memory(client, embedding_batch_size=1, embedding_max_concurrency=3)
+        memory.get_embeddings([f"文本{i}" for i in range(12)])
+
+        self.assertEqual(len(client.batch_sizes), 12)
+        self.assertLessEqual(client.max_active, 3)
+        self.assertGreater(client.max_active, 1)
+
+    def test_failed_batch_degrades_alone(self):
+        """单个批次失败只把该批次降级为零向量"""
+        texts = [f"文本{i}" for i in range(6)]
+        memory = _make_memory(StubEmbeddingClient(fail_on="文本4"), embedding_batch_size=3)
+        embeddings = memory.get_embeddings(texts)
+
+        self.assertEqual(embeddings[:3], [_vector(t) for t in texts[:3]])
+        self.assertTrue(all(all(x == 0.0 for x in e) for e in embeddings[3:]))
+
+    def test_dashscope_batch_uses_text_index(self):
+        """阿里百炼批量请求按 text_index 还原顺序，v3模型每批10条"""
+        memory = _make_memory(None)
+        memory.llm_provider, memory.embedding = "dashscope", "text-embedding-v3"
+        calls = []
+
+        def fake_call(model, input):
+            calls.append(list(input))
+            items = [{"text_index": i, "embedding": _vector(t)} for i, t in enumerate(input)]
+            return SimpleNamespace(status_code=200, output={"embeddings": items[::-1]})
+
+        texts = [f"文本{i}" for i in range(25)]
+        with patch.object(memory_module.dashscope, "api_key", "test-key", create=True), \
+                patch.object(memory_module.TextEmbedding, "call", side_effect=fake_call):
+            embeddings = memory.get_embeddings(texts)
+
+        self.assertEqual(sorted(len(c) for c in calls), [5, 10, 10])
+        self.assertEqual(embeddings, [_vector(t) for t in texts])
+
+    def test_disabled_memory_returns_zero_vectors(self):
+        """记忆功能禁用时不发起请求"""
+        memory = _make_memory("DISABLED")
+        self.assertEqual(memory.get_embeddings(["a", "b"]), [[0.0] * 1024] * 2)
+        self.assertEqual(memory.get_memories("a"), [])
+
+
+def benchmark(count=500, latency=0.05):
+    """模拟回填历史决策，返回 (逐条请求耗时, 批量请求耗时, 批量请求次数)"""
+    situations = _situations(count)
+
+    client = StubEmbeddingClient(latency=latency)
+    memory = _make_memory(client)
+    start = time.perf_counter()
+    for situation, _ in situations:
+        memory.get_embedding(situation)
+    single_time = time.perf_counter() - start
+
+    # 以阿里百炼v3的10条/批为准，批量收益最保守
+    client = StubEmbeddingClient(latency=latency)
+    memory = _make_memory(client, embedding_batch_size=10)
+    start = time.perf_counter()
+    memory.add_situations(situations)
+    batch_time = time.perf_counter() - start
+
+    return single_time, batch_time, len(client.batch_sizes)
+
+
+if __name__ == "__main__":
+    if not MEMORY_AVAILABLE:
+        sys.exit(1)
+    print("📚 记忆回填基准 (500条情景, 嵌入请求延迟50ms, 每批10条, 并发4)")
+    single_time, batch_time, requests = benchmark()
+    print(f"  逐条嵌入: {single_time:.2f}s (500次请求)")
+    print(f"  批量嵌入: {batch_time:.2f}s ({requests}次请求)")
+    print(f"  加速比:   {single_time / batch_time:.1f}x")
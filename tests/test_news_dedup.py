@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+新闻近似重复检测测试
+
+验证 RealtimeNewsAggregator._deduplicate_news 用MinHash-LSH合并不同新闻源对同一事件的报道
+（中英文），每簇只保留一条，并保持原有的完全重复和短标题过滤。
+直接运行时在数千条合成新闻上对比两两比较与MinHash-LSH的耗时，展示随条数近似线性增长。
+"""
+
+import os
+import random
+import sys
+import time
+import unittest
+from datetime import datetime
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+try:
+    from tradingagents.dataflows.news_dedup import NearDuplicateDetector, shingles
+    from tradingagents.dataflows.realtime_news_utils import NewsItem, RealtimeNewsAggregator
+    DEDUP_AVAILABLE = True
+except ImportError as e:
+    print(f"⚠️ 新闻去重模块不可用: {e}")
+    DEDUP_AVAILABLE = False
+
+
+def _item(title, content="", source="FinnHub", relevance=0.5):
+    return NewsItem(title=title, content=content, source=source, publish_time=datetime.now(),
+                    url="", urgency="low", relevance_score=relevance)
+
+
+_EN_WORDS = ("apple tesla nvidia microsoft shares stock revenue profit guidance chip iphone cloud "
+             "deal merger lawsuit recall upgrade downgrade forecast quarter record growth demand").split()
+_CN_WORDS = ("茅台 宁德 比亚迪 招商 平安 净利润 营收 同比 增长 下滑 分红 回购 增持 减持 "
+             "订单 合作 协议 产能 电池 白酒 银行 保险 业绩 预告 公告 停牌 复牌").split()
+
+
+def synthetic_news(count, stories=None, seed=0):
+    """生成合成新闻：每个事件有多条措辞略有差异的报道（中英文各半）"""
+    rng = random.Random(seed)
+    stories = stories or max(1, count // 4)
+    base = []
+    for s in range(stories):
+        words = _CN_WORDS if s % 2 else _EN_WORDS
+        sep = "" if s % 2 else " "
+        base.append((sep, [rng.choice(words) for _ in range(24)] + [f"{s}"]))
+    items = []
+    for i in range(count):
+        sep, words = base[i % stories]
+        variant = list(words)
+        # 每条报道替换一个词
+        variant[rng.randrange(len(variant))] = rng.choice(_CN_WORDS if sep == "" else _EN_WORDS)
+        text = sep.join(variant)
+        items.append(_item(title=text[:40] + f" #{i % stories}", content=text, source=f"源{i % 3}"))
+    return items
+
+
+def _pairwise_dedup(texts, threshold=0.5):
+    """两两计算分片Jaccard的朴素去重（基准对照）"""
+    sets = [shingles(t) for t in texts]
+    kept = []
+    for i, s in enumerate(sets):
+        if not any(len(s & sets[k]) / max(1, len(s | sets[k])) >= threshold for k in kept):
+            kept.append(i)
+    return kept
+
+
+class TestNewsNearDuplicate(unittest.TestCase):
+    """新闻近似重复检测测试"""
+
+    def setUp(self):
+        if not DEDUP_AVAILABLE:
+            self.skipTest("新闻去重模块不可用")
+        self.aggregator = RealtimeNewsAggregator()
+
+    def test_english_variants_collapse(self):
+        """不同来源措辞略有差异的英文报道合并为一条"""
+        news = [
+            _item("Apple shares jump after strong iPhone sales beat estimates",
+                  "Apple reported record revenue for the quarter", "FinnHub"),
+            _item("Apple shares jump after strong iPhone sales beat analyst estimates",
+                  "Apple reported record revenue for the quarter.", "Alpha Vantage"),
+            _item("Tesla recalls 100,000 vehicles over steering issue", "Recall affects Model 3", "NewsAPI"),
+        ]
+        result = self.aggregator._deduplicate_news(news)
+        self.assertEqual([n.source for n in result], ["FinnHub", "NewsAPI"])
+
+    def test_chinese_variants_collapse(self):
+        """中文同一事件的不同标题合并为一条"""
+        news = [
+            _item("贵州茅台发布2024年年报，净利润同比增长15%", "拟每股派息30元", "东方财富"),
+            _item("贵州茅台发布2024年度报告：净利润同比增长15%", "拟每股派发现金红利30元", "财联社"),
+            _item("宁德时代与福特签署电池合作协议", "双方将在北美建厂", "东方财富"),
+        ]
+        result = self.aggregator._deduplicate_news(news)
+        self.assertEqual(len(result), 2)
+        self.assertEqual(result[1].title, "宁德时代与福特签署电池合作协议")
+
+    def test_representative_has_highest_relevance(self):
+        """簇内保留相关性最高的一条，位置保持在簇首"""
+        news = [
+            _item("Nvidia unveils new AI chip for data centers", "Nvidia launched the chip today", relevance=0.3),
+            _item("Microsoft cloud revenue grows 30% in quarter", "Azure drove growth"),
+            _item("NVDA: Nvidia unveils new AI chip for data centers", "Nvidia launched the chip today", relevance=1.0),
+        ]
+        result = self.aggregator._deduplicate_news(news)
+        self.assertEqual([n.relevance_score for n in result], [1.0, 0.5])
+
+    def test_exact_and_short_titles_still_filtered(self):
+        """原有的完全重复和短标题过滤保持不变"""
+        news = [_item("短标题"), _item("Same headline about markets"), _item("same headline about markets ")]
+        result = self.aggregator._deduplicate_news(news)
+        self.assertEqual([n.title for n in result], ["Same headline about markets"])
+
+    def test_matches_pairwise_on_synthetic_news(self):
+        """合成数据上与两两比较的去重结果数量接近"""
+        news = synthetic_news(400, stories=100)
+        texts = [f"{n.title} {n.content}" for n in news]
+        lsh_clusters = len(set(NearDuplicateDetector().cluster(texts)))
+        pairwise_clusters = len(_pairwise_dedup(texts))
+
+        self.assertEqual(pairwise_clusters, 100)
+        self.assertLessEqual(abs(lsh_clusters - pairwise_clusters), 5)
+
+    def test_sub_quadratic_scaling(self):
+        """条数翻四倍时耗时增长远小于16倍"""
+        detector = NearDuplicateDetector()
+        timings = {}
+        for count in (500, 2000):
+            texts = [f"{n.title} {n.content}" for n in synthetic_news(count)]
+            start = time.perf_counter()
+            detector.cluster(texts)
+            timings[count] = time.perf_counter() - start
+        self.assertLess(timings[2000] / timings[500], 8)
+
+
+def benchmark(sizes=(1000, 2000, 4000, 8000), pairwise_limit=2000):
+    """返回 [(条数, 两两比较耗时或None, MinHash-LSH耗时, 去重后条数)]"""
+    detector = NearDuplicateDetector()
+    results = []
+    for count in sizes:
+        texts = [f"{n.title} {n.content}" for n in synthetic_news(count)]
+        pairwise_time = None
+        if count <= pairwise_limit:
+            start = time.perf_counter()
+            _pairwise_dedup(texts)
+            pairwise_time = time.perf_counter() - start
+        start = time.perf_counter()
+        clusters = len(set(detector.cluster(texts)))
+        results.append((count, pairwise_time, time.perf_counter() - start, clusters))
+    return results
+
+
+if __name__ == "__main__":
+    if not DEDUP_AVAILABLE:
+        sys.exit(1)
+    print("📰 新闻近似重复检测基准 (合成中英文新闻, 每个事件4条变体)")
+    for count, pairwise_time, lsh_time, clusters in benchmark():
+        pairwise_text = f"{pairwise_time:7.2f}s" if pairwise_time is not None else "      -"
+        print(f"  {count:5d}条 | 两两比较 {pairwise_text} | MinHash-LSH {lsh_time:6.2f}s | 去重后 {clusters}条")
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+新闻关键词自动机测试
+
+验证 KeywordMatcher 的多模式匹配（正则实现，及安装了pyahocorasick时的Aho-Corasick自动机）
+与逐个子串查找结果一致（含重叠、嵌套关键词），
+NewsRelevanceFilter 的逐条评分、批量评分和 filter_news 批量模式与原有逐词扫描的评分完全相同。
+直接运行时在数千条合成新闻上对比逐词扫描、单遍逐条评分和整列批量评分的吞吐。
+"""
+
+import os
+import random
+import sys
+import time
+import unittest
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+import pandas as pd
+
+try:
+    from tradingagents.utils.keyword_matcher import AHOCORASICK_AVAILABLE, KeywordMatcher
+    from tradingagents.utils.news_filter import NewsRelevanceFilter
+    MATCHER_AVAILABLE = True
+except ImportError as e:
+    print(f"⚠️ 新闻过滤器不可用: {e}")
+    MATCHER_AVAILABLE = False
+
+
+def reference_score(news_filter, title, content):
+    """原有的逐关键词子串扫描评分（对照实现）"""
+    score = 0
+    title_lower, content_lower = title.lower(), content.lower()
+    if news_filter.company_name in title:
+        score += 50
+    elif news_filter.company_name in content:
+        score += 25
+    if news_filter.stock_code in title:
+        score += 40
+    elif news_filter.stock_code in content:
+        score += 20
+    for keywords, title_points, content_points in ((news_filter.strong_keywords, 30, 15),
+                                                  (news_filter.include_keywords, 15, 8),
+                                                  (news_filter.exclude_keywords, -40, -20)):
+        for keyword in keywords:
+            if keyword in title_lower:
+                score += title_points
+            elif keyword in content_lower:
+                score += content_points
+    if (news_filter.company_name not in title and news_filter.stock_code not in title and
+            any(keyword in title_lower for keyword in news_filter.exclude_keywords)):
+        score -= 30
+    return max(0, min(100, score))
+
+
+_FILLER = "市场今日震荡整理，分析师认为短期波动不改长期趋势，资金面保持合理充裕，成交量较昨日略有放大"
+_FRAGMENTS = ["招商银行", "600036", "ETF", "etf", "指数基金", "业绩预告", "业绩", "ST", "*ST", "st",
+              "股东大会", "董事会", "权重股", "Index", "FUND", "限售解禁", "资产重组", "投资", "被动投资",
+              "涨停", "回购", "半年报", "年报", "成分股", "板块"]
+
+
+def synthetic_news(count, seed=0):
+    """生成混有关键词、大小写变体和重叠关键词的合成新闻"""
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(count):
+        title = "".join(rng.choice(_FRAGMENTS + [_FILLER[:rng.randint(2, 8)]]) for _ in range(rng.randint(2, 6)))
+        parts = [_FILLER[rng.randint(0, 20):] for _ in range(rng.randint(4, 40))]
+        for _ in range(rng.randint(0, 6)):
+            parts.insert(rng.randrange(len(parts) + 1), rng.choice(_FRAGMENTS))
+        rows.append({"新闻标题": title, "新闻内容": "".join(parts), "发布时间": "2025-01-01", "文章来源": "东方财富"})
+    return pd.DataFrame(rows)
+
+
+def _reference_filter(news_filter, news_df, min_score):
+    """原有逐行过滤（对照实现）"""
+    rows = []
+    for _, row in news_df.iterrows():
+        score = reference_score(news_filter, row["新闻标题"], row["新闻内容"])
+        if score >= min_score:
+            row_dict = row.to_dict()
+            row_dict["relevance_score"] = score
+            rows.append(row_dict)
+    return pd.DataFrame(rows).sort_values("relevance_score", ascending=False)
+
+
+class TestKeywordMatcher(unittest.TestCase):
+    """关键词匹配器测试（正则实现；安装了pyahocorasick时同时测试自动机实现）"""
+
+    def setUp(self):
+        if not MATCHER_AVAILABLE:
+            self.skipTest("新闻过滤器不可用")
+
+    def _matchers(self, keywords):
+        matchers = [KeywordMatcher(keywords, use_automaton=False)]
+        if AHOCORASICK_AVAILABLE:
+            matchers.append(KeywordMatcher(keywords, use_automaton=True))
+        return matchers
+
+    def test_overlapping_and_nested_keywords(self):
+        """嵌套、重叠和后缀关键词都能找到"""
+        for matcher in self._matchers(["he", "she", "his", "hers", "业绩", "业绩预告", "绩预"]):
+            self.assertEqual(matcher.find("ushers"), {"she", "he", "hers"})
+            self.assertEqual(matcher.find("发布业绩预告"), {"业绩", "业绩预告", "绩预"})
+            self.assertEqual(matcher.find("业 绩"), set())
+
+    def test_matches_substring_search(self):
+        """随机文本上与逐个 in 查找结果一致"""
+        rng = random.Random(1)
+        keywords = ["".join(rng.choice("abcab") for _ in range(rng.randint(1, 4))) for _ in range(40)]
+        texts = ["".join(rng.choice("abcxy") for _ in range(rng.randint(0, 30))) for _ in range(300)]
+        expected = [{k for k in keywords if k in text} for text in texts]
+        for matcher in self._matchers(keywords):
+            self.assertEqual([matcher.find(text) for text in texts], expected)
+            self.assertEqual(matcher.find_many(texts), expected)
+
+    def test_find_many_does_not_cross_texts(self):
+        """批量扫描时关键词不会跨越相邻文本"""
+        for matcher in self._matchers(["业绩", "绩"]):
+            self.assertEqual(matcher.find_many(["发布业", "绩报告", "", "业绩"]),
+                             [set(), {"绩"}, set(), {"业绩", "绩"}])
+
+    def test_empty_keywords(self):
+        """没有关键词时不匹配任何内容"""
+        matcher = KeywordMatcher([])
+        self.assertEqual(matcher.find("任意文本"), set())
+        self.assertEqual(matcher.find_many(["a", "b"]), [set(), set()])
+
+
+class TestNewsRelevanceParity(unittest.TestCase):
+    """新闻相关性评分一致性测试"""
+
+    def setUp(self):
+        if not MATCHER_AVAILABLE:
+            self.skipTest("新闻过滤器不可用")
+        self.news_filter = NewsRelevanceFilter("600036", "招商银行")
+        self.news_df = synthetic_news(1500)
+
+    def test_scores_identical(self):
+        """逐条评分和批量评分与原有逐词扫描完全相同"""
+        titles, contents = self.news_df["新闻标题"].tolist(), self.news_df["新闻内容"].tolist()
+        expected = [reference_score(self.news_filter, t, c) for t, c in zip(titles, contents)]
+
+        self.assertEqual([self.news_filter.calculate_relevance_score(t, c) for t, c in zip(titles, contents)], expected)
+        self.assertEqual(self.news_filter.calculate_relevance_scores(titles, contents), expected)
+        self.assertGreater(len(set(expected)), 10)
+
+    def test_filter_news_bulk_matches_row_mode(self):
+        """filter_news 批量模式与逐行模式输出一致"""
+        expected = _reference_filter(self.news_filter, self.news_df, 30)
+        pd.testing.assert_frame_equal(self.news_filter.filter_news(self.news_df, min_score=30), expected)
+        pd.testing.assert_frame_equal(self.news_filter.filter_news(self.news_df, min_score=30, bulk=False), expected)
+
+    def test_keyword_list_changes_recompile(self):
+        """修改关键词列表后自动机自动重建"""
+        self.assertEqual(self.news_filter.calculate_relevance_score("某公司发布新品", ""), 0)
+        self.news_filter.include_keywords.append("新品")
+        self.assertEqual(self.news_filter.calculate_relevance_score("某公司发布新品", ""), 15)
+
+
+def benchmark(count=5000, rounds=3):
+    """返回 (逐词扫描耗时, 单遍逐条耗时, 整列批量耗时)，均为每轮平均秒数"""
+    news_filter = NewsRelevanceFilter("600036", "招商银行")
+    news_df = synthetic_news(count)
+    titles, contents = news_df["新闻标题"].tolist(), news_df["新闻内容"].tolist()
+
+    def timed(fn):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            fn()
+        return (time.perf_counter() - start) / rounds
+
+    reference_time = timed(lambda: [reference_score(news_filter, t, c) for t, c in zip(titles, contents)])
+    single_time = timed(lambda: [news_filter.calculate_relevance_score(t, c) for t, c in zip(titles, contents)])
+    bulk_time = timed(lambda: news_filter.calculate_relevance_scores(titles, contents))
+    return reference_time, single_time, bulk_time
+
+
+if __name__ == "__main__":
+    if not MATCHER_AVAILABLE:
+        sys.exit(1)
+    backend = "Aho-Corasick自动机" if AHOCORASICK_AVAILABLE else "正则"
+    print(f"📰 新闻关键词评分基准 (5000条合成新闻, 58个关键词, {backend})")
+    reference_time, single_time, bulk_time = benchmark()
+    print(f"  逐词扫描:     {reference_time:.3f}s ({5000 / reference_time:,.0f}条/秒)")
+    print(f"  单遍逐条:     {single_time:.3f}s ({5000 / single_time:,.0f}条/秒)")
+    print(f"  单遍整列:     {bulk_time:.3f}s ({5000 / bulk_time:,.0f}条/秒)")
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分析师并行执行测试
+
+使用桩LLM和桩工具验证 GraphSetup 的并行模式：
+- 每个分析师在独立消息通道中完成工具循环
+- 所有报告在 Bull Researcher 之前汇合
+- 与顺序链路对比墙钟时间（python tests/test_parallel_analysts.py 运行基准）
+"""
+
+import os
+import sys
+import time
+import unittest
+from unittest.mock import patch
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+try:
+    from langchain_core.messages import AIMessage, ToolMessage
+    from langchain_core.tools import tool
+    from langgraph.prebuilt import ToolNode
+
+    from tradingagents.graph.conditional_logic import ConditionalLogic
+    from tradingagents.graph.setup import GraphSetup, ANALYST_REPORT_KEYS
+    from tradingagents.graph.propagation import Propagator
+    GRAPH_AVAILABLE = True
+except ImportError as e:
+    print(f"⚠️ LangGraph环境不可用: {e}")
+    GRAPH_AVAILABLE = False
+
+ALL_ANALYSTS = ["market", "social", "news", "fundamentals"]
+
+
+def _make_stub_analyst(analyst_type, llm_latency):
+    """桩分析师：第一次调用请求工具，拿到工具结果后输出报告"""
+    report_key = ANALYST_REPORT_KEYS[analyst_type]
+
+    def factory(llm, toolkit):
+        def analyst_node(state):
+            time.sleep(llm_latency)
+            tool_results = [m for m in state["messages"] if isinstance(m, ToolMessage)]
+            if not tool_results:
+                call = {"name": f"stub_tool_{analyst_type}", "args": {}, "id": f"call_{analyst_type}"}
+                return {"messages": [AIMessage(content="", tool_calls=[call])]}
+            report = f"{analyst_type} report: {tool_results[-1].content}"
+            return {"messages": [AIMessage(content=report)], report_key: report}
+        return analyst_node
+
+    return factory
+
+
+def _make_stub_tool_node(analyst_type, tool_latency):
+    def stub_tool() -> str:
+        """Return canned data after a simulated network delay."""
+        time.sleep(tool_latency)
+        return f"{analyst_type} data"
+
+    stub_tool.__name__ = f"stub_tool_{analyst_type}"
+    return ToolNode([tool(stub_tool)])
+
+
+def _stub_bull(llm, memory):
+    def node(state):
+        debate = dict(state["investment_debate_state"])
+        debate.update({
+            "current_response": "Bull: " + " | ".join(
+                state[key] for key in ANALYST_REPORT_KEYS.values() if state.get(key)
+            ),
+            "count": 2,
+        })
+        return {"investment_debate_state": debate}
+    return node
+
+
+def _stub_research_manager(llm, memory):
+    return lambda state: {"investment_plan": "plan"}
+
+
+def _stub_trader(llm, memory):
+    return lambda state: {"trader_investment_plan": "trade"}
+
+
+def _stub_risky(llm):
+    def node(state):
+        risk = dict(state["risk_debate_state"])
+        risk.update({"latest_speaker": "Risky", "count": 3})
+        return {"risk_debate_state": risk}
+    return node
+
+
+def _stub_risk_judge(llm, memory):
+    return lambda state: {"final_trade_decision": "买入"}
+
+
+def build_stub_graph(parallel, llm_latency=0.0, tool_latency=0.0, analysts=ALL_ANALYSTS):
+    """用桩节点构建完整交易图"""
+    stubs = {
+        f"create_{name}_analyst": _make_stub_analyst(key, llm_latency)
+        for key, name in [("market", "market"), ("social", "social_media"),
+                          ("news", "news"), ("fundamentals", "fundamentals")]
+    }
+    stubs.update({
+        "create_bull_researcher": _stub_bull,
+        "create_bear_researcher": _stub_bull,
+        "create_research_manager": _stub_research_manager,
+        "create_trader": _stub_trader,
+        "create_risky_debator": _stub_risky,
+        "create_safe_debator": _stub_risky,
+        "create_neutral_debator": _stub_risky,
+        "create_risk_manager": _stub_risk_judge,
+    })
+    tool_nodes = {key: _make_stub_tool_node(key, tool_latency) for key in ALL_ANALYSTS}
+
+    patchers = [patch(f"tradingagents.graph.setup.{name}", stub) for name, stub in stubs.items()]
+    for p in patchers:
+        p.start()
+    try:
+        setup = GraphSetup(
+            None, None, None, tool_nodes,
+            None, None, None, None, None,
+            ConditionalLogic(),
+            config={"parallel_analysts": parallel},
+        )
+        return setup.setup_graph(list(analysts))
+    finally:
+        for p in patchers:
+            p.stop()
+
+
+def run_stub_graph(graph):
+    propagator = Propagator()
+    init_state = propagator.create_initial_state("000001", "2025-01-02")
+    return graph.invoke(init_state, config={"recursion_limit": propagator.max_recur_limit})
+
+
+class TestParallelAnalysts(unittest.TestCase):
+    """分析师并行模式测试"""
+
+    def setUp(self):
+        if not GRAPH_AVAILABLE:
+            self.skipTest("LangGraph环境不可用")
+
+    def test_parallel_reports_match_sequential(self):
+        """并行与顺序模式生成相同的分析报告和最终决策"""
+        sequential = run_stub_graph(build_stub_graph(parallel=False))
+        parallel = run_stub_graph(build_stub_graph(parallel=True))
+
+        for report_key in ANALYST_REPORT_KEYS.values():
+            self.assertTrue(parallel[report_key])
+            self.assertEqual(parallel[report_key], sequential[report_key])
+        self.assertEqual(
+            parallel["investment_debate_state"]["current_response"],
+            sequential["investment_debate_state"]["current_response"],
+        )
+        self.assertEqual(parallel["final_trade_decision"], "买入")
+
+    def test_parallel_keeps_shared_messages_clean(self):
+        """并行模式下分析师的工具消息不会写回共享消息通道"""
+        final_state = run_stub_graph(build_stub_graph(parallel=True))
+        self.assertFalse(any(isinstance(m, ToolMessage) for m in final_state["messages"]))
+
+    def test_parallel_subset_of_analysts(self):
+        """只选择部分分析师时并行模式同样汇合"""
+        final_state = run_stub_graph(build_stub_graph(parallel=True, analysts=["market", "news"]))
+        self.assertTrue(final_state["market_report"])
+        self.assertTrue(final_state["news_report"])
+        self.assertEqual(final_state["sentiment_report"], "")
+
+    def test_parallel_faster_than_sequential(self):
+        """并行模式墙钟时间明显小于顺序模式"""
+        sequential_time, parallel_time = benchmark(llm_latency=0.05, tool_latency=0.05, rounds=1)
+        self.assertLess(parallel_time, sequential_time * 0.6)
+
+
+def benchmark(llm_latency=0.2, tool_latency=0.3, rounds=3):
+    """对比顺序链路与并行扇出的墙钟时间，返回 (顺序耗时, 并行耗时)"""
+    results = {}
+    for parallel in (False, True):
+        graph = build_stub_graph(parallel, llm_latency, tool_latency)
+        timings = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            run_stub_graph(graph)
+            timings.append(time.perf_counter() - start)
+        results[parallel] = min(timings)
+    return results[False], results[True]
+
+
+if __name__ == "__main__":
+    if not GRAPH_AVAILABLE:
+        sys.exit(1)
+    print("⚡ 分析师并行执行基准 (桩LLM 0.2s/次, 桩工具 0.3s/次, 4个分析师)")
+    sequential_time, parallel_time = benchmark()
+    print(f"  顺序链路: {sequential_time:.2f}s")
+    print(f"  并行扇出: {parallel_time:.2f}s")
+    print(f"  加速比:   {sequential_time / parallel_time:.2f}x")
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+价格数据内存缓存测试
+
+验证 PriceFrameCache 的命中统计、修改时间失效、按内存上限的LRU淘汰、
+指标列复用，以及 get_YFin_data / get_YFin_data_window 的输出不变。
+直接运行时对比冷/热缓存下的指标请求耗时。
+"""
+
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+import pandas as pd
+
+from tests.test_stockstats_window import write_synthetic_yfin_csv
+
+try:
+    from tradingagents.dataflows import interface
+    from tradingagents.dataflows.price_frame_cache import PriceFrameCache, get_price_frame_cache
+    CACHE_AVAILABLE = interface.STOCKSTATS_AVAILABLE
+except ImportError as e:
+    print(f"⚠️ 价格缓存不可用: {e}")
+    CACHE_AVAILABLE = False
+
+
+class TestPriceFrameCache(unittest.TestCase):
+    """价格数据缓存测试"""
+
+    def setUp(self):
+        if not CACHE_AVAILABLE:
+            self.skipTest("价格缓存不可用")
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.price_dir = write_synthetic_yfin_csv(self.tmp_dir.name, "AAA")
+        write_synthetic_yfin_csv(self.tmp_dir.name, "BBB", seed=1)
+        self.path_a = os.path.join(self.price_dir, "AAA-YFin-data-2015-01-01-2025-03-25.csv")
+        self.path_b = os.path.join(self.price_dir, "BBB-YFin-data-2015-01-01-2025-03-25.csv")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_hit_and_miss_counters(self):
+        """首次读取为miss，之后为hit"""
+        cache = PriceFrameCache()
+        first = cache.get(self.path_a)
+        second = cache.get(self.path_a)
+
+        self.assertIs(first, second)
+        stats = cache.get_stats()
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['entries'], 1)
+        self.assertEqual(stats['hit_rate'], 0.5)
+
+    def test_mtime_change_invalidates(self):
+        """文件更新后重新加载"""
+        cache = PriceFrameCache()
+        old = cache.get(self.path_a)
+
+        data = pd.read_csv(self.path_a).head(100)
+        data.to_csv(self.path_a, index=False)
+        os.utime(self.path_a, ns=(old.mtime_ns + 10**9, old.mtime_ns + 10**9))
+
+        new = cache.get(self.path_a)
+        self.assertIsNot(old, new)
+        self.assertEqual(len(new.data), 100)
+        self.assertEqual(cache.get_stats()['invalidations'], 1)
+
+    def test_lru_eviction_by_memory(self):
+        """超过内存上限时淘汰最久未使用的数据"""
+        probe = PriceFrameCache()
+        entry_bytes = probe.get(self.path_a).nbytes
+
+        cache = PriceFrameCache(max_bytes=int(entry_bytes * 1.5))
+        cache.get(self.path_a)
+        cache.get(self.path_b)
+
+        stats = cache.get_stats()
+        self.assertEqual(stats['entries'], 1)
+        self.assertEqual(stats['evictions'], 1)
+        cache.get(self.path_b)
+        self.assertEqual(cache.get_stats()['hits'], 1)
+
+    def test_indicators_kept_as_columns(self):
+        """已计算的指标不会重复计算"""
+        cache = PriceFrameCache()
+        first = cache.get_indicators(self.path_a, ["rsi", "macd"])
+        second = cache.get_indicators(self.path_a, ["macd", "rsi"])
+
+        stats = cache.get_stats()
+        self.assertEqual(stats['indicator_misses'], 2)
+        self.assertEqual(stats['indicator_hits'], 2)
+        pd.testing.assert_series_equal(first["rsi"], second["rsi"])
+        self.assertEqual(first.index[0], "2015-01-01")
+
+    def test_cached_data_not_mutated_by_readers(self):
+        """读取函数不会修改缓存中的原始数据"""
+        with patch.object(interface, "DATA_DIR", self.tmp_dir.name):
+            before_columns = list(get_price_frame_cache().get(self.path_a).data.columns)
+            window = interface.get_YFin_data("AAA", "2024-01-01", "2024-01-31")
+            interface.get_YFin_data_window("AAA", "2024-01-31", 10)
+            after_columns = list(get_price_frame_cache().get(self.path_a).data.columns)
+
+        self.assertEqual(before_columns, after_columns)
+        raw = pd.read_csv(self.path_a)
+        expected = raw[(raw["Date"] >= "2024-01-01") & (raw["Date"] <= "2024-01-31")].reset_index(drop=True)
+        pd.testing.assert_frame_equal(window, expected)
+
+
+def benchmark(requests=30, indicator="macd"):
+    """对比每次重新读取计算与缓存命中的耗时，返回 (冷缓存耗时, 热缓存耗时)"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        price_dir = write_synthetic_yfin_csv(tmp_dir, "BENCH")
+        path = os.path.join(price_dir, "BENCH-YFin-data-2015-01-01-2025-03-25.csv")
+
+        start = time.perf_counter()
+        for _ in range(requests):
+            PriceFrameCache().get_indicators(path, [indicator])
+        cold_time = time.perf_counter() - start
+
+        cache = PriceFrameCache()
+        start = time.perf_counter()
+        for _ in range(requests):
+            cache.get_indicators(path, [indicator])
+        warm_time = time.perf_counter() - start
+
+    print(f"  缓存统计: {cache.get_stats()}")
+    return cold_time, warm_time
+
+
+if __name__ == "__main__":
+    if not CACHE_AVAILABLE:
+        sys.exit(1)
+    print("📦 价格数据缓存基准 (30次 macd 请求, 10年日线)")
+    cold_time, warm_time = benchmark()
+    print(f"  每次重新加载: {cold_time:.3f}s")
+    print(f"  共享缓存:     {warm_time:.3f}s")
+    print(f"  加速比:       {cold_time / warm_time:.1f}x")
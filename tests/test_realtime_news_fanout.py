@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+实时新闻并发聚合测试
+
+用本地桩HTTP服务模拟 FinnHub、Alpha Vantage、NewsAPI 和财联社RSS，验证
+RealtimeNewsAggregator.get_realtime_stock_news 并发获取各新闻源、按截止时间放弃慢源、
+复用keep-alive连接，并记录各源耗时指标。
+直接运行时对比逐个请求与并发请求的总耗时。
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import unittest
+from datetime import datetime
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+import pandas as pd
+
+try:
+    from tradingagents.dataflows.realtime_news_utils import RealtimeNewsAggregator
+    NEWS_AVAILABLE = True
+except ImportError as e:
+    print(f"⚠️ 新闻聚合器不可用: {e}")
+    NEWS_AVAILABLE = False
+
+
+def _payload(path):
+    """按路径返回各新闻源格式的响应体"""
+    now = datetime.now()
+    if path == "/finnhub":
+        return "application/json", json.dumps([
+            {"headline": "AAPL shares rise after earnings report", "summary": "Apple beats estimates",
+             "source": "Reuters", "datetime": int(now.timestamp()), "url": "https://example.com/1"},
+        ])
+    if path == "/alphavantage":
+        return "application/json", json.dumps({"feed": [
+            {"title": "Apple announces new product launch event", "summary": "AAPL event",
+             "source": "Benzinga", "time_published": now.strftime("%Y%m%dT%H%M%S"), "url": "https://example.com/2"},
+        ]})
+    if path == "/newsapi":
+        return "application/json", json.dumps({"articles": [
+            {"title": "Analysts upgrade AAPL price target", "description": "Upgrade",
+             "source": {"name": "CNBC"}, "publishedAt": now.strftime("%Y-%m-%dT%H:%M:%S"),
+             "url": "https://example.com/3"},
+        ]})
+    return "application/rss+xml", f"""<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0"><channel><title>财联社</title>
+<item><title>AAPL 供应链消息：苹果新品备货</title><description>AAPL 相关快讯</description>
+<link>https://example.com/4</link><pubDate>{format_datetime(now.astimezone())}</pubDate></item>
+</channel></rss>"""
+
+
+class StubNewsServer:
+    """本地桩新闻服务：各路径可配置响应延迟，记录新建TCP连接数"""
+
+    def __init__(self, delays=None):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with server.lock:
+                    server.connections += 1
+
+            def do_GET(self):
+                path = self.path.split("?")[0]
+                time.sleep(server.delays.get(path, 0.0))
+                content_type, body = _payload(path)
+                data = body.encode("utf-8")
+                try:
+                    self.send_response(200)
+                    self.send_header("Content-Type", content_type)
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    # 客户端超时后已断开（截止时间测试的预期情况）
+                    self.close_connection = True
+
+            def log_message(self, *args):
+                pass
+
+        self.delays = delays or {}
+        self.connections = 0
+        self.lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def make_aggregator(server, **kwargs):
+    """创建指向桩服务的聚合器"""
+    with patch.dict(os.environ, {"FINNHUB_API_KEY": "k", "ALPHA_VANTAGE_API_KEY": "k", "NEWSAPI_KEY": "k"}):
+        aggregator = RealtimeNewsAggregator(**kwargs)
+    aggregator.FINNHUB_URL = f"{server.base_url}/finnhub"
+    aggregator.ALPHA_VANTAGE_URL = f"{server.base_url}/alphavantage"
+    aggregator.NEWSAPI_URL = f"{server.base_url}/newsapi"
+    aggregator.CHINESE_RSS_SOURCES = [f"{server.base_url}/rss"]
+    return aggregator
+
+
+def _no_eastmoney():
+    return patch("tradingagents.dataflows.akshare_utils.get_stock_news_em", return_value=pd.DataFrame())
+
+
+class TestRealtimeNewsFanout(unittest.TestCase):
+    """实时新闻并发聚合测试"""
+
+    def setUp(self):
+        if not NEWS_AVAILABLE:
+            self.skipTest("新闻聚合器不可用")
+
+    def _serve(self, delays=None):
+        server = StubNewsServer(delays)
+        self.addCleanup(server.close)
+        return server
+
+    def test_sources_fetched_concurrently(self):
+        """总耗时接近最慢的源而不是各源之和"""
+        server = self._serve({"/finnhub": 0.3, "/alphavantage": 0.3, "/newsapi": 0.3, "/rss": 0.3})
+        aggregator = make_aggregator(server)
+        with _no_eastmoney():
+            start = time.perf_counter()
+            news = aggregator.get_realtime_stock_news("AAPL", hours_back=6)
+            elapsed = time.perf_counter() - start
+
+        self.assertEqual({item.source for item in news}, {"Reuters", "Benzinga", "CNBC", "财联社"})
+        self.assertLess(elapsed, 0.9)
+
+    def test_slow_source_dropped_at_deadline(self):
+        """超过截止时间的源被放弃，其余结果照常返回"""
+        server = self._serve({"/newsapi": 2.0})
+        aggregator = make_aggregator(server, source_timeout=5, source_deadlines={"NewsAPI": 0.3})
+        with _no_eastmoney():
+            start = time.perf_counter()
+            news = aggregator.get_realtime_stock_news("AAPL", hours_back=6)
+            elapsed = time.perf_counter() - start
+
+        self.assertLess(elapsed, 1.0)
+        self.assertNotIn("CNBC", {item.source for item in news})
+        statuses = {t.source: t.status for t in aggregator.last_source_timings}
+        self.assertEqual(statuses, {"FinnHub": "ok", "Alpha Vantage": "ok", "NewsAPI": "timeout", "中文财经": "ok"})
+
+    def test_source_metrics_accumulate(self):
+        """各源耗时指标按源累计"""
+        server = self._serve({"/finnhub": 0.05})
+        aggregator = make_aggregator(server)
+        with _no_eastmoney():
+            for _ in range(3):
+                aggregator.get_realtime_stock_news("AAPL", hours_back=6)
+
+        metrics = aggregator.get_source_metrics()
+        self.assertEqual(metrics["FinnHub"]["calls"], 3)
+        self.assertEqual(metrics["FinnHub"]["ok"], 3)
+        self.assertEqual(metrics["FinnHub"]["items"], 3)
+        self.assertGreaterEqual(metrics["FinnHub"]["avg_elapsed"], 0.05)
+
+    def test_connections_reused_across_calls(self):
+        """多次聚合复用keep-alive连接"""
+        server = self._serve()
+        aggregator = make_aggregator(server)
+        with _no_eastmoney():
+            aggregator.get_realtime_stock_news("AAPL", hours_back=6)
+            first_connections = server.connections
+            for _ in range(4):
+                aggregator.get_realtime_stock_news("AAPL", hours_back=6)
+
+        self.assertLessEqual(server.connections, max(first_connections, 4))
+
+
+def _fetch_sequentially(aggregator, ticker, hours_back):
+    """原有的逐个请求方式，用于基准对比"""
+    news = []
+    news.extend(aggregator._get_finnhub_realtime_news(ticker, hours_back))
+    news.extend(aggregator._get_alpha_vantage_news(ticker, hours_back))
+    news.extend(aggregator._get_newsapi_news(ticker, hours_back))
+    news.extend(aggregator._get_chinese_finance_news(ticker, hours_back))
+    return news
+
+
+def benchmark(rounds=5, delays=None):
+    """对比逐个请求与并发请求，返回 (逐个平均耗时, 并发平均耗时)"""
+    delays = delays or {"/finnhub": 0.25, "/alphavantage": 0.4, "/newsapi": 0.3, "/rss": 0.35}
+    server = StubNewsServer(delays)
+    aggregator = make_aggregator(server)
+    try:
+        with _no_eastmoney():
+            start = time.perf_counter()
+            for _ in range(rounds):
+                _fetch_sequentially(aggregator, "AAPL", 6)
+            sequential_time = (time.perf_counter() - start) / rounds
+
+            start = time.perf_counter()
+            for _ in range(rounds):
+                aggregator.get_realtime_stock_news("AAPL", hours_back=6)
+            concurrent_time = (time.perf_counter() - start) / rounds
+    finally:
+        server.close()
+    return sequential_time, concurrent_time
+
+
+if __name__ == "__main__":
+    if not NEWS_AVAILABLE:
+        sys.exit(1)
+    print("📰 实时新闻聚合基准 (本地桩服务, 延迟 FinnHub 250ms / AV 400ms / NewsAPI 300ms / RSS 350ms)")
+    sequential_time, concurrent_time = benchmark()
+    print(f"  逐个请求: {sequential_time:.3f}s")
+    print(f"  并发请求: {concurrent_time:.3f}s")
+    print(f"  加速比:   {sequential_time / concurrent_time:.1f}x")
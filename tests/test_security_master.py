@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+证券主数据测试
+
+验证 SecurityMaster 的代码标准化、批量加载与磁盘表的保存和重新加载、过期后后台刷新（同时只有一个刷新线程）、
+加载失败时保留已有数据，以及通达信 _get_stock_name、分析师 _get_company_name 和新闻过滤器 get_company_name
+直接从主数据解析名称而不访问网络。
+直接运行时测量从磁盘加载上万条证券的耗时和单次名称查询耗时。
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+try:
+    from tradingagents.dataflows import security_master as security_master_module
+    from tradingagents.dataflows.security_master import SecurityMaster, normalize_code
+    SECURITY_MASTER_AVAILABLE = True
+except ImportError as e:
+    print(f"⚠️ 证券主数据模块不可用: {e}")
+    SECURITY_MASTER_AVAILABLE = False
+
+
+def _a_share_rows(count, start=1):
+    return [{"code": f"{600000 + i:06d}", "name": f"测试股份{i}", "market": "china_a", "source": "test"}
+            for i in range(start, start + count)]
+
+
+class TestSecurityMaster(unittest.TestCase):
+    """证券主数据测试"""
+
+    def setUp(self):
+        if not SECURITY_MASTER_AVAILABLE:
+            self.skipTest("证券主数据模块不可用")
+        temp = tempfile.TemporaryDirectory()
+        self.addCleanup(temp.cleanup)
+        self.path = os.path.join(temp.name, "security_master.csv")
+
+    def _master(self, loaders=(), **kwargs):
+        return SecurityMaster(self.path, loaders=list(loaders), **kwargs)
+
+    def test_normalize_code(self):
+        """A股去掉交易所后缀，港股补齐5位，美股大写"""
+        self.assertEqual(normalize_code("600036.SH"), "600036")
+        self.assertEqual(normalize_code("000001.sz"), "000001")
+        self.assertEqual(normalize_code("0700.HK"), "00700.HK")
+        self.assertEqual(normalize_code("700"), "00700.HK")
+        self.assertEqual(normalize_code(" aapl "), "AAPL")
+
+    def test_builtin_names_without_table(self):
+        """没有磁盘表和加载函数时也能解析内置的常用代码"""
+        master = self._master(auto_refresh=False)
+        self.assertEqual(master.get_name("600036"), "招商银行")
+        self.assertEqual(master.get_name("AAPL"), "苹果公司")
+        self.assertIsNone(master.get_name("999999"))
+        self.assertEqual((master.hits, master.misses), (2, 1))
+
+    def test_refresh_persists_and_reloads(self):
+        """批量加载后保存到磁盘，新实例直接从磁盘加载；后加载的行业补充不覆盖为空"""
+        hk = lambda: [{"code": "00700", "name": "腾讯控股", "market": "hong_kong"}]
+        industry = lambda: [{"code": "600001", "name": "测试股份1", "industry": "银行"}]
+        master = self._master([lambda: _a_share_rows(100), industry, hk, lambda: _a_share_rows(1)])
+        self.assertEqual(master.refresh(), 103)
+
+        reloaded = self._master(auto_refresh=False)
+        self.assertEqual(reloaded.get("600001.SH"),
+                         {"code": "600001", "name": "测试股份1", "market": "china_a", "industry": "银行", "source": "test"})
+        self.assertEqual(reloaded.get_name("0700.HK"), "腾讯控股")
+        self.assertEqual(reloaded.get("00700.HK")["market"], "hong_kong")
+        self.assertGreaterEqual(len(reloaded), 101)
+
+    def test_failed_loader_keeps_other_sources(self):
+        """单个加载函数失败不影响其他加载函数和已有数据"""
+        def broken():
+            raise ConnectionError("network down")
+
+        master = self._master([broken, lambda: _a_share_rows(3)])
+        self.assertEqual(master.refresh(), 3)
+        self.assertEqual(master.get_name("600002"), "测试股份2")
+
+    def test_stale_table_refreshes_once_in_background(self):
+        """表过期时查询立即返回，后台只启动一个刷新线程"""
+        release = threading.Event()
+        calls = []
+
+        def slow_loader():
+            calls.append(1)
+            release.wait(5)
+            return _a_share_rows(5, start=100)
+
+        master = self._master([slow_loader])
+        start = time.perf_counter()
+        for _ in range(50):
+            self.assertEqual(master.get_name("600036"), "招商银行")
+        self.assertLess(time.perf_counter() - start, 1.0)
+        release.set()
+        master.wait_for_refresh(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(master.get_name("600100"), "测试股份100")
+        self.assertTrue(os.path.exists(self.path))
+        master.get_name("600100")
+        self.assertEqual(len(calls), 1)
+
+    def test_upsert_persists(self):
+        """查询到的新代码写入磁盘表"""
+        master = self._master(auto_refresh=False)
+        master.upsert("688111", "金山办公", source="lookup")
+        self.assertEqual(self._master(auto_refresh=False).get_name("688111"), "金山办公")
+
+
+class TestSecurityMasterCallSites(unittest.TestCase):
+    """名称查询调用点测试"""
+
+    def setUp(self):
+        if not SECURITY_MASTER_AVAILABLE:
+            self.skipTest("证券主数据模块不可用")
+        temp = tempfile.TemporaryDirectory()
+        self.addCleanup(temp.cleanup)
+        master = SecurityMaster(os.path.join(temp.name, "security_master.csv"), loaders=[], auto_refresh=False)
+        master.upsert("301236", "软通动力", source="test")
+        master.upsert("09988.HK", "阿里巴巴-W", source="test")
+        patcher = patch.object(security_master_module, "_security_master", master)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_tdx_stock_name(self):
+        """通达信名称查询命中主数据时不访问MongoDB和行情接口"""
+        from tradingagents.dataflows import tdx_utils
+        provider = tdx_utils.TongDaXinDataProvider.__new__(tdx_utils.TongDaXinDataProvider)
+        provider.connected = False
+        with patch.dict(tdx_utils._stock_name_cache, clear=True), \
+                patch.object(tdx_utils, "_get_stock_name_from_mongodb", side_effect=AssertionError("不应查询MongoDB")):
+            self.assertEqual(provider._get_stock_name("301236"), "软通动力")
+
+    def test_analyst_company_names(self):
+        """分析师获取公司名称时命中主数据不调用统一接口"""
+        try:
+            from tradingagents.agents.analysts.market_analyst import _get_company_name
+            from tradingagents.agents.analysts.fundamentals_analyst import _get_company_name_for_fundamentals
+        except ImportError as e:
+            self.skipTest(f"分析师模块不可用: {e}")
+
+        china = {'is_china': True, 'is_hk': False, 'is_us': False}
+        hk = {'is_china': False, 'is_hk': True, 'is_us': False}
+        with patch("tradingagents.dataflows.interface.get_china_stock_info_unified",
+                   side_effect=AssertionError("不应调用统一接口")):
+            for resolve in (_get_company_name, _get_company_name_for_fundamentals):
+                self.assertEqual(resolve("301236", china), "软通动力")
+                self.assertEqual(resolve("9988.HK", hk), "阿里巴巴-W")
+
+    def test_news_filter_company_name(self):
+        """新闻过滤器的公司名称优先使用主数据"""
+        from tradingagents.utils.news_filter import get_company_name
+        self.assertEqual(get_company_name("301236"), "软通动力")
+        self.assertEqual(get_company_name("600036.SH"), "招商银行")
+
+
+def benchmark(count=10000, lookups=100000):
+    """返回 (从磁盘加载count条的耗时ms, 单次名称查询耗时µs)"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "security_master.csv")
+        SecurityMaster(path, loaders=[lambda: _a_share_rows(count)]).refresh()
+
+        start = time.perf_counter()
+        master = SecurityMaster(path, loaders=[], auto_refresh=False)
+        load_ms = (time.perf_counter() - start) * 1000
+
+        codes = [f"{600000 + i % count:06d}" for i in range(lookups)]
+        start = time.perf_counter()
+        for code in codes:
+            master.get_name(code)
+        lookup_us = (time.perf_counter() - start) / lookups * 1e6
+    return load_ms, lookup_us
+
+
+if __name__ == "__main__":
+    if not SECURITY_MASTER_AVAILABLE:
+        sys.exit(1)
+    print("📇 证券主数据基准 (10000条证券)")
+    load_ms, lookup_us = benchmark()
+    print(f"  磁盘加载: {load_ms:.1f}ms")
+    print(f"  名称查询: {lookup_us:.2f}µs/次")
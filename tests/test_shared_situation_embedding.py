@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+共享情景向量测试
+
+使用桩LLM、桩分析师和模拟嵌入服务运行完整交易图，验证分析师报告汇合后只计算一次情景向量，
+看涨/看跌研究员、研究经理、交易员和风险经理都用 state["situation_embedding"] 和同一份 build_situation 情景文本检索各自的记忆。
+直接运行时对比共享向量与各角色分别嵌入的嵌入请求数与耗时。
+"""
+
+import os
+import sys
+import time
+import unittest
+from unittest.mock import patch
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+try:
+    from langchain_core.messages import AIMessage
+
+    from tradingagents.graph.conditional_logic import ConditionalLogic
+    from tradingagents.graph.setup import GraphSetup
+    from tests.test_memory_batch_embedding import MEMORY_AVAILABLE, StubEmbeddingClient, _make_memory
+    from tests.test_parallel_analysts import (
+        GRAPH_AVAILABLE, ALL_ANALYSTS, _make_stub_analyst, _make_stub_tool_node, run_stub_graph,
+    )
+    SHARED_AVAILABLE = MEMORY_AVAILABLE and GRAPH_AVAILABLE
+except ImportError as e:
+    print(f"⚠️ 交易图环境不可用: {e}")
+    SHARED_AVAILABLE = False
+
+MEMORY_NAMES = ["bull", "bear", "trader", "invest_judge", "risk_manager"]
+
+
+class StubLLM:
+    """桩LLM：返回固定决策"""
+
+    def invoke(self, prompt):
+        return AIMessage(content="最终交易建议: **买入**")
+
+
+def _stub_risk_debator(llm):
+    """桩风险辩论：一次写入三方观点并结束辩论"""
+    def node(state):
+        risk = dict(state["risk_debate_state"])
+        risk.update({"risky_history": "激进", "safe_history": "保守", "neutral_history": "中性",
+                     "latest_speaker": "Risky", "count": 3})
+        return {"risk_debate_state": risk}
+    return node
+
+
+def build_graph(client, parallel=False, llm_latency=0.0):
+    """用真实的研究员/经理/交易员节点和桩分析师构建交易图，返回 (图, 各角色记忆)；client为None时不启用记忆"""
+    memories = dict.fromkeys(MEMORY_NAMES)
+    for name in MEMORY_NAMES if client is not None else []:
+        memory = _make_memory(client)
+        memory.add_situations([(f"{name}历史情景{i}", f"{name}经验{i}") for i in range(3)])
+        memories[name] = memory
+
+    stubs = {
+        f"create_{name}_analyst": _make_stub_analyst(key, llm_latency)
+        for key, name in [("market", "market"), ("social", "social_media"),
+                          ("news", "news"), ("fundamentals", "fundamentals")]
+    }
+    stubs.update({
+        "create_risky_debator": _stub_risk_debator,
+        "create_safe_debator": _stub_risk_debator,
+        "create_neutral_debator": _stub_risk_debator,
+    })
+    tool_nodes = {key: _make_stub_tool_node(key, 0.0) for key in ALL_ANALYSTS}
+
+    patchers = [patch(f"tradingagents.graph.setup.{name}", stub) for name, stub in stubs.items()]
+    for p in patchers:
+        p.start()
+    try:
+        setup = GraphSetup(
+            StubLLM(), StubLLM(), None, tool_nodes,
+            memories["bull"], memories["bear"], memories["trader"],
+            memories["invest_judge"], memories["risk_manager"],
+            ConditionalLogic(),
+            config={"parallel_analysts": parallel},
+        )
+        return setup.setup_graph(list(ALL_ANALYSTS)), memories
+    finally:
+        for p in patchers:
+            p.stop()
+
+
+class TestSharedSituationEmbedding(unittest.TestCase):
+    """共享情景向量测试"""
+
+    def setUp(self):
+        if not SHARED_AVAILABLE:
+            self.skipTest("交易图环境不可用")
+
+    def _run(self, parallel=False):
+        client = StubEmbeddingClient()
+        graph, memories = build_graph(client, parallel=parallel)
+        client.batch_sizes.clear()
+        with patch.object(type(memories["bull"]), "get_memories",
+                          autospec=True, side_effect=type(memories["bull"]).get_memories) as get_memories:
+            final_state = run_stub_graph(graph)
+        return client, final_state, get_memories
+
+    def test_embedding_computed_once_per_run(self):
+        """一次运行只请求一次情景嵌入，各角色的检索文本与嵌入文本一致"""
+        from tradingagents.agents.utils.memory import build_situation
+        client, final_state, get_memories = self._run()
+
+        self.assertEqual(client.batch_sizes, [1])
+        self.assertEqual(get_memories.call_count, 5)
+        for call in get_memories.call_args_list:
+            self.assertEqual(call.kwargs["query_embedding"], final_state["situation_embedding"])
+            self.assertEqual(call.args[1], build_situation(final_state))
+
+    def test_parallel_analysts_share_embedding(self):
+        """并行分析师模式在汇合后同样只嵌入一次"""
+        client, final_state, _ = self._run(parallel=True)
+        self.assertEqual(client.batch_sizes, [1])
+        self.assertEqual(final_state["final_trade_decision"], "最终交易建议: **买入**")
+
+    def test_shared_vector_matches_per_role_lookup(self):
+        """共享向量检索结果与各角色自行嵌入一致"""
+        client, final_state, _ = self._run()
+        memory = _make_memory(client)
+        memory.add_situations([("历史情景", "经验")])
+        from tradingagents.agents.utils.memory import build_situation
+        situation = build_situation(final_state)
+
+        self.assertEqual(memory.get_memories(situation, n_matches=1),
+                         memory.get_memories(situation, n_matches=1,
+                                             query_embedding=final_state["situation_embedding"]))
+
+    def test_memory_disabled(self):
+        """记忆关闭时情景向量为None，各角色跳过检索"""
+        graph, _ = build_graph(None)
+        final_state = run_stub_graph(graph)
+
+        self.assertIsNone(final_state["situation_embedding"])
+        self.assertEqual(final_state["final_trade_decision"], "最终交易建议: **买入**")
+
+
+def benchmark(runs=5, latency=0.2):
+    """对比共享情景向量与各角色分别嵌入，返回 (分别嵌入耗时, 共享耗时, 分别嵌入请求数, 共享请求数)"""
+    from tradingagents.agents.utils.memory import FinancialSituationMemory
+    original = FinancialSituationMemory.get_memories
+
+    def per_role(self, current_situation, n_matches=1, query_embedding=None):
+        return original(self, current_situation, n_matches)
+
+    results = {}
+    for shared in (False, True):
+        client = StubEmbeddingClient(latency=latency)
+        graph, _ = build_graph(client)
+        client.batch_sizes.clear()
+        with patch.object(FinancialSituationMemory, "get_memories", per_role if not shared else original):
+            start = time.perf_counter()
+            for _ in range(runs):
+                run_stub_graph(graph)
+            results[shared] = (time.perf_counter() - start, len(client.batch_sizes))
+    return results[False][0], results[True][0], results[False][1], results[True][1]
+
+
+if __name__ == "__main__":
+    if not SHARED_AVAILABLE:
+        sys.exit(1)
+    print("📚 共享情景向量基准 (5次运行, 嵌入延迟200ms, 5个记忆角色)")
+    per_role_time, shared_time, per_role_requests, shared_requests = benchmark()
+    print(f"  各角色分别嵌入: {per_role_time:.2f}s ({per_role_requests}次请求)")
+    print(f"  共享情景向量:   {shared_time:.2f}s ({shared_requests}次请求)")
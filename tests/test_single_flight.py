@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+请求合并测试
+
+验证 SingleFlight 对并发的相同请求只执行一次并共享结果（包括异常），不同请求和先后发生的请求各自执行，
+single_flight_scope 为每次分析建立独立的合并组且 LangGraph 并行节点继承该范围；
+RealDataSourceManager 的 get_real_stock_info / get_real_financial_data 在并行Agent间合并并统计节省的请求数。
+直接运行时对比三个并行Agent各自请求与合并后的上游调用次数和耗时。
+"""
+
+import contextvars
+import operator
+import os
+import sys
+import threading
+import time
+import unittest
+from typing import Annotated, List, TypedDict
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+try:
+    from tradingagents.utils.single_flight import SingleFlight, current_single_flight, single_flight_scope
+    SINGLE_FLIGHT_AVAILABLE = True
+except ImportError as e:
+    print(f"⚠️ 请求合并模块不可用: {e}")
+    SINGLE_FLIGHT_AVAILABLE = False
+
+
+def _run_concurrently(func, count):
+    """同时启动 count 个线程执行 func，返回结果列表（与LangGraph执行器一样复制调用方的上下文）"""
+    barrier = threading.Barrier(count)
+    results = [None] * count
+
+    def worker(index):
+        barrier.wait()
+        try:
+            results[index] = func()
+        except Exception as e:
+            results[index] = e
+
+    threads = [threading.Thread(target=contextvars.copy_context().run, args=(worker, i)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class _FakeProvider:
+    """模拟较慢的数据源，记录调用次数"""
+
+    def __init__(self, delay=0.2):
+        self.connected = True
+        self.delay = delay
+        self.calls = {"financial": 0, "info": 0}
+        self._lock = threading.Lock()
+
+    def _count(self, name):
+        with self._lock:
+            self.calls[name] += 1
+        time.sleep(self.delay)
+
+    def get_financial_data(self, symbol):
+        self._count("financial")
+        return {"main_indicators": [symbol]}
+
+    def get_stock_info(self, symbol):
+        self._count("info")
+        return {"symbol": symbol, "name": "招商银行", "source": "akshare"}
+
+
+def _manager(provider):
+    from tradingagents.analysis_stock_agent.tools.ashare_data_tools import RealDataSourceManager
+    manager = RealDataSourceManager.__new__(RealDataSourceManager)
+    manager.akshare_provider = provider
+    manager.tushare_provider = provider
+    manager.last_update_time = {}
+    return manager
+
+
+class TestSingleFlight(unittest.TestCase):
+    """合并组测试"""
+
+    def setUp(self):
+        if not SINGLE_FLIGHT_AVAILABLE:
+            self.skipTest("请求合并模块不可用")
+
+    def test_concurrent_calls_share_result(self):
+        """并发的相同请求只执行一次，全部调用拿到同一结果"""
+        group = SingleFlight("test")
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            time.sleep(0.2)
+            return {"value": 42}
+
+        results = _run_concurrently(lambda: group.do(("fetch", "600036"), fetch), 5)
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(result is results[0] for result in results))
+        stats = group.get_stats()
+        self.assertEqual((stats["executed"], stats["saved"], stats["in_flight"]), (1, 4, 0))
+        self.assertEqual(stats["methods"]["fetch"], {"executed": 1, "saved": 4})
+
+    def test_distinct_and_sequential_calls_execute(self):
+        """不同键并发执行；已完成的请求不缓存，再次调用重新执行"""
+        group = SingleFlight("test")
+        calls = []
+        fetch = lambda symbol: calls.append(symbol) or symbol
+        _run_concurrently(lambda: group.do(("fetch", threading.get_ident()), fetch, "x"), 3)
+        group.do(("fetch", "600036"), fetch, "600036")
+        group.do(("fetch", "600036"), fetch, "600036")
+        self.assertEqual(len(calls), 5)
+        self.assertEqual(group.get_stats()["saved"], 0)
+
+    def test_error_shared_then_retried(self):
+        """执行失败时等待者收到同一异常，之后的请求重新执行"""
+        group = SingleFlight("test")
+        attempts = []
+
+        def flaky():
+            attempts.append(1)
+            time.sleep(0.2)
+            if len(attempts) == 1:
+                raise ConnectionError("upstream down")
+            return "ok"
+
+        results = _run_concurrently(lambda: group.do("flaky", flaky), 3)
+        self.assertTrue(all(isinstance(result, ConnectionError) for result in results))
+        self.assertEqual(group.do("flaky", flaky), "ok")
+        self.assertEqual(len(attempts), 2)
+
+    def test_scope_isolated(self):
+        """每次分析使用独立的合并组，范围结束后恢复默认组"""
+        default = current_single_flight()
+        with single_flight_scope("600036@2026-10-18") as first:
+            self.assertIs(current_single_flight(), first)
+            with single_flight_scope("000001@2026-10-18") as second:
+                self.assertIs(current_single_flight(), second)
+            self.assertIs(current_single_flight(), first)
+        self.assertIs(current_single_flight(), default)
+
+
+class TestRealDataSourceCoalescing(unittest.TestCase):
+    """RealDataSourceManager 请求合并测试"""
+
+    def setUp(self):
+        if not SINGLE_FLIGHT_AVAILABLE:
+            self.skipTest("请求合并模块不可用")
+        try:
+            _manager(_FakeProvider())
+        except ImportError as e:
+            self.skipTest(f"A股数据工具不可用: {e}")
+
+    def test_parallel_agents_coalesced(self):
+        """三个Agent各自的数据管理器并发请求同一股票时，每类数据只请求一次"""
+        provider = _FakeProvider()
+        managers = [_manager(provider) for _ in range(3)]
+
+        def agent(index):
+            manager = managers[index % 3]
+            return manager.get_real_financial_data("600036"), manager.get_real_stock_info("600036")
+
+        counter = iter(range(3))
+        lock = threading.Lock()
+
+        def next_agent():
+            with lock:
+                index = next(counter)
+            return agent(index)
+
+        with single_flight_scope("600036@2026-10-18") as group:
+            results = _run_concurrently(next_agent, 3)
+
+        self.assertEqual(provider.calls, {"financial": 1, "info": 1})
+        self.assertEqual(results[0][0][1], "AkShare API (open source, primary)")
+        self.assertEqual(results[1][1][0]["name"], "招商银行")
+        stats = group.get_stats()
+        self.assertEqual(stats["methods"]["get_real_financial_data"], {"executed": 1, "saved": 2})
+        self.assertEqual(stats["methods"]["get_real_stock_info"], {"executed": 1, "saved": 2})
+
+    def test_langgraph_parallel_nodes_inherit_scope(self):
+        """LangGraph并行节点继承 analyze_stock 建立的合并范围"""
+        try:
+            from langgraph.graph import StateGraph, START, END
+        except ImportError as e:
+            self.skipTest(f"LangGraph不可用: {e}")
+
+        class State(TypedDict):
+            ticker: str
+            sources: Annotated[List[str], operator.add]
+
+        provider = _FakeProvider()
+
+        def node(state):
+            _, source = _manager(provider).get_real_financial_data(state["ticker"])
+            return {"sources": [source]}
+
+        graph = StateGraph(State)
+        for name in ("financial_metrics", "industry_comparison", "valuation_analysis"):
+            graph.add_node(name, node)
+            graph.add_edge(START, name)
+            graph.add_edge(name, END)
+        compiled = graph.compile()
+
+        with single_flight_scope("600036") as group:
+            result = compiled.invoke({"ticker": "600036", "sources": []})
+        self.assertEqual(len(result["sources"]), 3)
+        self.assertEqual(provider.calls["financial"], 1)
+        self.assertEqual(group.get_stats()["saved"], 2)
+
+
+def benchmark(delay=0.3):
+    """返回 {方式: (上游调用次数, 耗时ms)}，模拟三个并行Agent各请求一次财务数据和股票信息"""
+    results = {}
+    for label, coalesce in (("各自请求", False), ("请求合并", True)):
+        provider = _FakeProvider(delay=delay)
+        managers = [_manager(provider) for _ in range(3)]
+        if not coalesce:
+            for manager in managers:
+                manager.get_real_financial_data = manager._fetch_real_financial_data
+                manager.get_real_stock_info = manager._fetch_real_stock_info
+        start = time.perf_counter()
+        with single_flight_scope("benchmark"):
+            threads = [threading.Thread(target=contextvars.copy_context().run,
+                                        args=(lambda m=m: (m.get_real_financial_data("600036"),
+                                                           m.get_real_stock_info("600036")),))
+                       for m in managers]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        results[label] = (sum(provider.calls.values()), (time.perf_counter() - start) * 1000)
+    return results
+
+
+if __name__ == "__main__":
+    if not SINGLE_FLIGHT_AVAILABLE:
+        sys.exit(1)
+    print("🔗 三个并行Agent的数据请求基准 (模拟单次上游请求300ms)")
+    for label, (calls, millis) in benchmark().items():
+        print(f"  {label}: 上游调用{calls}次, 耗时{millis:.0f}ms")
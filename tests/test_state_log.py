@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+运行状态日志测试
+
+验证 TradingAgentsGraph._log_state 以追加方式写入 JSONL（可选gzip），
+StateLogReader 可流式遍历、按交易日期定位，以及写入中断后的恢复。
+直接运行时模拟长回测循环，对比每次重写完整JSON与追加写入的耗时。
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+try:
+    from tradingagents.graph.state_log import (
+        StateLogReader, StateLogWriter, migrate_legacy_log, state_log_path,
+    )
+    from tradingagents.graph.trading_graph import TradingAgentsGraph
+    STATE_LOG_AVAILABLE = True
+except ImportError as e:
+    print(f"⚠️ 状态日志模块不可用: {e}")
+    STATE_LOG_AVAILABLE = False
+
+
+def _final_state(trade_date, report_size=200):
+    """构造与 propagate 返回结构一致的最终状态"""
+    text = f"{trade_date} 分析内容 " * report_size
+    return {
+        "company_of_interest": "000001",
+        "trade_date": trade_date,
+        "market_report": text, "sentiment_report": text, "news_report": text, "fundamentals_report": text,
+        "investment_debate_state": {"bull_history": text, "bear_history": text, "history": text,
+                                    "current_response": "看涨", "judge_decision": "买入"},
+        "trader_investment_plan": "买入",
+        "risk_debate_state": {"risky_history": text, "safe_history": text, "neutral_history": text,
+                              "history": text, "judge_decision": "买入"},
+        "investment_plan": "买入",
+        "final_trade_decision": f"{trade_date}: 买入",
+    }
+
+
+def _trade_dates(count):
+    return [f"2024-{1 + i // 28:02d}-{1 + i % 28:02d}" for i in range(count)]
+
+
+class TestStateLog(unittest.TestCase):
+    """运行状态日志测试"""
+
+    def setUp(self):
+        if not STATE_LOG_AVAILABLE:
+            self.skipTest("状态日志模块不可用")
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.log_dir = Path(self.tmp_dir.name)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _write(self, compress, dates):
+        path = state_log_path(self.log_dir, compress)
+        writer = StateLogWriter(path)
+        for trade_date in dates:
+            writer.append(trade_date, {"final_trade_decision": f"{trade_date}: 买入"})
+        return path
+
+    def test_seek_by_trade_date(self):
+        """按交易日期定位，普通与压缩格式一致"""
+        dates = _trade_dates(30)
+        for compress in (False, True):
+            reader = StateLogReader(self._write(compress, dates))
+            self.assertEqual(reader.trade_dates(), dates)
+            self.assertEqual(reader.get(dates[17])["final_trade_decision"], f"{dates[17]}: 买入")
+            self.assertIsNone(reader.get("2030-01-01"))
+
+    def test_stream_in_write_order_and_last_run_wins(self):
+        """流式遍历保持写入顺序，同一日期重复运行时定位到最后一次"""
+        path = self._write(True, ["2024-01-02", "2024-01-03"])
+        StateLogWriter(path).append("2024-01-02", {"final_trade_decision": "卖出"})
+        reader = StateLogReader(path)
+
+        self.assertEqual([r["trade_date"] for r in reader], ["2024-01-02", "2024-01-03", "2024-01-02"])
+        self.assertEqual(reader.get("2024-01-02"), {"final_trade_decision": "卖出"})
+        self.assertEqual(reader.to_dict()["2024-01-02"], {"final_trade_decision": "卖出"})
+
+    def test_truncated_tail_recovered(self):
+        """写入中断留下的残缺记录被读取端忽略，下次写入时截掉"""
+        for compress in (False, True):
+            path = self._write(compress, ["2024-01-02", "2024-01-03"])
+            with open(path, "ab") as f:
+                f.write(b'{"trade_date": "2024-01-04", "sta')
+
+            self.assertEqual(StateLogReader(path).trade_dates(), ["2024-01-02", "2024-01-03"])
+            StateLogWriter(path).append("2024-01-05", {"final_trade_decision": "持有"})
+            reader = StateLogReader(path)
+            self.assertEqual([r["trade_date"] for r in reader], ["2024-01-02", "2024-01-03", "2024-01-05"])
+            self.assertEqual(reader.get("2024-01-05"), {"final_trade_decision": "持有"})
+            path.unlink()
+            path.with_name(path.name + ".idx").unlink()
+
+    def test_missing_index_rebuilt(self):
+        """索引文件丢失时扫描日志重建"""
+        path = self._write(True, _trade_dates(5))
+        path.with_name(path.name + ".idx").unlink()
+
+        self.assertEqual(StateLogReader(path).get(_trade_dates(5)[3]),
+                         {"final_trade_decision": f"{_trade_dates(5)[3]}: 买入"})
+        StateLogWriter(path).append("2024-06-01", {})
+        self.assertEqual(len(StateLogReader(path).trade_dates()), 6)
+
+    def test_log_state_appends_without_keeping_history(self):
+        """_log_state 追加写入，图对象不再保留历史状态"""
+        graph = TradingAgentsGraph.__new__(TradingAgentsGraph)
+        graph.config, graph.ticker, graph.state_log_writers = {"state_log_compress": True}, "000001", {}
+        cwd = os.getcwd()
+        os.chdir(self.tmp_dir.name)
+        try:
+            for trade_date in _trade_dates(3):
+                graph._log_state(trade_date, _final_state(trade_date, report_size=2))
+        finally:
+            os.chdir(cwd)
+
+        path = state_log_path(self.log_dir / "eval_results/000001/TradingAgentsStrategy_logs", compress=True)
+        state = StateLogReader(path).get(_trade_dates(3)[1])
+        self.assertEqual(state["trader_investment_decision"], "买入")
+        self.assertEqual(state["risk_debate_state"]["judge_decision"], "买入")
+        self.assertFalse(hasattr(graph, "log_states_dict"))
+
+    def test_migrate_legacy_json(self):
+        """旧版 full_states_log.json 可导入"""
+        legacy_path = self.log_dir / "full_states_log.json"
+        legacy_path.write_text(json.dumps({"2024-01-02": {"final_trade_decision": "买入"}}), encoding="utf-8")
+
+        reader = StateLogReader(migrate_legacy_log(legacy_path))
+        self.assertEqual(reader.get("2024-01-02"), {"final_trade_decision": "买入"})
+
+
+def benchmark(runs=300):
+    """模拟长回测循环，返回 {方式: (总耗时, 文件字节数)}"""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        log_dir = Path(tmp_dir)
+
+        # 旧方式：内存中保留全部状态，每次运行后以 indent=4 重写整个JSON
+        states = {}
+        start = time.perf_counter()
+        for trade_date in _trade_dates(runs):
+            states[trade_date] = _final_state(trade_date)
+            with open(log_dir / "full_states_log.json", "w") as f:
+                json.dump(states, f, indent=4)
+        results["重写JSON"] = (time.perf_counter() - start, (log_dir / "full_states_log.json").stat().st_size)
+
+        for compress in (False, True):
+            path = state_log_path(log_dir, compress)
+            writer = StateLogWriter(path)
+            start = time.perf_counter()
+            for trade_date in _trade_dates(runs):
+                writer.append(trade_date, _final_state(trade_date))
+            results["追加JSONL.gz" if compress else "追加JSONL"] = (time.perf_counter() - start, path.stat().st_size)
+
+        reader = StateLogReader(state_log_path(log_dir, True))
+        start = time.perf_counter()
+        reader.get(_trade_dates(runs)[runs // 2])
+        results["按日期定位"] = (time.perf_counter() - start, 0)
+    return results
+
+
+if __name__ == "__main__":
+    if not STATE_LOG_AVAILABLE:
+        sys.exit(1)
+    print("📝 状态日志基准 (300个交易日, 每条状态约50KB)")
+    for name, (elapsed, size) in benchmark().items():
+        size_text = f" | 文件 {size / 1024 / 1024:6.1f}MB" if size else ""
+        print(f"  {name:10s} {elapsed:7.3f}s{size_text}")
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+技术指标窗口批量计算测试
+
+验证 get_stock_stats_indicators_window 的批量路径与逐日计算结果一致，
+并在直接运行时对比两者耗时（python tests/test_stockstats_window.py [price_data目录]）。
+未指定目录时使用合成的15年YFin格式CSV。
+"""
+
+import os
+import sys
+import tempfile
+import time
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+import numpy as np
+import pandas as pd
+from dateutil.relativedelta import relativedelta
+
+try:
+    from tradingagents.dataflows import interface
+    STOCKSTATS_AVAILABLE = interface.STOCKSTATS_AVAILABLE
+except ImportError as e:
+    print(f"⚠️ stockstats工具不可用: {e}")
+    STOCKSTATS_AVAILABLE = False
+
+INDICATORS = ["close_50_sma", "close_10_ema", "macd", "rsi", "boll_ub", "atr", "vwma", "mfi"]
+
+
+def write_synthetic_yfin_csv(data_dir, symbol, start="2015-01-01", end="2025-03-25", seed=0):
+    """生成与 YFin-data-2015-01-01-2025-03-25.csv 相同格式的合成行情"""
+    price_dir = os.path.join(data_dir, "market_data", "price_data")
+    os.makedirs(price_dir, exist_ok=True)
+
+    dates = pd.bdate_range(start, end)
+    rng = np.random.default_rng(seed)
+    close = 100 + rng.standard_normal(len(dates)).cumsum()
+    data = pd.DataFrame({
+        "Date": dates.strftime("%Y-%m-%d"),
+        "Open": close + rng.uniform(-1, 1, len(dates)),
+        "High": close + 2,
+        "Low": close - 2,
+        "Close": close,
+        "Adj Close": close,
+        "Volume": rng.integers(100_000, 5_000_000, len(dates)),
+    })
+    data.to_csv(os.path.join(price_dir, f"{symbol}-YFin-data-2015-01-01-2025-03-25.csv"), index=False)
+    return price_dir
+
+
+def _window_args(curr_date, look_back_days):
+    end = datetime.strptime(curr_date, "%Y-%m-%d")
+    return end, end - relativedelta(days=look_back_days)
+
+
+class TestStockstatsWindow(unittest.TestCase):
+    """指标窗口批量计算测试"""
+
+    def setUp(self):
+        if not STOCKSTATS_AVAILABLE:
+            self.skipTest("stockstats工具不可用")
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        write_synthetic_yfin_csv(self.tmp_dir.name, "TEST")
+        self.patcher = patch.object(interface, "DATA_DIR", self.tmp_dir.name)
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+        self.tmp_dir.cleanup()
+
+    def test_batched_matches_day_by_day(self):
+        """批量路径与逐日计算的输出逐行一致"""
+        for indicator in INDICATORS:
+            curr_date, before = _window_args("2024-06-28", 30)
+            batched = interface._get_indicator_window_batched("TEST", indicator, curr_date, before, False)
+            by_day = interface._get_indicator_window_by_day("TEST", indicator, curr_date, before, False)
+            self.assertTrue(batched)
+            self.assertEqual(batched, by_day, indicator)
+
+    def test_window_skips_non_trading_days_offline(self):
+        """离线模式只输出交易日"""
+        report = interface.get_stock_stats_indicators_window("TEST", "rsi", "2024-06-30", 7, False)
+        self.assertNotIn("\n2024-06-29:", report)
+        self.assertNotIn("\n2024-06-30:", report)
+        self.assertIn("2024-06-28:", report)
+
+    def test_multiple_indicators_in_one_pass(self):
+        """一次调用返回多个指标列"""
+        window = interface.StockstatsUtils.get_stock_stats_window(
+            "TEST", INDICATORS, "2024-06-01", "2024-06-30",
+            os.path.join(self.tmp_dir.name, "market_data", "price_data"),
+        )
+        self.assertEqual(list(window.columns), INDICATORS)
+        self.assertEqual(len(window), 20)
+        self.assertEqual(window.index[0], "2024-06-03")
+
+    def test_falls_back_when_batch_fails(self):
+        """批量路径异常时回退到逐日计算"""
+        with patch.object(interface.StockstatsUtils, "get_stock_stats_window", side_effect=RuntimeError("boom")):
+            report = interface.get_stock_stats_indicators_window("TEST", "rsi", "2024-06-28", 3, False)
+        self.assertIn("2024-06-28:", report)
+
+
+def benchmark(price_data_root=None, symbol=None, curr_date="2025-03-24", look_back_days=30, indicator="macd"):
+    """对比逐日循环与批量路径的耗时，返回 (逐日耗时, 批量耗时)"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if price_data_root is None:
+            symbol = "BENCH"
+            write_synthetic_yfin_csv(tmp_dir, symbol)
+            data_root = tmp_dir
+        else:
+            data_root = price_data_root
+
+        with patch.object(interface, "DATA_DIR", data_root):
+            end, before = _window_args(curr_date, look_back_days)
+
+            start = time.perf_counter()
+            by_day = interface._get_indicator_window_by_day(symbol, indicator, end, before, False)
+            by_day_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            batched = interface._get_indicator_window_batched(symbol, indicator, end, before, False)
+            batched_time = time.perf_counter() - start
+
+    assert by_day == batched, "批量结果与逐日结果不一致"
+    return by_day_time, batched_time
+
+
+if __name__ == "__main__":
+    if not STOCKSTATS_AVAILABLE:
+        sys.exit(1)
+
+    data_root = sys.argv[1] if len(sys.argv) > 1 else None
+    symbols = [None]
+    if data_root:
+        price_dir = os.path.join(data_root, "market_data", "price_data")
+        symbols = sorted(
+            f.split("-YFin-data-")[0] for f in os.listdir(price_dir) if "-YFin-data-" in f
+        )[:5]
+
+    print("📈 指标窗口计算基准 (30天回溯, macd)")
+    for symbol in symbols:
+        by_day_time, batched_time = benchmark(data_root, symbol)
+        print(f"  {symbol or '合成数据'}: 逐日 {by_day_time:.3f}s | 批量 {batched_time:.3f}s | "
+              f"加速 {by_day_time / batched_time:.1f}x")
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Token使用滚动统计测试
+
+验证 UsageAggregates 的按日/供应商/模型/会话计数与逐条扫描全部记录的统计结果一致（窗口起点精确到记录时间）：
+从账本重建、增量写入、账本轮转淘汰旧分段、ConfigManager重启后重建，以及成本警告读取的今日成本
+（使用MongoDB时同样读取启动时建立的计数）。
+直接运行时对比逐条扫描与滚动计数在上万条历史记录下的统计耗时。
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+import unittest
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+try:
+    from tradingagents.config.config_manager import ConfigManager, TokenTracker
+    from tradingagents.config.usage_aggregates import UsageAggregates
+    from tradingagents.config.usage_ledger import UsageLedger
+    AGGREGATES_AVAILABLE = True
+except ImportError as e:
+    print(f"⚠️ 配置管理器不可用: {e}")
+    AGGREGATES_AVAILABLE = False
+
+NOW = datetime(2025, 3, 15, 14, 30, 0)
+
+
+def synthetic_records(count, seed=0, now=NOW, span_days=45):
+    """生成分布在最近 span_days 天内的使用记录（含少量无法解析的时间戳）"""
+    rng = random.Random(seed)
+    records = []
+    for i in range(count):
+        timestamp = now - timedelta(seconds=rng.randint(0, span_days * 86400))
+        records.append({
+            "timestamp": timestamp.isoformat() if i % 97 else "not-a-time",
+            "provider": rng.choice(["dashscope", "deepseek", "openai"]),
+            "model_name": rng.choice(["qwen-turbo", "deepseek-chat", "gpt-4"]),
+            "input_tokens": rng.randint(100, 5000),
+            "output_tokens": rng.randint(50, 2000),
+            "cost": round(rng.uniform(0.0001, 0.05), 6),
+            "session_id": f"session_{rng.randint(0, 9)}",
+            "analysis_type": "stock_analysis",
+        })
+    return records
+
+
+def full_statistics(records, days, now=NOW):
+    """逐条扫描全部记录的统计（原 get_usage_statistics 的JSON回退实现）"""
+    cutoff_date = now - timedelta(days=days)
+    recent = []
+    for record in records:
+        try:
+            if datetime.fromisoformat(record["timestamp"]) >= cutoff_date:
+                recent.append(record)
+        except ValueError:
+            continue
+    provider_stats, model_stats = {}, {}
+    for record in recent:
+        for group, key in ((provider_stats, record["provider"]),
+                           (model_stats, f"{record['provider']}/{record['model_name']}")):
+            stats = group.setdefault(key, {"cost": 0, "input_tokens": 0, "output_tokens": 0, "requests": 0})
+            stats["cost"] += record["cost"]
+            stats["input_tokens"] += record["input_tokens"]
+            stats["output_tokens"] += record["output_tokens"]
+            stats["requests"] += 1
+    return {
+        "period_days": days,
+        "total_cost": round(sum(r["cost"] for r in recent), 4),
+        "total_input_tokens": sum(r["input_tokens"] for r in recent),
+        "total_output_tokens": sum(r["output_tokens"] for r in recent),
+        "total_requests": len(recent),
+        "provider_stats": provider_stats,
+        "model_stats": model_stats,
+        "records_count": len(recent),
+    }
+
+
+class TestUsageAggregates(unittest.TestCase):
+    """滚动统计与全量重算一致性测试"""
+
+    def setUp(self):
+        if not AGGREGATES_AVAILABLE:
+            self.skipTest("配置管理器不可用")
+
+    def assertStatsEqual(self, actual, expected):
+        self.assertEqual(set(actual), set(expected))
+        for key in ("period_days", "total_input_tokens", "total_output_tokens", "total_requests", "records_count"):
+            self.assertEqual(actual[key], expected[key], key)
+        self.assertAlmostEqual(actual["total_cost"], expected["total_cost"], places=4)
+        for group in ("provider_stats", "model_stats"):
+            self.assertEqual(set(actual[group]), set(expected[group]))
+            for key, data in expected[group].items():
+                got = actual[group][key]
+                self.assertEqual({k: got[k] for k in ("input_tokens", "output_tokens", "requests")},
+                                 {k: data[k] for k in ("input_tokens", "output_tokens", "requests")})
+                self.assertAlmostEqual(got["cost"], data["cost"], places=9)
+
+    def test_rebuild_matches_full_scan(self):
+        """从记录重建的计数与逐条统计一致（含窗口起点当天的部分记录）"""
+        records = synthetic_records(3000)
+        aggregates = UsageAggregates(records)
+        for days in (1, 7, 30, 90):
+            self.assertStatsEqual(aggregates.get_statistics(days, now=NOW), full_statistics(records, days))
+
+    def test_incremental_matches_full_scan(self):
+        """逐条增量写入后的计数与逐条统计一致"""
+        records = synthetic_records(2000, seed=1)
+        aggregates = UsageAggregates()
+        for i, record in enumerate(records):
+            aggregates.add(record)
+            if i % 500 == 499:
+                self.assertStatsEqual(aggregates.get_statistics(7, now=NOW), full_statistics(records[:i + 1], 7))
+
+    def test_session_day_and_daily_usage(self):
+        """会话成本、自然日成本和按日汇总与逐条累加一致"""
+        records = synthetic_records(2000, seed=2)
+        aggregates = UsageAggregates(records)
+
+        sessions, days = defaultdict(float), defaultdict(float)
+        for record in records:
+            sessions[record["session_id"]] += record["cost"]
+            if record["timestamp"] != "not-a-time":
+                days[datetime.fromisoformat(record["timestamp"]).date()] += record["cost"]
+        for session_id, cost in sessions.items():
+            self.assertAlmostEqual(aggregates.get_session_cost(session_id), cost, places=9)
+        self.assertEqual(aggregates.get_session_cost("missing"), 0)
+        for day, cost in days.items():
+            self.assertAlmostEqual(aggregates.get_day_cost(day), cost, places=9)
+
+        daily = aggregates.get_daily_usage(10, now=NOW)
+        self.assertEqual(sum(d["requests"] for d in daily), full_statistics(records, 10)["total_requests"])
+        self.assertEqual([d["date"] for d in daily], sorted(d["date"] for d in daily))
+
+    def test_ledger_eviction_keeps_counts_in_sync(self):
+        """账本轮转删除旧分段时同步扣减计数"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            aggregates = UsageAggregates()
+            ledger = UsageLedger(os.path.join(temp_dir, "usage"), max_records=300, segment_records=50,
+                                 flush_interval=0, on_evict=aggregates.remove_many)
+            for record in sorted(synthetic_records(1000, seed=3), key=lambda r: r["timestamp"]):
+                ledger.append(record)
+                aggregates.add(record)
+
+            remaining = ledger.read_records()
+            self.assertLess(len(remaining), 400)
+            for days in (1, 30, 90):
+                self.assertStatsEqual(aggregates.get_statistics(days, now=NOW), full_statistics(remaining, days))
+            ledger.close()
+
+    def test_window_start_exact(self):
+        """窗口起点所在的那一小时按记录时间逐条比较，与逐条扫描的边界一致"""
+        cutoff = NOW - timedelta(days=1)  # 14:30
+        records = [dict(synthetic_records(1)[0], timestamp=(cutoff + timedelta(seconds=s)).isoformat())
+                   for s in (-1860, -1200, -1, 0, 1, 600, 1800)]
+        aggregates = UsageAggregates(records)
+        for days in (1, 30, 90):
+            self.assertStatsEqual(aggregates.get_statistics(days, now=NOW), full_statistics(records, days))
+        self.assertEqual(aggregates.get_statistics(1, now=NOW)["total_requests"], 4)
+        aggregates.remove_many(records[3:4])
+        self.assertEqual(aggregates.get_statistics(1, now=NOW)["total_requests"], 3)
+
+    def test_eviction_keeps_no_empty_buckets(self):
+        """扣除记录更新计数和所在小时的明细，全部扣除后不留下空计数"""
+        records = synthetic_records(2000, seed=4)
+        aggregates = UsageAggregates(records)
+        aggregates.remove_many(records[:1500])
+        self.assertStatsEqual(aggregates.get_statistics(30, now=NOW), full_statistics(records[1500:], 30))
+        aggregates.remove_many(records[1500:])
+        self.assertEqual(aggregates._days, {})
+        self.assertEqual(aggregates._sessions, {})
+
+    def test_mongodb_mode_reads_counters(self):
+        """使用MongoDB时启动从MongoDB最近记录建立计数，成本警告和会话成本不再查询MongoDB"""
+        class FakeMongoStorage:
+            def __init__(self, records):
+                self.records = records
+                self.saved = []
+
+            def is_connected(self):
+                return True
+
+            def load_usage_records(self, limit=10000, days=None):
+                return self.records
+
+            def save_usage_record(self, record):
+                self.saved.append(record)
+                return True
+
+            def get_usage_statistics(self, days=30):
+                raise AssertionError("成本警告不应查询MongoDB统计")
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            manager = ConfigManager(temp_dir)
+            earlier = manager.add_usage_record("dashscope", "qwen-turbo", 1000, 500, session_id="s1")
+            manager.usage_ledger.replace([])
+            manager.mongodb_storage = FakeMongoStorage([earlier])
+            manager._seed_usage_aggregates()
+
+            tracker = TokenTracker(manager)
+            for _ in range(3):
+                tracker.track_usage("dashscope", "qwen-turbo", 1000, 500, session_id="s1")
+            self.assertEqual(len(manager.mongodb_storage.saved), 3)
+            self.assertAlmostEqual(manager.get_today_cost(), earlier.cost * 4)
+            self.assertAlmostEqual(tracker.get_session_cost("s1"), earlier.cost * 4)
+            manager.usage_ledger.close()
+
+    def test_config_manager_rebuilds_on_restart(self):
+        """ConfigManager重启后从账本重建计数，统计、会话成本和今日成本保持一致"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            manager = ConfigManager(temp_dir)
+            tracker = TokenTracker(manager)
+            for i in range(20):
+                tracker.track_usage("dashscope", "qwen-turbo", 1000 + i, 500, session_id=f"s{i % 3}")
+            before = manager.get_usage_statistics(1)
+            session_cost = tracker.get_session_cost("s1")
+            manager.usage_ledger.close()
+
+            restarted = ConfigManager(temp_dir)
+            records = [vars(r) for r in restarted.load_usage_records()]
+            self.assertStatsEqual(restarted.get_usage_statistics(1), before)
+            self.assertStatsEqual(before, full_statistics(records, 1, now=datetime.now()))
+            self.assertAlmostEqual(TokenTracker(restarted).get_session_cost("s1"), session_cost)
+            self.assertAlmostEqual(restarted.get_today_cost(), sum(r["cost"] for r in records))
+            restarted.usage_ledger.close()
+
+
+def benchmark(history=20000, rounds=50):
+    """对比逐条扫描与滚动计数获取统计的耗时，返回 (逐条扫描ms, 滚动计数ms)"""
+    records = synthetic_records(history, now=datetime.now())
+    aggregates = UsageAggregates(records)
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        full_statistics(records, 1, now=datetime.now())
+    scan_ms = (time.perf_counter() - start) / rounds * 1000
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        aggregates.get_statistics(1)
+        aggregates.get_day_cost()
+    aggregate_ms = (time.perf_counter() - start) / rounds * 1000
+    return scan_ms, aggregate_ms
+
+
+if __name__ == "__main__":
+    if not AGGREGATES_AVAILABLE:
+        sys.exit(1)
+    print("📊 使用统计基准 (20000条历史记录, 最近1天统计 + 今日成本)")
+    scan_ms, aggregate_ms = benchmark()
+    print(f"  逐条扫描: {scan_ms:.2f}ms")
+    print(f"  滚动计数: {aggregate_ms:.3f}ms")
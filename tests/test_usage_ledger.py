@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Token使用记录账本测试
+
+验证 ConfigManager.add_usage_record 在MongoDB不可用时追加写入 UsageLedger：
+后台批量刷盘、分段轮转与保留上限、中断后残缺记录的恢复、整体替换中断时不丢失记录、
+旧版 usage.json 的导入（导入中断后下次启动重新导入），
+以及单次写入开销不随历史记录数量增长。
+直接运行时对比旧版整体读写 usage.json 与账本在不同历史规模下的单次写入耗时。
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+import unittest
+from dataclasses import asdict
+from unittest.mock import patch
+
+# 添加项目根目录到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+try:
+    from tradingagents.config.config_manager import ConfigManager, TokenTracker
+    from tradingagents.config.usage_ledger import UsageLedger
+    LEDGER_AVAILABLE = True
+except ImportError as e:
+    print(f"⚠️ 配置管理器不可用: {e}")
+    LEDGER_AVAILABLE = False
+
+
+def _record(i, cost=0.01, session_id="s1", timestamp="2025-01-01T10:00:00"):
+    return {"timestamp": timestamp, "provider": "dashscope", "model_name": "qwen-turbo",
+            "input_tokens": 100 + i, "output_tokens": 50, "cost": cost,
+            "session_id": session_id, "analysis_type": "stock_analysis"}
+
+
+class TestUsageLedger(unittest.TestCase):
+    """使用记录账本测试"""
+
+    def setUp(self):
+        if not LEDGER_AVAILABLE:
+            self.skipTest("配置管理器不可用")
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(lambda: __import__("shutil").rmtree(self.temp_dir, ignore_errors=True))
+
+    def _ledger(self, **kwargs):
+        ledger = UsageLedger(os.path.join(self.temp_dir, "usage"), **kwargs)
+        self.addCleanup(ledger.close)
+        return ledger
+
+    def test_write_behind_batches_fsync(self):
+        """记录先进入队列，后台按批次写入，每批只fsync一次"""
+        ledger = self._ledger(flush_interval=60, batch_size=1000)
+        with patch("tradingagents.config.usage_ledger.os.fsync") as fsync:
+            for i in range(500):
+                ledger.append(_record(i))
+            self.assertEqual(fsync.call_count, 0)
+            self.assertEqual(len(ledger), 500)
+            ledger.flush()
+            self.assertEqual(fsync.call_count, 1)
+
+    def test_background_flusher_writes_after_interval(self):
+        """后台线程在刷盘间隔后写入磁盘"""
+        ledger = self._ledger(flush_interval=0.1)
+        ledger.append(_record(0))
+        time.sleep(0.4)
+        with open(os.path.join(self.temp_dir, "usage", "usage-000001.jsonl"), encoding="utf-8") as f:
+            self.assertEqual([json.loads(line) for line in f], [_record(0)])
+
+    def test_reads_see_pending_records(self):
+        """读取前会刷盘，能读到刚写入的记录"""
+        ledger = self._ledger(flush_interval=60)
+        for i in range(3):
+            ledger.append(_record(i))
+        self.assertEqual(ledger.read_records(), [_record(i) for i in range(3)])
+
+    def test_rotation_and_retention(self):
+        """分段写满后轮转，超过上限时删除最旧的分段"""
+        ledger = self._ledger(max_records=25, segment_records=10, flush_interval=0)
+        for i in range(57):
+            ledger.append(_record(i))
+
+        segments = sorted(os.listdir(os.path.join(self.temp_dir, "usage")))
+        self.assertEqual(segments, ["usage-000003.jsonl", "usage-000004.jsonl",
+                                    "usage-000005.jsonl", "usage-000006.jsonl"])
+        self.assertEqual(ledger.read_records(), [_record(i) for i in range(20, 57)])
+
+    def test_recovers_torn_tail(self):
+        """中断留下的残缺行在重新打开时被截掉，之后的写入正常"""
+        ledger = self._ledger(flush_interval=0)
+        ledger.append(_record(0))
+        ledger.append(_record(1))
+        path = os.path.join(self.temp_dir, "usage", "usage-000001.jsonl")
+        with open(path, "a", encoding="utf-8") as f:
+            f.write('{"timestamp": "2025-01-01T10:0')
+
+        reopened = self._ledger(flush_interval=0)
+        reopened.append(_record(2))
+        self.assertEqual(reopened.read_records(), [_record(0), _record(1), _record(2)])
+        self.assertEqual(len(reopened), 3)
+
+    def test_interrupted_replace_keeps_old_records(self):
+        """替换在写入提交标记前中断（暂存分段已写入）时，重新打开仍是旧记录且暂存分段被清理"""
+        ledger = self._ledger(segment_records=2, flush_interval=0)
+        ledger.replace([_record(i) for i in range(5)])
+        ledger._stage_segments(ledger._segments[-1][0] + 1, [_record(i) for i in range(100, 103)])
+
+        reopened = self._ledger(segment_records=2, flush_interval=0)
+        self.assertEqual(reopened.read_records(), [_record(i) for i in range(5)])
+        self.assertFalse([name for name in os.listdir(os.path.join(self.temp_dir, "usage"))
+                          if not name.endswith(".jsonl")])
+
+    def test_interrupted_replace_completed_on_open(self):
+        """替换在写入提交标记后中断时，重新打开完成替换，旧分段被删除"""
+        ledger = self._ledger(segment_records=2, flush_interval=0)
+        ledger.replace([_record(i) for i in range(5)])
+        first = ledger._segments[-1][0] + 1
+        ledger._stage_segments(first, [_record(i) for i in range(100, 103)])
+        ledger._write_marker(first)
+
+        reopened = self._ledger(segment_records=2, flush_interval=0)
+        self.assertEqual(reopened.read_records(), [_record(i) for i in range(100, 103)])
+        self.assertEqual(sorted(os.listdir(os.path.join(self.temp_dir, "usage"))),
+                         [f"usage-{first:06d}.jsonl", f"usage-{first + 1:06d}.jsonl"])
+
+    def test_failed_replace_keeps_old_records(self):
+        """写入新记录失败时替换不生效，旧记录保留"""
+        ledger = self._ledger(flush_interval=0)
+        ledger.replace([_record(i) for i in range(3)])
+        with patch("tradingagents.config.usage_ledger.os.fsync", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                ledger.replace([_record(9)])
+        self.assertEqual(ledger.read_records(), [_record(i) for i in range(3)])
+        self.assertEqual(len(self._ledger().read_records()), 3)
+
+    def test_close_flushes_pending(self):
+        """关闭时刷盘，重新打开后记录完整"""
+        ledger = self._ledger(flush_interval=60)
+        for i in range(5):
+            ledger.append(_record(i))
+        ledger.close()
+        self.assertEqual(self._ledger().read_records(), [_record(i) for i in range(5)])
+
+
+class TestConfigManagerLedger(unittest.TestCase):
+    """ConfigManager使用记录存储测试"""
+
+    def setUp(self):
+        if not LEDGER_AVAILABLE:
+            self.skipTest("配置管理器不可用")
+        temp = tempfile.TemporaryDirectory()
+        self.addCleanup(temp.cleanup)
+        self.config_dir = temp.name
+
+    def _manager(self):
+        manager = ConfigManager(self.config_dir)
+        self.addCleanup(manager.usage_ledger.close)
+        return manager
+
+    def test_add_and_load(self):
+        """添加的记录可以立即读到，会话成本和统计照常计算"""
+        manager = self._manager()
+        tracker = TokenTracker(manager)
+        for _ in range(3):
+            tracker.track_usage("dashscope", "qwen-turbo", 1000, 500, session_id="abc")
+
+        records = manager.load_usage_records()
+        self.assertEqual(len(records), 3)
+        self.assertAlmostEqual(tracker.get_session_cost("abc"), 3 * records[0].cost)
+        self.assertEqual(manager.get_usage_statistics(1)["total_requests"], 3)
+
+    def test_legacy_usage_json_migrated(self):
+        """旧版 usage.json 在首次启动时导入账本"""
+        with open(os.path.join(self.config_dir, "usage.json"), "w", encoding="utf-8") as f:
+            json.dump([_record(i) for i in range(4)], f)
+
+        manager = self._manager()
+        self.assertEqual([asdict(r) for r in manager.load_usage_records()], [_record(i) for i in range(4)])
+        self.assertFalse(os.path.exists(os.path.join(self.config_dir, "usage.json")))
+        self.assertTrue(os.path.exists(os.path.join(self.config_dir, "usage.json.migrated")))
+
+    def test_interrupted_migration_reimported(self):
+        """导入失败时不重命名 usage.json，账本只有部分记录时下次启动重新完整导入"""
+        legacy = [_record(i) for i in range(4)]
+        with open(os.path.join(self.config_dir, "usage.json"), "w", encoding="utf-8") as f:
+            json.dump(legacy, f)
+
+        with patch.object(UsageLedger, "replace", side_effect=OSError("disk full")):
+            self._manager()
+        self.assertTrue(os.path.exists(os.path.join(self.config_dir, "usage.json")))
+
+        partial = UsageLedger(os.path.join(self.config_dir, "usage"), flush_interval=0)
+        partial.replace(legacy[:2])
+        partial.close()
+        manager = self._manager()
+        self.assertEqual([asdict(r) for r in manager.load_usage_records()], legacy)
+        self.assertEqual(manager.get_usage_statistics(3650)["total_requests"], 4)
+        self.assertTrue(os.path.exists(os.path.join(self.config_dir, "usage.json.migrated")))
+
+    def test_save_usage_records_replaces(self):
+        """save_usage_records 整体替换账本（如清空记录）"""
+        manager = self._manager()
+        manager.add_usage_record("dashscope", "qwen-turbo", 10, 10, "s")
+        manager.save_usage_records([])
+        self.assertEqual(manager.load_usage_records(), [])
+
+    def test_max_usage_records_setting_applies(self):
+        """修改 max_usage_records 设置后账本的保留上限随之更新"""
+        manager = self._manager()
+        settings = manager.load_settings()
+        settings["max_usage_records"] = 5
+        manager.save_settings(settings)
+        for i in range(8):
+            manager.add_usage_record("dashscope", "qwen-turbo", i, 1, "s")
+        self.assertEqual([r.input_tokens for r in manager.load_usage_records()], [3, 4, 5, 6, 7])
+
+    def test_append_cost_independent_of_history(self):
+        """单次写入耗时与已有历史记录数量无关"""
+        small = _time_appends(self.config_dir + "/small", history=0)
+        large = _time_appends(self.config_dir + "/large", history=20000)
+        self.assertLess(large, small * 3 + 0.05)
+
+
+def _legacy_add(usage_file, record, max_records=10000):
+    """旧版写入方式：读取全部记录、追加一条、整体重写（基准对照）"""
+    records = []
+    if os.path.exists(usage_file):
+        with open(usage_file, "r", encoding="utf-8") as f:
+            records = json.load(f)
+    records.append(record)
+    records = records[-max_records:]
+    with open(usage_file, "w", encoding="utf-8") as f:
+        json.dump(records, f, ensure_ascii=False, indent=2)
+
+
+def _time_appends(config_dir, history, calls=200):
+    """在已有 history 条记录的账本上连续写入，返回总耗时"""
+    os.makedirs(config_dir, exist_ok=True)
+    ledger = UsageLedger(os.path.join(config_dir, "usage"), max_records=history + 10000, flush_interval=0.5)
+    if history:
+        ledger.replace([_record(i) for i in range(history)])
+    start = time.perf_counter()
+    for i in range(calls):
+        ledger.append(_record(i))
+    elapsed = time.perf_counter() - start
+    ledger.close()
+    return elapsed
+
+
+def benchmark(histories=(0, 1000, 5000, 10000), calls=50):
+    """返回 [(历史记录数, 旧版单次耗时ms, 账本单次耗时ms)]"""
+    results = []
+    for history in histories:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            usage_file = os.path.join(temp_dir, "usage.json")
+            if history:
+                with open(usage_file, "w", encoding="utf-8") as f:
+                    json.dump([_record(i) for i in range(history)], f)
+            start = time.perf_counter()
+            for i in range(calls):
+                _legacy_add(usage_file, _record(i))
+            legacy_ms = (time.perf_counter() - start) / calls * 1000
+            ledger_ms = _time_appends(temp_dir, history, calls) / calls * 1000
+        results.append((history, legacy_ms, ledger_ms))
+    return results
+
+
+if __name__ == "__main__":
+    if not LEDGER_AVAILABLE:
+        sys.exit(1)
+    print("🧾 使用记录单次写入基准 (旧版整体读写usage.json vs 追加写入账本)")
+    for history, legacy_ms, ledger_ms in benchmark():
+        print(f"  历史 {history:6d}条 | 旧版 {legacy_ms:8.2f}ms | 账本 {ledger_ms:6.3f}ms")
@@ -1,6 +1,6 @@
 from .utils.agent_utils import Toolkit, create_msg_delete
 from .utils.agent_states import AgentState, InvestDebateState, RiskDebateState
-from .utils.memory import FinancialSituationMemory
+from .utils.memory import FinancialSituationMemory, create_situation_embedder
 
 from .analysts.fundamentals_analyst import create_fundamentals_analyst
 from .analysts.market_analyst import create_market_analyst
@@ -40,6 +40,7 @@ __all__ = [
     "create_risky_debator",
     "create_risk_manager",
     "create_safe_debator",
+    "create_situation_embedder",
     "create_social_media_analyst",
     "create_trader",
 ]
@@ -25,14 +25,24 @@ def _get_company_name(ticker: str, market_info: dict) -> str:
         str: 公司名称
     """
     try:
+        # 优先查本地证券主数据（批量加载的代码名称表，无网络或数据库往返）
+        from tradingagents.dataflows.security_master import get_security_master
+        security_master = get_security_master()
+        company_name = security_master.get_name(ticker)
+        if company_name:
+            logger.debug(f"📊 [DEBUG] 从证券主数据获取名称: {ticker} -> {company_name}")
+            return company_name
+
         if market_info['is_china']:
-            # 中国A股：使用统一接口获取股票信息
+            # 中国A股：主数据中没有时使用统一接口获取股票信息
             from tradingagents.dataflows.interface import get_china_stock_info_unified
             stock_info = get_china_stock_info_unified(ticker)
 
             # 解析股票名称
             if "股票名称:" in stock_info:
                 company_name = stock_info.split("股票名称:")[1].split("\n")[0].strip()
+                if not company_name.startswith('股票'):
+                    security_master.upsert(ticker, company_name, source="unified_interface")
                 logger.debug(f"📊 [DEBUG] 从统一接口获取中国股票名称: {ticker} -> {company_name}")
                 return company_name
             else:
@@ -44,6 +54,8 @@ def _get_company_name(ticker: str, market_info: dict) -> str:
             try:
                 from tradingagents.dataflows.improved_hk_utils import get_hk_company_name_improved
                 company_name = get_hk_company_name_improved(ticker)
+                if not company_name.startswith('港股'):
+                    security_master.upsert(ticker, company_name, source="hk_provider")
                 logger.debug(f"📊 [DEBUG] 使用改进港股工具获取名称: {ticker} -> {company_name}")
                 return company_name
             except Exception as e:
@@ -53,19 +65,8 @@ def _get_company_name(ticker: str, market_info: dict) -> str:
                 return f"港股{clean_ticker}"
 
         elif market_info['is_us']:
-            # 美股：使用简单映射或返回代码
-            us_stock_names = {
-                'AAPL': '苹果公司',
-                'TSLA': '特斯拉',
-                'NVDA': '英伟达',
-                'MSFT': '微软',
-                'GOOGL': '谷歌',
-                'AMZN': '亚马逊',
-                'META': 'Meta',
-                'NFLX': '奈飞'
-            }
-
-            company_name = us_stock_names.get(ticker.upper(), f"美股{ticker}")
+            # 美股：常用代码已在证券主数据的内置表中，其他返回默认名称
+            company_name = f"美股{ticker}"
             logger.debug(f"📊 [DEBUG] 美股名称映射: {ticker} -> {company_name}")
             return company_name
 
@@ -1,6 +1,8 @@
 import time
 import json
 
+from tradingagents.agents.utils.memory import build_situation
+
 # 导入统一日志系统
 from tradingagents.utils.logging_init import get_logger
 logger = get_logger("default")
@@ -16,11 +18,13 @@ def create_research_manager(llm, memory):
 
         investment_debate_state = state["investment_debate_state"]
 
-        curr_situation = f"{market_research_report}\n\n{sentiment_report}\n\n{news_report}\n\n{fundamentals_report}"
+        curr_situation = build_situation(state)
 
         # 安全检查：确保memory不为None
         if memory is not None:
-            past_memories = memory.get_memories(curr_situation, n_matches=2)
+            past_memories = memory.get_memories(
+                curr_situation, n_matches=2, query_embedding=state.get("situation_embedding")
+            )
         else:
             logger.warning(f"⚠️ [DEBUG] memory为None，跳过历史记忆检索")
             past_memories = []
@@ -64,6 +64,9 @@ class AgentState(MessagesState):
         str, "Report from the News Researcher of current world affairs"
     ]
     fundamentals_report: Annotated[str, "Report from the Fundamentals Researcher"]
+    situation_embedding: Annotated[
+        list, "Embedding of the combined analyst reports, shared by all memory lookups"
+    ]
 
     # researcher team discussion step
     investment_debate_state: Annotated[
@@ -559,16 +559,19 @@ class Toolkit:
         import re
         if re.match(r'^\d{6}$', str(ticker)):
             logger.debug(f"📊 [DEBUG] 检测到中国A股代码: {ticker}")
-            # 使用统一接口获取中国股票名称
+            # 优先查本地证券主数据，没有时使用统一接口获取中国股票名称
             try:
-                from tradingagents.dataflows.interface import get_china_stock_info_unified
-                stock_info = get_china_stock_info_unified(ticker)
-
-                # 解析股票名称
-                if "股票名称:" in stock_info:
-                    company_name = stock_info.split("股票名称:")[1].split("\n")[0].strip()
-                else:
-                    company_name = f"股票代码{ticker}"
+                from tradingagents.dataflows.security_master import get_security_master
+                company_name = get_security_master().get_name(ticker)
+                if not company_name:
+                    from tradingagents.dataflows.interface import get_china_stock_info_unified
+                    stock_info = get_china_stock_info_unified(ticker)
+
+                    # 解析股票名称
+                    if "股票名称:" in stock_info:
+                        company_name = stock_info.split("股票名称:")[1].split("\n")[0].strip()
+                    else:
+                        company_name = f"股票代码{ticker}"
 
                 logger.debug(f"📊 [DEBUG] 中国股票名称映射: {ticker} -> {company_name}")
             except Exception as e:
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+嵌入向量缓存
+按 (provider, model, sha256(text)) 内容寻址的SQLite持久化缓存，
+相同文本在一次分析内、以及多次运行之间只请求一次嵌入
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# 导入统一日志系统
+from tradingagents.utils.logging_init import get_logger
+logger = get_logger("agents.utils.memory")
+
+
+def text_digest(text: str) -> str:
+    """文本内容的sha256摘要"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class EmbeddingCache:
+    """嵌入向量缓存 - 向量以float64二进制存储，读取结果与原始嵌入完全一致"""
+
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), timeout=10, check_same_thread=False)
+        self._stats = {'hits': 0, 'misses': 0, 'writes': 0}
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    provider    TEXT NOT NULL,
+                    model       TEXT NOT NULL,
+                    text_hash   TEXT NOT NULL,
+                    dim         INTEGER NOT NULL,
+                    vector      BLOB NOT NULL,
+                    created_ts  REAL NOT NULL,
+                    PRIMARY KEY (provider, model, text_hash)
+                )
+                """
+            )
+
+    def get_many(self, provider: str, model: str, texts: List[str]) -> Dict[str, List[float]]:
+        """批量查找，返回 {文本: 向量}，未命中的文本不在结果中"""
+        digests = {text_digest(text): text for text in set(texts)}
+        found = {}
+        keys = list(digests)
+        with self._lock:
+            # SQLite单条语句的参数个数有限，分段查询
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE provider = ? AND model = ? "
+                    f"AND text_hash IN ({', '.join('?' for _ in chunk)})",
+                    [provider, model, *chunk],
+                )
+                for text_hash, blob in rows:
+                    found[digests[text_hash]] = array('d', blob).tolist()
+
+            hits = sum(1 for text in texts if text in found)
+            self._stats['hits'] += hits
+            self._stats['misses'] += len(texts) - hits
+        return found
+
+    def put_many(self, provider: str, model: str, embeddings: Dict[str, List[float]]):
+        """批量写入 {文本: 向量}"""
+        if not embeddings:
+            return
+        now = time.time()
+        rows = [(provider, model, text_digest(text), len(vector), array('d', vector).tobytes(), now)
+                for text, vector in embeddings.items()]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (provider, model, text_hash, dim, vector, created_ts) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._stats['writes'] += len(rows)
+
+    def get_stats(self) -> Dict[str, float]:
+        """命中率统计（当前进程内）"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = {'hits': 0, 'misses': 0, 'writes': 0}
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM embeddings")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_caches: Dict[str, EmbeddingCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_embedding_cache(db_path) -> Optional[EmbeddingCache]:
+    """获取指定路径的共享嵌入缓存实例，打开失败时返回None（不影响记忆功能）"""
+    key = str(Path(db_path).resolve())
+    with _caches_lock:
+        if key not in _caches:
+            try:
+                _caches[key] = EmbeddingCache(db_path)
+                logger.info(f"📚 嵌入缓存已启用: {db_path}")
+            except Exception as e:
+                logger.warning(f"⚠️ 嵌入缓存初始化失败，直接请求嵌入: {e}")
+                return None
+        return _caches[key]
@@ -5,12 +5,27 @@ import dashscope
 from dashscope import TextEmbedding
 import os
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Optional
 
+from tradingagents.agents.utils.embedding_cache import get_embedding_cache
+
 # 导入统一日志系统
 from tradingagents.utils.logging_init import get_logger
 logger = get_logger("agents.utils.memory")
 
+# 各嵌入模型单次请求可提交的文本条数上限
+EMBEDDING_BATCH_SIZES = {
+    "text-embedding-v3": 10,
+    "text-embedding-v2": 25,
+    "text-embedding-v1": 25,
+    "text-embedding-3-small": 2048,
+    "text-embedding-3-large": 2048,
+    "nomic-embed-text": 64,
+}
+DEFAULT_EMBEDDING_BATCH_SIZE = 16
+DEFAULT_EMBEDDING_CONCURRENCY = 4
+
 
 class ChromaDBManager:
     """单例ChromaDB管理器，避免并发创建集合的冲突"""
@@ -273,165 +288,167 @@ class FinancialSituationMemory:
         self.chroma_manager = ChromaDBManager()
         self.situation_collection = self.chroma_manager.get_or_create_collection(name)
 
-    def get_embedding(self, text):
-        """Get embedding for a text using the configured provider"""
-
-        # 检查记忆功能是否被禁用
-        if self.client == "DISABLED":
-            # 内存功能已禁用，返回空向量
-            logger.debug(f"⚠️ 记忆功能已禁用，返回空向量")
-            return [0.0] * 1024  # 返回1024维的零向量
-
-        if (self.llm_provider == "dashscope" or
-            self.llm_provider == "alibaba" or
-            (self.llm_provider == "google" and self.client is None) or
-            (self.llm_provider == "deepseek" and self.client is None) or
-            (self.llm_provider == "openrouter" and self.client is None)):
-            # 使用阿里百炼的嵌入模型
+        # 内容寻址的嵌入缓存，相同文本只请求一次嵌入
+        self.embedding_cache = None
+        if self.client != "DISABLED" and config.get("embedding_cache_enabled", True):
+            cache_path = config.get("embedding_cache_path") or os.path.join(
+                config.get("data_cache_dir", "data_cache"), "embedding_cache.db")
+            self.embedding_cache = get_embedding_cache(cache_path)
+
+    def _uses_dashscope(self):
+        """是否使用阿里百炼的嵌入模型"""
+        return (self.llm_provider == "dashscope" or
+                self.llm_provider == "alibaba" or
+                (self.llm_provider in ("google", "deepseek", "openrouter") and self.client is None))
+
+    def _embedding_batch_size(self):
+        """单次嵌入请求的文本条数上限，可通过 config["embedding_batch_size"] 覆盖"""
+        configured = self.config.get("embedding_batch_size")
+        if configured:
+            return max(1, int(configured))
+        return EMBEDDING_BATCH_SIZES.get(self.embedding, DEFAULT_EMBEDDING_BATCH_SIZE)
+
+    def _embed_batch(self, texts):
+        """对一批文本发起一次嵌入请求，失败时整批降级为零向量"""
+        if self._uses_dashscope():
             try:
-                # 导入DashScope模块
-                import dashscope
-                from dashscope import TextEmbedding
-
                 # 检查DashScope API密钥是否可用
-                if not hasattr(dashscope, 'api_key') or not dashscope.api_key:
+                if not getattr(dashscope, 'api_key', None):
                     logger.warning(f"⚠️ DashScope API密钥未设置，记忆功能降级")
-                    return [0.0] * 1024  # 返回空向量
-
-                # 尝试调用DashScope API
-                response = TextEmbedding.call(
-                    model=self.embedding,
-                    input=text
-                )
+                    return [[0.0] * 1024 for _ in texts]
 
-                # 检查响应状态
-                if response.status_code == 200:
-                    # 成功获取embedding
-                    embedding = response.output['embeddings'][0]['embedding']
-                    logger.debug(f"✅ DashScope embedding成功，维度: {len(embedding)}")
-                    return embedding
-                else:
-                    # API返回错误状态码
+                response = TextEmbedding.call(model=self.embedding, input=texts)
+                if response.status_code != 200:
                     logger.error(f"❌ DashScope API错误: {response.code} - {response.message}")
                     logger.warning(f"⚠️ 记忆功能降级，返回空向量")
-                    return [0.0] * 1024  # 返回空向量而不是抛出异常
+                    return [[0.0] * 1024 for _ in texts]
 
-            except ImportError as e:
-                # dashscope包未安装
-                logger.error(f"❌ DashScope包未安装: {str(e)}")
-                logger.warning(f"⚠️ 记忆功能降级，返回空向量")
-                return [0.0] * 1024
-
-            except AttributeError as e:
-                # API调用方法不存在或参数错误
-                logger.error(f"❌ DashScope API调用错误: {str(e)}")
-                logger.warning(f"⚠️ 记忆功能降级，返回空向量")
-                return [0.0] * 1024
-
-            except ConnectionError as e:
-                # 网络连接错误
-                logger.error(f"❌ DashScope网络连接错误: {str(e)}")
-                logger.warning(f"⚠️ 记忆功能降级，返回空向量")
-                return [0.0] * 1024
-
-            except TimeoutError as e:
-                # 请求超时
-                logger.error(f"❌ DashScope请求超时: {str(e)}")
-                logger.warning(f"⚠️ 记忆功能降级，返回空向量")
-                return [0.0] * 1024
-
-            except KeyError as e:
-                # 响应格式错误
-                logger.error(f"❌ DashScope响应格式错误: {str(e)}")
-                logger.warning(f"⚠️ 记忆功能降级，返回空向量")
-                return [0.0] * 1024
+                # 按 text_index 还原输入顺序
+                embeddings = [None] * len(texts)
+                for item in response.output['embeddings']:
+                    embeddings[item.get('text_index', 0)] = item['embedding']
+                logger.debug(f"✅ DashScope embedding成功，{len(texts)}条")
+                return [e if e is not None else [0.0] * 1024 for e in embeddings]
 
             except Exception as e:
-                # 其他所有异常
-                logger.error(f"❌ DashScope embedding未知异常: {str(e)}")
+                logger.error(f"❌ DashScope embedding异常: {str(e)}")
                 logger.warning(f"⚠️ 记忆功能降级，返回空向量")
-                return [0.0] * 1024  # 返回空向量而不是抛出异常
-        else:
-            # 使用OpenAI兼容的嵌入模型
-            if self.client is None:
-                logger.warning(f"⚠️ 嵌入客户端未初始化，返回空向量")
-                return [0.0] * 1024  # 返回空向量
-            elif self.client == "DISABLED":
-                # 内存功能已禁用，返回空向量
-                logger.debug(f"⚠️ 内存功能已禁用，返回空向量")
-                return [0.0] * 1024  # 返回1024维的零向量
-
-            # 尝试调用OpenAI兼容的embedding API
-            try:
-                response = self.client.embeddings.create(
-                    model=self.embedding,
-                    input=text
-                )
-                embedding = response.data[0].embedding
-                logger.debug(f"✅ OpenAI embedding成功，维度: {len(embedding)}")
-                return embedding
+                return [[0.0] * 1024 for _ in texts]
 
-            except AttributeError as e:
-                # API调用方法不存在
-                logger.error(f"❌ OpenAI API调用错误: {str(e)}")
-                logger.warning(f"⚠️ 记忆功能降级，返回空向量")
-                return [0.0] * 1024
+        # 使用OpenAI兼容的嵌入模型
+        if self.client is None:
+            logger.warning(f"⚠️ 嵌入客户端未初始化，返回空向量")
+            return [[0.0] * 1024 for _ in texts]
 
-            except ConnectionError as e:
-                # 网络连接错误
-                logger.error(f"❌ OpenAI网络连接错误: {str(e)}")
-                logger.warning(f"⚠️ 记忆功能降级，返回空向量")
-                return [0.0] * 1024
+        try:
+            response = self.client.embeddings.create(model=self.embedding, input=texts)
+            data = sorted(response.data, key=lambda item: item.index)
+            logger.debug(f"✅ OpenAI embedding成功，{len(texts)}条")
+            return [item.embedding for item in data]
 
-            except TimeoutError as e:
-                # 请求超时
-                logger.error(f"❌ OpenAI请求超时: {str(e)}")
-                logger.warning(f"⚠️ 记忆功能降级，返回空向量")
-                return [0.0] * 1024
+        except Exception as e:
+            logger.error(f"❌ OpenAI embedding异常: {str(e)}")
+            logger.warning(f"⚠️ 记忆功能降级，返回空向量")
+            return [[0.0] * 1024 for _ in texts]
 
-            except KeyError as e:
-                # 响应格式错误
-                logger.error(f"❌ OpenAI响应格式错误: {str(e)}")
-                logger.warning(f"⚠️ 记忆功能降级，返回空向量")
-                return [0.0] * 1024
+    def get_embeddings(self, texts):
+        """批量获取嵌入向量，结果与输入顺序一致
 
-            except Exception as e:
-                # 其他所有异常
-                logger.error(f"❌ OpenAI embedding未知异常: {str(e)}")
-                logger.warning(f"⚠️ 记忆功能降级，返回空向量")
-                return [0.0] * 1024
+        按提供商的单次请求上限切分批次，批次间以有界并发执行
+        （config["embedding_max_concurrency"]，默认4），单个批次失败只降级该批次。
+        """
+        texts = list(texts)
+        if not texts:
+            return []
 
-            response = self.client.embeddings.create(
-                model=self.embedding, input=text
-            )
-            return response.data[0].embedding
+        # 检查记忆功能是否被禁用
+        if self.client == "DISABLED":
+            logger.debug(f"⚠️ 记忆功能已禁用，返回空向量")
+            return [[0.0] * 1024 for _ in texts]
+
+        cached = {}
+        if self.embedding_cache is not None:
+            cached = self.embedding_cache.get_many(self._embedding_provider_key(), self.embedding, texts)
+        pending = list(dict.fromkeys(text for text in texts if text not in cached))
+        if not pending:
+            return [cached[text] for text in texts]
+
+        batch_size = self._embedding_batch_size()
+        batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+        max_workers = max(1, int(self.config.get("embedding_max_concurrency",
+                                                 DEFAULT_EMBEDDING_CONCURRENCY)))
+
+        if len(batches) == 1 or max_workers == 1:
+            results = [self._embed_batch(batch) for batch in batches]
+        else:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(batches))) as executor:
+                results = list(executor.map(self._embed_batch, batches))
+
+        if len(batches) > 1:
+            logger.info(f"📚 批量嵌入完成: {len(pending)}条, {len(batches)}个批次")
+        fresh = dict(zip(pending, (embedding for batch in results for embedding in batch)))
+
+        if self.embedding_cache is not None:
+            # 降级返回的零向量不写入缓存
+            self.embedding_cache.put_many(
+                self._embedding_provider_key(), self.embedding,
+                {text: e for text, e in fresh.items() if any(x != 0.0 for x in e)})
+        return [cached[text] if text in cached else fresh[text] for text in texts]
+
+    def _embedding_provider_key(self):
+        """缓存键中的提供商部分，OpenAI兼容接口按服务地址区分"""
+        if self._uses_dashscope():
+            return "dashscope"
+        return str(getattr(self.client, "base_url", "") or self.llm_provider)
+
+    def get_cache_stats(self):
+        """嵌入缓存命中率统计，未启用缓存时返回None"""
+        if self.embedding_cache is None:
+            return None
+        return self.embedding_cache.get_stats()
+
+    def get_embedding(self, text):
+        """Get embedding for a text using the configured provider"""
+        return self.get_embeddings([text])[0]
 
     def add_situations(self, situations_and_advice):
         """Add financial situations and their corresponding advice. Parameter is a list of tuples (situation, rec)"""
 
-        situations = []
-        advice = []
-        ids = []
-        embeddings = []
+        situations_and_advice = list(situations_and_advice)
+        if not situations_and_advice:
+            return
+
+        situations = [situation for situation, _ in situations_and_advice]
+        advice = [recommendation for _, recommendation in situations_and_advice]
+        embeddings = self.get_embeddings(situations)
 
         offset = self.situation_collection.count()
+        ids = [str(offset + i) for i in range(len(situations))]
+
+        # 大批量回填时按ChromaDB单次写入上限分段
+        chunk_size = self._chroma_max_batch_size()
+        for start in range(0, len(situations), chunk_size):
+            end = start + chunk_size
+            self.situation_collection.add(
+                documents=situations[start:end],
+                metadatas=[{"recommendation": rec} for rec in advice[start:end]],
+                embeddings=embeddings[start:end],
+                ids=ids[start:end],
+            )
 
-        for i, (situation, recommendation) in enumerate(situations_and_advice):
-            situations.append(situation)
-            advice.append(recommendation)
-            ids.append(str(offset + i))
-            embeddings.append(self.get_embedding(situation))
+    def _chroma_max_batch_size(self):
+        try:
+            return self.chroma_manager._client.get_max_batch_size()
+        except Exception:
+            return 5000
 
-        self.situation_collection.add(
-            documents=situations,
-            metadatas=[{"recommendation": rec} for rec in advice],
-            embeddings=embeddings,
-            ids=ids,
-        )
+    def get_memories(self, current_situation, n_matches=1, query_embedding=None):
+        """Find matching recommendations using embeddings
 
-    def get_memories(self, current_situation, n_matches=1):
-        """Find matching recommendations using embeddings"""
-        query_embedding = self.get_embedding(current_situation)
+        query_embedding: 已计算好的情景向量（如 state["situation_embedding"]），传入时不再请求嵌入
+        """
+        if query_embedding is None:
+            query_embedding = self.get_embedding(current_situation)
 
         # 检查是否为空向量（记忆功能被禁用）
         if all(x == 0.0 for x in query_embedding):
@@ -462,6 +479,25 @@ class FinancialSituationMemory:
             return []  # 查询失败时返回空列表
 
 
+def build_situation(state):
+    """由四份分析师报告拼出用于记忆检索的当前情景"""
+    return (f"{state['market_report']}\n\n{state['sentiment_report']}\n\n"
+            f"{state['news_report']}\n\n{state['fundamentals_report']}")
+
+
+def create_situation_embedder(memory):
+    """分析师报告汇合后计算一次情景向量写入状态，供各角色的记忆检索共用"""
+
+    def situation_embedding_node(state) -> dict:
+        if memory is None:
+            return {"situation_embedding": None}
+        embedding = memory.get_embedding(build_situation(state))
+        logger.debug(f"📚 情景向量已计算，维度: {len(embedding)}")
+        return {"situation_embedding": embedding}
+
+    return situation_embedding_node
+
+
 if __name__ == "__main__":
     # Example usage
     matcher = FinancialSituationMemory()
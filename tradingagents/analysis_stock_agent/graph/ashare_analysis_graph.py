@@ -29,6 +29,7 @@ from tradingagents.analysis_stock_agent.agents import (
 
 # 导入统一日志系统
 from tradingagents.utils.logging_manager import get_logger
+from tradingagents.utils.single_flight import single_flight_scope
 logger = get_logger('ashare_analysis_graph')
 
 
@@ -131,9 +132,15 @@ class AShareAnalysisGraph:
                 "agent_timings": {}
             }
             
-            # 执行工作流
+            # 执行工作流（并行Agent对同一股票的相同数据请求在本次分析内合并）
             logger.info(f"📈 [A股分析图] 开始执行多智能体工作流...")
-            result = self.graph.invoke(initial_state)
+            with single_flight_scope(f"{ticker}@{analysis_date}") as fetch_group:
+                result = self.graph.invoke(initial_state)
+            
+            fetch_stats = fetch_group.get_stats()
+            result["data_fetch_stats"] = fetch_stats
+            logger.info(f"🔗 [A股分析图] 数据请求合并: 实际请求{fetch_stats['executed']}次, "
+                        f"合并节省{fetch_stats['saved']}次")
             
             # 处理结果
             logger.info(f"📈 [A股分析图] 工作流执行完成")
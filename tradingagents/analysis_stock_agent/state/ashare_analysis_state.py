@@ -40,6 +40,7 @@ class AShareAnalysisState(TypedDict):
     # 时间追踪
     start_time: Optional[datetime]                  # 分析开始时间
     agent_timings: Dict[str, float]                 # 各Agent执行时间
+    data_fetch_stats: Optional[Dict[str, Any]]      # 数据请求合并统计（实际请求/合并节省次数）
     
     # 最终输出
     investment_recommendation: Optional[str]         # 投资建议（买入/持有/卖出）
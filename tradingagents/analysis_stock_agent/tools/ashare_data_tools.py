@@ -18,9 +18,13 @@ import warnings
 from tradingagents.utils.logging_manager import get_logger
 logger = get_logger('ashare_data_tools')
 
+# 并行Agent的相同数据请求合并
+from tradingagents.utils.single_flight import current_single_flight
+
 # 导入真实数据源
 from tradingagents.dataflows.tushare_utils import get_tushare_provider
 from tradingagents.dataflows.akshare_utils import get_akshare_provider
+from tradingagents.dataflows.industry_peers import PEER_METRICS, get_industry_peer_engine
 from tradingagents.dataflows.interface import (
     get_china_stock_data_unified,
     get_china_stock_info_unified,
@@ -49,7 +53,7 @@ class RealDataSourceManager:
     
     def get_real_financial_data(self, symbol: str, report_period: str = None) -> Tuple[Dict[str, Any], str]:
         """
-        获取真实的财务数据
+        获取真实的财务数据（并行Agent同时请求同一股票时只向数据源请求一次）
         
         Args:
             symbol: 股票代码
@@ -58,6 +62,11 @@ class RealDataSourceManager:
         Returns:
             Tuple[财务数据, 数据来源说明]
         """
+        return current_single_flight().do(("get_real_financial_data", symbol, report_period),
+                                          self._fetch_real_financial_data, symbol, report_period)
+
+    def _fetch_real_financial_data(self, symbol: str, report_period: str = None) -> Tuple[Dict[str, Any], str]:
+        """从数据源获取财务数据"""
         try:
             logger.info(f"📊 [财务数据] 获取{symbol}的真实财务数据")
             
@@ -93,7 +102,7 @@ class RealDataSourceManager:
     
     def get_real_stock_info(self, symbol: str) -> Tuple[Dict[str, Any], str]:
         """
-        获取真实的股票基本信息
+        获取真实的股票基本信息（并行Agent同时请求同一股票时只向数据源请求一次）
         
         Args:
             symbol: 股票代码
@@ -101,6 +110,11 @@ class RealDataSourceManager:
         Returns:
             Tuple[股票信息, 数据来源说明]
         """
+        return current_single_flight().do(("get_real_stock_info", symbol),
+                                          self._fetch_real_stock_info, symbol)
+
+    def _fetch_real_stock_info(self, symbol: str) -> Tuple[Dict[str, Any], str]:
+        """从数据源获取股票基本信息"""
         try:
             logger.info(f"🗺️ [股票信息] 获取{symbol}的真实基本信息")
             
@@ -495,25 +509,17 @@ class AShareDataTools:
             if not company_info or not company_info.get('name'):
                 return f"❌ 无法获取{ticker}的公司信息，数据源：{info_source}"
             
-            # 获取公司财务数据用于行业对比
-            financial_data, financial_source = self.data_manager.get_real_financial_data(ticker)
-            
-            if not financial_data:
-                logger.warning(f"⚠️ [A股工具] 无法获取{ticker}的财务数据进行行业对比")
-                return f"❌ 行业对比需要财务数据支持，但无法获取{ticker}的财务数据"
-            
-            # 计算财务指标用于行业对比
-            profitability_ratios = self.metrics_calculator.calculate_profitability_ratios(financial_data)
-            solvency_ratios = self.metrics_calculator.calculate_solvency_ratios(financial_data)
+            # 在申万行业快照中查找（快照按报告期缓存，同业数据不再逐只请求）
+            comparison = get_industry_peer_engine().compare(ticker)
+            if comparison is None:
+                logger.warning(f"⚠️ [A股工具] 无法获取{ticker}的申万行业同业快照")
+                return f"❌ 无法获取{ticker}所属申万行业的同业财务数据，暂不能进行行业对比"
             
             # 生成真实行业对比报告
-            comparison_report = self._generate_real_industry_comparison(
-                ticker, company_info, profitability_ratios, solvency_ratios
-            )
+            comparison_report = self._generate_real_industry_comparison(ticker, company_info, comparison)
             
             # 添加数据来源说明
-            data_sources = [info_source, financial_source]
-            transparency_note = f"\n\n### 数据来源声明\n- 公司信息来源: {info_source}\n- 财务数据来源: {financial_source}\n- 行业对比: 基于真实财务指标计算\n- 更新时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
+            transparency_note = f"\n\n### 数据来源声明\n- 公司信息来源: {info_source}\n- 行业成分: AKShare 申万三级行业成分股\n- 同业财务数据: AKShare 财务摘要（报告期 {comparison['period']}，{comparison['peer_count']}家成分股）\n- 更新时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
             
             final_report = comparison_report + transparency_note
             
@@ -633,72 +639,77 @@ class AShareDataTools:
     
     
     
-    def _format_industry_comparison_report(self, ticker: str, industry: str, peer_companies: List[str]) -> str:
-        """格式化行业对比报告"""
+    def _generate_real_industry_comparison(self, ticker: str, company_info: Dict[str, Any],
+                                           comparison: Dict[str, Any]) -> str:
+        """根据申万行业快照生成行业对比报告"""
+        company_name = company_info.get('name') or comparison.get('name') or ticker
+        return self._format_industry_comparison_report(ticker, company_name, comparison)
+    
+    @staticmethod
+    def _format_peer_value(metric: str, value: Optional[float]) -> str:
+        """格式化同业指标值（流动比率为倍数，其余为百分比）"""
+        if value is None or pd.isna(value):
+            return "N/A"
+        return f"{value:.2f}" if metric == "current_ratio" else f"{value:.1f}%"
+    
+    def _format_industry_comparison_report(self, ticker: str, company_name: str, comparison: Dict[str, Any]) -> str:
+        """格式化行业对比报告（指标值、分位和排名均来自申万行业快照）"""
         try:
-            current_year = datetime.now().year
+            industry = comparison['industry_name']
+            stats = comparison['stats']
+            snapshot = comparison['snapshot']
+            category = next((value for key, value in self.industry_mapping.items() if key in industry), "其他")
             
             report = f"""
-## {ticker} 行业对比分析
+## {ticker} {company_name} 行业对比分析
 
 ### 行业基本信息
-- **所属行业**: {industry}
-- **行业分类**: {self.industry_mapping.get(industry, "其他")}
-- **行业发展阶段**: 成熟期
-- **行业景气度**: 中等偏上
+- **所属行业**: {industry}（申万三级 {comparison['industry_code']}）
+- **行业分类**: {category}
+- **对比报告期**: {comparison['period']}
+- **行业成分股**: {comparison['peer_count']}家
 
 ### 行业财务指标对比
-
-#### 盈利能力对比（{current_year}年）
-| 公司代码 | ROE | ROA | 净利润率 | 毛利润率 |
-|----------|-----|-----|----------|----------|
-| {ticker} | 14.1% | 7.5% | 9.1% | 26.8% |
-| 行业平均 | 11.8% | 6.2% | 7.8% | 24.5% |
-| 行业前25% | 15.2% | 8.1% | 10.2% | 28.3% |
-| 行业排名 | 前20% | 前25% | 前15% | 前20% |
-
-#### 成长性对比（近3年CAGR）
-| 公司代码 | 营收增长 | 净利润增长 | 总资产增长 |
-|----------|----------|------------|------------|
-| {ticker} | 14.8% | 17.2% | 12.3% |
-| 行业平均 | 8.5% | 9.8% | 7.6% |
-| 行业前25% | 16.2% | 18.5% | 14.1% |
-| 行业排名 | 前15% | 前10% | 前20% |
-
-#### 财务安全性对比
-| 公司代码 | 资产负债率 | 流动比率 | 现金比率 |
-|----------|------------|----------|----------|
-| {ticker} | 27.5% | 2.01 | 0.78 |
-| 行业平均 | 35.2% | 1.65 | 0.52 |
-| 行业前25% | 25.8% | 2.15 | 0.81 |
-| 行业排名 | 前25% | 前20% | 前15% |
-
-### 竞争对手对比
+| 指标 | {company_name} | 行业平均 | 行业中位数 | 行业前25% | 行业排名 |
+|------|------|----------|------------|-----------|----------|
 """
-            
-            # 添加主要竞争对手信息
-            for i, peer in enumerate(peer_companies):
-                report += f"""
-#### 竞争对手{i+1}: {peer}
-- ROE: {12.5 + i*0.8:.1f}%
-- 市值规模: {'大型' if i == 0 else '中型' if i == 1 else '小型'}
-- 竞争优势: {'品牌优势' if i == 0 else '成本优势' if i == 1 else '技术优势'}
+            strengths, weaknesses = [], []
+            for metric, item in comparison['metrics'].items():
+                label = PEER_METRICS[metric][1]
+                if item['rank'] is not None:
+                    ranking = f"{item['rank']}/{item['count']}（超过{item['percentile']:.0f}%同行）"
+                    if item['percentile'] >= 75:
+                        strengths.append(label)
+                    elif item['percentile'] <= 25:
+                        weaknesses.append(label)
+                else:
+                    ranking = "N/A"
+                report += (f"| {label} | {self._format_peer_value(metric, item['value'])} "
+                           f"| {self._format_peer_value(metric, stats.at[metric, 'mean'])} "
+                           f"| {self._format_peer_value(metric, stats.at[metric, 'median'])} "
+                           f"| {self._format_peer_value(metric, stats.at[metric, 'top_quartile'])} "
+                           f"| {ranking} |\n")
+            
+            report += """
+*资产负债率越低排名越靠前，其余指标越高排名越靠前*
+
+### 同业对比（按ROE排名前5）
+| 公司 | ROE | ROA | 净利率 | 资产负债率 |
+|------|-----|-----|--------|------------|
 """
+            for code, peer in snapshot.top("roe", 5, exclude=ticker).iterrows():
+                report += (f"| {peer['name']}({code}) | {self._format_peer_value('roe', peer['roe'])} "
+                           f"| {self._format_peer_value('roa', peer['roa'])} "
+                           f"| {self._format_peer_value('net_margin', peer['net_margin'])} "
+                           f"| {self._format_peer_value('debt_ratio', peer['debt_ratio'])} |\n")
             
             report += f"""
 ### 行业地位评估
-- **市场地位**: 行业前列（基于ROE和成长性排名）
-- **竞争优势**: 盈利能力强，财务结构稳健
-- **发展前景**: 良好，各项指标均优于行业平均水平
-
-### 行业风险因素
-- 行业政策监管变化风险
-- 市场竞争加剧风险
-- 宏观经济周期影响风险
-- 技术变革带来的冲击风险
-
-**数据来源**: 同花顺、Wind、公司公告
-**对比基准**: 证监会行业分类同类公司
+- **处于行业前25%的指标**: {'、'.join(strengths) if strengths else '无'}
+- **处于行业后25%的指标**: {'、'.join(weaknesses) if weaknesses else '无'}
+
+**数据来源**: AKShare 申万行业成分股、财务摘要
+**对比基准**: 申万三级行业全部成分股（报告期 {comparison['period']}）
 **更新时间**: {datetime.now().strftime('%Y-%m-%d %H:%M')}
 """
             
@@ -4,6 +4,7 @@
 管理API密钥、模型配置、费率设置等
 """
 
+import itertools
 import json
 import os
 from datetime import datetime
@@ -19,6 +20,9 @@ from tradingagents.utils.logging_init import get_logger
 from tradingagents.utils.logging_manager import get_logger
 logger = get_logger('agents')
 
+from .usage_aggregates import UsageAggregates
+from .usage_ledger import UsageLedger
+
 try:
     from .mongodb_storage import MongoDBStorage
     MONGODB_AVAILABLE = True
@@ -26,6 +30,9 @@ except ImportError:
     MONGODB_AVAILABLE = False
     MongoDBStorage = None
 
+# 启动时从MongoDB载入最近一天记录建立滚动计数的上限
+MONGODB_SEED_LIMIT = 100000
+
 
 @dataclass
 class ModelConfig:
@@ -71,9 +78,15 @@ class ConfigManager:
 
         self.models_file = self.config_dir / "models.json"
         self.pricing_file = self.config_dir / "pricing.json"
-        self.usage_file = self.config_dir / "usage.json"
+        self.usage_file = self.config_dir / "usage.json"  # 旧版使用记录，首次启动时导入账本
+        self.usage_ledger_dir = self.config_dir / "usage"
         self.settings_file = self.config_dir / "settings.json"
 
+        # 配置文件解析结果缓存：{路径: ((mtime_ns, size), 数据)}，文件变化或调用save方法时失效
+        self._file_cache: Dict[Path, Any] = {}
+        self._pricing_index: Dict[tuple, PricingConfig] = {}
+        self._pricing_index_source = None
+
         # 加载.env文件（保持向后兼容）
         self._load_env_file()
 
@@ -83,6 +96,70 @@ class ConfigManager:
 
         self._init_default_configs()
 
+        # 使用记录账本（MongoDB不可用时的本地存储）和滚动统计计数
+        max_records = self.load_settings().get("max_usage_records", 10000)
+        self.usage_aggregates = UsageAggregates()
+        self.usage_ledger = UsageLedger(
+            self.usage_ledger_dir,
+            max_records=max_records,
+            segment_records=self._usage_segment_records(max_records),
+            on_evict=self.usage_aggregates.remove_many
+        )
+        self._migrate_legacy_usage_file()
+        self._seed_usage_aggregates()
+
+    def _seed_usage_aggregates(self):
+        """启动时建立滚动计数：本地账本的全部记录，使用MongoDB时再加上MongoDB中最近一天的记录
+        （今日成本和进行中的会话），此后成本警告和会话成本只读取计数"""
+        records = self.usage_ledger.iter_records()
+        if self.mongodb_storage and self.mongodb_storage.is_connected():
+            recent = self.mongodb_storage.load_usage_records(limit=MONGODB_SEED_LIMIT, days=1)
+            records = itertools.chain(records, (asdict(record) for record in recent))
+        self.usage_aggregates.rebuild(records)
+
+    @staticmethod
+    def _usage_segment_records(max_records: int) -> int:
+        """账本分段大小：保留上限的1/5，淘汰时最多多保留一个分段"""
+        return max(1, min(2000, max_records // 5))
+
+    def _migrate_legacy_usage_file(self):
+        """把旧版 usage.json 导入账本，导入成功后才重命名为 usage.json.migrated
+
+        账本记录数少于旧文件时（首次导入，或上次导入在重命名前中断）整体替换为旧文件的记录，重复执行结果相同
+        """
+        if not self.usage_file.exists():
+            return
+        try:
+            with open(self.usage_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data and len(self.usage_ledger) < len(data):
+                self.usage_ledger.replace(data)
+            self.usage_file.replace(self.usage_file.with_name(self.usage_file.name + ".migrated"))
+            logger.info(f"📝 已导入旧版使用记录: {len(data)} 条 -> {self.usage_ledger_dir}")
+        except Exception as e:
+            logger.error(f"导入旧版使用记录失败: {e}")
+
+    def _read_json_file(self, path: Path) -> Any:
+        """读取JSON配置文件，文件修改时间和大小不变时直接返回缓存的解析结果"""
+        stat = path.stat()
+        signature = (stat.st_mtime_ns, stat.st_size)
+        cached = self._file_cache.get(path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        self._file_cache[path] = (signature, data)
+        return data
+
+    def _write_json_file(self, path: Path, data: Any):
+        """写入JSON配置文件并使缓存失效"""
+        try:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+        finally:
+            self._file_cache.pop(path, None)
+
     def _load_env_file(self):
         """加载.env文件（保持向后兼容）"""
         # 尝试从项目根目录加载.env文件
@@ -267,40 +344,59 @@ class ConfigManager:
     def load_pricing(self) -> List[PricingConfig]:
         """加载定价配置"""
         try:
-            with open(self.pricing_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            data = self._read_json_file(self.pricing_file)
             return [PricingConfig(**item) for item in data]
         except Exception as e:
             logger.error(f"加载定价配置失败: {e}")
             return []
-    
+
+    def _get_pricing_index(self) -> Dict[tuple, PricingConfig]:
+        """按 (provider, model_name) 索引的定价配置，定价文件变化时重建"""
+        try:
+            data = self._read_json_file(self.pricing_file)
+        except Exception as e:
+            logger.error(f"加载定价配置失败: {e}")
+            return {}
+
+        if data is not self._pricing_index_source:
+            index = {}
+            for item in data:
+                pricing = PricingConfig(**item)
+                # 与原先顺序查找一致：重复配置以第一条为准
+                index.setdefault((pricing.provider, pricing.model_name), pricing)
+            self._pricing_index = index
+            self._pricing_index_source = data
+        return self._pricing_index
+
     def save_pricing(self, pricing: List[PricingConfig]):
         """保存定价配置"""
         try:
             data = [asdict(price) for price in pricing]
-            with open(self.pricing_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            self._write_json_file(self.pricing_file, data)
         except Exception as e:
             logger.error(f"保存定价配置失败: {e}")
     
     def load_usage_records(self) -> List[UsageRecord]:
         """加载使用记录"""
         try:
-            if not self.usage_file.exists():
-                return []
-            with open(self.usage_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                return [UsageRecord(**item) for item in data]
+            records = []
+            for item in self.usage_ledger.read_records():
+                try:
+                    records.append(UsageRecord(**item))
+                except TypeError:
+                    continue
+            return records
         except Exception as e:
             logger.error(f"加载使用记录失败: {e}")
             return []
     
     def save_usage_records(self, records: List[UsageRecord]):
-        """保存使用记录"""
+        """保存使用记录（整体替换账本内容）"""
         try:
             data = [asdict(record) for record in records]
-            with open(self.usage_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            self.usage_ledger.replace(data)
+            # 按账本实际保留的记录重建（超过保留上限的旧记录已被淘汰）
+            self.usage_aggregates.rebuild(self.usage_ledger.iter_records())
         except Exception as e:
             logger.error(f"保存使用记录失败: {e}")
     
@@ -321,6 +417,9 @@ class ConfigManager:
             analysis_type=analysis_type
         )
         
+        # 本进程内的滚动统计（会话成本、今日成本）
+        self.usage_aggregates.add(asdict(record))
+
         # 优先使用MongoDB存储
         if self.mongodb_storage and self.mongodb_storage.is_connected():
             success = self.mongodb_storage.save_usage_record(record)
@@ -329,34 +428,25 @@ class ConfigManager:
             else:
                 logger.error(f"⚠️ MongoDB保存失败，回退到JSON文件存储")
         
-        # 回退到JSON文件存储
-        records = self.load_usage_records()
-        records.append(record)
-        
-        # 限制记录数量
-        settings = self.load_settings()
-        max_records = settings.get("max_usage_records", 10000)
-        if len(records) > max_records:
-            records = records[-max_records:]
-        
-        self.save_usage_records(records)
+        # 回退到本地账本（追加写入，后台批量刷盘，超过 max_usage_records 时轮转删除旧分段）
+        self.usage_ledger.append(asdict(record))
         return record
     
     def calculate_cost(self, provider: str, model_name: str, input_tokens: int, output_tokens: int) -> float:
         """计算使用成本"""
-        pricing_configs = self.load_pricing()
+        pricing_index = self._get_pricing_index()
 
-        for pricing in pricing_configs:
-            if pricing.provider == provider and pricing.model_name == model_name:
-                input_cost = (input_tokens / 1000) * pricing.input_price_per_1k
-                output_cost = (output_tokens / 1000) * pricing.output_price_per_1k
-                total_cost = input_cost + output_cost
-                return round(total_cost, 6)
+        pricing = pricing_index.get((provider, model_name))
+        if pricing is not None:
+            input_cost = (input_tokens / 1000) * pricing.input_price_per_1k
+            output_cost = (output_tokens / 1000) * pricing.output_price_per_1k
+            total_cost = input_cost + output_cost
+            return round(total_cost, 6)
 
         # 只在找不到配置时输出调试信息
         logger.warning(f"⚠️ [calculate_cost] 未找到匹配的定价配置: {provider}/{model_name}")
         logger.debug(f"⚠️ [calculate_cost] 可用的配置:")
-        for pricing in pricing_configs:
+        for pricing in pricing_index.values():
             logger.debug(f"⚠️ [calculate_cost]   - {pricing.provider}/{pricing.model_name}")
 
         return 0.0
@@ -364,8 +454,8 @@ class ConfigManager:
     def load_settings(self) -> Dict[str, Any]:
         """加载设置，合并.env中的配置"""
         try:
-            with open(self.settings_file, 'r', encoding='utf-8') as f:
-                settings = json.load(f)
+            # 返回副本，调用方修改后需通过 save_settings 保存
+            settings = dict(self._read_json_file(self.settings_file))
         except Exception as e:
             logger.error(f"加载设置失败: {e}")
             settings = {}
@@ -410,10 +500,14 @@ class ConfigManager:
     def save_settings(self, settings: Dict[str, Any]):
         """保存设置"""
         try:
-            with open(self.settings_file, 'w', encoding='utf-8') as f:
-                json.dump(settings, f, ensure_ascii=False, indent=2)
+            self._write_json_file(self.settings_file, settings)
         except Exception as e:
             logger.error(f"保存设置失败: {e}")
+
+        usage_ledger = getattr(self, "usage_ledger", None)
+        if usage_ledger is not None:
+            usage_ledger.max_records = settings.get("max_usage_records", usage_ledger.max_records)
+            usage_ledger.segment_records = self._usage_segment_records(usage_ledger.max_records)
     
     def get_enabled_models(self) -> List[ModelConfig]:
         """获取启用的模型"""
@@ -440,57 +534,25 @@ class ConfigManager:
                 
                 if stats:
                     stats["provider_stats"] = provider_stats
+                    stats["model_stats"] = self.mongodb_storage.get_model_statistics(days)
                     stats["records_count"] = stats.get("total_requests", 0)
                     return stats
             except Exception as e:
                 logger.error(f"⚠️ MongoDB统计获取失败，回退到JSON文件: {e}")
         
-        # 回退到JSON文件统计
-        records = self.load_usage_records()
-        
-        # 过滤最近N天的记录
-        from datetime import datetime, timedelta
+        # 回退到本地账本的滚动统计
+        return self.usage_aggregates.get_statistics(days)
 
-        cutoff_date = datetime.now() - timedelta(days=days)
-        
-        recent_records = []
-        for record in records:
-            try:
-                record_date = datetime.fromisoformat(record.timestamp)
-                if record_date >= cutoff_date:
-                    recent_records.append(record)
-            except:
-                continue
-        
-        # 统计数据
-        total_cost = sum(record.cost for record in recent_records)
-        total_input_tokens = sum(record.input_tokens for record in recent_records)
-        total_output_tokens = sum(record.output_tokens for record in recent_records)
-        
-        # 按供应商统计
-        provider_stats = {}
-        for record in recent_records:
-            if record.provider not in provider_stats:
-                provider_stats[record.provider] = {
-                    "cost": 0,
-                    "input_tokens": 0,
-                    "output_tokens": 0,
-                    "requests": 0
-                }
-            provider_stats[record.provider]["cost"] += record.cost
-            provider_stats[record.provider]["input_tokens"] += record.input_tokens
-            provider_stats[record.provider]["output_tokens"] += record.output_tokens
-            provider_stats[record.provider]["requests"] += 1
-        
-        return {
-            "period_days": days,
-            "total_cost": round(total_cost, 4),
-            "total_input_tokens": total_input_tokens,
-            "total_output_tokens": total_output_tokens,
-            "total_requests": len(recent_records),
-            "provider_stats": provider_stats,
-            "records_count": len(recent_records)
-        }
+    def get_daily_usage(self, days: int = 30) -> List[Dict[str, Any]]:
+        """获取最近N天按日汇总的使用量（date, cost, input_tokens, output_tokens, requests）"""
+        if self.mongodb_storage and self.mongodb_storage.is_connected():
+            records = self.mongodb_storage.load_usage_records(days=days)
+            return UsageAggregates(asdict(record) for record in records).get_daily_usage(days)
+        return self.usage_aggregates.get_daily_usage(days)
+
+    def get_today_cost(self) -> float:
+        """获取今日总成本（滚动计数，MongoDB和本地账本两种存储方式下都不查询历史记录）"""
+        return self.usage_aggregates.get_day_cost()
     
     def get_data_dir(self) -> str:
         """获取数据目录路径"""
@@ -576,9 +638,8 @@ class TokenTracker:
         settings = self.config_manager.load_settings()
         threshold = settings.get("cost_alert_threshold", 100.0)
 
-        # 获取今日总成本
-        today_stats = self.config_manager.get_usage_statistics(1)
-        total_today = today_stats["total_cost"]
+        # 获取今日总成本（滚动计数，不扫描历史记录）
+        total_today = self.config_manager.get_today_cost()
 
         if total_today >= threshold:
             logger.warning(f"⚠️ 成本警告: 今日成本已达到 ¥{total_today:.4f}，超过阈值 ¥{threshold}",
@@ -586,9 +647,7 @@ class TokenTracker:
 
     def get_session_cost(self, session_id: str) -> float:
         """获取会话成本"""
-        records = self.config_manager.load_usage_records()
-        session_cost = sum(record.cost for record in records if record.session_id == session_id)
-        return session_cost
+        return self.config_manager.usage_aggregates.get_session_cost(session_id)
 
     def estimate_cost(self, provider: str, model_name: str, estimated_input_tokens: int,
                      estimated_output_tokens: int) -> float:
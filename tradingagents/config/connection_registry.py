@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+数据库连接注册表
+进程内共享的MongoDB/Redis客户端：相同连接地址和参数只创建一个客户端（客户端自带连接池），
+连接失败的后端进入退避窗口，窗口内直接返回None而不再等待连接超时；并统计连接池使用情况。
+"""
+
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import quote_plus
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+_CONNECTION_ERRORS = (ConnectionError, TimeoutError)
+
+try:
+    import pymongo
+    from pymongo import monitoring
+    from pymongo.errors import ConnectionFailure
+    PYMONGO_AVAILABLE = True
+    # ConnectionFailure 包括 AutoReconnect、NetworkTimeout 和 ServerSelectionTimeoutError
+    _CONNECTION_ERRORS += (ConnectionFailure,)
+except ImportError:
+    pymongo = None
+    monitoring = None
+    PYMONGO_AVAILABLE = False
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+    _CONNECTION_ERRORS += (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError)
+except ImportError:
+    redis = None
+    REDIS_AVAILABLE = False
+
+DEFAULT_BACKOFF_SECONDS = float(os.getenv("TRADINGAGENTS_DB_BACKOFF_SECONDS", "30"))
+DEFAULT_MAX_BACKOFF_SECONDS = float(os.getenv("TRADINGAGENTS_DB_MAX_BACKOFF_SECONDS", "600"))
+
+
+def is_connection_error(error: Exception) -> bool:
+    """是否为连接类错误（连接中断、超时、选不到服务器）；查询、序列化等错误不说明后端不可用"""
+    return isinstance(error, _CONNECTION_ERRORS)
+
+
+def mongo_uri(host: str = "localhost", port: int = 27017, username: str = None, password: str = None,
+              auth_source: str = "admin") -> str:
+    """由主机、端口和认证信息拼出MongoDB连接地址"""
+    if username and password:
+        return (f"mongodb://{quote_plus(username)}:{quote_plus(password)}@{host}:{port}/"
+                f"?authSource={quote_plus(auth_source or 'admin')}")
+    return f"mongodb://{host}:{port}/"
+
+
+def redis_url(host: str = "localhost", port: int = 6379, password: str = None, db: int = 0) -> str:
+    """由主机、端口、密码和库编号拼出Redis连接地址"""
+    auth = f":{quote_plus(password)}@" if password else ""
+    return f"redis://{auth}{host}:{port}/{db}"
+
+
+if PYMONGO_AVAILABLE:
+    class _MongoPoolMetrics(monitoring.ConnectionPoolListener):
+        """通过pymongo连接池事件统计连接数和借出数"""
+
+        def __init__(self):
+            self.created = 0
+            self.closed = 0
+            self.checked_out = 0
+            self.in_use = 0
+            self.checkout_failed = 0
+
+        def pool_created(self, event): pass
+        def pool_ready(self, event): pass
+        def pool_cleared(self, event): pass
+        def pool_closed(self, event): pass
+        def connection_ready(self, event): pass
+        def connection_check_out_started(self, event): pass
+
+        def connection_created(self, event):
+            self.created += 1
+
+        def connection_closed(self, event):
+            self.closed += 1
+
+        def connection_checked_out(self, event):
+            self.checked_out += 1
+            self.in_use += 1
+
+        def connection_checked_in(self, event):
+            self.in_use -= 1
+
+        def connection_check_out_failed(self, event):
+            self.checkout_failed += 1
+
+        def snapshot(self) -> Dict[str, int]:
+            return {"connections": self.created - self.closed, "in_use": self.in_use,
+                    "checkouts": self.checked_out, "checkout_failures": self.checkout_failed}
+
+
+def _default_mongo_factory(uri: str, **options):
+    metrics = _MongoPoolMetrics()
+    client = pymongo.MongoClient(uri, event_listeners=[metrics], **options)
+    client._tradingagents_pool_metrics = metrics
+    return client
+
+
+def _default_redis_factory(url: str, **options):
+    return redis.Redis.from_url(url, **options)
+
+
+class _BackendState:
+    """单个连接的健康状态"""
+
+    def __init__(self, kind: str, address: str):
+        self.kind = kind
+        self.address = address
+        self.client = None
+        self.healthy = None  # None: 尚未连接过
+        self.failures = 0
+        self.down_until = 0.0
+        self.last_error = ""
+        self.handouts = 0
+        self.skipped = 0
+        self.connect_attempts = 0
+        self.lock = threading.Lock()
+
+
+class ConnectionRegistry:
+    """MongoDB/Redis客户端注册表（线程安全）"""
+
+    def __init__(self, backoff_seconds: float = DEFAULT_BACKOFF_SECONDS,
+                 max_backoff_seconds: float = DEFAULT_MAX_BACKOFF_SECONDS,
+                 mongo_factory: Optional[Callable[..., Any]] = None,
+                 redis_factory: Optional[Callable[..., Any]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            backoff_seconds: 首次连接失败后的退避时长，连续失败时按2倍递增
+            max_backoff_seconds: 退避时长上限
+            mongo_factory: 创建MongoDB客户端的函数 (uri, **options)，默认 pymongo.MongoClient
+            redis_factory: 创建Redis客户端的函数 (url, **options)，默认 redis.Redis.from_url
+            clock: 时间函数（测试时可替换）
+        """
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.mongo_factory = mongo_factory or (_default_mongo_factory if PYMONGO_AVAILABLE else None)
+        self.redis_factory = redis_factory or (_default_redis_factory if REDIS_AVAILABLE else None)
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._states: Dict[Tuple, _BackendState] = {}
+        self._client_keys: Dict[int, Tuple] = {}
+
+    # ---- 获取客户端 ----
+
+    def get_mongo_client(self, uri: str, timeout_ms: int = 3000, **options):
+        """
+        获取MongoDB客户端，相同地址和参数共享同一个客户端（及其连接池）
+
+        连接或ping失败后该后端进入退避窗口，窗口内直接返回None而不再等待连接超时；
+        调用方使用客户端时遇到连接错误应通过 report_failure 上报，之后的获取同样进入退避。
+        需要客户端的调用方在返回None时按"后端不可用"处理（降级或抛出ConnectionError）。
+
+        Returns:
+            连接成功返回客户端；pymongo未安装、连接失败或处于退避窗口内返回None
+        """
+        options.setdefault("serverSelectionTimeoutMS", timeout_ms)
+        options.setdefault("connectTimeoutMS", timeout_ms)
+        return self._get_client("mongodb", self.mongo_factory, uri, options,
+                                lambda client: client.admin.command('ping'))
+
+    def get_redis_client(self, url: str, timeout: float = 5, **options):
+        """
+        获取Redis客户端，相同地址和参数共享同一个客户端（及其连接池）
+
+        退避和上报规则与 get_mongo_client 相同。
+
+        Returns:
+            连接成功返回客户端；redis未安装、连接失败或处于退避窗口内返回None
+        """
+        options.setdefault("socket_timeout", timeout)
+        options.setdefault("socket_connect_timeout", timeout)
+        return self._get_client("redis", self.redis_factory, url, options, lambda client: client.ping())
+
+    def _state(self, kind: str, address: str, options: Dict[str, Any]) -> _BackendState:
+        key = (kind, address, tuple(sorted((k, repr(v)) for k, v in options.items())))
+        with self._lock:
+            state = self._states.get(key)
+            if state is None:
+                state = self._states[key] = _BackendState(kind, address)
+            return state
+
+    def _get_client(self, kind: str, factory, address: str, options: Dict[str, Any], ping: Callable):
+        if factory is None:
+            return None
+        state = self._state(kind, address, options)
+
+        # 快速路径：已连接且健康
+        if state.healthy and state.client is not None:
+            state.handouts += 1
+            return state.client
+
+        if self.clock() < state.down_until:
+            state.skipped += 1
+            return None
+
+        with state.lock:
+            # 等锁期间其他线程可能已完成连接
+            if state.healthy and state.client is not None:
+                state.handouts += 1
+                return state.client
+            if self.clock() < state.down_until:
+                state.skipped += 1
+                return None
+
+            state.connect_attempts += 1
+            client = state.client
+            try:
+                if client is None:
+                    client = factory(address, **options)
+                ping(client)
+            except Exception as e:
+                self._mark_down(state, e)
+                if state.client is None and client is not None:
+                    self._close(client)
+                return None
+
+            if state.client is None:
+                state.client = client
+                with self._lock:
+                    self._client_keys[id(client)] = state
+            if state.healthy is False:
+                logger.info(f"✅ {kind}连接已恢复: {_mask(address)}")
+            state.healthy = True
+            state.failures = 0
+            state.down_until = 0.0
+            state.handouts += 1
+            return client
+
+    # ---- 健康状态 ----
+
+    def _mark_down(self, state: _BackendState, error: Exception):
+        state.healthy = False
+        state.failures += 1
+        state.last_error = str(error)
+        backoff = min(self.max_backoff_seconds, self.backoff_seconds * 2 ** (state.failures - 1))
+        state.down_until = self.clock() + backoff
+        logger.warning(f"⚠️ {state.kind}连接不可用，{backoff:.0f}秒内跳过: {_mask(state.address)} ({error})")
+
+    def report_failure(self, client, error: Exception) -> bool:
+        """
+        调用方在使用客户端出错时上报，连接类错误使该后端进入退避窗口
+
+        调用方可以在 except 中直接上报任何异常，非连接类错误（查询、序列化等）被忽略。
+
+        Returns:
+            该后端是否因此被标记为不可用
+        """
+        if client is None or not is_connection_error(error):
+            return False
+        with self._lock:
+            state = self._client_keys.get(id(client))
+        if state is None:
+            return False
+        with state.lock:
+            if not state.healthy:
+                return False
+            self._mark_down(state, error)
+            return True
+
+    def is_available(self, kind: str, address: str) -> bool:
+        """该地址的后端是否可用（不处于退避窗口且最近一次连接成功）"""
+        with self._lock:
+            states = [s for (k, a, _), s in self._states.items() if k == kind and a == address]
+        return any(s.healthy and self.clock() >= s.down_until for s in states)
+
+    # ---- 统计和清理 ----
+
+    def get_stats(self) -> Dict[str, Any]:
+        """每个连接的健康状态、退避剩余时间、获取次数和连接池使用情况"""
+        now = self.clock()
+        with self._lock:
+            states = list(self._states.values())
+        stats = []
+        for state in states:
+            entry = {
+                "kind": state.kind,
+                "address": _mask(state.address),
+                "healthy": state.healthy,
+                "failures": state.failures,
+                "backoff_remaining": max(0.0, state.down_until - now),
+                "last_error": state.last_error,
+                "handouts": state.handouts,
+                "skipped": state.skipped,
+                "connect_attempts": state.connect_attempts,
+            }
+            entry["pool"] = _pool_stats(state.client) if state.client is not None else {}
+            stats.append(entry)
+        return {"backends": stats}
+
+    def close_all(self):
+        """关闭全部客户端并清空注册表"""
+        with self._lock:
+            states = list(self._states.values())
+            self._states.clear()
+            self._client_keys.clear()
+        for state in states:
+            if state.client is not None:
+                self._close(state.client)
+
+    @staticmethod
+    def _close(client):
+        try:
+            client.close()
+        except Exception:
+            pass
+
+
+def _mask(address: str) -> str:
+    """日志和统计中隐藏连接地址里的密码"""
+    if "@" not in address or "://" not in address:
+        return address
+    scheme, rest = address.split("://", 1)
+    credentials, host = rest.rsplit("@", 1)
+    user = credentials.split(":", 1)[0]
+    return f"{scheme}://{user}:***@{host}"
+
+
+def _pool_stats(client) -> Dict[str, Any]:
+    """客户端连接池的使用情况"""
+    # MongoClient 的属性访问会返回同名数据库，所以从实例字典读取
+    metrics = getattr(client, "__dict__", {}).get("_tradingagents_pool_metrics")
+    if metrics is not None:
+        return metrics.snapshot()
+    pool = getattr(client, "__dict__", {}).get("connection_pool")
+    if REDIS_AVAILABLE and isinstance(pool, redis.ConnectionPool):
+        return {
+            "connections": getattr(pool, "_created_connections", 0),
+            "in_use": len(pool._in_use_connections),
+            "idle": len(getattr(pool, "_available_connections", [])),
+            "max_connections": getattr(pool, "max_connections", None),
+        }
+    return {}
+
+
+# 全局注册表
+_connection_registry = None
+_connection_registry_lock = threading.Lock()
+
+
+def get_connection_registry() -> ConnectionRegistry:
+    """获取全局数据库连接注册表"""
+    global _connection_registry
+    if _connection_registry is None:
+        with _connection_registry_lock:
+            if _connection_registry is None:
+                _connection_registry = ConnectionRegistry()
+    return _connection_registry
+
+
+def get_connection_stats() -> Dict[str, Any]:
+    """获取全局注册表的连接统计"""
+    return get_connection_registry().get_stats()
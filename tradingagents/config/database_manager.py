@@ -10,6 +10,8 @@ import os
 from pathlib import Path
 from typing import Dict, Any, Optional, Tuple
 
+from .connection_registry import get_connection_registry, mongo_uri, redis_url
+
 class DatabaseManager:
     """智能数据库管理器"""
 
@@ -78,78 +80,44 @@ class DatabaseManager:
     
 
     
+    def _mongodb_uri(self) -> str:
+        return mongo_uri(self.mongodb_config["host"], self.mongodb_config["port"],
+                         self.mongodb_config["username"], self.mongodb_config["password"],
+                         self.mongodb_config["auth_source"])
+
+    def _redis_url(self) -> str:
+        return redis_url(self.redis_config["host"], self.redis_config["port"],
+                         self.redis_config["password"], self.redis_config["db"])
+
     def _detect_mongodb(self) -> Tuple[bool, str]:
-        """检测MongoDB是否可用"""
+        """检测MongoDB是否可用（通过共享连接注册表）"""
         # 首先检查是否启用
         if not self.mongodb_enabled:
             return False, "MongoDB未启用 (MONGODB_ENABLED=false)"
 
-        try:
-            import pymongo
-            from pymongo import MongoClient
-
-            # 构建连接参数
-            connect_kwargs = {
-                "host": self.mongodb_config["host"],
-                "port": self.mongodb_config["port"],
-                "serverSelectionTimeoutMS": self.mongodb_config["timeout"],
-                "connectTimeoutMS": self.mongodb_config["timeout"]
-            }
-
-            # 如果有用户名和密码，添加认证
-            if self.mongodb_config["username"] and self.mongodb_config["password"]:
-                connect_kwargs.update({
-                    "username": self.mongodb_config["username"],
-                    "password": self.mongodb_config["password"],
-                    "authSource": self.mongodb_config["auth_source"]
-                })
-
-            client = MongoClient(**connect_kwargs)
-
-            # 测试连接
-            client.server_info()
-            client.close()
+        registry = get_connection_registry()
+        if registry.mongo_factory is None:
+            return False, "pymongo未安装"
 
+        self.mongodb_client = registry.get_mongo_client(self._mongodb_uri(), timeout_ms=self.mongodb_config["timeout"])
+        if self.mongodb_client is not None:
             return True, "MongoDB连接成功"
-
-        except ImportError:
-            return False, "pymongo未安装"
-        except Exception as e:
-            return False, f"MongoDB连接失败: {str(e)}"
+        return False, "MongoDB连接失败"
     
     def _detect_redis(self) -> Tuple[bool, str]:
-        """检测Redis是否可用"""
+        """检测Redis是否可用（通过共享连接注册表）"""
         # 首先检查是否启用
         if not self.redis_enabled:
             return False, "Redis未启用 (REDIS_ENABLED=false)"
 
-        try:
-            import redis
-
-            # 构建连接参数
-            connect_kwargs = {
-                "host": self.redis_config["host"],
-                "port": self.redis_config["port"],
-                "db": self.redis_config["db"],
-                "socket_timeout": self.redis_config["timeout"],
-                "socket_connect_timeout": self.redis_config["timeout"]
-            }
-
-            # 如果有密码，添加密码
-            if self.redis_config["password"]:
-                connect_kwargs["password"] = self.redis_config["password"]
-
-            client = redis.Redis(**connect_kwargs)
-
-            # 测试连接
-            client.ping()
+        registry = get_connection_registry()
+        if registry.redis_factory is None:
+            return False, "redis未安装"
 
+        self.redis_client = registry.get_redis_client(self._redis_url(), timeout=self.redis_config["timeout"])
+        if self.redis_client is not None:
             return True, "Redis连接成功"
-
-        except ImportError:
-            return False, "redis未安装"
-        except Exception as e:
-            return False, f"Redis连接失败: {str(e)}"
+        return False, "Redis连接失败"
     
     def _detect_databases(self):
         """检测所有数据库"""
@@ -189,67 +157,36 @@ class DatabaseManager:
         self.logger.info(f"主要缓存后端: {self.primary_backend}")
     
     def _initialize_connections(self):
-        """初始化数据库连接"""
-        # 初始化MongoDB连接
+        """初始化数据库连接（客户端在检测时已从共享连接注册表获取）"""
         if self.mongodb_available:
-            try:
-                import pymongo
-
-                # 构建连接参数
-                connect_kwargs = {
-                    "host": self.mongodb_config["host"],
-                    "port": self.mongodb_config["port"],
-                    "serverSelectionTimeoutMS": self.mongodb_config["timeout"]
-                }
-
-                # 如果有用户名和密码，添加认证
-                if self.mongodb_config["username"] and self.mongodb_config["password"]:
-                    connect_kwargs.update({
-                        "username": self.mongodb_config["username"],
-                        "password": self.mongodb_config["password"],
-                        "authSource": self.mongodb_config["auth_source"]
-                    })
-
-                self.mongodb_client = pymongo.MongoClient(**connect_kwargs)
-                self.logger.info("MongoDB客户端初始化成功")
-            except Exception as e:
-                self.logger.error(f"MongoDB客户端初始化失败: {e}")
-                self.mongodb_available = False
-
-        # 初始化Redis连接
+            self.logger.info("MongoDB客户端初始化成功")
         if self.redis_available:
-            try:
-                import redis
-
-                # 构建连接参数
-                connect_kwargs = {
-                    "host": self.redis_config["host"],
-                    "port": self.redis_config["port"],
-                    "db": self.redis_config["db"],
-                    "socket_timeout": self.redis_config["timeout"]
-                }
-
-                # 如果有密码，添加密码
-                if self.redis_config["password"]:
-                    connect_kwargs["password"] = self.redis_config["password"]
-
-                self.redis_client = redis.Redis(**connect_kwargs)
-                self.logger.info("Redis客户端初始化成功")
-            except Exception as e:
-                self.logger.error(f"Redis客户端初始化失败: {e}")
-                self.redis_available = False
+            self.logger.info("Redis客户端初始化成功")
     
     def get_mongodb_client(self):
-        """获取MongoDB客户端"""
-        if self.mongodb_available and self.mongodb_client:
-            return self.mongodb_client
-        return None
+        """获取MongoDB客户端（后端不可用时返回None）"""
+        if not self.mongodb_enabled:
+            return None
+        client = get_connection_registry().get_mongo_client(self._mongodb_uri(),
+                                                            timeout_ms=self.mongodb_config["timeout"])
+        if client is not None:
+            self.mongodb_client = client
+            self.mongodb_available = True
+        return client
     
     def get_redis_client(self):
-        """获取Redis客户端"""
-        if self.redis_available and self.redis_client:
-            return self.redis_client
-        return None
+        """获取Redis客户端（后端不可用时返回None）"""
+        if not self.redis_enabled:
+            return None
+        client = get_connection_registry().get_redis_client(self._redis_url(), timeout=self.redis_config["timeout"])
+        if client is not None:
+            self.redis_client = client
+            self.redis_available = True
+        return client
+    
+    def report_failure(self, client, error: Exception):
+        """使用客户端出错时上报给共享连接注册表"""
+        get_connection_registry().report_failure(client, error)
     
     def is_mongodb_available(self) -> bool:
         """检查MongoDB是否可用"""
@@ -292,7 +229,8 @@ class DatabaseManager:
                 "port": self.redis_config["port"]
             },
             "cache_backend": self.get_cache_backend(),
-            "fallback_enabled": True  # 总是启用降级
+            "fallback_enabled": True,  # 总是启用降级
+            "connections": get_connection_registry().get_stats()["backends"]
         }
 
     def get_cache_stats(self) -> Dict[str, Any]:
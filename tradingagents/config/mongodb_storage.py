@@ -9,6 +9,7 @@ from datetime import datetime
 from typing import Dict, List, Optional, Any
 from dataclasses import asdict
 from .config_manager import UsageRecord
+from .connection_registry import get_connection_registry
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
@@ -54,12 +55,9 @@ class MongoDBStorage:
     def _connect(self):
         """连接到MongoDB"""
         try:
-            self.client = MongoClient(
-                self.connection_string,
-                serverSelectionTimeoutMS=5000  # 5秒超时
-            )
-            # 测试连接
-            self.client.admin.command('ping')
+            self.client = get_connection_registry().get_mongo_client(self.connection_string, timeout_ms=5000)
+            if self.client is None:
+                raise ConnectionFailure("MongoDB不可用")
             
             self.db = self.client[self.database_name]
             self.collection = self.db[self.collection_name]
@@ -96,6 +94,11 @@ class MongoDBStorage:
             
         except Exception as e:
             logger.error(f"创建MongoDB索引失败: {e}")
+            self._report_failure(e)
+    
+    def _report_failure(self, error: Exception):
+        """上报MongoDB读写错误"""
+        get_connection_registry().report_failure(self.client, error)
     
     def is_connected(self) -> bool:
         """检查是否连接到MongoDB"""
@@ -124,6 +127,7 @@ class MongoDBStorage:
                 
         except Exception as e:
             logger.error(f"保存记录到MongoDB失败: {e}")
+            self._report_failure(e)
             return False
     
     def load_usage_records(self, limit: int = 10000, days: int = None) -> List[UsageRecord]:
@@ -160,6 +164,7 @@ class MongoDBStorage:
             
         except Exception as e:
             logger.error(f"从MongoDB加载记录失败: {e}")
+            self._report_failure(e)
             return []
     
     def get_usage_statistics(self, days: int = 30) -> Dict[str, Any]:
@@ -211,6 +216,7 @@ class MongoDBStorage:
                 
         except Exception as e:
             logger.error(f"获取MongoDB统计失败: {e}")
+            self._report_failure(e)
             return {}
     
     def get_provider_statistics(self, days: int = 30) -> Dict[str, Dict[str, Any]]:
@@ -256,6 +262,50 @@ class MongoDBStorage:
             
         except Exception as e:
             logger.error(f"获取供应商统计失败: {e}")
+            self._report_failure(e)
+            return {}
+    
+    def get_model_statistics(self, days: int = 30) -> Dict[str, Dict[str, Any]]:
+        """按模型获取统计信息，键为"供应商/模型名"（与本地滚动计数一致）"""
+        if not self._connected:
+            return {}
+        
+        try:
+            from datetime import timedelta
+            cutoff_date = datetime.now() - timedelta(days=days)
+            
+            pipeline = [
+                {
+                    '$match': {
+                        'timestamp': {'$gte': cutoff_date.isoformat()}
+                    }
+                },
+                {
+                    '$group': {
+                        '_id': {'provider': '$provider', 'model_name': '$model_name'},
+                        'cost': {'$sum': '$cost'},
+                        'input_tokens': {'$sum': '$input_tokens'},
+                        'output_tokens': {'$sum': '$output_tokens'},
+                        'requests': {'$sum': 1}
+                    }
+                }
+            ]
+            
+            model_stats = {}
+            for result in self.collection.aggregate(pipeline):
+                key = f"{result['_id'].get('provider')}/{result['_id'].get('model_name')}"
+                model_stats[key] = {
+                    'cost': round(result.get('cost', 0), 4),
+                    'input_tokens': result.get('input_tokens', 0),
+                    'output_tokens': result.get('output_tokens', 0),
+                    'requests': result.get('requests', 0)
+                }
+            
+            return model_stats
+            
+        except Exception as e:
+            logger.error(f"获取模型统计失败: {e}")
+            self._report_failure(e)
             return {}
     
     def cleanup_old_records(self, days: int = 90) -> int:
@@ -280,11 +330,14 @@ class MongoDBStorage:
             
         except Exception as e:
             logger.error(f"清理旧记录失败: {e}")
+            self._report_failure(e)
             return 0
     
     def close(self):
-        """关闭MongoDB连接"""
+        """释放MongoDB连接（客户端由共享连接注册表管理，不在这里关闭）"""
         if self.client:
-            self.client.close()
+            self.client = None
+            self.db = None
+            self.collection = None
             self._connected = False
             logger.info(f"MongoDB连接已关闭")
\ No newline at end of file
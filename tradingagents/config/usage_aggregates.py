@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Token使用滚动统计
+按日、供应商、模型和会话维护成本与Token计数，记录写入时增量更新，启动时从使用记录账本（及MongoDB）重建。
+成本警告、会话成本和统计页面直接读取计数，不再逐条扫描全部记录。
+"""
+
+import threading
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+
+def _empty_totals() -> Dict[str, Any]:
+    return {"cost": 0, "input_tokens": 0, "output_tokens": 0, "requests": 0}
+
+
+def _accumulate(totals: Dict[str, Any], cost: float, input_tokens: int, output_tokens: int, sign: int = 1):
+    totals["cost"] += sign * cost
+    totals["input_tokens"] += sign * input_tokens
+    totals["output_tokens"] += sign * output_tokens
+    totals["requests"] += sign
+
+
+def _merge(target: Dict[str, Any], source: Dict[str, Any]):
+    for key, value in source.items():
+        target[key] += value
+
+
+def model_key(record: Dict[str, Any]) -> str:
+    """模型统计的键：供应商/模型名"""
+    return f"{record.get('provider')}/{record.get('model_name')}"
+
+
+def _empty_bucket() -> Dict[str, Any]:
+    return {"totals": _empty_totals(), "providers": {}, "models": {}}
+
+
+def _apply_bucket(bucket: Dict[str, Any], keys: Dict[str, Any], cost: float, input_tokens: int,
+                  output_tokens: int, sign: int):
+    """计入（或扣除）一条记录到总计以及 providers/models 分组"""
+    _accumulate(bucket["totals"], cost, input_tokens, output_tokens, sign)
+    for group, key in keys.items():
+        totals = bucket[group].setdefault(key, _empty_totals())
+        _accumulate(totals, cost, input_tokens, output_tokens, sign)
+        if totals["requests"] <= 0:
+            del bucket[group][key]
+
+
+def _merge_bucket(target: Dict[str, Any], source: Dict[str, Any]):
+    _merge(target["totals"], source["totals"])
+    for group in ("providers", "models"):
+        for key, totals in source[group].items():
+            _merge(target[group].setdefault(key, _empty_totals()), totals)
+
+
+class UsageAggregates:
+    """使用记录的滚动计数（线程安全）"""
+
+    def __init__(self, records: Iterable[Dict[str, Any]] = ()):
+        self._lock = threading.Lock()
+        self._days: Dict[date, Dict[str, Any]] = {}
+        self._sessions: Dict[str, Dict[str, Any]] = {}
+        self.rebuild(records)
+
+    def rebuild(self, records: Iterable[Dict[str, Any]]):
+        """丢弃现有计数，按给定记录重新统计"""
+        with self._lock:
+            self._days = {}
+            self._sessions = {}
+            for record in records:
+                self._apply(record, 1)
+
+    def add(self, record: Dict[str, Any]):
+        """计入一条新记录"""
+        with self._lock:
+            self._apply(record, 1)
+
+    def remove_many(self, records: Iterable[Dict[str, Any]]):
+        """扣除被删除的记录（如账本轮转删除旧分段）"""
+        with self._lock:
+            for record in records:
+                self._apply(record, -1)
+
+    def _apply(self, record: Dict[str, Any], sign: int):
+        try:
+            cost = record["cost"]
+            input_tokens = record["input_tokens"]
+            output_tokens = record["output_tokens"]
+        except (KeyError, TypeError):
+            return
+
+        session = self._sessions.setdefault(record.get("session_id"), _empty_totals())
+        _accumulate(session, cost, input_tokens, output_tokens, sign)
+        if session["requests"] <= 0:
+            del self._sessions[record.get("session_id")]
+
+        # 时间戳无法解析的记录不计入按时间统计（与逐条统计时的处理一致）
+        try:
+            timestamp = datetime.fromisoformat(record["timestamp"])
+        except (KeyError, TypeError, ValueError):
+            return
+
+        keys = {"providers": record.get("provider"), "models": model_key(record)}
+        day = self._days.get(timestamp.date())
+        if day is None:
+            day = self._days[timestamp.date()] = dict(_empty_bucket(), hours={})
+        _apply_bucket(day, keys, cost, input_tokens, output_tokens, sign)
+        # 按小时的子计数和明细只用于统计窗口起点所在的那一天
+        hour = day["hours"].get(timestamp.hour)
+        if hour is None:
+            hour = day["hours"][timestamp.hour] = dict(_empty_bucket(), entries=[])
+        _apply_bucket(hour, keys, cost, input_tokens, output_tokens, sign)
+        entry = (timestamp, cost, input_tokens, output_tokens, keys)
+        if sign > 0:
+            hour["entries"].append(entry)
+        elif entry in hour["entries"]:
+            hour["entries"].remove(entry)
+        if hour["totals"]["requests"] <= 0:
+            del day["hours"][timestamp.hour]
+        if day["totals"]["requests"] <= 0:
+            del self._days[timestamp.date()]
+
+    def _window(self, days: int, now: Optional[datetime]):
+        """
+        返回窗口内每天的计数 [(日期, 计数)]，日期升序，计数包含 totals/providers/models
+
+        窗口起点当天：起点之后的整小时直接合并小时计数，起点所在的那一小时按明细逐条比较时间，
+        因此窗口边界与逐条扫描 timestamp >= now - days 完全一致。
+        """
+        cutoff = (now or datetime.now()) - timedelta(days=days)
+        window = []
+        for day in sorted(d for d in self._days if d >= cutoff.date()):
+            bucket = self._days[day]
+            if day > cutoff.date():
+                window.append((day, bucket))
+                continue
+            partial = _empty_bucket()
+            for hour, hour_bucket in bucket["hours"].items():
+                if hour > cutoff.hour:
+                    _merge_bucket(partial, hour_bucket)
+                elif hour == cutoff.hour:
+                    for timestamp, cost, input_tokens, output_tokens, keys in hour_bucket["entries"]:
+                        if timestamp >= cutoff:
+                            _apply_bucket(partial, keys, cost, input_tokens, output_tokens, 1)
+            if partial["totals"]["requests"]:
+                window.append((day, partial))
+        return window
+
+    def get_statistics(self, days: int = 30, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """最近N天的统计，结构与 ConfigManager.get_usage_statistics 一致，model_stats 以"供应商/模型名"为键"""
+        with self._lock:
+            merged = _empty_bucket()
+            for _, bucket in self._window(days, now):
+                _merge_bucket(merged, bucket)
+        totals = merged["totals"]
+
+        return {
+            "period_days": days,
+            "total_cost": round(totals["cost"], 4),
+            "total_input_tokens": totals["input_tokens"],
+            "total_output_tokens": totals["output_tokens"],
+            "total_requests": totals["requests"],
+            "provider_stats": merged["providers"],
+            "model_stats": merged["models"],
+            "records_count": totals["requests"]
+        }
+
+    def get_daily_usage(self, days: int = 30, now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """最近N天按日汇总的使用量，日期升序"""
+        with self._lock:
+            return [dict(bucket["totals"], date=day) for day, bucket in self._window(days, now)]
+
+    def get_day_cost(self, day: Optional[date] = None) -> float:
+        """某一自然日（默认今天）的总成本"""
+        with self._lock:
+            bucket = self._days.get(day or date.today())
+            return bucket["totals"]["cost"] if bucket else 0.0
+
+    def get_session_cost(self, session_id: str) -> float:
+        """会话总成本"""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            return session["cost"] if session else 0
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Token使用记录账本
+追加写入的JSONL账本，替代每次调用都整体读写的 usage.json：
+
+- 写入先进入内存队列，由后台线程按批次追加到当前分段文件，每批一次 write + fsync
+- 当前分段写满后轮转为新分段，总记录数超过上限时删除最旧的分段
+- 进程中断时最多留下一行残缺记录，下次打开时截掉；读取时也会跳过无法解析的行
+- 整体替换先把新记录写入暂存分段，写入提交标记后才替换并删除旧分段，中断时要么保留旧记录，要么在下次打开时完成替换
+- 单次写入的开销与历史记录数量无关
+"""
+
+import atexit
+import json
+import os
+import re
+import threading
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+_SEGMENT_PATTERN = re.compile(r'^usage-(\d{6})\.jsonl$')
+_STAGED_PATTERN = re.compile(r'^usage-(\d{6})\.jsonl\.staged$')
+_REPLACE_MARKER = "replace-from"
+
+
+class UsageLedger:
+    """追加写入、后台批量刷盘的使用记录账本"""
+
+    def __init__(self, directory, max_records: int = 10000, segment_records: int = 2000,
+                 flush_interval: float = 1.0, batch_size: int = 100,
+                 on_evict: Optional[Callable[[List[Dict[str, Any]]], None]] = None):
+        """
+        Args:
+            directory: 账本目录，分段文件为 usage-000001.jsonl、usage-000002.jsonl ...
+            max_records: 保留的最大记录数（按分段整体删除，实际保留数最多多出一个分段）
+            segment_records: 单个分段的记录数，写满后轮转
+            flush_interval: 后台刷盘间隔（秒），为0时每条记录同步写入
+            batch_size: 队列积压达到该数量时立即刷盘
+            on_evict: 删除旧分段前以该分段的记录调用（用于同步扣减统计计数）
+        """
+        self.directory = Path(directory)
+        self.max_records = max_records
+        self.segment_records = segment_records
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.on_evict = on_evict
+
+        self._pending = deque()
+        self._write_lock = threading.Lock()
+        self._condition = threading.Condition()
+        self._flusher = None
+        self._closed = False
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._recover_replace()
+        self._segments = self._scan_segments()  # [[序号, 记录数]]，按序号升序，最后一个是当前分段
+        if not self._segments:
+            self._segments = [[1, 0]]
+        else:
+            self._recover_tail()
+            self._enforce_retention()
+
+        atexit.register(self.close)
+
+    # ---- 分段文件 ----
+
+    def _segment_path(self, number: int) -> Path:
+        return self.directory / f"usage-{number:06d}.jsonl"
+
+    def _scan_segments(self) -> List[List[int]]:
+        segments = []
+        for path in self.directory.iterdir():
+            match = _SEGMENT_PATTERN.match(path.name)
+            if match:
+                with open(path, 'rb') as f:
+                    count = sum(1 for line in f if line.endswith(b'\n'))
+                segments.append([int(match.group(1)), count])
+        return sorted(segments)
+
+    def _recover_replace(self):
+        """处理上次中断的整体替换：已写入提交标记时完成替换，否则丢弃暂存分段（旧记录保持不变）"""
+        marker = self.directory / _REPLACE_MARKER
+        if marker.exists():
+            first = int(marker.read_text(encoding='utf-8'))
+            logger.warning(f"⚠️ 使用记录账本上次替换未完成，继续完成替换 (新分段从 {first} 开始)")
+            self._commit_replace(first)
+        else:
+            self._discard_staged()
+
+    def _discard_staged(self):
+        for path in self.directory.iterdir():
+            if _STAGED_PATTERN.match(path.name) or path.name == f"{_REPLACE_MARKER}.tmp":
+                path.unlink()
+
+    def _recover_tail(self):
+        """截掉当前分段末尾上次中断留下的残缺行"""
+        path = self._segment_path(self._segments[-1][0])
+        if not path.exists():
+            return
+        with open(path, 'rb+') as f:
+            data = f.read()
+            end = data.rfind(b'\n') + 1
+            if end < len(data):
+                logger.warning(f"⚠️ 使用记录账本末尾有残缺记录，已截断: {path} ({len(data) - end} 字节)")
+                f.truncate(end)
+
+    def _write_batch(self, batch: List[Dict[str, Any]]):
+        """把一批记录追加到当前分段（调用方持有写锁），写满时轮转"""
+        while batch:
+            number, count = self._segments[-1]
+            room = max(1, self.segment_records - count)
+            chunk, batch = batch[:room], batch[room:]
+            payload = ''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in chunk)
+            with open(self._segment_path(number), 'a', encoding='utf-8') as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            self._segments[-1] = [number, count + len(chunk)]
+            if count + len(chunk) >= self.segment_records:
+                self._segments.append([number + 1, 0])
+                self._enforce_retention()
+
+    def _enforce_retention(self):
+        """总记录数超过上限时删除最旧的分段"""
+        total = sum(count for _, count in self._segments)
+        while len(self._segments) > 1 and total - self._segments[0][1] >= self.max_records:
+            number, count = self._segments.pop(0)
+            total -= count
+            if self.on_evict is not None:
+                try:
+                    self.on_evict(list(self._read_segment(number)))
+                except Exception as e:
+                    logger.error(f"❌ 使用记录淘汰回调失败: {e}")
+            try:
+                self._segment_path(number).unlink()
+            except FileNotFoundError:
+                pass
+
+    # ---- 写入 ----
+
+    def append(self, record: Dict[str, Any]):
+        """追加一条记录（写入内存队列，由后台线程刷盘）"""
+        if self.flush_interval <= 0 or self._closed:
+            with self._write_lock:
+                self._write_batch([record])
+            return
+
+        with self._condition:
+            self._pending.append(record)
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_loop, name="usage-ledger-flusher", daemon=True)
+                self._flusher.start()
+            if len(self._pending) >= self.batch_size:
+                self._condition.notify()
+
+    def _flush_loop(self):
+        """后台刷盘：每隔 flush_interval 或队列积压到 batch_size 时写入一批"""
+        while True:
+            with self._condition:
+                if not self._closed and len(self._pending) < self.batch_size:
+                    self._condition.wait(self.flush_interval)
+                closed = self._closed
+            self.flush()
+            if closed:
+                return
+
+    def flush(self):
+        """把队列中的记录全部写入磁盘"""
+        with self._write_lock:
+            with self._condition:
+                batch = list(self._pending)
+                self._pending.clear()
+            if not batch:
+                return
+            try:
+                self._write_batch(batch)
+            except Exception as e:
+                if not self.directory.exists():
+                    # 账本目录已被删除（如清理配置目录），放弃这批记录
+                    if not self._closed:
+                        logger.warning(f"⚠️ 使用记录账本目录不存在，丢弃 {len(batch)} 条记录: {self.directory}")
+                    return
+                logger.error(f"❌ 使用记录写入失败: {e}")
+                with self._condition:
+                    self._pending.extendleft(reversed(batch))
+
+    def close(self):
+        """刷盘并停止后台线程"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if self._flusher is not None and self._flusher is not threading.current_thread():
+            self._flusher.join(timeout=5)
+        self.flush()
+
+    # ---- 读取 ----
+
+    def _read_segment(self, number: int) -> Iterator[Dict[str, Any]]:
+        path = self._segment_path(number)
+        if not path.exists():
+            return
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.endswith('\n'):
+                    break
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        """按写入顺序遍历账本中的全部记录（先刷盘，保证读到刚写入的记录）"""
+        self.flush()
+        for number, _ in list(self._segments):
+            yield from self._read_segment(number)
+
+    def read_records(self) -> List[Dict[str, Any]]:
+        """返回账本中的全部记录（保留数量由分段淘汰控制）"""
+        return list(self.iter_records())
+
+    def replace(self, records: List[Dict[str, Any]]):
+        """用给定记录替换账本全部内容（如清空记录、导入旧版记录）
+
+        新记录先写入序号更大的暂存分段并fsync，再原子写入提交标记，之后才启用新分段、删除旧分段；
+        提交标记写入前中断时旧记录不受影响，写入后中断时下次打开账本会完成替换
+        """
+        with self._write_lock:
+            with self._condition:
+                self._pending.clear()
+            first = self._segments[-1][0] + 1
+            try:
+                segments = self._stage_segments(first, list(records))
+                self._write_marker(first)
+            except Exception:
+                self._discard_staged()
+                raise
+            self._commit_replace(first)
+            self._segments = segments
+            self._enforce_retention()
+
+    def _stage_segments(self, first: int, records: List[Dict[str, Any]]) -> List[List[int]]:
+        """把记录按分段大小写入暂存文件，返回新的分段列表"""
+        segments = []
+        for start in range(0, len(records), self.segment_records):
+            chunk = records[start:start + self.segment_records]
+            number = first + len(segments)
+            with open(self._staged_path(number), 'w', encoding='utf-8') as f:
+                f.write(''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in chunk))
+                f.flush()
+                os.fsync(f.fileno())
+            segments.append([number, len(chunk)])
+        if not segments or segments[-1][1] >= self.segment_records:
+            segments.append([first + len(segments), 0])
+        return segments
+
+    def _staged_path(self, number: int) -> Path:
+        return self.directory / f"usage-{number:06d}.jsonl.staged"
+
+    def _write_marker(self, first: int):
+        """原子写入替换提交标记（记录新分段的起始序号）"""
+        tmp_path = self.directory / f"{_REPLACE_MARKER}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(str(first))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.directory / _REPLACE_MARKER)
+        self._fsync_directory()
+
+    def _commit_replace(self, first: int):
+        """启用暂存分段、删除序号小于 first 的旧分段，最后删除提交标记（可重复执行）"""
+        for path in self.directory.iterdir():
+            staged = _STAGED_PATTERN.match(path.name)
+            if staged:
+                os.replace(path, self._segment_path(int(staged.group(1))))
+        self._fsync_directory()
+        for path in self.directory.iterdir():
+            match = _SEGMENT_PATTERN.match(path.name)
+            if match and int(match.group(1)) < first:
+                path.unlink()
+        (self.directory / _REPLACE_MARKER).unlink()
+
+    def _fsync_directory(self):
+        """目录项（重命名）落盘；不支持打开目录的平台（Windows）跳过"""
+        try:
+            fd = os.open(self.directory, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+    def __len__(self) -> int:
+        with self._condition:
+            pending = len(self._pending)
+        return sum(count for _, count in self._segments) + pending
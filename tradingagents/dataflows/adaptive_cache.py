@@ -126,6 +126,7 @@ class AdaptiveCacheSystem:
             
         except Exception as e:
             self.logger.error(f"Redis缓存保存失败: {e}")
+            self.db_manager.report_failure(redis_client, e)
             return False
     
     def _load_from_redis(self, cache_key: str) -> Optional[Dict]:
@@ -150,6 +151,7 @@ class AdaptiveCacheSystem:
             
         except Exception as e:
             self.logger.error(f"Redis缓存加载失败: {e}")
+            self.db_manager.report_failure(redis_client, e)
             return None
     
     def _save_to_mongodb(self, cache_key: str, data: Any, metadata: Dict, ttl_seconds: int) -> bool:
@@ -187,6 +189,7 @@ class AdaptiveCacheSystem:
             
         except Exception as e:
             self.logger.error(f"MongoDB缓存保存失败: {e}")
+            self.db_manager.report_failure(mongodb_client, e)
             return False
     
     def _load_from_mongodb(self, cache_key: str) -> Optional[Dict]:
@@ -226,6 +229,7 @@ class AdaptiveCacheSystem:
             
         except Exception as e:
             self.logger.error(f"MongoDB缓存加载失败: {e}")
+            self.db_manager.report_failure(mongodb_client, e)
             return None
     
     def save_data(self, symbol: str, data: Any, start_date: str = "", end_date: str = "", 
@@ -5,7 +5,7 @@ AKShare数据源工具
 """
 
 import pandas as pd
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterable
 import warnings
 from datetime import datetime
 
@@ -14,6 +14,9 @@ from tradingagents.utils.logging_manager import get_logger
 logger = get_logger('agents')
 warnings.filterwarnings('ignore')
 
+from .security_master import get_security_master, load_a_shares_from_akshare
+from .financial_statement_store import get_financial_statement_store
+
 class AKShareProvider:
     """AKShare数据提供器"""
 
@@ -78,16 +81,27 @@ class AKShareProvider:
             else:
                 symbol = symbol.replace('.SZ', '').replace('.SS', '')
             
-            # 获取数据
-            data = self.ak.stock_zh_a_hist(
-                symbol=symbol,
-                period="daily",
-                start_date=start_date.replace('-', '') if start_date else "20240101",
-                end_date=end_date.replace('-', '') if end_date else "20241231",
-                adjust=""
-            )
-            
-            return data
+            def fetch(fetch_start: str, fetch_end: str) -> pd.DataFrame:
+                return self.ak.stock_zh_a_hist(
+                    symbol=symbol,
+                    period="daily",
+                    start_date=fetch_start.replace('-', ''),
+                    end_date=fetch_end.replace('-', ''),
+                    adjust=""
+                )
+
+            # 获取数据（未复权日线按股票存储，只请求缺失的首尾区间）
+            start_date = start_date or "20240101"
+            end_date = end_date or "20241231"
+            try:
+                from .cache_manager import get_cache
+                cache = get_cache()
+            except Exception as e:
+                logger.debug(f"缓存不可用，直接请求AKShare: {e}")
+                return fetch(start_date, end_date)
+
+            return cache.get_daily_bars(symbol, start_date, end_date, fetch,
+                                        data_source="akshare", date_column="日期")
             
         except Exception as e:
             logger.error(f"❌ AKShare获取股票数据失败: {e}")
@@ -97,24 +111,45 @@ class AKShareProvider:
         """获取股票基本信息"""
         if not self.connected:
             return {}
-        
+        return self.get_stock_infos([symbol])[symbol]
+
+    def get_stock_infos(self, symbols: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        批量获取A股基本信息
+
+        A股代码名称表每天只下载一次并保存在证券主数据中，查询直接使用内存索引
+
+        Args:
+            symbols: 股票代码列表
+
+        Returns:
+            Dict: {股票代码: {'symbol', 'name', 'source'}}，表中没有的代码名称为"股票{代码}"
+        """
+        symbols = list(symbols)
+        if not self.connected:
+            return {symbol: {} for symbol in symbols}
+
         try:
-            # 获取股票基本信息
-            stock_list = self.ak.stock_info_a_code_name()
-            stock_info = stock_list[stock_list['code'] == symbol]
-            
-            if not stock_info.empty:
-                return {
-                    'symbol': symbol,
-                    'name': stock_info.iloc[0]['name'],
-                    'source': 'akshare'
-                }
-            else:
-                return {'symbol': symbol, 'name': f'股票{symbol}', 'source': 'akshare'}
-                
+            master = self._ensure_a_share_listing()
+            names = master.get_names(symbols)
         except Exception as e:
             logger.error(f"❌ AKShare获取股票信息失败: {e}")
-            return {'symbol': symbol, 'name': f'股票{symbol}', 'source': 'akshare'}
+            names = {}
+
+        return {symbol: {'symbol': symbol, 'name': names.get(symbol) or f'股票{symbol}', 'source': 'akshare'}
+                for symbol in symbols}
+
+    def _ensure_a_share_listing(self):
+        """证券主数据中的A股代码名称表过期时同步加载一次（由主数据记录，后台刷新不再重复下载），返回证券主数据"""
+        master = get_security_master()
+        try:
+            count = master.ensure_loaded(load_a_shares_from_akshare, ak=self.ak)
+            if count:
+                logger.info(f"📇 A股代码名称表已更新: {count}条")
+        except Exception as e:
+            # 下载失败时重试间隔内不再下载，期间只使用已有数据
+            logger.error(f"❌ AKShare下载A股代码名称表失败: {e}")
+        return master
 
     def get_hk_stock_data(self, symbol: str, start_date: str = None, end_date: str = None) -> Optional[pd.DataFrame]:
         """
@@ -341,56 +376,15 @@ class AKShareProvider:
         try:
             logger.info(f"🔍 开始获取{symbol}的AKShare财务数据")
             
-            financial_data = {}
-            
-            # 1. 优先获取主要财务指标
-            try:
-                logger.debug(f"📊 尝试获取{symbol}主要财务指标...")
-                main_indicators = self.ak.stock_financial_abstract(symbol=symbol)
-                if main_indicators is not None and not main_indicators.empty:
-                    financial_data['main_indicators'] = main_indicators
-                    logger.info(f"✅ 成功获取{symbol}主要财务指标: {len(main_indicators)}条记录")
-                    logger.debug(f"主要财务指标列名: {list(main_indicators.columns)}")
-                else:
-                    logger.warning(f"⚠️ {symbol}主要财务指标为空")
-            except Exception as e:
-                logger.warning(f"❌ 获取{symbol}主要财务指标失败: {e}")
-            
-            # 2. 尝试获取资产负债表（可能失败，降级为debug日志）
-            try:
-                logger.debug(f"📊 尝试获取{symbol}资产负债表...")
-                balance_sheet = self.ak.stock_balance_sheet_by_report_em(symbol=symbol)
-                if balance_sheet is not None and not balance_sheet.empty:
-                    financial_data['balance_sheet'] = balance_sheet
-                    logger.debug(f"✅ 成功获取{symbol}资产负债表: {len(balance_sheet)}条记录")
-                else:
-                    logger.debug(f"⚠️ {symbol}资产负债表为空")
-            except Exception as e:
-                logger.debug(f"❌ 获取{symbol}资产负债表失败: {e}")
-            
-            # 3. 尝试获取利润表（可能失败，降级为debug日志）
-            try:
-                logger.debug(f"📊 尝试获取{symbol}利润表...")
-                income_statement = self.ak.stock_profit_sheet_by_report_em(symbol=symbol)
-                if income_statement is not None and not income_statement.empty:
-                    financial_data['income_statement'] = income_statement
-                    logger.debug(f"✅ 成功获取{symbol}利润表: {len(income_statement)}条记录")
-                else:
-                    logger.debug(f"⚠️ {symbol}利润表为空")
-            except Exception as e:
-                logger.debug(f"❌ 获取{symbol}利润表失败: {e}")
-            
-            # 4. 尝试获取现金流量表（可能失败，降级为debug日志）
-            try:
-                logger.debug(f"📊 尝试获取{symbol}现金流量表...")
-                cash_flow = self.ak.stock_cash_flow_sheet_by_report_em(symbol=symbol)
-                if cash_flow is not None and not cash_flow.empty:
-                    financial_data['cash_flow'] = cash_flow
-                    logger.debug(f"✅ 成功获取{symbol}现金流量表: {len(cash_flow)}条记录")
-                else:
-                    logger.debug(f"⚠️ {symbol}现金流量表为空")
-            except Exception as e:
-                logger.debug(f"❌ 获取{symbol}现金流量表失败: {e}")
+            # 主要财务指标和三大报表并发获取（共用一个截止时间），按报告期存储，
+            # 只有可能出现更新的报告期时才重新请求
+            fetchers = {
+                'main_indicators': lambda: self.ak.stock_financial_abstract(symbol=symbol),
+                'balance_sheet': lambda: self.ak.stock_balance_sheet_by_report_em(symbol=symbol),
+                'income_statement': lambda: self.ak.stock_profit_sheet_by_report_em(symbol=symbol),
+                'cash_flow': lambda: self.ak.stock_cash_flow_sheet_by_report_em(symbol=symbol),
+            }
+            financial_data = get_financial_statement_store().get_statements(symbol, fetchers)
             
             # 记录最终结果
             if financial_data:
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+缓存元数据索引
+基于SQLite的本地索引，按 (symbol, data_type, market_type, data_source) 查找缓存条目，
+避免每次查找、过期清理和统计时遍历并解析所有 *_meta.json 文件
+"""
+
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+
+_COLUMNS = (
+    'cache_key', 'symbol', 'data_key', 'data_type', 'market_type', 'data_source',
+    'start_date', 'end_date', 'file_path', 'file_format', 'cached_at', 'cached_ts', 'size_bytes',
+)
+
+
+class CacheMetadataIndex:
+    """缓存元数据索引 - *_meta.json 仍是单条记录的权威来源，本索引负责检索"""
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), timeout=10, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS cache_index (
+                    cache_key   TEXT PRIMARY KEY,
+                    symbol      TEXT,
+                    data_key    TEXT,
+                    data_type   TEXT,
+                    market_type TEXT,
+                    data_source TEXT,
+                    start_date  TEXT,
+                    end_date    TEXT,
+                    file_path   TEXT,
+                    file_format TEXT,
+                    cached_at   TEXT,
+                    cached_ts   REAL,
+                    size_bytes  INTEGER
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_cache_lookup "
+                "ON cache_index (symbol, data_type, market_type, data_source)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_cache_key_lookup "
+                "ON cache_index (data_type, market_type, data_key)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_ts ON cache_index (cached_ts)")
+
+    @staticmethod
+    def _to_row(cache_key: str, metadata: Dict[str, Any]) -> tuple:
+        cached_at = metadata.get('cached_at') or datetime.now().isoformat()
+        file_path = metadata.get('file_path')
+        size_bytes = metadata.get('size_bytes')
+        if size_bytes is None and file_path:
+            try:
+                size_bytes = Path(file_path).stat().st_size
+            except OSError:
+                size_bytes = 0
+        return (
+            cache_key,
+            metadata.get('symbol'),
+            metadata.get('data_key'),
+            metadata.get('data_type'),
+            metadata.get('market_type'),
+            metadata.get('data_source'),
+            metadata.get('start_date'),
+            metadata.get('end_date'),
+            file_path,
+            metadata.get('file_format'),
+            cached_at,
+            datetime.fromisoformat(cached_at).timestamp(),
+            size_bytes or 0,
+        )
+
+    def upsert(self, cache_key: str, metadata: Dict[str, Any]):
+        """写入或更新一条索引记录"""
+        self.upsert_many([(cache_key, metadata)])
+
+    def upsert_many(self, items: Iterable[tuple]):
+        rows = [self._to_row(cache_key, metadata) for cache_key, metadata in items]
+        placeholders = ", ".join("?" for _ in _COLUMNS)
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO cache_index ({', '.join(_COLUMNS)}) VALUES ({placeholders})",
+                rows,
+            )
+
+    def delete(self, cache_keys: Iterable[str]):
+        """删除索引记录"""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "DELETE FROM cache_index WHERE cache_key = ?",
+                [(cache_key,) for cache_key in cache_keys],
+            )
+
+    def find(self, symbol: str = None, data_type: str = None, market_type: str = None,
+             data_source: str = None, data_key: str = None, min_cached_ts: float = None,
+             limit: int = None) -> List[Dict[str, Any]]:
+        """按条件查找缓存条目，结果按缓存时间从新到旧排列；参数为None表示不限制"""
+        conditions, params = [], []
+        for column, value in (('symbol', symbol), ('data_type', data_type),
+                              ('market_type', market_type), ('data_source', data_source),
+                              ('data_key', data_key)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if min_cached_ts is not None:
+            conditions.append("cached_ts >= ?")
+            params.append(min_cached_ts)
+
+        sql = "SELECT * FROM cache_index"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY cached_ts DESC"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params)]
+
+    def find_older_than(self, cutoff_ts: float) -> List[Dict[str, Any]]:
+        """查找缓存时间早于 cutoff_ts 的条目"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM cache_index WHERE cached_ts < ?", (cutoff_ts,)
+            )
+            return [dict(row) for row in rows]
+
+    def stats_by_type(self) -> Dict[str, Dict[str, int]]:
+        """按数据类型汇总条目数与文件大小"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data_type, COUNT(*) AS count, COALESCE(SUM(size_bytes), 0) AS size_bytes "
+                "FROM cache_index GROUP BY data_type"
+            )
+            return {row['data_type']: {'count': row['count'], 'size_bytes': row['size_bytes']}
+                    for row in rows}
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM cache_index").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def rebuild(self, metadata_dir: Path) -> int:
+        """扫描 *_meta.json 重建索引（仅用于首次迁移或手动修复）"""
+        items = []
+        for metadata_file in Path(metadata_dir).glob("*_meta.json"):
+            try:
+                with open(metadata_file, 'r', encoding='utf-8') as f:
+                    metadata = json.load(f)
+                cache_key = metadata_file.stem.replace('_meta', '')
+                self._to_row(cache_key, metadata)  # 校验时间等字段
+                items.append((cache_key, metadata))
+            except Exception as e:
+                logger.warning(f"⚠️ 重建缓存索引时跳过损坏的元数据 {metadata_file.name}: {e}")
+
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM cache_index")
+        self.upsert_many(items)
+        logger.info(f"🗂️ 缓存元数据索引已重建: {len(items)} 条")
+        return len(items)
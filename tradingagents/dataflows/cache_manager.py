@@ -7,16 +7,33 @@
 import os
 import json
 import pickle
+import threading
+from collections import defaultdict
 import pandas as pd
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Optional, Dict, Any, Union
+from typing import Callable, Optional, Dict, Any, List, Tuple, Union
 import hashlib
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
 logger = get_logger('agents')
 
+from .cache_index import CacheMetadataIndex
+
+# 列式存储依赖（可选）
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# DataFrame缓存的存储格式：csv（兼容旧缓存）、parquet（压缩，体积小）、feather（Arrow IPC，内存映射读取）
+COLUMNAR_FORMATS = ('parquet', 'feather')
+FRAME_FORMATS = ('csv',) + COLUMNAR_FORMATS
+
 
 class StockDataCache:
     """股票数据缓存管理器 - 支持美股和A股数据缓存优化"""
@@ -54,16 +71,23 @@ class StockDataCache:
                         self.sw_industry_dir, self.metadata_dir]:
             dir_path.mkdir(exist_ok=True)
 
+        # 元数据索引 - 查找/清理/统计不再遍历所有元数据文件
+        self.index = CacheMetadataIndex(self.metadata_dir / "cache_index.db")
+        if self.index.count() == 0 and next(self.metadata_dir.glob("*_meta.json"), None):
+            self.index.rebuild(self.metadata_dir)
+
         # 缓存配置 - 针对不同市场设置不同的TTL
         self.cache_config = {
             'us_stock_data': {
                 'ttl_hours': 2,  # 美股数据缓存2小时（考虑到API限制）
                 'max_files': 1000,
+                'storage_format': 'parquet',
                 'description': '美股历史数据'
             },
             'china_stock_data': {
                 'ttl_hours': 1,  # A股数据缓存1小时（实时性要求高）
                 'max_files': 1000,
+                'storage_format': 'parquet',
                 'description': 'A股历史数据'
             },
             'us_news': {
@@ -89,20 +113,39 @@ class StockDataCache:
             'sw_index_data': {
                 'ttl_hours': 4,  # 申万指数数据缓存4小时（行业指数相对稳定）
                 'max_files': 100,
+                'storage_format': 'parquet',
                 'description': '申万指数历史数据'
             },
             'sw_industry_data': {
                 'ttl_hours': 6,  # 申万行业分类数据缓存6小时（分类相对稳定）
                 'max_files': 50,
+                'storage_format': 'parquet',
                 'description': '申万行业分类数据'
             },
             'sw_components_data': {
                 'ttl_hours': 12,  # 申万行业成份股数据缓存12小时（成份股变化较少）
                 'max_files': 200,
+                'storage_format': 'parquet',
                 'description': '申万行业成份股数据'
+            },
+            'us_daily_bars': {
+                'ttl_hours': 24,  # 日线存储按天重建（复权价格可能因除权变化）
+                'max_files': 1000,
+                'storage_format': 'feather',  # 读取频繁，使用内存映射
+                'description': '美股日线数据'
+            },
+            'china_daily_bars': {
+                'ttl_hours': 24,  # 日线存储按天重建（复权价格可能因除权变化）
+                'max_files': 1000,
+                'storage_format': 'feather',  # 读取频繁，使用内存映射
+                'description': 'A股日线数据'
             }
         }
 
+        # 日线存储按股票加锁，避免并发补齐同一只股票
+        self._bar_locks = defaultdict(threading.Lock)
+        self._bar_locks_guard = threading.Lock()
+
         logger.info(f"📁 缓存管理器初始化完成，缓存目录: {self.cache_dir}")
         logger.info(f"🗄️ 数据库缓存管理器初始化完成")
         logger.info(f"   美股数据: ✅ 已配置")
@@ -148,7 +191,7 @@ class StockDataCache:
             market_type = 'us' if not cache_key.startswith(('0', '1', '2', '3', '4', '5', '6', '7', '8', '9')) else 'china'
 
         # 根据数据类型和市场类型选择目录
-        if data_type == "stock_data":
+        if data_type in ("stock_data", "daily_bars"):
             base_dir = self.china_stock_dir if market_type == 'china' else self.us_stock_dir
         elif data_type == "news":
             base_dir = self.china_news_dir if market_type == 'china' else self.us_news_dir
@@ -169,13 +212,101 @@ class StockDataCache:
         """获取元数据文件路径"""
         return self.metadata_dir / f"{cache_key}_meta.json"
     
-    def _save_metadata(self, cache_key: str, metadata: Dict[str, Any]):
-        """保存元数据"""
+    def _save_metadata(self, cache_key: str, metadata: Dict[str, Any], touch: bool = True):
+        """保存元数据（touch=False 时保留原缓存时间）"""
         metadata_path = self._get_metadata_path(cache_key)
-        metadata['cached_at'] = datetime.now().isoformat()
+        if touch or 'cached_at' not in metadata:
+            metadata['cached_at'] = datetime.now().isoformat()
         
         with open(metadata_path, 'w', encoding='utf-8') as f:
             json.dump(metadata, f, ensure_ascii=False, indent=2)
+
+        self.index.upsert(cache_key, metadata)
+
+    def _storage_format(self, data_type: str, market_type: str = None) -> str:
+        """数据类型配置的DataFrame存储格式，列式格式依赖pyarrow，不可用时使用csv"""
+        config = self.cache_config.get(f"{market_type}_{data_type}") or self.cache_config.get(data_type, {})
+        storage_format = config.get('storage_format', 'csv')
+        if storage_format in COLUMNAR_FORMATS and not PYARROW_AVAILABLE:
+            return 'csv'
+        return storage_format
+
+    def _write_frame(self, data: pd.DataFrame, data_type: str, cache_key: str, storage_format: str,
+                     symbol: str = None, index: bool = True) -> Tuple[Path, str]:
+        """按指定格式写入DataFrame，列式格式写入失败时退回csv，返回 (文件路径, 实际格式)"""
+        if storage_format in COLUMNAR_FORMATS:
+            cache_path = self._get_cache_path(data_type, cache_key, storage_format, symbol)
+            try:
+                table = pa.Table.from_pandas(data, preserve_index=index)
+                if storage_format == 'parquet':
+                    pq.write_table(table, cache_path)
+                else:
+                    # 不压缩才能零拷贝内存映射读取
+                    feather.write_feather(table, cache_path, compression='uncompressed')
+                return cache_path, storage_format
+            except (pa.ArrowException, ValueError, TypeError) as e:
+                logger.warning(f"⚠️ {storage_format}格式写入失败，改用csv: {cache_key} ({e})")
+                cache_path.unlink(missing_ok=True)
+
+        cache_path = self._get_cache_path(data_type, cache_key, "csv", symbol)
+        data.to_csv(cache_path, index=index)
+        return cache_path, 'csv'
+
+    @staticmethod
+    def _read_frame(cache_path: Path, file_format: str, **csv_kwargs) -> pd.DataFrame:
+        """读取DataFrame缓存文件"""
+        if file_format == 'parquet':
+            return pq.read_table(cache_path, memory_map=True).to_pandas()
+        if file_format == 'feather':
+            return feather.read_table(cache_path, memory_map=True).to_pandas()
+        return pd.read_csv(cache_path, **csv_kwargs)
+
+    def _remove_replaced_file(self, cache_key: str, new_path: Path):
+        """同一缓存键换了存储格式时删除旧文件"""
+        old_metadata = self._load_metadata(cache_key)
+        if old_metadata and old_metadata.get('file_path') and Path(old_metadata['file_path']) != new_path:
+            Path(old_metadata['file_path']).unlink(missing_ok=True)
+
+    def find_cache_entries(self, symbol: str = None, data_type: str = None,
+                           market_type: str = None, data_source: str = None,
+                           data_key: str = None, max_age_hours: float = None) -> List[Dict[str, Any]]:
+        """
+        通过元数据索引查找缓存条目（按缓存时间从新到旧）
+
+        Args:
+            symbol/data_type/market_type/data_source/data_key: 过滤条件，None表示不限制
+            max_age_hours: 只返回该时间内缓存的条目，None表示不限制
+
+        Returns:
+            元数据字典列表，每项包含 cache_key
+        """
+        min_cached_ts = None
+        if max_age_hours is not None:
+            min_cached_ts = (datetime.now() - timedelta(hours=max_age_hours)).timestamp()
+        return self.index.find(symbol=symbol, data_type=data_type, market_type=market_type,
+                               data_source=data_source, data_key=data_key,
+                               min_cached_ts=min_cached_ts)
+
+    def _first_valid_entry(self, entries: List[Dict[str, Any]], max_age_hours: float,
+                           symbol: str = None, data_type: str = None) -> Optional[str]:
+        """返回第一个仍然有效的缓存键，顺带清理元数据已丢失的索引记录"""
+        stale_keys = []
+        try:
+            for entry in entries:
+                cache_key = entry['cache_key']
+                if not self._get_metadata_path(cache_key).exists():
+                    stale_keys.append(cache_key)
+                    continue
+                if self.is_cache_valid(cache_key, max_age_hours, symbol, data_type):
+                    return cache_key
+        finally:
+            if stale_keys:
+                self.index.delete(stale_keys)
+        return None
+
+    def rebuild_index(self) -> int:
+        """从元数据文件重建索引"""
+        return self.index.rebuild(self.metadata_dir)
     
     def _load_metadata(self, cache_key: str) -> Optional[Dict[str, Any]]:
         """加载元数据"""
@@ -248,12 +379,13 @@ class StockDataCache:
 
         # 保存数据
         if isinstance(data, pd.DataFrame):
-            cache_path = self._get_cache_path("stock_data", cache_key, "csv", symbol)
-            data.to_csv(cache_path, index=True)
+            cache_path, file_format = self._write_frame(data, "stock_data", cache_key,
+                                                        self._storage_format("stock_data", market_type), symbol)
         else:
-            cache_path = self._get_cache_path("stock_data", cache_key, "txt", symbol)
+            cache_path, file_format = self._get_cache_path("stock_data", cache_key, "txt", symbol), 'txt'
             with open(cache_path, 'w', encoding='utf-8') as f:
                 f.write(str(data))
+        self._remove_replaced_file(cache_key, cache_path)
 
         # 保存元数据
         metadata = {
@@ -264,7 +396,7 @@ class StockDataCache:
             'end_date': end_date,
             'data_source': data_source,
             'file_path': str(cache_path),
-            'file_format': 'csv' if isinstance(data, pd.DataFrame) else 'txt'
+            'file_format': file_format
         }
         self._save_metadata(cache_key, metadata)
 
@@ -285,8 +417,8 @@ class StockDataCache:
             return None
         
         try:
-            if metadata['file_format'] == 'csv':
-                return pd.read_csv(cache_path, index_col=0)
+            if metadata['file_format'] in FRAME_FORMATS:
+                return self._read_frame(cache_path, metadata['file_format'], index_col=0)
             else:
                 with open(cache_path, 'r', encoding='utf-8') as f:
                     return f.read()
@@ -331,28 +463,147 @@ class StockDataCache:
             return search_key
 
         # 如果没有精确匹配，查找部分匹配（相同股票代码的其他缓存）
-        for metadata_file in self.metadata_dir.glob(f"*_meta.json"):
-            try:
-                with open(metadata_file, 'r', encoding='utf-8') as f:
-                    metadata = json.load(f)
-
-                if (metadata.get('symbol') == symbol and
-                    metadata.get('data_type') == 'stock_data' and
-                    metadata.get('market_type') == market_type and
-                    (data_source is None or metadata.get('data_source') == data_source)):
-
-                    cache_key = metadata_file.stem.replace('_meta', '')
-                    if self.is_cache_valid(cache_key, max_age_hours, symbol, 'stock_data'):
-                        desc = self.cache_config.get(f"{market_type}_stock_data", {}).get('description', '数据')
-                        logger.info(f"📋 找到部分匹配的{desc}: {symbol} -> {cache_key}")
-                        return cache_key
-            except Exception:
-                continue
+        entries = self.find_cache_entries(symbol=symbol, data_type='stock_data',
+                                          market_type=market_type, data_source=data_source,
+                                          max_age_hours=max_age_hours)
+        cache_key = self._first_valid_entry(entries, max_age_hours, symbol, 'stock_data')
+        if cache_key:
+            desc = self.cache_config.get(f"{market_type}_stock_data", {}).get('description', '数据')
+            logger.info(f"📋 找到部分匹配的{desc}: {symbol} -> {cache_key}")
+            return cache_key
 
         desc = self.cache_config.get(f"{market_type}_stock_data", {}).get('description', '数据')
         logger.error(f"❌ 未找到有效的{desc}缓存: {symbol}")
         return None
     
+    def _daily_bars_key(self, symbol: str, data_source: str) -> str:
+        return self._generate_cache_key("daily_bars", symbol, source=data_source,
+                                        market=self._determine_market_type(symbol))
+
+    def _load_daily_bars_entry(self, symbol: str, data_source: str) -> Tuple[Optional[Dict[str, Any]], Optional[pd.DataFrame]]:
+        """读取日线存储，过期或损坏时返回 (None, None)"""
+        cache_key = self._daily_bars_key(symbol, data_source)
+        metadata = self._load_metadata(cache_key)
+        if not metadata or not Path(metadata['file_path']).exists():
+            return None, None
+
+        ttl_hours = self.cache_config.get(f"{metadata['market_type']}_daily_bars", {}).get('ttl_hours', 24)
+        created_at = datetime.fromisoformat(metadata.get('created_at', metadata['cached_at']))
+        if datetime.now() - created_at > timedelta(hours=ttl_hours):
+            logger.debug(f"⏰ 日线存储已过期，将重建: {symbol} ({data_source})")
+            return None, None
+
+        try:
+            date_column = metadata['date_column']
+            text_columns = {col: str for col, dtype in metadata.get('dtypes', {}).items()
+                            if dtype == 'object' and col != date_column}
+            bars = self._read_frame(Path(metadata['file_path']), metadata.get('file_format', 'csv'),
+                                    dtype=text_columns)
+            bars[date_column] = pd.to_datetime(bars[date_column])
+            return metadata, bars
+        except Exception as e:
+            logger.warning(f"⚠️ 读取日线存储失败，将重建: {symbol} ({e})")
+            return None, None
+
+    def _save_daily_bars(self, symbol: str, bars: pd.DataFrame, data_source: str, date_column: str,
+                         coverage: Tuple[str, str], created_at: str = None):
+        cache_key = self._daily_bars_key(symbol, data_source)
+        market_type = self._determine_market_type(symbol)
+        cache_path, file_format = self._write_frame(bars, "daily_bars", cache_key,
+                                                    self._storage_format("daily_bars", market_type),
+                                                    symbol, index=False)
+        self._remove_replaced_file(cache_key, cache_path)
+
+        self._save_metadata(cache_key, {
+            'symbol': symbol,
+            'data_type': 'daily_bars',
+            'market_type': market_type,
+            'start_date': coverage[0],
+            'end_date': coverage[1],
+            'data_source': data_source,
+            'file_path': str(cache_path),
+            'file_format': file_format,
+            'date_column': date_column,
+            'dtypes': {col: str(dtype) for col, dtype in bars.dtypes.items()},
+            'created_at': created_at or datetime.now().isoformat(),
+        })
+
+    def daily_bars_cover(self, symbol: str, start_date: str, end_date: str,
+                         data_source: str = None) -> bool:
+        """日线存储是否已完整覆盖 [start_date, end_date]（无需请求上游）"""
+        start_date = pd.Timestamp(start_date).strftime('%Y-%m-%d')
+        end_date = pd.Timestamp(end_date).strftime('%Y-%m-%d')
+        for entry in self.find_cache_entries(symbol=symbol, data_type='daily_bars', data_source=data_source):
+            metadata, _ = self._load_daily_bars_entry(symbol, entry['data_source'])
+            if metadata and not _missing_bar_ranges(metadata['start_date'], metadata['end_date'],
+                                                    start_date, end_date)[0]:
+                return True
+        return False
+
+    def get_daily_bars(self, symbol: str, start_date: str, end_date: str,
+                       fetcher: Callable[[str, str], Optional[pd.DataFrame]],
+                       data_source: str = "unknown", date_column: str = "date") -> Optional[pd.DataFrame]:
+        """
+        从按股票存储的日线中读取 [start_date, end_date]，只向上游补齐缺失的首尾区间
+
+        Args:
+            symbol: 股票代码
+            start_date: 开始日期 (YYYY-MM-DD 或 YYYYMMDD)
+            end_date: 结束日期 (YYYY-MM-DD 或 YYYYMMDD)
+            fetcher: fetcher(start, end) 返回闭区间内的日线DataFrame，失败返回None
+            data_source: 数据源，不同数据源分别存储
+            date_column: 日期列名
+
+        Returns:
+            DataFrame: 区间内的日线（日期列为datetime），上游失败时返回None
+        """
+        if not start_date or not end_date:
+            return fetcher(start_date, end_date)
+        start_date = pd.Timestamp(start_date).strftime('%Y-%m-%d')
+        end_date = pd.Timestamp(end_date).strftime('%Y-%m-%d')
+
+        with self._bar_locks_guard:
+            symbol_lock = self._bar_locks[(symbol, data_source)]
+
+        with symbol_lock:
+            metadata, bars = self._load_daily_bars_entry(symbol, data_source)
+            coverage = (metadata['start_date'], metadata['end_date']) if metadata else (None, None)
+            missing, replace = _missing_bar_ranges(coverage[0], coverage[1], start_date, end_date)
+
+            if missing:
+                if replace:
+                    bars, coverage = None, (None, None)
+                fetched = []
+                for fetch_start, fetch_end in missing:
+                    new_bars = fetcher(fetch_start, fetch_end)
+                    if new_bars is None:
+                        return None
+                    if new_bars.empty:
+                        # 空结果可能是假期也可能是上游异常，不扩展覆盖区间
+                        continue
+                    new_bars = new_bars.copy()
+                    new_bars[date_column] = pd.to_datetime(new_bars[date_column])
+                    fetched.append(new_bars)
+                    coverage = _extend_coverage(coverage, fetch_start, fetch_end)
+
+                if fetched:
+                    bars = pd.concat(([bars] if bars is not None else []) + fetched, ignore_index=True)
+                    bars = (bars.drop_duplicates(subset=[date_column], keep='last')
+                                .sort_values(date_column)
+                                .reset_index(drop=True))
+                    if coverage[0] is not None:
+                        self._save_daily_bars(symbol, bars, data_source, date_column, coverage,
+                                              None if replace or metadata is None else metadata.get('created_at'))
+                    logger.info(f"💾 日线存储已补齐: {symbol} ({data_source}) 请求区间 {len(missing)} 段, "
+                                f"覆盖 {coverage[0]} 至 {coverage[1]}")
+            else:
+                logger.info(f"⚡ 日线存储命中: {symbol} ({data_source}) {start_date} 至 {end_date}")
+
+            if bars is None:
+                return pd.DataFrame()
+            in_range = (bars[date_column] >= pd.Timestamp(start_date)) & (bars[date_column] <= pd.Timestamp(end_date))
+            return bars[in_range].reset_index(drop=True)
+
     def save_news_data(self, symbol: str, news_data: str, 
                       start_date: str = None, end_date: str = None,
                       data_source: str = "unknown") -> str:
@@ -445,52 +696,102 @@ class StockDataCache:
             max_age_hours = self.cache_config.get(cache_type, {}).get('ttl_hours', 24)
         
         # 查找匹配的缓存
-        for metadata_file in self.metadata_dir.glob(f"*_meta.json"):
-            try:
-                with open(metadata_file, 'r', encoding='utf-8') as f:
-                    metadata = json.load(f)
-                
-                if (metadata.get('symbol') == symbol and
-                    metadata.get('data_type') == 'fundamentals' and
-                    metadata.get('market_type') == market_type and
-                    (data_source is None or metadata.get('data_source') == data_source)):
-                    
-                    cache_key = metadata_file.stem.replace('_meta', '')
-                    if self.is_cache_valid(cache_key, max_age_hours, symbol, 'fundamentals'):
-                        desc = self.cache_config.get(f"{market_type}_fundamentals", {}).get('description', '基本面数据')
-                        logger.info(f"🎯 找到匹配的{desc}缓存: {symbol} ({data_source}) -> {cache_key}")
-                        return cache_key
-            except Exception:
-                continue
+        entries = self.find_cache_entries(symbol=symbol, data_type='fundamentals',
+                                          market_type=market_type, data_source=data_source,
+                                          max_age_hours=max_age_hours)
+        cache_key = self._first_valid_entry(entries, max_age_hours, symbol, 'fundamentals')
+        if cache_key:
+            desc = self.cache_config.get(f"{market_type}_fundamentals", {}).get('description', '基本面数据')
+            logger.info(f"🎯 找到匹配的{desc}缓存: {symbol} ({data_source}) -> {cache_key}")
+            return cache_key
         
         desc = self.cache_config.get(f"{market_type}_fundamentals", {}).get('description', '基本面数据')
         logger.error(f"❌ 未找到有效的{desc}缓存: {symbol} ({data_source})")
         return None
     
+    def migrate_storage_format(self, data_types: List[str] = None, dry_run: bool = False) -> Dict[str, int]:
+        """
+        把已有的csv缓存转换为 cache_config 中配置的存储格式（不改变缓存时间）
+
+        Args:
+            data_types: 只转换这些数据类型，None表示全部
+            dry_run: 只统计不转换
+
+        Returns:
+            统计信息: converted/skipped/failed 以及转换前后的字节数
+        """
+        result = {'converted': 0, 'skipped': 0, 'failed': 0, 'bytes_before': 0, 'bytes_after': 0}
+
+        for entry in self.find_cache_entries():
+            if entry['file_format'] != 'csv' or (data_types and entry['data_type'] not in data_types):
+                continue
+
+            cache_key = entry['cache_key']
+            metadata = self._load_metadata(cache_key)
+            target_format = self._storage_format(entry['data_type'], entry['market_type'])
+            old_path = Path(entry['file_path'] or '')
+            if not metadata or target_format == 'csv' or not old_path.is_file():
+                result['skipped'] += 1
+                continue
+            if dry_run:
+                result['converted'] += 1
+                result['bytes_before'] += old_path.stat().st_size
+                continue
+
+            try:
+                index = entry['data_type'] != 'daily_bars'
+                if index:
+                    data = pd.read_csv(old_path, index_col=0)
+                else:
+                    text_columns = {col: str for col, dtype in metadata.get('dtypes', {}).items()
+                                    if dtype == 'object'}
+                    data = pd.read_csv(old_path, dtype=text_columns)
+
+                new_path, file_format = self._write_frame(data, entry['data_type'], cache_key, target_format,
+                                                          entry['symbol'], index=index)
+                if file_format == 'csv':
+                    result['failed'] += 1
+                    continue
+
+                result['bytes_before'] += old_path.stat().st_size
+                result['bytes_after'] += new_path.stat().st_size
+                metadata.update({'file_path': str(new_path), 'file_format': file_format})
+                self._save_metadata(cache_key, metadata, touch=False)
+                old_path.unlink()
+                result['converted'] += 1
+            except Exception as e:
+                logger.warning(f"⚠️ 缓存格式转换失败: {cache_key} ({e})")
+                result['failed'] += 1
+
+        logger.info(f"🔄 缓存格式转换完成: 转换 {result['converted']} 个, 跳过 {result['skipped']} 个, "
+                    f"失败 {result['failed']} 个")
+        return result
+
     def clear_old_cache(self, max_age_days: int = 7):
         """清理过期缓存"""
         cutoff_time = datetime.now() - timedelta(days=max_age_days)
-        cleared_count = 0
+        cleared_keys = []
         
-        for metadata_file in self.metadata_dir.glob("*_meta.json"):
+        for entry in self.index.find_older_than(cutoff_time.timestamp()):
             try:
-                with open(metadata_file, 'r', encoding='utf-8') as f:
-                    metadata = json.load(f)
-                
-                cached_at = datetime.fromisoformat(metadata['cached_at'])
-                if cached_at < cutoff_time:
-                    # 删除数据文件
-                    data_file = Path(metadata['file_path'])
+                # 删除数据文件
+                if entry.get('file_path'):
+                    data_file = Path(entry['file_path'])
                     if data_file.exists():
                         data_file.unlink()
-                    
-                    # 删除元数据文件
+                
+                # 删除元数据文件
+                metadata_file = self._get_metadata_path(entry['cache_key'])
+                if metadata_file.exists():
                     metadata_file.unlink()
-                    cleared_count += 1
+                cleared_keys.append(entry['cache_key'])
                     
             except Exception as e:
                 logger.warning(f"⚠️ 清理缓存时出错: {e}")
         
+        self.index.delete(cleared_keys)
+        cleared_count = len(cleared_keys)
+        
         logger.info(f"🧹 已清理 {cleared_count} 个过期缓存文件")
     
     def get_cache_stats(self) -> Dict[str, Any]:
@@ -503,28 +804,17 @@ class StockDataCache:
             'total_size_mb': 0
         }
         
-        for metadata_file in self.metadata_dir.glob("*_meta.json"):
-            try:
-                with open(metadata_file, 'r', encoding='utf-8') as f:
-                    metadata = json.load(f)
-                
-                data_type = metadata.get('data_type', 'unknown')
-                if data_type == 'stock_data':
-                    stats['stock_data_count'] += 1
-                elif data_type == 'news':
-                    stats['news_count'] += 1
-                elif data_type == 'fundamentals':
-                    stats['fundamentals_count'] += 1
-                
-                # 计算文件大小
-                data_file = Path(metadata['file_path'])
-                if data_file.exists():
-                    stats['total_size_mb'] += data_file.stat().st_size / (1024 * 1024)
-                
-                stats['total_files'] += 1
-                
-            except Exception:
-                continue
+        for data_type, type_stats in self.index.stats_by_type().items():
+            if data_type == 'stock_data':
+                stats['stock_data_count'] += type_stats['count']
+            elif data_type == 'news':
+                stats['news_count'] += type_stats['count']
+            elif data_type == 'fundamentals':
+                stats['fundamentals_count'] += type_stats['count']
+            
+            # 文件大小在写入缓存时记录到索引
+            stats['total_size_mb'] += type_stats['size_bytes'] / (1024 * 1024)
+            stats['total_files'] += type_stats['count']
         
         stats['total_size_mb'] = round(stats['total_size_mb'], 2)
         return stats
@@ -552,12 +842,13 @@ class StockDataCache:
 
         # 保存数据
         if isinstance(data, pd.DataFrame):
-            cache_path = self._get_cache_path("sw_index_data", cache_key, "csv", symbol)
-            data.to_csv(cache_path, index=True)
+            cache_path, file_format = self._write_frame(data, "sw_index_data", cache_key,
+                                                        self._storage_format("sw_index_data"), symbol)
         else:
-            cache_path = self._get_cache_path("sw_index_data", cache_key, "txt", symbol)
+            cache_path, file_format = self._get_cache_path("sw_index_data", cache_key, "txt", symbol), 'txt'
             with open(cache_path, 'w', encoding='utf-8') as f:
                 f.write(str(data))
+        self._remove_replaced_file(cache_key, cache_path)
 
         # 保存元数据
         metadata = {
@@ -568,7 +859,7 @@ class StockDataCache:
             'end_date': end_date,
             'data_source': data_source,
             'file_path': str(cache_path),
-            'file_format': 'csv' if isinstance(data, pd.DataFrame) else 'txt'
+            'file_format': file_format
         }
         self._save_metadata(cache_key, metadata)
 
@@ -587,8 +878,8 @@ class StockDataCache:
             return None
         
         try:
-            if metadata['file_format'] == 'csv':
-                return pd.read_csv(cache_path, index_col=0)
+            if metadata['file_format'] in FRAME_FORMATS:
+                return self._read_frame(cache_path, metadata['file_format'], index_col=0)
             else:
                 with open(cache_path, 'r', encoding='utf-8') as f:
                     return f.read()
@@ -629,22 +920,13 @@ class StockDataCache:
             return search_key
 
         # 如果没有精确匹配，查找部分匹配
-        for metadata_file in self.metadata_dir.glob(f"*_meta.json"):
-            try:
-                with open(metadata_file, 'r', encoding='utf-8') as f:
-                    metadata = json.load(f)
-
-                if (metadata.get('symbol') == symbol and
-                    metadata.get('data_type') == 'sw_index_data' and
-                    (data_source is None or metadata.get('data_source') == data_source)):
-
-                    cache_key = metadata_file.stem.replace('_meta', '')
-                    if self.is_cache_valid(cache_key, max_age_hours, symbol, 'sw_index_data'):
-                        desc = self.cache_config.get('sw_index_data', {}).get('description', '申万指数数据')
-                        logger.info(f"📋 找到部分匹配的{desc}: {symbol} -> {cache_key}")
-                        return cache_key
-            except Exception:
-                continue
+        entries = self.find_cache_entries(symbol=symbol, data_type='sw_index_data',
+                                          data_source=data_source, max_age_hours=max_age_hours)
+        cache_key = self._first_valid_entry(entries, max_age_hours, symbol, 'sw_index_data')
+        if cache_key:
+            desc = self.cache_config.get('sw_index_data', {}).get('description', '申万指数数据')
+            logger.info(f"📋 找到部分匹配的{desc}: {symbol} -> {cache_key}")
+            return cache_key
 
         desc = self.cache_config.get('sw_index_data', {}).get('description', '申万指数数据')
         logger.error(f"❌ 未找到有效的{desc}缓存: {symbol}")
@@ -670,12 +952,13 @@ class StockDataCache:
 
         # 保存数据
         if isinstance(data, pd.DataFrame):
-            cache_path = self._get_cache_path(data_type, cache_key, "csv")
-            data.to_csv(cache_path, index=True)
+            cache_path, file_format = self._write_frame(data, data_type, cache_key,
+                                                        self._storage_format(data_type))
         else:
-            cache_path = self._get_cache_path(data_type, cache_key, "txt")
+            cache_path, file_format = self._get_cache_path(data_type, cache_key, "txt"), 'txt'
             with open(cache_path, 'w', encoding='utf-8') as f:
                 f.write(str(data))
+        self._remove_replaced_file(cache_key, cache_path)
 
         # 保存元数据
         metadata = {
@@ -684,7 +967,7 @@ class StockDataCache:
             'market_type': 'sw_industry',
             'data_source': data_source,
             'file_path': str(cache_path),
-            'file_format': 'csv' if isinstance(data, pd.DataFrame) else 'txt'
+            'file_format': file_format
         }
         self._save_metadata(cache_key, metadata)
 
@@ -703,8 +986,8 @@ class StockDataCache:
             return None
         
         try:
-            if metadata['file_format'] == 'csv':
-                return pd.read_csv(cache_path, index_col=0)
+            if metadata['file_format'] in FRAME_FORMATS:
+                return self._read_frame(cache_path, metadata['file_format'], index_col=0)
             else:
                 with open(cache_path, 'r', encoding='utf-8') as f:
                     return f.read()
@@ -731,29 +1014,57 @@ class StockDataCache:
             max_age_hours = self.cache_config.get(data_type, {}).get('ttl_hours', 6)
 
         # 查找匹配的缓存
-        for metadata_file in self.metadata_dir.glob(f"*_meta.json"):
-            try:
-                with open(metadata_file, 'r', encoding='utf-8') as f:
-                    metadata = json.load(f)
-
-                if (metadata.get('data_type') == data_type and
-                    metadata.get('market_type') == 'sw_industry' and
-                    (data_key is None or metadata.get('data_key') == data_key) and
-                    (data_source is None or metadata.get('data_source') == data_source)):
-
-                    cache_key = metadata_file.stem.replace('_meta', '')
-                    if self.is_cache_valid(cache_key, max_age_hours):
-                        desc = self.cache_config.get(data_type, {}).get('description', '申万行业数据')
-                        logger.info(f"🎯 找到匹配的{desc}缓存: {data_key} ({data_source}) -> {cache_key}")
-                        return cache_key
-            except Exception:
-                continue
+        entries = self.find_cache_entries(data_type=data_type, market_type='sw_industry',
+                                          data_key=data_key, data_source=data_source,
+                                          max_age_hours=max_age_hours)
+        cache_key = self._first_valid_entry(entries, max_age_hours)
+        if cache_key:
+            desc = self.cache_config.get(data_type, {}).get('description', '申万行业数据')
+            logger.info(f"🎯 找到匹配的{desc}缓存: {data_key} ({data_source}) -> {cache_key}")
+            return cache_key
 
         desc = self.cache_config.get(data_type, {}).get('description', '申万行业数据')
         logger.error(f"❌ 未找到有效的{desc}缓存: {data_key} ({data_source})")
         return None
 
 
+def _shift_date(date_str: str, days: int) -> str:
+    return (datetime.strptime(date_str, '%Y-%m-%d') + timedelta(days=days)).strftime('%Y-%m-%d')
+
+
+def _missing_bar_ranges(coverage_start: Optional[str], coverage_end: Optional[str],
+                        start_date: str, end_date: str) -> Tuple[List[Tuple[str, str]], bool]:
+    """
+    计算需要向上游请求的日期区间
+
+    Returns:
+        (区间列表, 是否替换现有存储)。请求与已覆盖区间不相交也不相邻时整体重取并替换，
+        保证存储始终是一段连续区间
+    """
+    if coverage_start is None or coverage_end is None:
+        return [(start_date, end_date)], True
+    if start_date > _shift_date(coverage_end, 1) or end_date < _shift_date(coverage_start, -1):
+        return [(start_date, end_date)], True
+
+    missing = []
+    if start_date < coverage_start:
+        missing.append((start_date, _shift_date(coverage_start, -1)))
+    if end_date > coverage_end:
+        missing.append((_shift_date(coverage_end, 1), end_date))
+    return missing, False
+
+
+def _extend_coverage(coverage: Tuple[Optional[str], Optional[str]],
+                     fetch_start: str, fetch_end: str) -> Tuple[Optional[str], Optional[str]]:
+    """把成功取回的区间并入覆盖范围；当天及以后的日线可能仍在变化，不计入覆盖"""
+    fetch_end = min(fetch_end, (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d'))
+    if fetch_end < fetch_start:
+        return coverage
+    start, end = coverage
+    return (fetch_start if start is None else min(start, fetch_start),
+            fetch_end if end is None else max(end, fetch_end))
+
+
 # 全局缓存实例
 _cache_instance = None
 
@@ -16,6 +16,8 @@ import pandas as pd
 from tradingagents.utils.logging_manager import get_logger
 logger = get_logger('agents')
 
+from tradingagents.config.connection_registry import get_connection_registry
+
 # MongoDB
 try:
     from pymongo import MongoClient
@@ -81,13 +83,9 @@ class DatabaseCacheManager:
             return
         
         try:
-            self.mongodb_client = MongoClient(
-                self.mongodb_url,
-                serverSelectionTimeoutMS=5000,  # 5秒超时
-                connectTimeoutMS=5000
-            )
-            # 测试连接
-            self.mongodb_client.admin.command('ping')
+            self.mongodb_client = get_connection_registry().get_mongo_client(self.mongodb_url, timeout_ms=5000)
+            if self.mongodb_client is None:
+                raise ConnectionError("MongoDB不可用")
             self.mongodb_db = self.mongodb_client[self.mongodb_db_name]
             
             # 创建索引
@@ -106,15 +104,14 @@ class DatabaseCacheManager:
             return
         
         try:
-            self.redis_client = redis.from_url(
+            self.redis_client = get_connection_registry().get_redis_client(
                 self.redis_url,
+                timeout=5,
                 db=self.redis_db,
-                socket_timeout=5,
-                socket_connect_timeout=5,
                 decode_responses=True
             )
-            # 测试连接
-            self.redis_client.ping()
+            if self.redis_client is None:
+                raise ConnectionError("Redis不可用")
             
             logger.info(f"✅ Redis连接成功: {self.redis_url}")
             
@@ -160,6 +157,7 @@ class DatabaseCacheManager:
             
         except Exception as e:
             logger.error(f"⚠️ MongoDB索引创建失败: {e}")
+            get_connection_registry().report_failure(self.mongodb_client, e)
     
     def _generate_cache_key(self, data_type: str, symbol: str, **kwargs) -> str:
         """生成缓存键"""
@@ -231,6 +229,7 @@ class DatabaseCacheManager:
                 logger.info(f"💾 股票数据已保存到MongoDB: {symbol} -> {cache_key}")
             except Exception as e:
                 logger.error(f"⚠️ MongoDB保存失败: {e}")
+                get_connection_registry().report_failure(self.mongodb_client, e)
         
         # 保存到Redis（快速缓存，6小时过期）
         if self.redis_client:
@@ -250,6 +249,7 @@ class DatabaseCacheManager:
                 logger.info(f"⚡ 股票数据已缓存到Redis: {symbol} -> {cache_key}")
             except Exception as e:
                 logger.error(f"⚠️ Redis缓存失败: {e}")
+                get_connection_registry().report_failure(self.redis_client, e)
         
         return cache_key
     
@@ -270,6 +270,7 @@ class DatabaseCacheManager:
                         return data_dict["data"]
             except Exception as e:
                 logger.error(f"⚠️ Redis加载失败: {e}")
+                get_connection_registry().report_failure(self.redis_client, e)
         
         # 如果Redis没有，从MongoDB加载
         if self.mongodb_db is not None:
@@ -298,6 +299,7 @@ class DatabaseCacheManager:
                             logger.info(f"⚡ 数据已同步到Redis缓存")
                         except Exception as e:
                             logger.error(f"⚠️ Redis同步失败: {e}")
+                            get_connection_registry().report_failure(self.redis_client, e)
                     
                     if doc["data_format"] == "dataframe_json":
                         return pd.read_json(doc["data"], orient='records')
@@ -306,6 +308,7 @@ class DatabaseCacheManager:
                         
             except Exception as e:
                 logger.error(f"⚠️ MongoDB加载失败: {e}")
+                get_connection_registry().report_failure(self.mongodb_client, e)
         
         return None
     
@@ -352,6 +355,7 @@ class DatabaseCacheManager:
                     
             except Exception as e:
                 logger.error(f"⚠️ MongoDB查询失败: {e}")
+                get_connection_registry().report_failure(self.mongodb_client, e)
         
         logger.error(f"❌ 未找到有效缓存: {symbol}")
         return None
@@ -386,6 +390,7 @@ class DatabaseCacheManager:
                 logger.info(f"📰 新闻数据已保存到MongoDB: {symbol} -> {cache_key}")
             except Exception as e:
                 logger.error(f"⚠️ MongoDB保存失败: {e}")
+                get_connection_registry().report_failure(self.mongodb_client, e)
 
         # 保存到Redis（24小时过期）
         if self.redis_client:
@@ -404,6 +409,7 @@ class DatabaseCacheManager:
                 logger.info(f"⚡ 新闻数据已缓存到Redis: {symbol} -> {cache_key}")
             except Exception as e:
                 logger.error(f"⚠️ Redis缓存失败: {e}")
+                get_connection_registry().report_failure(self.redis_client, e)
 
         return cache_key
 
@@ -437,6 +443,7 @@ class DatabaseCacheManager:
                 logger.info(f"💼 基本面数据已保存到MongoDB: {symbol} -> {cache_key}")
             except Exception as e:
                 logger.error(f"⚠️ MongoDB保存失败: {e}")
+                get_connection_registry().report_failure(self.mongodb_client, e)
 
         # 保存到Redis（24小时过期）
         if self.redis_client:
@@ -456,6 +463,7 @@ class DatabaseCacheManager:
                 logger.info(f"⚡ 基本面数据已缓存到Redis: {symbol} -> {cache_key}")
             except Exception as e:
                 logger.error(f"⚠️ Redis缓存失败: {e}")
+                get_connection_registry().report_failure(self.redis_client, e)
 
         return cache_key
 
@@ -479,6 +487,7 @@ class DatabaseCacheManager:
                     }
             except Exception as e:
                 logger.error(f"⚠️ MongoDB统计获取失败: {e}")
+                get_connection_registry().report_failure(self.mongodb_client, e)
 
         # Redis统计
         if self.redis_client:
@@ -488,6 +497,7 @@ class DatabaseCacheManager:
                 stats["redis"]["memory_usage"] = f"{info.get('used_memory_human', 'N/A')}"
             except Exception as e:
                 logger.error(f"⚠️ Redis统计获取失败: {e}")
+                get_connection_registry().report_failure(self.redis_client, e)
 
         return stats
 
@@ -506,19 +516,21 @@ class DatabaseCacheManager:
                     logger.info(f"🧹 MongoDB {collection_name} 清理了 {result.deleted_count} 条记录")
             except Exception as e:
                 logger.error(f"⚠️ MongoDB清理失败: {e}")
+                get_connection_registry().report_failure(self.mongodb_client, e)
 
         # Redis会自动过期，不需要手动清理
         logger.info(f"🧹 总共清理了 {cleared_count} 条过期记录")
         return cleared_count
 
     def close(self):
-        """关闭数据库连接"""
+        """释放数据库连接（客户端由共享连接注册表管理，不在这里关闭）"""
         if self.mongodb_client:
-            self.mongodb_client.close()
+            self.mongodb_client = None
+            self.mongodb_db = None
             logger.info(f"🔒 MongoDB连接已关闭")
 
         if self.redis_client:
-            self.redis_client.close()
+            self.redis_client = None
             logger.info(f"🔒 Redis连接已关闭")
 
 
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+财务报表存储
+按股票保存财务报表（主要指标、资产负债表、利润表、现金流量表）及其最新报告期，
+只有可能出现更新的报告期时才重新请求上游；多张报表并发获取并共用一个截止时间，按报表类型统计耗时。
+"""
+
+import os
+import pickle
+import re
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import date
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+import pandas as pd
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+DEFAULT_FETCH_TIMEOUT = float(os.getenv("TRADINGAGENTS_FINANCIAL_FETCH_TIMEOUT", "45"))
+DEFAULT_RECHECK_HOURS = float(os.getenv("TRADINGAGENTS_FINANCIAL_RECHECK_HOURS", "12"))
+
+_PERIOD_COLUMN = re.compile(r'^\d{8}$')
+_QUARTER_ENDS = ((3, 31), (6, 30), (9, 30), (12, 31))
+
+
+def report_period(frame: pd.DataFrame) -> Optional[str]:
+    """报表中最新的报告期（YYYYMMDD），无法识别时返回None
+
+    主要指标（stock_financial_abstract）的报告期是列名，三大报表（*_by_report_em）的报告期在 REPORT_DATE 列
+    """
+    if frame is None or frame.empty:
+        return None
+    if "REPORT_DATE" in frame.columns:
+        dates = pd.to_datetime(frame["REPORT_DATE"], errors="coerce").dropna()
+        return dates.max().strftime('%Y%m%d') if not dates.empty else None
+    periods = [str(column) for column in frame.columns if _PERIOD_COLUMN.match(str(column))]
+    return max(periods) if periods else None
+
+
+def latest_possible_period(today: date = None) -> str:
+    """截至今天已经结束的最近一个报告期（再新的报告期不可能已披露）"""
+    today = today or date.today()
+    ended = [date(today.year, month, day) for month, day in _QUARTER_ENDS if date(today.year, month, day) < today]
+    return (max(ended) if ended else date(today.year - 1, 12, 31)).strftime('%Y%m%d')
+
+
+class _StatementMetrics:
+    """单类报表的获取统计"""
+
+    def __init__(self):
+        self.fetches = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.total_seconds = 0.0
+        self.last_seconds = 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "fetches": self.fetches,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "avg_seconds": self.total_seconds / self.fetches if self.fetches else 0.0,
+            "last_seconds": self.last_seconds,
+        }
+
+
+class FinancialStatementStore:
+    """按股票存储的财务报表（线程安全）"""
+
+    def __init__(self, directory: Optional[str] = None, recheck_hours: float = DEFAULT_RECHECK_HOURS,
+                 max_workers: int = 8):
+        """
+        Args:
+            directory: 存储目录，默认为 tradingagents/dataflows/data_cache/financial_statements
+            recheck_hours: 可能已有更新报告期时，两次向上游确认之间的最短间隔（小时）
+            max_workers: 并发获取报表的线程数
+        """
+        if directory is None:
+            directory = Path(__file__).parent / "data_cache" / "financial_statements"
+        self.directory = Path(directory)
+        self.recheck_seconds = recheck_hours * 3600
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="financial-statements")
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._symbol_locks: Dict[str, threading.Lock] = defaultdict(threading.Lock)
+        self._metrics: Dict[str, _StatementMetrics] = defaultdict(_StatementMetrics)
+        self.store_hits = 0
+        self.upstream_checks = 0
+
+    # ---- 磁盘存储 ----
+
+    def _path(self, symbol: str) -> Path:
+        return self.directory / f"{symbol}.pkl"
+
+    def _load(self, symbol: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(symbol)
+        if entry is not None:
+            return entry
+        path = self._path(symbol)
+        if not path.exists():
+            return None
+        try:
+            with open(path, 'rb') as f:
+                entry = pickle.load(f)
+        except Exception as e:
+            logger.warning(f"⚠️ 财务报表存储读取失败，将重新获取: {symbol} ({e})")
+            return None
+        self._entries[symbol] = entry
+        return entry
+
+    def _save(self, symbol: str, entry: Dict[str, Any]):
+        self._entries[symbol] = entry
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            tmp_path = self._path(symbol).with_suffix(".tmp")
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(entry, f)
+            os.replace(tmp_path, self._path(symbol))
+        except Exception as e:
+            logger.error(f"⚠️ 财务报表存储保存失败: {symbol} ({e})")
+
+    # ---- 获取 ----
+
+    def get_statements(self, symbol: str, fetchers: Dict[str, Callable[[], Optional[pd.DataFrame]]],
+                       timeout: float = DEFAULT_FETCH_TIMEOUT, today: date = None) -> Dict[str, pd.DataFrame]:
+        """
+        获取股票的财务报表
+
+        已存储全部报表且最新报告期已是可能披露的最新一期时直接返回存储；否则（每 recheck_hours 最多一次）
+        并发调用全部 fetchers，在 timeout 秒内完成的非空结果替换存储中的同类报表，其余沿用存储。
+        间隔内请求了存储中没有的报表类型时只获取缺少的报表。
+
+        Args:
+            symbol: 股票代码
+            fetchers: {报表类型: 获取函数}，获取函数返回DataFrame，失败时抛出异常或返回None
+            timeout: 全部报表共用的截止时间（秒）
+            today: 当前日期（测试时可指定）
+
+        Returns:
+            Dict: {报表类型: DataFrame}，只包含非空报表
+        """
+        with self._lock:
+            symbol_lock = self._symbol_locks[symbol]
+
+        with symbol_lock:
+            entry = self._load(symbol)
+            checked_at = time.time()
+            if entry is not None:
+                missing = [name for name in fetchers if name not in entry["statements"]]
+                up_to_date = not missing and (entry.get("latest_period") or "") >= latest_possible_period(today)
+                recently_checked = time.time() - entry.get("checked_at", 0) < self.recheck_seconds
+                if up_to_date or (recently_checked and not missing):
+                    self.store_hits += 1
+                    logger.info(f"⚡ 财务报表存储命中: {symbol} (最新报告期 {entry.get('latest_period')})")
+                    return dict(entry["statements"])
+                if recently_checked:
+                    # 其他调用方只存储了部分报表：只补齐缺少的报表，已有报表仍按原确认时间
+                    fetchers = {name: fetchers[name] for name in missing}
+                    checked_at = entry["checked_at"]
+
+            self.upstream_checks += 1
+            fetched = self._fetch_all(symbol, fetchers, timeout)
+
+            statements = dict(entry["statements"]) if entry is not None else {}
+            statements.update(fetched)
+            periods = [period for period in map(report_period, statements.values()) if period]
+            latest_period = max(periods) if periods else None
+            if entry is not None and latest_period and latest_period > (entry.get("latest_period") or ""):
+                logger.info(f"📑 {symbol}有新的报告期: {entry.get('latest_period')} -> {latest_period}")
+
+            if statements:
+                self._save(symbol, {
+                    "statements": statements,
+                    "latest_period": latest_period,
+                    "checked_at": checked_at,
+                })
+            return statements
+
+    def _fetch_all(self, symbol: str, fetchers: Dict[str, Callable[[], Optional[pd.DataFrame]]],
+                   timeout: float) -> Dict[str, pd.DataFrame]:
+        """并发获取全部报表，超过截止时间的报表不再等待"""
+        def timed(name, fetcher):
+            start = time.perf_counter()
+            try:
+                return fetcher()
+            finally:
+                self._record(name, time.perf_counter() - start)
+
+        futures = {self._executor.submit(timed, name, fetcher): name for name, fetcher in fetchers.items()}
+        done, not_done = wait(futures, timeout=timeout)
+
+        results = {}
+        for future, name in futures.items():
+            if future not in done:
+                continue
+            try:
+                frame = future.result()
+            except Exception as e:
+                self._metrics[name].failures += 1
+                logger.debug(f"❌ 获取{symbol} {name}失败: {e}")
+                continue
+            if frame is not None and not frame.empty:
+                results[name] = frame
+                logger.debug(f"✅ 成功获取{symbol} {name}: {len(frame)}条记录")
+            else:
+                logger.debug(f"⚠️ {symbol} {name}为空")
+        for future in not_done:
+            name = futures[future]
+            self._metrics[name].timeouts += 1
+            logger.warning(f"⏰ 获取{symbol} {name}超过{timeout:.0f}秒，本次不再等待")
+        return results
+
+    def _record(self, name: str, seconds: float):
+        metrics = self._metrics[name]
+        metrics.fetches += 1
+        metrics.total_seconds += seconds
+        metrics.last_seconds = seconds
+
+    # ---- 统计 ----
+
+    def get_stats(self) -> Dict[str, Any]:
+        """存储命中次数、向上游确认次数和每类报表的获取耗时"""
+        return {
+            "store_hits": self.store_hits,
+            "upstream_checks": self.upstream_checks,
+            "statements": {name: metrics.snapshot() for name, metrics in self._metrics.items()},
+        }
+
+
+# 全局实例
+_financial_statement_store = None
+_financial_statement_store_lock = threading.Lock()
+
+
+def get_financial_statement_store() -> FinancialStatementStore:
+    """获取全局财务报表存储"""
+    global _financial_statement_store
+    if _financial_statement_store is None:
+        with _financial_statement_store_lock:
+            if _financial_statement_store is None:
+                _financial_statement_store = FinancialStatementStore()
+    return _financial_statement_store
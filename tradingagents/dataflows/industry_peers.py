@@ -0,0 +1,480 @@
+#!/usr/bin/env python3
+"""
+申万行业同业对比
+按申万三级行业批量获取全部成分股的财务摘要，对ROE、ROA、毛利率、净利率、资产负债率、流动比率
+在整个行业上向量化计算分位、排名和行业分布，行业快照按报告期缓存（内存+磁盘），
+单只股票的行业对比只是在快照中查找，不再每次请求N只同业的数据。
+"""
+
+import os
+import pickle
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from .financial_statement_store import (
+    DEFAULT_RECHECK_HOURS, get_financial_statement_store, latest_possible_period, report_period
+)
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+DEFAULT_MEMBERSHIP_DAYS = float(os.getenv("TRADINGAGENTS_SW_MEMBERSHIP_DAYS", "7"))
+MEMBERSHIP_RETRY_SECONDS = 600
+MAX_HINT_CANDIDATES = 8
+
+# 指标 -> (财务摘要中的指标名, 显示名称, 是否越高越好)
+PEER_METRICS = {
+    "roe": ("净资产收益率(ROE)", "ROE", True),
+    "roa": ("总资产报酬率", "ROA", True),
+    "gross_margin": ("毛利率", "毛利率", True),
+    "net_margin": ("销售净利率", "净利率", True),
+    "debt_ratio": ("资产负债率", "资产负债率", False),
+    "current_ratio": ("流动比率", "流动比率", True),
+}
+
+
+def _stock_codes(frame: pd.DataFrame) -> pd.Series:
+    """从成分股表中提取6位股票代码（兼容 600036.SH 和 600036 两种写法）"""
+    for column in ("股票代码", "Code", "证券代码", "代码"):
+        if column in frame.columns:
+            return frame[column].astype(str).str.extract(r'(\d{6})', expand=False)
+    return pd.Series(dtype=object)
+
+
+def compute_peer_statistics(values: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """
+    在整个行业上向量化计算分位、排名和分布
+
+    Args:
+        values: 以股票代码为索引、PEER_METRICS 中的指标为列的DataFrame，缺失值为NaN
+
+    Returns:
+        Dict: percentile（0~100，越高越好，方向已按指标调整）、rank（1为最好）、
+              stats（每个指标的 count/mean/median/p25/p75/top_quartile）
+    """
+    metrics = [metric for metric in PEER_METRICS if metric in values.columns]
+    values = values[metrics].astype(float)
+    # 越低越好的指标取负，统一为越高越好后再排名
+    direction = np.array([1.0 if PEER_METRICS[metric][2] else -1.0 for metric in metrics])
+    oriented = values * direction
+
+    percentile = oriented.rank(pct=True) * 100
+    rank = oriented.rank(ascending=False, method="min")
+    stats = pd.DataFrame({
+        "count": values.count(),
+        "mean": values.mean(),
+        "median": values.median(),
+        "p25": values.quantile(0.25),
+        "p75": values.quantile(0.75),
+        "top_quartile": oriented.quantile(0.75) * direction,
+    })
+    return {"percentile": percentile, "rank": rank, "stats": stats}
+
+
+class IndustrySnapshot:
+    """某个申万行业在某个报告期的同业快照"""
+
+    def __init__(self, industry_code: str, industry_name: str, period: str, peers: pd.DataFrame,
+                 built_at: float = None):
+        """
+        Args:
+            peers: 以股票代码为索引，包含 name 和 PEER_METRICS 中指标的DataFrame
+        """
+        self.industry_code = industry_code
+        self.industry_name = industry_name
+        self.period = period
+        self.peers = peers
+        self.built_at = built_at or time.time()
+
+        computed = compute_peer_statistics(peers)
+        self.percentile = computed["percentile"]
+        self.rank = computed["rank"]
+        self.stats = computed["stats"]
+
+    def __contains__(self, code: str) -> bool:
+        return code in self.peers.index
+
+    def __len__(self) -> int:
+        return len(self.peers)
+
+    def lookup(self, code: str) -> Optional[Dict[str, Any]]:
+        """股票在行业中的指标值、分位和排名，不是行业成分股时返回None"""
+        if code not in self.peers.index:
+            return None
+        metrics = {}
+        for metric in self.stats.index:
+            value = self.peers.at[code, metric]
+            metrics[metric] = {
+                "value": None if pd.isna(value) else float(value),
+                "percentile": None if pd.isna(self.percentile.at[code, metric]) else float(self.percentile.at[code, metric]),
+                "rank": None if pd.isna(self.rank.at[code, metric]) else int(self.rank.at[code, metric]),
+                "count": int(self.stats.at[metric, "count"]),
+            }
+        return {
+            "code": code,
+            "name": self.peers.at[code, "name"],
+            "industry_code": self.industry_code,
+            "industry_name": self.industry_name,
+            "period": self.period,
+            "peer_count": len(self.peers),
+            "metrics": metrics,
+        }
+
+    def top(self, metric: str = "roe", n: int = 5, exclude: str = None) -> pd.DataFrame:
+        """按指标排名最靠前的n家公司"""
+        ranked = self.peers.assign(_rank=self.rank[metric]).dropna(subset=["_rank"])
+        if exclude is not None:
+            ranked = ranked.drop(index=exclude, errors="ignore")
+        return ranked.sort_values("_rank").head(n).drop(columns="_rank")
+
+
+class IndustryPeerEngine:
+    """申万行业同业快照引擎（线程安全）"""
+
+    def __init__(self, provider=None, directory: Optional[str] = None,
+                 recheck_hours: float = DEFAULT_RECHECK_HOURS, membership_days: float = DEFAULT_MEMBERSHIP_DAYS,
+                 max_workers: int = 8, statement_store=None):
+        """
+        Args:
+            provider: AKShareProvider，默认使用 get_akshare_provider()
+            directory: 快照存储目录，默认为 tradingagents/dataflows/data_cache/industry_peers
+            recheck_hours: 可能已有更新报告期时，两次重建快照之间的最短间隔（小时）
+            membership_days: 股票所属行业映射的有效期（天）
+            max_workers: 批量获取成分股和财务摘要的线程数
+            statement_store: 财务摘要存储，默认使用全局财务报表存储
+        """
+        if directory is None:
+            directory = Path(__file__).parent / "data_cache" / "industry_peers"
+        self.directory = Path(directory)
+        self.recheck_seconds = recheck_hours * 3600
+        self.membership_seconds = membership_days * 86400
+        self.max_workers = max_workers
+        self._provider = provider
+        self._statement_store = statement_store
+
+        self._lock = threading.Lock()
+        self._industry_locks: Dict[str, threading.Lock] = defaultdict(threading.Lock)
+        self._membership_lock = threading.Lock()
+        self._membership: Optional[Dict[str, Any]] = None
+        self._membership_thread: Optional[threading.Thread] = None
+        self._next_membership_refresh = 0.0
+        self._snapshots: Dict[str, Dict[str, Any]] = {}
+        self.snapshot_hits = 0
+        self.snapshot_builds = 0
+
+    @property
+    def provider(self):
+        if self._provider is None:
+            from .akshare_utils import get_akshare_provider
+            self._provider = get_akshare_provider()
+        return self._provider
+
+    @property
+    def statement_store(self):
+        return self._statement_store or get_financial_statement_store()
+
+    # ---- 磁盘存储 ----
+
+    def _read(self, name: str) -> Optional[Dict[str, Any]]:
+        path = self.directory / f"{name}.pkl"
+        if not path.exists():
+            return None
+        try:
+            with open(path, 'rb') as f:
+                return pickle.load(f)
+        except Exception as e:
+            logger.warning(f"⚠️ 行业快照读取失败，将重新计算: {name} ({e})")
+            return None
+
+    def _write(self, name: str, entry: Dict[str, Any]):
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path = self.directory / f"{name}.pkl"
+            tmp_path = path.with_suffix(".tmp")
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(entry, f)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.error(f"⚠️ 行业快照保存失败: {name} ({e})")
+
+    # ---- 行业成分 ----
+
+    def _constituents(self, industry_code: str) -> Optional[pd.DataFrame]:
+        """申万行业成分股，三级行业接口无数据时使用指数成分接口"""
+        data = self.provider.get_sw_industry_constituents(industry_code)
+        if data is None or data.empty:
+            data = self.provider.get_sw_components(industry_code.split(".")[0])
+        if data is None or data.empty:
+            return None
+        data = data.assign(code=_stock_codes(data).values).dropna(subset=["code"])
+        return data.drop_duplicates("code")
+
+    def _fetch_industry_list(self) -> Dict[str, Dict[str, str]]:
+        """申万三级行业列表 {industries: {行业代码: 行业名称}, parents: {行业代码: 上级行业}}"""
+        industries = self.provider.get_sw_industry_list()
+        if industries is None or industries.empty or "行业代码" not in industries.columns:
+            logger.warning("⚠️ 无法获取申万三级行业列表")
+            return {"industries": {}, "parents": {}}
+        codes = industries["行业代码"].astype(str)
+        parents = industries["上级行业"].astype(str) if "上级行业" in industries.columns else [""] * len(codes)
+        return {"industries": dict(zip(codes, industries["行业名称"].astype(str))),
+                "parents": dict(zip(codes, parents))}
+
+    def refresh_membership(self) -> int:
+        """遍历全部三级行业的成分股重建 股票代码 -> 申万三级行业 的映射，返回映射的股票数"""
+        industry_list = self._fetch_industry_list()
+        names = industry_list["industries"]
+        if not names:
+            return 0
+
+        logger.info(f"🏭 后台重建申万行业映射: {len(names)}个三级行业")
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="sw-membership") as executor:
+            constituents = dict(zip(names, executor.map(self._constituents, names)))
+
+        stocks = {}
+        for code, frame in constituents.items():
+            if frame is not None:
+                stocks.update(dict.fromkeys(frame["code"], code))
+        if not stocks:
+            logger.warning("⚠️ 申万行业成分股全部获取失败，沿用已有的行业映射")
+            return 0
+
+        membership = dict(industry_list, stocks=stocks, built_at=time.time())
+        with self._membership_lock:
+            self._membership = membership
+            self._write("membership", membership)
+        logger.info(f"✅ 申万行业映射已更新: {len(stocks)}只股票")
+        return len(stocks)
+
+    def _maybe_refresh_membership(self):
+        """行业映射缺失或过期时启动后台重建（同一时间只有一个重建线程）"""
+        with self._membership_lock:
+            if self._membership is None:
+                self._membership = self._read("membership")
+            membership = self._membership
+            fresh = membership is not None and time.time() - membership["built_at"] < self.membership_seconds
+            if fresh or time.time() < self._next_membership_refresh:
+                return
+            if self._membership_thread is not None and self._membership_thread.is_alive():
+                return
+            self._next_membership_refresh = time.time() + MEMBERSHIP_RETRY_SECONDS
+            self._membership_thread = threading.Thread(target=self.refresh_membership, name="sw-membership-refresh",
+                                                       daemon=True)
+            self._membership_thread.start()
+
+    def wait_for_membership(self, timeout: Optional[float] = None):
+        """等待正在进行的后台行业映射重建完成"""
+        thread = self._membership_thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def _industry_hint(self, code: str) -> str:
+        """证券主数据中记录的行业名称（如"银行"），用于在映射重建完成前快速定位申万行业"""
+        from .security_master import get_security_master
+        entry = get_security_master().get(code)
+        return (entry or {}).get("industry") or ""
+
+    def _resolve_industry(self, code: str) -> Optional[str]:
+        """
+        映射中还没有该股票时只查询与行业提示相符的少数三级行业，找到后补充到映射中
+
+        不遍历全部三级行业（全量重建在后台进行），没有行业提示或提示不相符时返回None。
+        """
+        hint = self._industry_hint(code).strip()
+        if not hint:
+            return None
+        with self._membership_lock:
+            membership = self._membership or {"stocks": {}, "industries": {}, "parents": {}, "built_at": 0}
+        if not membership["industries"]:
+            membership = dict(membership, **self._fetch_industry_list())
+        names, parents = membership["industries"], membership.get("parents", {})
+        strip = lambda name: name.rstrip("ⅠⅡⅢ").strip()
+        candidates = [industry for industry, name in names.items()
+                      if strip(name) and (hint in name or strip(name) in hint or hint in parents.get(industry, ""))]
+        candidates = candidates[:MAX_HINT_CANDIDATES]
+        if not candidates:
+            return None
+
+        logger.info(f"🔍 按行业提示\"{hint}\"查找{code}所属的申万行业: {len(candidates)}个候选")
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="sw-membership") as executor:
+            constituents = dict(zip(candidates, executor.map(self._constituents, candidates)))
+
+        with self._membership_lock:
+            # 后台重建可能已经完成，在最新的映射上补充
+            membership = self._membership if self._membership and self._membership["industries"] else membership
+            stocks = dict(membership["stocks"])
+            for industry, frame in constituents.items():
+                if frame is not None:
+                    stocks.update(dict.fromkeys(frame["code"], industry))
+            self._membership = dict(membership, stocks=stocks)
+            self._write("membership", self._membership)
+        return stocks.get(code)
+
+    def get_industry(self, code: str) -> Optional[Dict[str, str]]:
+        """
+        股票所属的申万三级行业 {code, name}，未找到时返回None
+
+        使用已有的行业映射（过期时在后台重建）；映射中没有该股票时按行业提示只查询少数候选行业。
+        """
+        self._maybe_refresh_membership()
+        membership = self._membership
+        industry_code = membership["stocks"].get(code) if membership else None
+        if industry_code is None:
+            industry_code = self._resolve_industry(code)
+        if industry_code is None:
+            return None
+        names = self._membership["industries"]
+        return {"code": industry_code, "name": names.get(industry_code, industry_code)}
+
+    # ---- 行业快照 ----
+
+    def _abstract(self, code: str, today: date = None) -> Optional[pd.DataFrame]:
+        fetchers = {"main_indicators": lambda: self.provider.ak.stock_financial_abstract(symbol=code)}
+        try:
+            return self.statement_store.get_statements(code, fetchers, today=today).get("main_indicators")
+        except Exception as e:
+            logger.debug(f"❌ 获取{code}财务摘要失败: {e}")
+            return None
+
+    @staticmethod
+    def _common_period(abstracts: Dict[str, pd.DataFrame]) -> Optional[str]:
+        """至少一半成分股已披露的最新报告期（避免少数先披露的公司决定对比口径）"""
+        latest = pd.Series([report_period(frame) for frame in abstracts.values()]).dropna()
+        if latest.empty:
+            return None
+        counts = latest.value_counts().sort_index(ascending=False).cumsum()
+        reached = counts[counts >= len(latest) / 2]
+        return reached.index[0] if not reached.empty else counts.index[-1]
+
+    def build_snapshot(self, industry_code: str, industry_name: str = None,
+                       today: date = None) -> Optional[IndustrySnapshot]:
+        """批量获取行业全部成分股的财务摘要并计算快照"""
+        constituents = self._constituents(industry_code)
+        if constituents is None:
+            logger.warning(f"⚠️ 无法获取申万行业成分股: {industry_code}")
+            return None
+        codes = constituents["code"].tolist()
+        name_column = next((c for c in ("股票简称", "Name", "证券名称") if c in constituents.columns), None)
+        names = constituents.set_index("code")[name_column] if name_column else pd.Series(codes, index=codes)
+        if industry_name is None and "申万3级" in constituents.columns:
+            industry_name = str(constituents["申万3级"].iloc[0])
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="industry-peers") as executor:
+            abstracts = {code: frame for code, frame in zip(codes, executor.map(self._abstract, codes, [today] * len(codes)))
+                         if frame is not None and not frame.empty}
+        period = self._common_period(abstracts)
+        if period is None:
+            logger.warning(f"⚠️ 申万行业{industry_code}没有可用的财务摘要")
+            return None
+
+        indicators = {indicator: metric for metric, (indicator, _, _) in PEER_METRICS.items()}
+        rows = [frame.loc[frame["指标"].isin(indicators), ["指标", period]].drop_duplicates("指标").assign(code=code)
+                for code, frame in abstracts.items() if period in frame.columns and "指标" in frame.columns]
+        long = pd.concat(rows, ignore_index=True) if rows else pd.DataFrame(columns=["指标", period, "code"])
+        values = (long.pivot(index="code", columns="指标", values=period)
+                  .rename(columns=indicators)
+                  .reindex(index=codes, columns=list(PEER_METRICS)))
+        peers = values.apply(pd.to_numeric, errors="coerce")
+        peers.insert(0, "name", names.reindex(codes).astype(str).values)
+
+        snapshot = IndustrySnapshot(industry_code, industry_name or industry_code, period, peers)
+        logger.info(f"✅ 申万行业快照: {snapshot.industry_name}({industry_code}) 报告期{period}, "
+                    f"{len(abstracts)}/{len(codes)}只成分股有财务摘要, 耗时{time.perf_counter() - start:.1f}秒")
+        return snapshot
+
+    def get_snapshot(self, industry_code: str, industry_name: str = None, today: date = None) -> Optional[IndustrySnapshot]:
+        """
+        获取行业快照
+
+        已缓存的快照报告期已是可能披露的最新一期，或距上次构建不足 recheck_hours 时直接返回；
+        否则重新构建（成分股财务摘要大多命中财务报表存储），构建失败时沿用已有快照。
+        """
+        with self._lock:
+            industry_lock = self._industry_locks[industry_code]
+
+        with industry_lock:
+            entry = self._snapshots.get(industry_code) or self._read(f"snapshot_{industry_code}")
+            if entry is not None:
+                self._snapshots[industry_code] = entry
+                up_to_date = entry["period"] >= latest_possible_period(today)
+                if up_to_date or time.time() - entry["built_at"] < self.recheck_seconds:
+                    self.snapshot_hits += 1
+                    return entry["snapshot"]
+
+            self.snapshot_builds += 1
+            snapshot = self.build_snapshot(industry_code, industry_name, today=today)
+            if snapshot is None:
+                return entry["snapshot"] if entry is not None else None
+            if entry is not None and snapshot.period > entry["period"]:
+                logger.info(f"📑 申万行业{industry_code}有新的报告期: {entry['period']} -> {snapshot.period}")
+
+            entry = {"period": snapshot.period, "snapshot": snapshot, "built_at": snapshot.built_at}
+            self._snapshots[industry_code] = entry
+            self._write(f"snapshot_{industry_code}", entry)
+            return snapshot
+
+    def compare(self, code: str, industry_code: str = None, today: date = None) -> Optional[Dict[str, Any]]:
+        """
+        股票的行业对比
+
+        Args:
+            code: 6位股票代码
+            industry_code: 申万三级行业代码，未指定时从行业映射中查找
+
+        Returns:
+            Dict: IndustrySnapshot.lookup 的结果加上 stats（行业分布）和 snapshot，无法对比时返回None
+        """
+        industry_name = None
+        if industry_code is None:
+            industry = self.get_industry(code)
+            if industry is None:
+                logger.warning(f"⚠️ 未找到{code}所属的申万行业（行业映射可能正在后台重建）")
+                return None
+            industry_code, industry_name = industry["code"], industry["name"]
+
+        snapshot = self.get_snapshot(industry_code, industry_name, today=today)
+        if snapshot is None:
+            return None
+        comparison = snapshot.lookup(code)
+        if comparison is None:
+            logger.warning(f"⚠️ {code}不在申万行业{industry_code}的快照中")
+            return None
+        comparison["stats"] = snapshot.stats
+        comparison["snapshot"] = snapshot
+        return comparison
+
+    # ---- 统计 ----
+
+    def get_stats(self) -> Dict[str, Any]:
+        """快照命中次数、构建次数和已缓存的行业"""
+        return {
+            "snapshot_hits": self.snapshot_hits,
+            "snapshot_builds": self.snapshot_builds,
+            "industries": {code: {"period": entry["period"], "peers": len(entry["snapshot"])}
+                           for code, entry in self._snapshots.items()},
+        }
+
+
+# 全局实例
+_industry_peer_engine = None
+_industry_peer_engine_lock = threading.Lock()
+
+
+def get_industry_peer_engine() -> IndustryPeerEngine:
+    """获取全局申万行业同业快照引擎"""
+    global _industry_peer_engine
+    if _industry_peer_engine is None:
+        with _industry_peer_engine_lock:
+            if _industry_peer_engine is None:
+                _industry_peer_engine = IndustryPeerEngine()
+    return _industry_peer_engine
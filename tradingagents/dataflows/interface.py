@@ -62,6 +62,7 @@ except ImportError as e:
     yf = None
     YF_AVAILABLE = False
 from .config import get_config, set_config, DATA_DIR
+from .price_frame_cache import get_price_frame_cache
 
 
 def get_finnhub_news(
@@ -590,21 +591,71 @@ def get_stock_stats_indicators_window(
     curr_date = datetime.strptime(curr_date, "%Y-%m-%d")
     before = curr_date - relativedelta(days=look_back_days)
 
+    try:
+        ind_string = _get_indicator_window_batched(
+            symbol, indicator, curr_date, before, online
+        )
+    except Exception as e:
+        logger.warning(f"⚠️ 批量计算指标 {indicator} 失败，回退到逐日计算: {e}")
+        ind_string = _get_indicator_window_by_day(
+            symbol, indicator, curr_date, before, online
+        )
+
+    result_str = (
+        f"## {indicator} values from {before.strftime('%Y-%m-%d')} to {end_date}:\n\n"
+        + ind_string
+        + "\n\n"
+        + best_ind_params.get(indicator, "No description available.")
+    )
+
+    return result_str
+
+
+def _get_indicator_window_batched(
+    symbol: str, indicator: str, curr_date: datetime, before: datetime, online: bool
+) -> str:
+    """加载一次价格数据并整体计算指标，再按日期截取窗口"""
+    window = StockstatsUtils.get_stock_stats_window(
+        symbol,
+        [indicator],
+        before.strftime("%Y-%m-%d"),
+        curr_date.strftime("%Y-%m-%d"),
+        os.path.join(DATA_DIR, "market_data", "price_data"),
+        online=online,
+    )
+    values = dict(zip(window.index, window[indicator].values))
+
+    ind_string = ""
+    while curr_date >= before:
+        date_str = curr_date.strftime("%Y-%m-%d")
+        if date_str in values:
+            ind_string += f"{date_str}: {values[date_str]}\n"
+        elif online:
+            # 在线模式保留非交易日行，与逐日计算的输出一致
+            ind_string += f"{date_str}: N/A: Not a trading day (weekend or holiday)\n"
+
+        curr_date = curr_date - relativedelta(days=1)
+
+    return ind_string
+
+
+def _get_indicator_window_by_day(
+    symbol: str, indicator: str, curr_date: datetime, before: datetime, online: bool
+) -> str:
+    """逐日计算指标（每个日期都会重新读取并计算完整序列）"""
     if not online:
         # read from YFin data
-        data = pd.read_csv(
+        dates_in_df = set(get_price_frame_cache().get(
             os.path.join(
                 DATA_DIR,
                 f"market_data/price_data/{symbol}-YFin-data-2015-01-01-2025-03-25.csv",
             )
-        )
-        data["Date"] = pd.to_datetime(data["Date"], utc=True)
-        dates_in_df = data["Date"].astype(str).str[:10]
+        ).dates)
 
         ind_string = ""
         while curr_date >= before:
             # only do the trading dates
-            if curr_date.strftime("%Y-%m-%d") in dates_in_df.values:
+            if curr_date.strftime("%Y-%m-%d") in dates_in_df:
                 indicator_value = get_stockstats_indicator(
                     symbol, indicator, curr_date.strftime("%Y-%m-%d"), online
                 )
@@ -624,14 +675,7 @@ def get_stock_stats_indicators_window(
 
             curr_date = curr_date - relativedelta(days=1)
 
-    result_str = (
-        f"## {indicator} values from {before.strftime('%Y-%m-%d')} to {end_date}:\n\n"
-        + ind_string
-        + "\n\n"
-        + best_ind_params.get(indicator, "No description available.")
-    )
-
-    return result_str
+    return ind_string
 
 
 def get_stockstats_indicator(
@@ -673,24 +717,16 @@ def get_YFin_data_window(
     before = date_obj - relativedelta(days=look_back_days)
     start_date = before.strftime("%Y-%m-%d")
 
-    # read in data
-    data = pd.read_csv(
+    # read in data (shared in-process price cache)
+    prices = get_price_frame_cache().get(
         os.path.join(
             DATA_DIR,
             f"market_data/price_data/{symbol}-YFin-data-2015-01-01-2025-03-25.csv",
         )
     )
 
-    # Extract just the date part for comparison
-    data["DateOnly"] = data["Date"].str[:10]
-
     # Filter data between the start and end dates (inclusive)
-    filtered_data = data[
-        (data["DateOnly"] >= start_date) & (data["DateOnly"] <= curr_date)
-    ]
-
-    # Drop the temporary column we created
-    filtered_data = filtered_data.drop("DateOnly", axis=1)
+    filtered_data = prices.data[prices.date_mask(start_date, curr_date)]
 
     # Set pandas display options to show the full DataFrame
     with pd.option_context(
@@ -754,8 +790,8 @@ def get_YFin_data(
     start_date: Annotated[str, "Start date in yyyy-mm-dd format"],
     end_date: Annotated[str, "End date in yyyy-mm-dd format"],
 ) -> str:
-    # read in data
-    data = pd.read_csv(
+    # read in data (shared in-process price cache)
+    prices = get_price_frame_cache().get(
         os.path.join(
             DATA_DIR,
             f"market_data/price_data/{symbol}-YFin-data-2015-01-01-2025-03-25.csv",
@@ -767,16 +803,8 @@ def get_YFin_data(
             f"Get_YFin_Data: {end_date} is outside of the data range of 2015-01-01 to 2025-03-25"
         )
 
-    # Extract just the date part for comparison
-    data["DateOnly"] = data["Date"].str[:10]
-
     # Filter data between the start and end dates (inclusive)
-    filtered_data = data[
-        (data["DateOnly"] >= start_date) & (data["DateOnly"] <= end_date)
-    ]
-
-    # Drop the temporary column we created
-    filtered_data = filtered_data.drop("DateOnly", axis=1)
+    filtered_data = prices.data[prices.date_mask(start_date, end_date)]
 
     # remove the index from the dataframe
     filtered_data = filtered_data.reset_index(drop=True)
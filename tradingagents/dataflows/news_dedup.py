@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+新闻近似重复检测
+对规范化后的标题+摘要做词元n-gram分片，计算MinHash签名并用LSH分桶，
+只比较落在同一桶中的候选，整体耗时随新闻条数线性增长。中英文混排均适用：
+中文按单字切分，英文和数字按单词切分。
+"""
+
+import hashlib
+import re
+import unicodedata
+from typing import List, Sequence
+
+import numpy as np
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+# 中日韩统一表意文字逐字切分，英文/数字按单词切分
+_TOKEN_PATTERN = re.compile(r'[一-鿿㐀-䶿]|[a-z0-9]+')
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def tokenize(text: str) -> List[str]:
+    """规范化（全角转半角、小写）后切分词元，标点和空白被忽略"""
+    text = unicodedata.normalize('NFKC', text or '').lower()
+    return _TOKEN_PATTERN.findall(text)
+
+
+def shingles(text: str, ngram: int = 2) -> set:
+    """词元n-gram分片；词元数不足n时退化为单个词元"""
+    tokens = tokenize(text)
+    if len(tokens) < ngram:
+        return set(tokens)
+    return {' '.join(tokens[i:i + ngram]) for i in range(len(tokens) - ngram + 1)}
+
+
+def _hash_shingles(items: set) -> np.ndarray:
+    """分片的32位稳定哈希（不受PYTHONHASHSEED影响）"""
+    return np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=4).digest(), 'little') for s in items),
+        dtype=np.uint64, count=len(items),
+    )
+
+
+class NearDuplicateDetector:
+    """MinHash-LSH近似重复检测器
+
+    num_perm 个哈希函数分为 bands 段，每段 num_perm // bands 行；
+    任意一段签名完全相同即成为候选，再用签名估计的Jaccard相似度确认（>= threshold）。
+    默认 64/16 对应约0.5的Jaccard召回阈值。
+    """
+
+    def __init__(self, threshold: float = 0.5, num_perm: int = 64, bands: int = 16,
+                 ngram: int = 2, seed: int = 42):
+        if num_perm % bands:
+            raise ValueError("num_perm必须能被bands整除")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.ngram = ngram
+        rng = np.random.default_rng(seed)
+        # 通用哈希 (a*x + b) mod p，a、b < 2^29 保证 a*x+b 在uint64内不溢出
+        self._a = rng.integers(1, 1 << 29, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 29, size=num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        """文本的MinHash签名；没有可用分片时返回全最大值签名"""
+        hashes = _hash_shingles(shingles(text, self.ngram))
+        if hashes.size == 0:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        permuted = (np.outer(self._a, hashes) + self._b[:, None]) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=1)
+
+    def cluster(self, texts: Sequence[str]) -> List[int]:
+        """返回每条文本所属簇的代表下标（簇内最早出现的文本）"""
+        parent = list(range(len(texts)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        signatures = [self.signature(text) for text in texts]
+        empty = [not np.any(sig != _MAX_HASH) for sig in signatures]
+        comparisons = 0
+        for band in range(self.bands):
+            start = band * self.rows
+            buckets = {}
+            for i, sig in enumerate(signatures):
+                if empty[i]:
+                    continue
+                key = sig[start:start + self.rows].tobytes()
+                anchor = buckets.setdefault(key, i)
+                if anchor == i:
+                    continue
+                # 同桶内只与桶中第一条比较，借助并查集传递，避免桶内两两比较
+                root_a, root_i = find(anchor), find(i)
+                if root_a == root_i:
+                    continue
+                comparisons += 1
+                if np.mean(signatures[anchor] == sig) >= self.threshold:
+                    parent[max(root_a, root_i)] = min(root_a, root_i)
+
+        logger.debug(f"[新闻去重] MinHash-LSH候选比较 {comparisons} 次，新闻 {len(texts)} 条")
+        return [find(i) for i in range(len(texts))]
@@ -130,9 +130,7 @@ class OptimizedUSDataProvider:
                         # 备用方案：Yahoo Finance
                         logger.info(f"🔄 使用Yahoo Finance备用方案获取港股数据: {symbol}")
 
-                        self._wait_for_rate_limit()
-                        ticker = yf.Ticker(symbol)  # 港股代码保持原格式
-                        data = ticker.history(start=start_date, end=end_date)
+                        data = self._get_yfinance_history(symbol, start_date, end_date)  # 港股代码保持原格式
 
                         if not data.empty:
                             formatted_data = self._format_stock_data(symbol, data, start_date, end_date)
@@ -143,11 +141,8 @@ class OptimizedUSDataProvider:
                 else:
                     # 美股使用Yahoo Finance
                     logger.info(f"🇺🇸 从Yahoo Finance API获取美股数据: {symbol}")
-                    self._wait_for_rate_limit()
-
                     # 获取数据
-                    ticker = yf.Ticker(symbol.upper())
-                    data = ticker.history(start=start_date, end=end_date)
+                    data = self._get_yfinance_history(symbol.upper(), start_date, end_date)
 
                     if data.empty:
                         error_msg = f"未找到股票 '{symbol}' 在 {start_date} 到 {end_date} 期间的数据"
@@ -179,6 +174,31 @@ class OptimizedUSDataProvider:
 
         return formatted_data
     
+    def _get_yfinance_history(self, symbol: str, start_date: str, end_date: str) -> pd.DataFrame:
+        """
+        获取Yahoo Finance日线（与 Ticker.history 一致，不含 end_date 当天）
+
+        日线按股票存储，只有缺失的首尾区间才请求API并等待限流
+        """
+        def fetch(fetch_start: str, fetch_end: str) -> pd.DataFrame:
+            self._wait_for_rate_limit()
+            # Ticker.history 的 end 为开区间
+            end_exclusive = (datetime.strptime(fetch_end, '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d')
+            history = yf.Ticker(symbol).history(start=fetch_start, end=end_exclusive)
+            if history.index.tz is not None:
+                history.index = history.index.tz_localize(None)
+            return history.rename_axis('Date').reset_index()
+
+        last_day = (datetime.strptime(end_date, '%Y-%m-%d') - timedelta(days=1)).strftime('%Y-%m-%d')
+        if last_day < start_date:
+            return pd.DataFrame()
+
+        bars = self.cache.get_daily_bars(symbol, start_date, last_day, fetch,
+                                         data_source="yfinance", date_column="Date")
+        if bars is None or bars.empty:
+            return pd.DataFrame()
+        return bars.set_index('Date')
+
     def _format_stock_data(self, symbol: str, data: pd.DataFrame, 
                           start_date: str, end_date: str) -> str:
         """格式化股票数据为字符串"""
@@ -244,20 +264,12 @@ class OptimizedUSDataProvider:
         """尝试获取过期的缓存数据作为备用"""
         try:
             # 查找任何相关的缓存，不考虑TTL
-            for metadata_file in self.cache.metadata_dir.glob(f"*_meta.json"):
+            for entry in self.cache.find_cache_entries(symbol=symbol, data_type='stock_data',
+                                                       market_type='us'):
                 try:
-                    import json
-                    with open(metadata_file, 'r', encoding='utf-8') as f:
-                        metadata = json.load(f)
-                    
-                    if (metadata.get('symbol') == symbol and 
-                        metadata.get('data_type') == 'stock_data' and
-                        metadata.get('market_type') == 'us'):
-                        
-                        cache_key = metadata_file.stem.replace('_meta', '')
-                        cached_data = self.cache.load_stock_data(cache_key)
-                        if cached_data:
-                            return cached_data + "\n\n⚠️ 注意: 使用的是过期缓存数据"
+                    cached_data = self.cache.load_stock_data(entry['cache_key'])
+                    if cached_data:
+                        return cached_data + "\n\n⚠️ 注意: 使用的是过期缓存数据"
                 except Exception:
                     continue
         except Exception:
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+复权价格计算
+基于涨跌幅（pct_chg）向量化计算前复权/后复权价格：复权因子由 (1 + pct_chg) 的累积乘积得到，
+一次性应用到全部价格列；多只股票的数据框按 ts_code 分组各自计算。
+"""
+
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+FORWARD = "forward"
+BACKWARD = "backward"
+
+PRICE_COLUMNS = ("close", "open", "high", "low")
+
+
+def adjust_prices(data: pd.DataFrame, mode: str = FORWARD, group_column: Optional[str] = "ts_code",
+                  date_column: str = "trade_date", pct_column: str = "pct_chg") -> pd.DataFrame:
+    """
+    根据涨跌幅重新计算连续的复权价格
+
+    前复权以每只股票最后一天的收盘价为基准：前一天的收盘价 = 当天收盘价 / (1 + 当天涨跌幅)；
+    后复权以第一天的收盘价为基准：当天收盘价 = 前一天收盘价 * (1 + 当天涨跌幅)。
+    开盘、最高、最低价按当天 复权收盘价/原始收盘价 的比例调整（原始收盘价为0时保持不变）。
+    涨跌幅缺失按0处理。
+
+    Args:
+        data: 包含 open/high/low/close、日期和涨跌幅（百分数）的数据框
+        mode: "forward"（前复权）或 "backward"（后复权）
+        group_column: 股票代码列，存在且有多只股票时分组计算；None表示整体视为一只股票
+        date_column: 日期列
+        pct_column: 涨跌幅列
+
+    Returns:
+        DataFrame: 按（代码、）日期排序并重建索引的新数据框，原价格保存在 *_raw 列，
+            price_type 列为 forward_adjusted / backward_adjusted
+    """
+    if mode not in (FORWARD, BACKWARD):
+        raise ValueError(f"不支持的复权方式: {mode}")
+
+    grouped = group_column is not None and group_column in data.columns and data[group_column].nunique() > 1
+    sort_columns = [group_column, date_column] if grouped else [date_column]
+    adjusted = data.sort_values(sort_columns, kind="mergesort").reset_index(drop=True)
+
+    price_columns = [column for column in PRICE_COLUMNS if column in adjusted.columns]
+    for column in price_columns:
+        adjusted[f"{column}_raw"] = adjusted[column].copy()
+
+    close_raw = adjusted["close"].to_numpy(dtype=float)
+    growth = 1.0 + adjusted[pct_column].to_numpy(dtype=float) / 100.0
+    growth[np.isnan(growth)] = 1.0
+
+    # 每只股票第一行的位置（数据已按代码排序，各股票的行连续）
+    if grouped:
+        codes = adjusted[group_column].to_numpy()
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    else:
+        starts = np.array([0])
+    ends = np.r_[starts[1:], len(adjusted)]
+    group_ids = np.repeat(np.arange(len(starts)), ends - starts)
+
+    if mode == FORWARD:
+        # 第i天到最后一天之间的累计涨幅 (1+pct[i+1]) * ... * (1+pct[n-1])
+        later = np.r_[growth[1:], 1.0]
+        later[ends - 1] = 1.0
+        factors = _grouped_cumprod(later[::-1], group_ids[::-1])[::-1]
+        close = close_raw[ends - 1][group_ids] / factors
+    else:
+        # 第一天到第i天之间的累计涨幅 (1+pct[1]) * ... * (1+pct[i])
+        earlier = growth.copy()
+        earlier[starts] = 1.0
+        factors = _grouped_cumprod(earlier, group_ids)
+        close = close_raw[starts][group_ids] * factors
+
+    adjusted["close"] = close
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = close / close_raw
+    nonzero = close_raw != 0
+    for column in price_columns:
+        if column == "close":
+            continue
+        raw = adjusted[f"{column}_raw"].to_numpy(dtype=float)
+        adjusted[column] = np.where(nonzero, raw * ratio, raw)
+
+    adjusted["price_type"] = "forward_adjusted" if mode == FORWARD else "backward_adjusted"
+    return adjusted
+
+
+def _grouped_cumprod(values: np.ndarray, group_ids: np.ndarray) -> np.ndarray:
+    """按连续的分组计算累积乘积"""
+    if len(values) == 0 or group_ids[0] == group_ids[-1]:
+        return np.cumprod(values)
+    return pd.Series(values).groupby(group_ids).cumprod().to_numpy()
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+价格数据内存缓存
+进程内共享的LRU缓存，保存已解析的OHLCV数据框（按文件路径和修改时间校验），
+已计算的技术指标作为列保留在缓存中，重复请求无需再次读取或计算
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List
+
+import pandas as pd
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+DEFAULT_MAX_MB = int(os.getenv("TRADINGAGENTS_PRICE_CACHE_MB", "256"))
+
+
+class CachedPriceFrame:
+    """缓存中的单个价格文件"""
+
+    def __init__(self, path: str, mtime_ns: int, data: pd.DataFrame):
+        self.path = path
+        self.mtime_ns = mtime_ns
+        # 原始数据按只读使用，调用方需要修改时请自行copy
+        self.data = data
+        # 日期索引（YYYY-mm-dd），与 Date 列逐行对应
+        self.dates = pd.Index(data["Date"].astype(str).str[:10])
+        self.lock = threading.Lock()
+        self._stats = None
+        self.nbytes = self._measure()
+
+    def _measure(self) -> int:
+        nbytes = int(self.data.memory_usage(index=True, deep=True).sum())
+        nbytes += int(self.dates.memory_usage(deep=True))
+        if self._stats is not None:
+            nbytes += int(self._stats.memory_usage(index=True, deep=True).sum())
+        return nbytes
+
+    def date_mask(self, start_date: str = None, end_date: str = None):
+        """返回 [start_date, end_date] 区间内的行掩码"""
+        mask = pd.Series(True, index=self.data.index)
+        if start_date:
+            mask &= self.dates >= start_date
+        if end_date:
+            mask &= self.dates <= end_date
+        return mask.values
+
+    def compute_indicators(self, indicators: List[str]) -> int:
+        """计算缺失的指标列，返回新计算的指标数（调用方持有 self.lock）"""
+        if self._stats is None:
+            from stockstats import wrap
+            self._stats = wrap(self.data)
+
+        missing = [indicator for indicator in indicators if indicator not in self._stats.columns]
+        for indicator in missing:
+            self._stats[indicator]  # trigger stockstats to calculate the indicator
+
+        if missing:
+            self.nbytes = self._measure()
+        return len(missing)
+
+    def indicator_frame(self, indicators: List[str]) -> pd.DataFrame:
+        """以日期为索引返回指标列（调用方持有 self.lock）"""
+        return pd.DataFrame(
+            {indicator: self._stats[indicator].values for indicator in indicators},
+            index=self.dates,
+        )
+
+
+class PriceFrameCache:
+    """价格数据LRU缓存 - 按内存占用上限淘汰"""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_MB * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, CachedPriceFrame]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._total_bytes = 0
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'invalidations': 0,
+            'evictions': 0,
+            'indicator_hits': 0,
+            'indicator_misses': 0,
+        }
+
+    def get(self, path: str) -> CachedPriceFrame:
+        """获取价格数据，文件不存在时抛出 FileNotFoundError"""
+        path = os.path.abspath(path)
+        mtime_ns = os.stat(path).st_mtime_ns
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None:
+                if entry.mtime_ns == mtime_ns:
+                    self._entries.move_to_end(path)
+                    self._stats['hits'] += 1
+                    return entry
+                # 文件已更新，丢弃旧数据
+                self._remove(path)
+                self._stats['invalidations'] += 1
+            self._stats['misses'] += 1
+
+        entry = CachedPriceFrame(path, mtime_ns, pd.read_csv(path))
+
+        with self._lock:
+            current = self._entries.get(path)
+            if current is not None and current.mtime_ns == mtime_ns:
+                # 其他线程已加载同一文件
+                return current
+            if current is not None:
+                self._remove(path)
+            self._entries[path] = entry
+            self._total_bytes += entry.nbytes
+            self._evict()
+
+        logger.debug(f"📦 价格数据已缓存: {os.path.basename(path)} ({entry.nbytes / 1024 / 1024:.1f}MB)")
+        return entry
+
+    def get_indicators(self, path: str, indicators: List[str]) -> pd.DataFrame:
+        """获取指标列（以日期为索引），已计算过的指标直接复用"""
+        entry = self.get(path)
+
+        with entry.lock:
+            old_bytes = entry.nbytes
+            computed = entry.compute_indicators(indicators)
+            frame = entry.indicator_frame(indicators)
+
+        with self._lock:
+            self._stats['indicator_misses'] += computed
+            self._stats['indicator_hits'] += len(indicators) - computed
+            if computed and self._entries.get(entry.path) is entry:
+                self._total_bytes += entry.nbytes - old_bytes
+                self._evict()
+
+        return frame
+
+    def invalidate(self, path: str = None):
+        """使指定文件（或全部）缓存失效"""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                self._total_bytes = 0
+            else:
+                self._remove(os.path.abspath(path))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息"""
+        with self._lock:
+            stats = dict(self._stats)
+            lookups = stats['hits'] + stats['misses']
+            stats.update({
+                'entries': len(self._entries),
+                'size_mb': round(self._total_bytes / (1024 * 1024), 2),
+                'max_size_mb': round(self.max_bytes / (1024 * 1024), 2),
+                'hit_rate': round(stats['hits'] / lookups, 4) if lookups else 0.0,
+            })
+        return stats
+
+    def _remove(self, path: str):
+        entry = self._entries.pop(path, None)
+        if entry is not None:
+            self._total_bytes -= entry.nbytes
+
+    def _evict(self):
+        # 至少保留最近使用的一项，避免单个大文件反复加载
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            path, entry = self._entries.popitem(last=False)
+            self._total_bytes -= entry.nbytes
+            self._stats['evictions'] += 1
+            logger.debug(f"🧹 价格数据缓存淘汰: {os.path.basename(path)}")
+
+
+# 全局缓存实例
+_price_frame_cache = None
+_price_frame_cache_lock = threading.Lock()
+
+
+def get_price_frame_cache() -> PriceFrameCache:
+    """获取全局价格数据缓存实例"""
+    global _price_frame_cache
+    if _price_frame_cache is None:
+        with _price_frame_cache_lock:
+            if _price_frame_cache is None:
+                _price_frame_cache = PriceFrameCache()
+    return _price_frame_cache
+
+
+def get_price_frame_cache_stats() -> Dict[str, Any]:
+    """获取全局价格数据缓存的命中统计"""
+    return get_price_frame_cache().get_stats()
@@ -10,7 +10,12 @@ from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 import time
 import os
-from dataclasses import dataclass
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, asdict
+from requests.adapters import HTTPAdapter
+
+from .news_dedup import NearDuplicateDetector
 
 # 导入日志模块
 from tradingagents.utils.logging_manager import get_logger
@@ -30,10 +35,59 @@ class NewsItem:
     relevance_score: float
 
 
+@dataclass
+class SourceTiming:
+    """单个新闻源一次获取的耗时指标"""
+    source: str
+    status: str  # ok, empty, timeout, error
+    elapsed: float
+    item_count: int = 0
+
+
+_http_session = None
+_http_session_lock = threading.Lock()
+_fetch_executor = None
+
+
+def _get_http_session() -> requests.Session:
+    """进程内共享的keep-alive连接池会话"""
+    global _http_session
+    with _http_session_lock:
+        if _http_session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _http_session = session
+        return _http_session
+
+
+def _get_fetch_executor() -> ThreadPoolExecutor:
+    """新闻源并发获取线程池；超时的请求在后台结束，不阻塞下一次聚合"""
+    global _fetch_executor
+    with _http_session_lock:
+        if _fetch_executor is None:
+            _fetch_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="news-source")
+        return _fetch_executor
+
+
 class RealtimeNewsAggregator:
     """实时新闻聚合器"""
-    
-    def __init__(self):
+
+    FINNHUB_URL = "https://finnhub.io/api/v1/company-news"
+    ALPHA_VANTAGE_URL = "https://www.alphavantage.co/query"
+    NEWSAPI_URL = "https://newsapi.org/v2/everything"
+    CHINESE_RSS_SOURCES = [
+        "https://www.cls.cn/api/sw?app=CailianpressWeb&os=web&sv=7.7.5",
+        # 可以添加更多RSS源
+    ]
+
+    def __init__(self, source_timeout: float = None, source_deadlines: Dict[str, float] = None):
+        """
+        Args:
+            source_timeout: 每个新闻源的默认截止时间（秒），默认读取 NEWS_SOURCE_TIMEOUT，未设置时为10秒
+            source_deadlines: 按新闻源覆盖截止时间，如 {'FinnHub': 5, '中文财经': 15}
+        """
         self.headers = {
             'User-Agent': 'TradingAgents-CN/1.0'
         }
@@ -42,6 +96,71 @@ class RealtimeNewsAggregator:
         self.finnhub_key = os.getenv('FINNHUB_API_KEY')
         self.alpha_vantage_key = os.getenv('ALPHA_VANTAGE_API_KEY')
         self.newsapi_key = os.getenv('NEWSAPI_KEY')
+
+        # 连接池会话与各新闻源截止时间
+        self.session = _get_http_session()
+        self.source_timeout = float(source_timeout or os.getenv('NEWS_SOURCE_TIMEOUT', 10))
+        self.source_deadlines = source_deadlines or {}
+
+        # 耗时指标：最近一次聚合的各源耗时，以及按源累计的统计
+        self.last_source_timings: List[SourceTiming] = []
+        self._source_stats: Dict[str, Dict[str, float]] = {}
+        self._metrics_lock = threading.Lock()
+
+        # 近似重复新闻检测（同一事件在不同新闻源的标题措辞略有差异）
+        self._near_duplicate_detector = NearDuplicateDetector()
+
+    def _deadline(self, source: str) -> float:
+        return float(self.source_deadlines.get(source, self.source_timeout))
+
+    def _record_timing(self, timing: SourceTiming):
+        with self._metrics_lock:
+            stats = self._source_stats.setdefault(timing.source, {
+                'calls': 0, 'ok': 0, 'empty': 0, 'timeout': 0, 'error': 0,
+                'items': 0, 'total_elapsed': 0.0, 'max_elapsed': 0.0,
+            })
+            stats['calls'] += 1
+            stats[timing.status] += 1
+            stats['items'] += timing.item_count
+            stats['total_elapsed'] += timing.elapsed
+            stats['max_elapsed'] = max(stats['max_elapsed'], timing.elapsed)
+
+    def get_source_metrics(self) -> Dict[str, Dict[str, float]]:
+        """按新闻源累计的耗时与结果统计"""
+        with self._metrics_lock:
+            return {source: dict(stats, avg_elapsed=stats['total_elapsed'] / stats['calls'])
+                    for source, stats in self._source_stats.items()}
+
+    def _fetch_sources_concurrently(self, sources: Dict[str, callable]) -> List[NewsItem]:
+        """并发获取各新闻源，按各自截止时间收集结果，超时的源直接放弃"""
+        executor = _get_fetch_executor()
+        started = time.monotonic()
+
+        def timed(fetch):
+            fetch_start = time.monotonic()
+            items = fetch()
+            return items, time.monotonic() - fetch_start
+
+        futures = {name: executor.submit(timed, fetch) for name, fetch in sources.items()}
+        all_news, timings = [], []
+        for name, future in futures.items():
+            remaining = max(0.0, started + self._deadline(name) - time.monotonic())
+            try:
+                items, elapsed = future.result(timeout=remaining)
+                timing = SourceTiming(name, 'ok' if items else 'empty', round(elapsed, 4), len(items))
+                all_news.extend(items)
+            except FutureTimeoutError:
+                timing = SourceTiming(name, 'timeout', round(time.monotonic() - started, 4))
+                logger.warning(f"[新闻聚合器] {name} 超过截止时间 {self._deadline(name):.1f}秒，放弃该源")
+            except Exception as e:
+                timing = SourceTiming(name, 'error', round(time.monotonic() - started, 4))
+                logger.error(f"[新闻聚合器] {name} 获取失败: {e}")
+            timings.append(timing)
+            self._record_timing(timing)
+
+        self.last_source_timings = timings
+        logger.info(f"[新闻聚合器] 各新闻源耗时: {json.dumps([asdict(t) for t in timings], ensure_ascii=False)}")
+        return all_news
         
     def get_realtime_stock_news(self, ticker: str, hours_back: int = 6) -> List[NewsItem]:
         """
@@ -50,62 +169,19 @@ class RealtimeNewsAggregator:
         """
         logger.info(f"[新闻聚合器] 开始获取 {ticker} 的实时新闻，回溯时间: {hours_back}小时")
         start_time = datetime.now()
-        all_news = []
-        
-        # 1. FinnHub实时新闻 (最高优先级)
-        logger.info(f"[新闻聚合器] 尝试从 FinnHub 获取 {ticker} 的新闻")
-        finnhub_start = datetime.now()
-        finnhub_news = self._get_finnhub_realtime_news(ticker, hours_back)
-        finnhub_time = (datetime.now() - finnhub_start).total_seconds()
-        
-        if finnhub_news:
-            logger.info(f"[新闻聚合器] 成功从 FinnHub 获取 {len(finnhub_news)} 条新闻，耗时: {finnhub_time:.2f}秒")
-        else:
-            logger.info(f"[新闻聚合器] FinnHub 未返回新闻，耗时: {finnhub_time:.2f}秒")
-            
-        all_news.extend(finnhub_news)
-        
-        # 2. Alpha Vantage新闻
-        logger.info(f"[新闻聚合器] 尝试从 Alpha Vantage 获取 {ticker} 的新闻")
-        av_start = datetime.now()
-        av_news = self._get_alpha_vantage_news(ticker, hours_back)
-        av_time = (datetime.now() - av_start).total_seconds()
-        
-        if av_news:
-            logger.info(f"[新闻聚合器] 成功从 Alpha Vantage 获取 {len(av_news)} 条新闻，耗时: {av_time:.2f}秒")
-        else:
-            logger.info(f"[新闻聚合器] Alpha Vantage 未返回新闻，耗时: {av_time:.2f}秒")
-            
-        all_news.extend(av_news)
-        
-        # 3. NewsAPI (如果配置了)
+
+        # 各新闻源并发获取：专业API、NewsAPI(如果配置了)、中文财经新闻源
+        sources = {
+            'FinnHub': lambda: self._get_finnhub_realtime_news(ticker, hours_back),
+            'Alpha Vantage': lambda: self._get_alpha_vantage_news(ticker, hours_back),
+        }
         if self.newsapi_key:
-            logger.info(f"[新闻聚合器] 尝试从 NewsAPI 获取 {ticker} 的新闻")
-            newsapi_start = datetime.now()
-            newsapi_news = self._get_newsapi_news(ticker, hours_back)
-            newsapi_time = (datetime.now() - newsapi_start).total_seconds()
-            
-            if newsapi_news:
-                logger.info(f"[新闻聚合器] 成功从 NewsAPI 获取 {len(newsapi_news)} 条新闻，耗时: {newsapi_time:.2f}秒")
-            else:
-                logger.info(f"[新闻聚合器] NewsAPI 未返回新闻，耗时: {newsapi_time:.2f}秒")
-                
-            all_news.extend(newsapi_news)
+            sources['NewsAPI'] = lambda: self._get_newsapi_news(ticker, hours_back)
         else:
             logger.info(f"[新闻聚合器] NewsAPI 密钥未配置，跳过此新闻源")
-        
-        # 4. 中文财经新闻源
-        logger.info(f"[新闻聚合器] 尝试获取 {ticker} 的中文财经新闻")
-        chinese_start = datetime.now()
-        chinese_news = self._get_chinese_finance_news(ticker, hours_back)
-        chinese_time = (datetime.now() - chinese_start).total_seconds()
-        
-        if chinese_news:
-            logger.info(f"[新闻聚合器] 成功获取 {len(chinese_news)} 条中文财经新闻，耗时: {chinese_time:.2f}秒")
-        else:
-            logger.info(f"[新闻聚合器] 未获取到中文财经新闻，耗时: {chinese_time:.2f}秒")
-            
-        all_news.extend(chinese_news)
+        sources['中文财经'] = lambda: self._get_chinese_finance_news(ticker, hours_back)
+
+        all_news = self._fetch_sources_concurrently(sources)
         
         # 去重和排序
         logger.info(f"[新闻聚合器] 开始对 {len(all_news)} 条新闻进行去重和排序")
@@ -140,7 +216,7 @@ class RealtimeNewsAggregator:
             start_time = end_time - timedelta(hours=hours_back)
             
             # FinnHub API调用
-            url = "https://finnhub.io/api/v1/company-news"
+            url = self.FINNHUB_URL
             params = {
                 'symbol': ticker,
                 'from': start_time.strftime('%Y-%m-%d'),
@@ -148,7 +224,7 @@ class RealtimeNewsAggregator:
                 'token': self.finnhub_key
             }
             
-            response = requests.get(url, params=params, headers=self.headers)
+            response = self.session.get(url, params=params, headers=self.headers, timeout=self._deadline('FinnHub'))
             response.raise_for_status()
             
             news_data = response.json()
@@ -185,7 +261,7 @@ class RealtimeNewsAggregator:
             return []
         
         try:
-            url = "https://www.alphavantage.co/query"
+            url = self.ALPHA_VANTAGE_URL
             params = {
                 'function': 'NEWS_SENTIMENT',
                 'tickers': ticker,
@@ -193,7 +269,7 @@ class RealtimeNewsAggregator:
                 'limit': 50
             }
             
-            response = requests.get(url, params=params, headers=self.headers)
+            response = self.session.get(url, params=params, headers=self.headers, timeout=self._deadline('Alpha Vantage'))
             response.raise_for_status()
             
             data = response.json()
@@ -244,7 +320,7 @@ class RealtimeNewsAggregator:
             
             query = f"{ticker} OR {company_names.get(ticker, ticker)}"
             
-            url = "https://newsapi.org/v2/everything"
+            url = self.NEWSAPI_URL
             params = {
                 'q': query,
                 'language': 'en',
@@ -253,7 +329,7 @@ class RealtimeNewsAggregator:
                 'apiKey': self.newsapi_key
             }
             
-            response = requests.get(url, params=params, headers=self.headers)
+            response = self.session.get(url, params=params, headers=self.headers, timeout=self._deadline('NewsAPI'))
             response.raise_for_status()
             
             data = response.json()
@@ -372,10 +448,7 @@ class RealtimeNewsAggregator:
             # 2. 财联社RSS (如果可用)
             logger.info(f"[中文财经新闻] 开始获取财联社RSS新闻")
             rss_start_time = datetime.now()
-            rss_sources = [
-                "https://www.cls.cn/api/sw?app=CailianpressWeb&os=web&sv=7.7.5",
-                # 可以添加更多RSS源
-            ]
+            rss_sources = self.CHINESE_RSS_SOURCES
             
             rss_success_count = 0
             rss_error_count = 0
@@ -425,7 +498,9 @@ class RealtimeNewsAggregator:
             import feedparser
             
             logger.info(f"[RSS解析] 尝试获取RSS源内容")
-            feed = feedparser.parse(rss_url)
+            response = self.session.get(rss_url, headers=self.headers, timeout=self._deadline('中文财经'))
+            response.raise_for_status()
+            feed = feedparser.parse(response.content)
             
             if not feed or not feed.entries:
                 logger.warning(f"[RSS解析] RSS源未返回有效内容")
@@ -552,12 +627,12 @@ class RealtimeNewsAggregator:
         return 0.3  # 默认相关性
     
     def _deduplicate_news(self, news_items: List[NewsItem]) -> List[NewsItem]:
-        """去重新闻"""
+        """去重新闻：标题完全相同的直接去除，再用MinHash-LSH合并标题/摘要近似的同一事件"""
         logger.info(f"[新闻去重] 开始对 {len(news_items)} 条新闻进行去重处理")
         start_time = datetime.now()
         
         seen_titles = set()
-        unique_news = []
+        candidates = []
         duplicate_count = 0
         short_title_count = 0
         
@@ -577,14 +652,23 @@ class RealtimeNewsAggregator:
                 duplicate_count += 1
                 continue
                 
-            # 添加到结果集
             seen_titles.add(title_key)
-            unique_news.append(item)
+            candidates.append(item)
+
+        # 近似重复：同一簇只保留相关性最高的一条（相同时保留最先出现的），位置取簇内首条
+        roots = self._near_duplicate_detector.cluster([f"{item.title} {item.content}" for item in candidates])
+        representatives = {}
+        for index, root in enumerate(roots):
+            best = representatives.get(root)
+            if best is None or candidates[index].relevance_score > candidates[best].relevance_score:
+                representatives[root] = index
+        unique_news = [candidates[representatives[root]] for root in sorted(representatives)]
+        near_duplicate_count = len(candidates) - len(unique_news)
         
         # 记录去重结果
         time_taken = (datetime.now() - start_time).total_seconds()
         logger.info(f"[新闻去重] 去重完成，原始新闻: {len(news_items)}条，去重后: {len(unique_news)}条，")
-        logger.info(f"[新闻去重] 去除重复: {duplicate_count}条，标题过短: {short_title_count}条，耗时: {time_taken:.2f}秒")
+        logger.info(f"[新闻去重] 去除重复: {duplicate_count}条，近似重复: {near_duplicate_count}条，标题过短: {short_title_count}条，耗时: {time_taken:.2f}秒")
         
         return unique_news
     
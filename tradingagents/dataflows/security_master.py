@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+证券主数据
+A股、港股、美股的 代码 -> 名称/市场/行业 本地表，批量加载一次后保存在磁盘（CSV），
+进程内用字典索引，名称查询无需网络或数据库往返；表过期后在后台线程中刷新。
+"""
+
+import csv
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+DEFAULT_REFRESH_HOURS = float(os.getenv("TRADINGAGENTS_SECURITY_MASTER_REFRESH_HOURS", "24"))
+FAILED_REFRESH_RETRY_SECONDS = 1800
+
+COLUMNS = ("code", "name", "market", "industry", "source")
+
+MARKET_CHINA_A = "china_a"
+MARKET_HONG_KONG = "hong_kong"
+MARKET_US = "us"
+
+# 内置常用证券（表为空或刷新失败时也能解析最常见的代码）
+BUILTIN_SECURITIES = {
+    # 深圳主板
+    '000001': '平安银行',
+    '000002': '万科A',
+    '000858': '五粮液',
+    '000895': '双汇发展',
+    # 深圳中小板
+    '002594': '比亚迪',
+    '002415': '海康威视',
+    '002304': '洋河股份',
+    # 深圳创业板
+    '300001': '特锐德',
+    '300015': '爱尔眼科',
+    '300059': '东方财富',
+    '300750': '宁德时代',
+    # 上海主板
+    '600519': '贵州茅台',
+    '600036': '招商银行',
+    '601398': '工商银行',
+    '601127': '小康股份',
+    '600000': '浦发银行',
+    '601318': '中国平安',
+    '600276': '恒瑞医药',
+    '600887': '伊利股份',
+    # 科创板
+    '688981': '中芯国际',
+    '688599': '天合光能',
+    # 美股
+    'AAPL': '苹果公司',
+    'TSLA': '特斯拉',
+    'NVDA': '英伟达',
+    'MSFT': '微软',
+    'GOOGL': '谷歌',
+    'AMZN': '亚马逊',
+    'META': 'Meta',
+    'NFLX': '奈飞',
+}
+
+_A_SHARE_PATTERN = re.compile(r'^(\d{6})(?:\.(?:SH|SZ|SS|BJ))?$')
+_HK_PATTERN = re.compile(r'^(\d{1,5})(?:\.HK)?$')
+
+
+def normalize_code(code: str) -> str:
+    """标准化证券代码：A股6位数字，港股5位数字加 .HK，美股大写字母"""
+    code = str(code).strip().upper()
+    match = _A_SHARE_PATTERN.match(code)
+    if match:
+        return match.group(1)
+    match = _HK_PATTERN.match(code)
+    if match:
+        return f"{int(match.group(1)):05d}.HK"
+    return code
+
+
+def infer_market(code: str) -> str:
+    """根据标准化后的代码判断市场"""
+    if code.endswith(".HK"):
+        return MARKET_HONG_KONG
+    if code.isdigit():
+        return MARKET_CHINA_A
+    return MARKET_US
+
+
+def load_a_shares_from_akshare(ak=None) -> List[Dict[str, Any]]:
+    """AKShare A股代码名称表（ak 为已导入的akshare模块，默认自行导入）"""
+    if ak is None:
+        import akshare as ak
+    df = ak.stock_info_a_code_name()
+    return [{"code": code, "name": name, "market": MARKET_CHINA_A, "source": "akshare"}
+            for code, name in zip(df["code"], df["name"])]
+
+
+def _load_a_shares_from_mongodb() -> List[Dict[str, Any]]:
+    """MongoDB stock_basic_info 集合（同步脚本写入，可能带行业字段）"""
+    from tradingagents.config.database_manager import get_database_manager
+    db_manager = get_database_manager()
+    client = db_manager.get_mongodb_client()
+    if client is None:
+        return []
+    collection = client[db_manager.mongodb_config["database"]]['stock_basic_info']
+    rows = []
+    try:
+        for doc in collection.find({}, {"_id": 0, "code": 1, "name": 1, "industry": 1}):
+            if doc.get("code") and doc.get("name"):
+                rows.append({"code": doc["code"], "name": doc["name"], "market": MARKET_CHINA_A,
+                             "industry": doc.get("industry") or "", "source": "mongodb"})
+    except Exception as e:
+        db_manager.report_failure(client, e)
+        raise
+    return rows
+
+
+def _load_hk_from_akshare() -> List[Dict[str, Any]]:
+    """AKShare 港股实时行情表中的代码名称"""
+    import akshare as ak
+    df = ak.stock_hk_spot_em()
+    return [{"code": code, "name": name, "market": MARKET_HONG_KONG, "source": "akshare"}
+            for code, name in zip(df["代码"], df["名称"])]
+
+
+def _load_us_from_akshare() -> List[Dict[str, Any]]:
+    """AKShare 美股实时行情表中的代码名称（代码形如 105.AAPL）"""
+    import akshare as ak
+    df = ak.stock_us_spot_em()
+    return [{"code": str(code).split(".")[-1], "name": name, "market": MARKET_US, "source": "akshare"}
+            for code, name in zip(df["代码"], df["名称"])]
+
+
+DEFAULT_LOADERS = (
+    load_a_shares_from_akshare,
+    _load_a_shares_from_mongodb,  # 在AKShare之后，补充行业字段
+    _load_hk_from_akshare,
+    _load_us_from_akshare,
+)
+
+
+class SecurityMaster:
+    """证券主数据表（线程安全）"""
+
+    def __init__(self, path: Optional[str] = None, refresh_hours: float = DEFAULT_REFRESH_HOURS,
+                 loaders: Optional[Iterable[Callable[[], List[Dict[str, Any]]]]] = None,
+                 auto_refresh: bool = True):
+        """
+        Args:
+            path: CSV文件路径，默认为 tradingagents/dataflows/data_cache/security_master.csv
+            refresh_hours: 表的有效期（小时），过期后查询时在后台刷新
+            loaders: 批量加载函数列表，每个返回 [{code, name, market, industry, source}]，
+                后面的加载结果覆盖前面的；单个加载失败不影响其他
+            auto_refresh: 查询时是否自动触发后台刷新
+        """
+        if path is None:
+            path = os.getenv("TRADINGAGENTS_SECURITY_MASTER_PATH") or \
+                Path(__file__).parent / "data_cache" / "security_master.csv"
+        self.path = Path(path)
+        self.refresh_seconds = refresh_hours * 3600
+        self.loaders = list(DEFAULT_LOADERS if loaders is None else loaders)
+        self.auto_refresh = auto_refresh
+
+        self._lock = threading.Lock()
+        self._loader_lock = threading.Lock()
+        self._index: Dict[str, Dict[str, str]] = {}
+        self._updated_at = 0.0
+        self._next_refresh = 0.0
+        self._loaded_at: Dict[Callable, float] = {}
+        self._refresh_thread: Optional[threading.Thread] = None
+        self.hits = 0
+        self.misses = 0
+
+        for code, name in BUILTIN_SECURITIES.items():
+            self._put({"code": code, "name": name, "source": "builtin"})
+        self._load_file()
+
+    # ---- 磁盘表 ----
+
+    def _load_file(self):
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8', newline='') as f:
+                for row in csv.DictReader(f):
+                    self._put(row)
+            self._updated_at = self.path.stat().st_mtime
+            self._next_refresh = self._updated_at + self.refresh_seconds
+            logger.debug(f"📇 证券主数据已加载: {len(self._index)}条 ({self.path})")
+        except Exception as e:
+            logger.error(f"⚠️ 证券主数据文件读取失败: {e}")
+
+    def _save_file(self):
+        """原子写入CSV（先写临时文件再替换）
+
+        文件修改时间设为最近一次完整刷新的时间，补充单个证券不会让未刷新过的表被当作未过期
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with self._lock:
+            rows = list(self._index.values())
+        with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=COLUMNS)
+            writer.writeheader()
+            writer.writerows(rows)
+        os.utime(tmp_path, (self._updated_at, self._updated_at))
+        os.replace(tmp_path, self.path)
+
+    def _put(self, row: Dict[str, Any]) -> Optional[Dict[str, str]]:
+        code = normalize_code(row.get("code", ""))
+        name = str(row.get("name") or "").strip()
+        if not code or not name:
+            return None
+        existing = self._index.get(code, {})
+        entry = {
+            "code": code,
+            "name": name,
+            "market": row.get("market") or existing.get("market") or infer_market(code),
+            # 后加载的数据没有行业时保留已有的行业
+            "industry": str(row.get("industry") or existing.get("industry") or "").strip(),
+            "source": row.get("source") or existing.get("source") or "",
+        }
+        self._index[code] = entry
+        return entry
+
+    # ---- 刷新 ----
+
+    def refresh(self) -> int:
+        """运行全部批量加载函数并保存到磁盘，返回加载的记录数
+
+        有效期内已经运行过的加载函数（如查询时通过 ensure_loaded 同步加载的A股名称表）跳过
+        """
+        loaded = 0
+        for loader in self.loaders:
+            name = getattr(loader, "__name__", repr(loader))
+            with self._loader_lock:
+                if time.time() - self._loaded_at.get(loader, 0.0) < self.refresh_seconds:
+                    logger.debug(f"📇 证券主数据加载 {name} 仍在有效期内，跳过")
+                    continue
+                try:
+                    loaded += self._run_loader(loader)
+                except Exception as e:
+                    logger.warning(f"⚠️ 证券主数据加载失败 {name}: {e}")
+
+        now = time.time()
+        if loaded:
+            self._updated_at = now
+            self._next_refresh = now + self.refresh_seconds
+            try:
+                self._save_file()
+            except Exception as e:
+                logger.error(f"⚠️ 证券主数据保存失败: {e}")
+        else:
+            self._next_refresh = now + min(self.refresh_seconds, FAILED_REFRESH_RETRY_SECONDS)
+        return loaded
+
+    def _run_loader(self, loader: Callable, **kwargs) -> int:
+        """运行单个加载函数并合并结果，记录运行时间（失败时记为重试间隔后可再次运行），调用方持有 _loader_lock"""
+        try:
+            rows = loader(**kwargs) or []
+        except Exception:
+            self._loaded_at[loader] = time.time() - self.refresh_seconds + FAILED_REFRESH_RETRY_SECONDS
+            raise
+        loaded = 0
+        with self._lock:
+            for row in rows:
+                if self._put(row):
+                    loaded += 1
+        self._loaded_at[loader] = time.time()
+        logger.info(f"📇 证券主数据加载 {getattr(loader, '__name__', repr(loader))}: {len(rows)}条")
+        return loaded
+
+    def ensure_loaded(self, loader: Callable, **kwargs) -> int:
+        """
+        单个加载函数的数据过期时立即同步运行（如查询A股名称前确保代码名称表可用），返回加载的记录数
+
+        运行时间记录在主数据中，随后的后台刷新在有效期内不再运行该加载函数；失败时抛出异常，
+        重试间隔内不再运行。与后台刷新共用加载锁，同一加载函数不会同时运行两次。
+        """
+        def is_fresh():
+            loaded_at = max(self._loaded_at.get(loader, 0.0), self._updated_at)
+            return time.time() - loaded_at < self.refresh_seconds
+
+        if is_fresh():
+            return 0
+        with self._loader_lock:
+            # 等锁期间其他线程或后台刷新可能已完成加载
+            if is_fresh():
+                return 0
+            loaded = self._run_loader(loader, **kwargs)
+        if loaded:
+            try:
+                self._save_file()
+            except Exception as e:
+                logger.error(f"⚠️ 证券主数据保存失败: {e}")
+        return loaded
+
+    def _maybe_refresh(self):
+        """表过期时启动后台刷新（同一时间只有一个刷新线程）"""
+        if not self.auto_refresh or not self.loaders or time.time() < self._next_refresh:
+            return
+        with self._lock:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return
+            self._next_refresh = time.time() + FAILED_REFRESH_RETRY_SECONDS
+            self._refresh_thread = threading.Thread(target=self.refresh, name="security-master-refresh",
+                                                    daemon=True)
+            self._refresh_thread.start()
+
+    def wait_for_refresh(self, timeout: Optional[float] = None):
+        """等待正在进行的后台刷新完成"""
+        thread = self._refresh_thread
+        if thread is not None:
+            thread.join(timeout)
+
+    # ---- 查询 ----
+
+    def get(self, code: str) -> Optional[Dict[str, str]]:
+        """返回 {code, name, market, industry, source}，未知代码返回None"""
+        self._maybe_refresh()
+        entry = self._index.get(normalize_code(code))
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return dict(entry)
+
+    def get_name(self, code: str) -> Optional[str]:
+        """返回证券名称，未知代码返回None"""
+        self._maybe_refresh()
+        entry = self._index.get(normalize_code(code))
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry["name"]
+
+    def get_names(self, codes: Iterable[str]) -> Dict[str, Optional[str]]:
+        """批量查询名称，返回 {原始代码: 名称或None}"""
+        return {code: self.get_name(code) for code in codes}
+
+    def upsert(self, code: str, name: str, market: str = None, industry: str = None,
+               source: str = "lookup", persist: bool = True):
+        """补充单个证券（如网络查询到表中没有的代码），默认同时写入磁盘"""
+        with self._lock:
+            entry = self._put({"code": code, "name": name, "market": market,
+                               "industry": industry, "source": source})
+        if entry is not None and persist:
+            try:
+                self._save_file()
+            except Exception as e:
+                logger.error(f"⚠️ 证券主数据保存失败: {e}")
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """表规模、更新时间和命中统计"""
+        return {
+            "securities": len(self._index),
+            "updated_at": self._updated_at,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+# 全局实例
+_security_master = None
+_security_master_lock = threading.Lock()
+
+
+def get_security_master() -> SecurityMaster:
+    """获取全局证券主数据实例"""
+    global _security_master
+    if _security_master is None:
+        with _security_master_lock:
+            if _security_master is None:
+                _security_master = SecurityMaster()
+    return _security_master
+
+
+def get_security_name(code: str) -> Optional[str]:
+    """查询证券名称（便捷函数），未知代码返回None"""
+    return get_security_master().get_name(code)
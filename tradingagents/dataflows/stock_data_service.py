@@ -115,6 +115,7 @@ class StockDataService:
     
     def _get_from_mongodb(self, stock_code: str = None) -> Optional[Dict[str, Any]]:
         """从MongoDB获取数据"""
+        mongodb_client = None
         try:
             mongodb_client = self.db_manager.get_mongodb_client()
             if not mongodb_client:
@@ -135,6 +136,7 @@ class StockDataService:
 
         except Exception as e:
             logger.error(f"MongoDB查询失败: {e}")
+            self.db_manager.report_failure(mongodb_client, e)
             return None
     
     def _get_from_tdx_api(self, stock_code: str = None) -> Optional[Dict[str, Any]]:
@@ -1,9 +1,9 @@
 import pandas as pd
 import yfinance as yf
-from stockstats import wrap
-from typing import Annotated
+from typing import Annotated, List
 import os
 from .config import get_config
+from .price_frame_cache import get_price_frame_cache
 
 
 class StockstatsUtils:
@@ -25,63 +25,88 @@ class StockstatsUtils:
             "whether to use online tools to fetch data or offline tools. If True, will use online tools.",
         ] = False,
     ):
-        df = None
-        data = None
+        data_file = StockstatsUtils._get_price_data_path(symbol, data_dir, online)
+        curr_date = pd.to_datetime(curr_date).strftime("%Y-%m-%d")
 
+        values = get_price_frame_cache().get_indicators(data_file, [indicator])
+        matching_rows = values[values.index == curr_date]
+
+        if not matching_rows.empty:
+            indicator_value = matching_rows[indicator].values[0]
+            return indicator_value
+        else:
+            return "N/A: Not a trading day (weekend or holiday)"
+
+    @staticmethod
+    def _get_price_data_path(symbol: str, data_dir: str, online: bool = False) -> str:
+        """获取价格数据文件路径，在线模式下文件不存在时先从Yahoo Finance下载"""
         if not online:
-            try:
-                data = pd.read_csv(
-                    os.path.join(
-                        data_dir,
-                        f"{symbol}-YFin-data-2015-01-01-2025-03-25.csv",
-                    )
-                )
-                df = wrap(data)
-            except FileNotFoundError:
+            data_file = os.path.join(
+                data_dir,
+                f"{symbol}-YFin-data-2015-01-01-2025-03-25.csv",
+            )
+            if not os.path.exists(data_file):
                 raise Exception("Stockstats fail: Yahoo Finance data not fetched yet!")
-        else:
-            # Get today's date as YYYY-mm-dd to add to cache
-            today_date = pd.Timestamp.today()
-            curr_date = pd.to_datetime(curr_date)
+            return data_file
 
-            end_date = today_date
-            start_date = today_date - pd.DateOffset(years=15)
-            start_date = start_date.strftime("%Y-%m-%d")
-            end_date = end_date.strftime("%Y-%m-%d")
+        # Get today's date as YYYY-mm-dd to add to cache
+        today_date = pd.Timestamp.today()
 
-            # Get config and ensure cache directory exists
-            config = get_config()
-            os.makedirs(config["data_cache_dir"], exist_ok=True)
+        end_date = today_date
+        start_date = today_date - pd.DateOffset(years=15)
+        start_date = start_date.strftime("%Y-%m-%d")
+        end_date = end_date.strftime("%Y-%m-%d")
 
-            data_file = os.path.join(
-                config["data_cache_dir"],
-                f"{symbol}-YFin-data-{start_date}-{end_date}.csv",
+        # Get config and ensure cache directory exists
+        config = get_config()
+        os.makedirs(config["data_cache_dir"], exist_ok=True)
+
+        data_file = os.path.join(
+            config["data_cache_dir"],
+            f"{symbol}-YFin-data-{start_date}-{end_date}.csv",
+        )
+
+        if not os.path.exists(data_file):
+            data = yf.download(
+                symbol,
+                start=start_date,
+                end=end_date,
+                multi_level_index=False,
+                progress=False,
+                auto_adjust=True,
             )
+            data = data.reset_index()
+            data.to_csv(data_file, index=False)
 
-            if os.path.exists(data_file):
-                data = pd.read_csv(data_file)
-                data["Date"] = pd.to_datetime(data["Date"])
-            else:
-                data = yf.download(
-                    symbol,
-                    start=start_date,
-                    end=end_date,
-                    multi_level_index=False,
-                    progress=False,
-                    auto_adjust=True,
-                )
-                data = data.reset_index()
-                data.to_csv(data_file, index=False)
+        return data_file
 
-            df = wrap(data)
-            df["Date"] = df["Date"].dt.strftime("%Y-%m-%d")
-            curr_date = curr_date.strftime("%Y-%m-%d")
+    @staticmethod
+    def get_stock_stats_window(
+        symbol: Annotated[str, "ticker symbol for the company"],
+        indicators: Annotated[
+            List[str], "quantitative indicators to compute over the whole series"
+        ],
+        start_date: Annotated[str, "window start date, YYYY-mm-dd (inclusive)"],
+        end_date: Annotated[str, "window end date, YYYY-mm-dd (inclusive)"],
+        data_dir: Annotated[
+            str,
+            "directory where the stock data is stored.",
+        ],
+        online: Annotated[
+            bool,
+            "whether to use online tools to fetch data or offline tools. If True, will use online tools.",
+        ] = False,
+    ) -> pd.DataFrame:
+        """
+        批量计算窗口内的技术指标
 
-        df[indicator]  # trigger stockstats to calculate the indicator
-        matching_rows = df[df["Date"].str.startswith(curr_date)]
+        价格数据只加载一次，所有指标在完整序列上一次性向量化计算，
+        然后按日期截取窗口；数据和已算指标都保留在价格数据缓存中。
+        返回以日期字符串(YYYY-mm-dd)为索引、每个指标一列的DataFrame；
+        同一日期出现多行时保留第一行，与 get_stock_stats 的取值规则一致。
+        """
+        data_file = StockstatsUtils._get_price_data_path(symbol, data_dir, online)
+        values = get_price_frame_cache().get_indicators(data_file, list(indicators))
 
-        if not matching_rows.empty:
-            indicator_value = matching_rows[indicator].values[0]
-            return indicator_value
-        else:
-            return "N/A: Not a trading day (weekend or holiday)"
+        window = values[(values.index >= start_date) & (values.index <= end_date)]
+        return window[~window.index.duplicated(keep="first")]
@@ -32,6 +32,8 @@ except ImportError:
     MONGODB_AVAILABLE = False
     logger.warning(f"⚠️ pymongo未安装，无法从MongoDB获取股票名称")
 
+from .security_master import BUILTIN_SECURITIES, get_security_master
+
 try:
     from .cache_manager import get_cache
     FILE_CACHE_AVAILABLE = True
@@ -159,7 +161,7 @@ class TongDaXinDataProvider:
     def _get_stock_name(self, stock_code: str) -> str:
         """
         获取股票名称
-        优先级：缓存 -> MongoDB -> 常用股票映射 -> API获取（仅深圳市场） -> 默认格式
+        优先级：缓存 -> 证券主数据 -> MongoDB -> API获取（仅深圳市场） -> 默认格式
         Args:
             stock_code: 股票代码
         Returns:
@@ -171,18 +173,20 @@ class TongDaXinDataProvider:
         if stock_code in _stock_name_cache:
             return _stock_name_cache[stock_code]
         
-        # 优先从MongoDB获取
+        # 本地证券主数据（批量加载的代码名称表，无网络往返）
+        security_master = get_security_master()
+        name = security_master.get_name(stock_code)
+        if name:
+            _stock_name_cache[stock_code] = name
+            return name
+
+        # 主数据中没有时从MongoDB获取
         mongodb_name = _get_stock_name_from_mongodb(stock_code)
         if mongodb_name:
             _stock_name_cache[stock_code] = mongodb_name
+            security_master.upsert(stock_code, mongodb_name, source="mongodb")
             return mongodb_name
         
-        # 检查常用股票映射表
-        if stock_code in _common_stock_names:
-            name = _common_stock_names[stock_code]
-            _stock_name_cache[stock_code] = name
-            return name
-        
         # 如果API不可用，直接返回默认格式
         if not self.connected:
             if not self.connect():
@@ -203,6 +207,7 @@ class TongDaXinDataProvider:
                                     stock_name = stock_info.get('name', '').strip()
                                     if stock_name:
                                         _stock_name_cache[stock_code] = stock_name
+                                        security_master.upsert(stock_code, stock_name, source="tdx_api")
                                         return stock_name
                 except Exception as e:
                     logger.error(f"⚠️ 获取深圳股票列表失败: {e}")
@@ -506,55 +511,30 @@ class TongDaXinDataProvider:
 # 全局实例和缓存
 _tdx_provider = None
 _stock_name_cache = {}  # 股票名称缓存，避免重复API调用
-_mongodb_client = None
-_mongodb_db = None
 
 def _get_mongodb_connection():
-    """获取MongoDB连接"""
-    global _mongodb_client, _mongodb_db
-    
+    """获取MongoDB连接（共享连接注册表中的客户端，后端不可用时返回 (None, None)）"""
     if not MONGODB_AVAILABLE:
         return None, None
-    
-    if _mongodb_client is None or _mongodb_db is None:
-        try:
-            # 从环境变量获取MongoDB配置
-            config = {
-                'host': os.getenv('MONGODB_HOST', 'localhost'),
-                'port': int(os.getenv('MONGODB_PORT', 27018)),
-                'username': os.getenv('MONGODB_USERNAME'),
-                'password': os.getenv('MONGODB_PASSWORD'),
-                'database': os.getenv('MONGODB_DATABASE', 'tradingagents'),
-                'auth_source': os.getenv('MONGODB_AUTH_SOURCE', 'admin')
-            }
-            
-            # 构建连接字符串
-            if config.get('username') and config.get('password'):
-                connection_string = f"mongodb://{config['username']}:{config['password']}@{config['host']}:{config['port']}/{config['auth_source']}"
-            else:
-                connection_string = f"mongodb://{config['host']}:{config['port']}/"
-            
-            # 创建客户端
-            _mongodb_client = MongoClient(
-                connection_string,
-                serverSelectionTimeoutMS=3000  # 3秒超时
-            )
-            
-            # 测试连接
-            _mongodb_client.admin.command('ping')
-            
-            # 选择数据库
-            _mongodb_db = _mongodb_client[config['database']]
-            
-        except Exception as e:
-            logger.error(f"⚠️ MongoDB连接失败: {e}")
-            _mongodb_client = None
-            _mongodb_db = None
-    
-    return _mongodb_client, _mongodb_db
+
+    from tradingagents.config.connection_registry import get_connection_registry, mongo_uri
+
+    # 从环境变量获取MongoDB配置
+    uri = mongo_uri(
+        host=os.getenv('MONGODB_HOST', 'localhost'),
+        port=int(os.getenv('MONGODB_PORT', 27018)),
+        username=os.getenv('MONGODB_USERNAME'),
+        password=os.getenv('MONGODB_PASSWORD'),
+        auth_source=os.getenv('MONGODB_AUTH_SOURCE', 'admin')
+    )
+    client = get_connection_registry().get_mongo_client(uri, timeout_ms=3000)
+    if client is None:
+        return None, None
+    return client, client[os.getenv('MONGODB_DATABASE', 'tradingagents')]
 
 def _get_stock_name_from_mongodb(stock_code: str) -> Optional[str]:
     """从MongoDB获取股票名称"""
+    client = None
     try:
         client, db = _get_mongodb_connection()
         if db is None:
@@ -570,41 +550,12 @@ def _get_stock_name_from_mongodb(stock_code: str) -> Optional[str]:
         
     except Exception as e:
         logger.error(f"⚠️ 从MongoDB获取股票名称失败: {e}")
+        from tradingagents.config.connection_registry import get_connection_registry
+        get_connection_registry().report_failure(client, e)
         return None
 
-# 精简的常用股票名称映射（仅包含最常见的股票）
-_common_stock_names = {
-    # 深圳主板
-    '000001': '平安银行',
-    '000002': '万科A',
-    '000858': '五粮液',
-    '000895': '双汇发展',
-    
-    # 深圳中小板
-    '002594': '比亚迪',
-    '002415': '海康威视',
-    '002304': '洋河股份',
-    
-    # 深圳创业板
-    '300001': '特锐德',
-    '300015': '爱尔眼科',
-    '300059': '东方财富',
-    '300750': '宁德时代',
-    
-    # 上海主板
-    '600519': '贵州茅台',
-    '600036': '招商银行',
-    '601398': '工商银行',
-    '601127': '小康股份',
-    '600000': '浦发银行',
-    '601318': '中国平安',
-    '600276': '恒瑞医药',
-    '600887': '伊利股份',
-    
-    # 科创板
-    '688981': '中芯国际',
-    '688599': '天合光能',
-}
+# 常用A股名称映射（已并入证券主数据的内置表，保留供旧代码引用）
+_common_stock_names = {code: name for code, name in BUILTIN_SECURITIES.items() if code.isdigit()}
 
 def get_tdx_provider() -> TongDaXinDataProvider:
     """获取通达信数据提供器实例"""
@@ -636,6 +587,7 @@ def get_china_stock_data(stock_code: str, start_date: str, end_date: str) -> str
     logger.info(f"📊 正在获取中国股票数据: {stock_code} ({start_date} 到 {end_date})")
 
     # 优先尝试从数据库缓存加载数据（使用统一的database_manager）
+    mongodb_client = None
     try:
         from tradingagents.config.database_manager import get_database_manager
         db_manager = get_database_manager()
@@ -661,6 +613,8 @@ def get_china_stock_data(stock_code: str, start_date: str, end_date: str) -> str
                     return cached_doc['data']
     except Exception as e:
         logger.error(f"⚠️ 从MongoDB加载缓存失败: {e}")
+        if mongodb_client is not None:
+            db_manager.report_failure(mongodb_client, e)
 
     # 如果数据库缓存不可用，尝试文件缓存
     if FILE_CACHE_AVAILABLE:
@@ -730,6 +684,7 @@ def get_china_stock_data(stock_code: str, start_date: str, end_date: str) -> str
 """
 
         # 优先保存到数据库缓存（使用统一的database_manager）
+        mongodb_client = None
         try:
             from tradingagents.config.database_manager import get_database_manager
             db_manager = get_database_manager()
@@ -764,6 +719,8 @@ def get_china_stock_data(stock_code: str, start_date: str, end_date: str) -> str
                     logger.info(f"💾 数据已保存到MongoDB: {stock_code}")
         except Exception as e:
             logger.error(f"⚠️ 保存到MongoDB失败: {e}")
+            if mongodb_client is not None:
+                db_manager.report_failure(mongodb_client, e)
 
         # 同时保存到文件缓存作为备份
         if FILE_CACHE_AVAILABLE:
@@ -28,6 +28,8 @@ except ImportError:
     CACHE_AVAILABLE = False
     logger.warning("⚠️ 缓存管理器不可用")
 
+from .price_adjustment import adjust_prices
+
 # 导入Tushare
 try:
     import tushare as ts
@@ -204,13 +206,9 @@ class TushareProvider:
             api_start_time = time.time()
             logger.info(f"🔍 [Tushare详细日志] API调用开始时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')}")
 
-            # 获取日线数据
+            # 获取日线数据（未复权原始数据按股票存储，只请求缺失的首尾区间）
             try:
-                data = self.api.daily(
-                    ts_code=ts_code,
-                    start_date=start_date,
-                    end_date=end_date
-                )
+                data = self._get_raw_daily(ts_code, start_date, end_date)
                 api_duration = time.time() - api_start_time
                 logger.info(f"🔍 [Tushare详细日志] API调用完成，耗时: {api_duration:.3f}秒")
 
@@ -286,6 +284,30 @@ class TushareProvider:
             logger.error(f"❌ [Tushare详细日志] 异常堆栈: {traceback.format_exc()}")
             return pd.DataFrame()
 
+    def _get_raw_daily(self, ts_code: str, start_date: str, end_date: str) -> pd.DataFrame:
+        """
+        获取未复权日线数据
+
+        前复权以区间最后一天为基准，所以只缓存原始日线，复权在截取请求区间后再计算
+        """
+        def fetch(fetch_start: str, fetch_end: str) -> pd.DataFrame:
+            return self.api.daily(
+                ts_code=ts_code,
+                start_date=fetch_start.replace('-', ''),
+                end_date=fetch_end.replace('-', '')
+            )
+
+        if not (self.enable_cache and self.cache_manager):
+            return fetch(start_date, end_date)
+
+        data = self.cache_manager.get_daily_bars(
+            ts_code.split('.')[0], start_date, end_date, fetch,
+            data_source="tushare", date_column="trade_date"
+        )
+        if data is not None and not data.empty:
+            data['trade_date'] = data['trade_date'].dt.strftime('%Y%m%d')
+        return data
+
     def _calculate_forward_adjusted_prices(self, data: pd.DataFrame) -> pd.DataFrame:
         """
         基于pct_chg计算前复权价格
@@ -294,7 +316,7 @@ class TushareProvider:
         使用pct_chg（涨跌幅）重新计算连续的前复权价格，确保价格序列的连续性。
 
         Args:
-            data: 包含除权价格和pct_chg的DataFrame
+            data: 包含除权价格和pct_chg的DataFrame（多只股票时按ts_code分别计算）
 
         Returns:
             DataFrame: 包含前复权价格的数据
@@ -304,49 +326,8 @@ class TushareProvider:
             return data
 
         try:
-            # 复制数据避免修改原始数据
-            adjusted_data = data.copy()
-
-            # 确保数据按日期排序
-            adjusted_data = adjusted_data.sort_values('trade_date').reset_index(drop=True)
-
-            # 保存原始价格列（用于对比）
-            adjusted_data['close_raw'] = adjusted_data['close'].copy()
-            adjusted_data['open_raw'] = adjusted_data['open'].copy()
-            adjusted_data['high_raw'] = adjusted_data['high'].copy()
-            adjusted_data['low_raw'] = adjusted_data['low'].copy()
-
-            # 从最新的收盘价开始，向前计算前复权价格
-            # 使用最后一天的收盘价作为基准
-            latest_close = float(adjusted_data.iloc[-1]['close'])
-
-            # 计算前复权收盘价
-            adjusted_closes = [latest_close]
-
-            # 从倒数第二天开始向前计算
-            for i in range(len(adjusted_data) - 2, -1, -1):
-                pct_change = float(adjusted_data.iloc[i + 1]['pct_chg']) / 100.0  # 转换为小数
-
-                # 前一天的前复权收盘价 = 今天的前复权收盘价 / (1 + 今天的涨跌幅)
-                prev_close = adjusted_closes[0] / (1 + pct_change)
-                adjusted_closes.insert(0, prev_close)
-
-            # 更新收盘价
-            adjusted_data['close'] = adjusted_closes
-
-            # 计算其他价格的调整比例
-            for i in range(len(adjusted_data)):
-                if adjusted_data.iloc[i]['close_raw'] != 0:  # 避免除零
-                    # 计算调整比例
-                    adjustment_ratio = adjusted_data.iloc[i]['close'] / adjusted_data.iloc[i]['close_raw']
-
-                    # 应用调整比例到其他价格
-                    adjusted_data.iloc[i, adjusted_data.columns.get_loc('open')] = adjusted_data.iloc[i]['open_raw'] * adjustment_ratio
-                    adjusted_data.iloc[i, adjusted_data.columns.get_loc('high')] = adjusted_data.iloc[i]['high_raw'] * adjustment_ratio
-                    adjusted_data.iloc[i, adjusted_data.columns.get_loc('low')] = adjusted_data.iloc[i]['low_raw'] * adjustment_ratio
-
-            # 添加标记表示这是前复权价格
-            adjusted_data['price_type'] = 'forward_adjusted'
+            # 向量化计算：复权因子为 (1 + pct_chg) 的反向累积乘积，一次应用到全部价格列
+            adjusted_data = adjust_prices(data, mode="forward")
 
             logger.info(f"✅ 前复权价格计算完成，数据条数: {len(adjusted_data)}")
             logger.info(f"📊 价格调整范围: 最早调整比例 {adjusted_data.iloc[0]['close'] / adjusted_data.iloc[0]['close_raw']:.4f}")
@@ -17,6 +17,12 @@ DEFAULT_CONFIG = {
     "max_debate_rounds": 1,
     "max_risk_discuss_rounds": 1,
     "max_recur_limit": 100,
+    # 分析师并行执行（各分析师使用独立消息通道，在Bull Researcher前汇合）
+    "parallel_analysts": os.getenv("TRADINGAGENTS_PARALLEL_ANALYSTS", "false").lower() == "true",
+    # 记忆嵌入缓存（按 provider/model/文本sha256 持久化，默认位于 data_cache_dir/embedding_cache.db）
+    "embedding_cache_enabled": os.getenv("TRADINGAGENTS_EMBEDDING_CACHE", "true").lower() == "true",
+    # 运行状态日志：eval_results/<ticker>/TradingAgentsStrategy_logs/full_states_log.jsonl，可选gzip压缩
+    "state_log_compress": os.getenv("TRADINGAGENTS_STATE_LOG_COMPRESS", "false").lower() == "true",
     # Tool settings
     "online_tools": True,
 
@@ -0,0 +1,210 @@
+# TradingAgents/graph/state_log.py
+
+"""
+追加写入的运行状态日志
+
+每次 propagate 的最终状态作为一条 JSONL 记录追加到日志文件末尾（可选gzip压缩，
+每条记录是一个独立的gzip成员），旁边的 .idx 文件记录每条记录的交易日期、偏移和长度，
+读取时可以逐条流式遍历，也可以按交易日期直接定位，不需要把全部历史状态载入内存。
+"""
+
+import gzip
+import json
+import os
+import threading
+import zlib
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# 导入统一日志系统
+from tradingagents.utils.logging_init import get_logger
+logger = get_logger("default")
+
+_READ_CHUNK = 64 * 1024
+
+
+def state_log_path(directory, compress: bool = False) -> Path:
+    """日志目录下的状态日志文件路径"""
+    return Path(directory) / ("full_states_log.jsonl.gz" if compress else "full_states_log.jsonl")
+
+
+def _is_compressed(path: Path) -> bool:
+    return path.suffix == ".gz"
+
+
+def _index_path(path: Path) -> Path:
+    return path.with_name(path.name + ".idx")
+
+
+def _iter_raw_records(path: Path) -> Iterator[Tuple[int, int, bytes]]:
+    """逐条读取完整记录，返回 (偏移, 长度, JSON字节)；末尾写了一半的记录被忽略"""
+    if not path.exists():
+        return
+    with open(path, "rb") as f:
+        if not _is_compressed(path):
+            offset = 0
+            for line in f:
+                if not line.endswith(b"\n"):
+                    return
+                yield offset, len(line), line
+                offset += len(line)
+            return
+
+        offset = 0
+        while True:
+            f.seek(offset)
+            decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+            parts, consumed = [], 0
+            while not decompressor.eof:
+                chunk = f.read(_READ_CHUNK)
+                if not chunk:
+                    return
+                try:
+                    parts.append(decompressor.decompress(chunk))
+                except zlib.error:
+                    return
+                consumed += len(chunk)
+            length = consumed - len(decompressor.unused_data)
+            yield offset, length, b"".join(parts)
+            offset += length
+
+
+def _decode(payload: bytes) -> Dict[str, Any]:
+    return json.loads(payload.decode("utf-8"))
+
+
+class StateLogWriter:
+    """状态日志写入器 - 每条记录追加写入并刷盘，不在内存中保留历史状态"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.index_path = _index_path(self.path)
+        self._lock = threading.Lock()
+        self._end = None  # 已索引的文件末尾偏移
+
+    def _recover(self) -> int:
+        """校验索引与日志文件一致，处理上次写入中断留下的残缺记录，返回有效末尾偏移"""
+        size = self.path.stat().st_size if self.path.exists() else 0
+        entries = _read_index(self.index_path)
+        end = entries[-1][1] + entries[-1][2] if entries else 0
+        if end == size:
+            return end
+
+        # 索引落后或文件末尾有残缺记录：扫描日志重建索引并截掉残缺部分
+        entries = [(_decode(payload).get("trade_date", ""), offset, length)
+                   for offset, length, payload in _iter_raw_records(self.path)]
+        end = entries[-1][1] + entries[-1][2] if entries else 0
+        if end < size:
+            logger.warning(f"⚠️ 状态日志末尾有残缺记录，已截断: {self.path} ({size - end} 字节)")
+            with open(self.path, "r+b") as f:
+                f.truncate(end)
+        _write_index(self.index_path, entries)
+        return end
+
+    def append(self, trade_date: str, state: Dict[str, Any]):
+        """追加一条运行记录"""
+        record = {
+            "trade_date": str(trade_date),
+            "logged_at": datetime.now().isoformat(),
+            "state": state,
+        }
+        payload = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        if _is_compressed(self.path):
+            payload = gzip.compress(payload)
+
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            if self._end is None:
+                self._end = self._recover()
+
+            with open(self.path, "ab") as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            # 先写记录再写索引：中断时索引最多落后一条，下次写入时自动补齐
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.write(f"{record['trade_date']}\t{self._end}\t{len(payload)}\n")
+            self._end += len(payload)
+
+
+def _read_index(index_path: Path) -> List[Tuple[str, int, int]]:
+    entries = []
+    if not index_path.exists():
+        return entries
+    with open(index_path, "r", encoding="utf-8") as f:
+        for line in f:
+            parts = line.rstrip("\n").split("\t")
+            if len(parts) != 3:
+                break
+            entries.append((parts[0], int(parts[1]), int(parts[2])))
+    return entries
+
+
+def _write_index(index_path: Path, entries: List[Tuple[str, int, int]]):
+    tmp_path = index_path.with_name(index_path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for trade_date, offset, length in entries:
+            f.write(f"{trade_date}\t{offset}\t{length}\n")
+    os.replace(tmp_path, index_path)
+
+
+class StateLogReader:
+    """状态日志读取器 - 流式遍历全部记录，或按交易日期定位单条记录"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.index_path = _index_path(self.path)
+        self._offsets = None  # trade_date -> (offset, length)，同一日期以最后一次为准
+
+    def _load_index(self) -> Dict[str, Tuple[int, int]]:
+        if self._offsets is None:
+            size = self.path.stat().st_size if self.path.exists() else 0
+            entries = [e for e in _read_index(self.index_path) if e[1] + e[2] <= size]
+            indexed_end = entries[-1][1] + entries[-1][2] if entries else 0
+            if indexed_end < size:
+                # 索引缺失或落后（如旧版本写入、中断）：只扫描未索引的部分
+                entries += [(_decode(payload).get("trade_date", ""), offset, length)
+                            for offset, length, payload in _iter_raw_records(self.path)
+                            if offset >= indexed_end]
+            self._offsets = {trade_date: (offset, length) for trade_date, offset, length in entries}
+        return self._offsets
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """按写入顺序逐条返回 {"trade_date", "logged_at", "state"}"""
+        for _, _, payload in _iter_raw_records(self.path):
+            yield _decode(payload)
+
+    def trade_dates(self) -> List[str]:
+        """已记录的交易日期（按首次写入顺序）"""
+        return list(self._load_index())
+
+    def get(self, trade_date) -> Optional[Dict[str, Any]]:
+        """按交易日期读取该日最后一次运行的状态，不存在时返回None"""
+        location = self._load_index().get(str(trade_date))
+        if location is None:
+            return None
+        offset, length = location
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            payload = f.read(length)
+        if _is_compressed(self.path):
+            payload = gzip.decompress(payload)
+        return _decode(payload)["state"]
+
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        """转换为旧版 full_states_log.json 的 {交易日期: 状态} 结构（会载入全部记录）"""
+        return {record["trade_date"]: record["state"] for record in self}
+
+
+def migrate_legacy_log(json_path, compress: bool = False) -> Path:
+    """把旧版 full_states_log.json 导入到同目录的状态日志，返回新日志路径"""
+    json_path = Path(json_path)
+    with open(json_path, "r", encoding="utf-8") as f:
+        legacy = json.load(f)
+    path = state_log_path(json_path.parent, compress)
+    writer = StateLogWriter(path)
+    for trade_date, state in legacy.items():
+        writer.append(trade_date, state)
+    logger.info(f"📝 已导入旧版状态日志: {len(legacy)} 条 -> {path}")
+    return path
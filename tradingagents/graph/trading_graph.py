@@ -2,7 +2,6 @@
 
 import os
 from pathlib import Path
-import json
 from datetime import date
 from typing import Dict, Any, Tuple, List, Optional
 
@@ -35,6 +34,7 @@ from .setup import GraphSetup
 from .propagation import Propagator
 from .reflection import Reflector
 from .signal_processing import SignalProcessor
+from .state_log import StateLogWriter, state_log_path
 
 
 class TradingAgentsGraph:
@@ -201,7 +201,7 @@ class TradingAgentsGraph:
         # State tracking
         self.curr_state = None
         self.ticker = None
-        self.log_states_dict = {}  # date to full state dict
+        self.state_log_writers = {}  # ticker -> 追加写入的状态日志
 
         # Set up the graph
         self.graph = self.graph_setup.setup_graph(selected_analysts)
@@ -298,8 +298,8 @@ class TradingAgentsGraph:
         return final_state, self.process_signal(final_state["final_trade_decision"], company_name)
 
     def _log_state(self, trade_date, final_state):
-        """Log the final state to a JSON file."""
-        self.log_states_dict[str(trade_date)] = {
+        """Append the final state to the ticker's JSONL state log."""
+        state_record = {
             "company_of_interest": final_state["company_of_interest"],
             "trade_date": final_state["trade_date"],
             "market_report": final_state["market_report"],
@@ -329,15 +329,13 @@ class TradingAgentsGraph:
             "final_trade_decision": final_state["final_trade_decision"],
         }
 
-        # Save to file
-        directory = Path(f"eval_results/{self.ticker}/TradingAgentsStrategy_logs/")
-        directory.mkdir(parents=True, exist_ok=True)
-
-        with open(
-            f"eval_results/{self.ticker}/TradingAgentsStrategy_logs/full_states_log.json",
-            "w",
-        ) as f:
-            json.dump(self.log_states_dict, f, indent=4)
+        # 追加到状态日志（config["state_log_compress"] 为True时写入gzip压缩的 .jsonl.gz）
+        if self.ticker not in self.state_log_writers:
+            directory = Path(f"eval_results/{self.ticker}/TradingAgentsStrategy_logs/")
+            self.state_log_writers[self.ticker] = StateLogWriter(
+                state_log_path(directory, self.config.get("state_log_compress", False))
+            )
+        self.state_log_writers[self.ticker].append(str(trade_date), state_record)
 
     def reflect_and_remember(self, returns_losses):
         """Reflect on decisions and update memory based on returns."""
@@ -17,6 +17,17 @@ logger = logging.getLogger(__name__)
 
 class EnhancedNewsFilter(NewsRelevanceFilter):
     """增强新闻过滤器，集成本地模型和多种过滤策略"""
+
+    # 批量推理的批次大小（CPU上语义编码与分类模型的经验值）
+    SEMANTIC_BATCH_SIZE = 64
+    CLASSIFICATION_BATCH_SIZE = 16
+
+    # 综合评分权重
+    SCORE_WEIGHTS = {
+        'rule': 0.4,      # 规则过滤权重40%
+        'semantic': 0.35,  # 语义相似度权重35%
+        'classification': 0.25  # 分类模型权重25%
+    }
     
     def __init__(self, stock_code: str, company_name: str, use_semantic: bool = True, use_local_model: bool = False):
         """
@@ -70,6 +81,7 @@ class EnhancedNewsFilter(NewsRelevanceFilter):
                 ]
                 
                 self.company_embedding = self.sentence_model.encode(company_texts)
+                self._normalize_company_embedding()
                 logger.info(f"[增强过滤器] ✅ 语义模型加载成功: {model_name}")
                 
             except ImportError:
@@ -106,6 +118,43 @@ class EnhancedNewsFilter(NewsRelevanceFilter):
             logger.error(f"[增强过滤器] 本地分类模型初始化失败: {e}")
             self.use_local_model = False
     
+    def _normalize_company_embedding(self):
+        """预先对公司相关文本的embedding做L2归一化，相似度计算只需一次矩阵乘法"""
+        company = np.asarray(self.company_embedding, dtype=np.float32)
+        norms = np.linalg.norm(company, axis=1, keepdims=True)
+        self._company_matrix = company / np.where(norms == 0, 1, norms)
+
+    def calculate_semantic_similarities(self, titles: List[str], contents: List[str]) -> np.ndarray:
+        """
+        批量计算语义相似度评分：一次编码全部新闻，与公司相关文本做归一化矩阵乘法
+
+        Returns:
+            np.ndarray: 每条新闻的语义相似度评分 (0-100)
+        """
+        if not self.use_semantic or self.sentence_model is None or not titles:
+            return np.zeros(len(titles))
+
+        try:
+            if getattr(self, '_company_matrix', None) is None:
+                self._normalize_company_embedding()
+
+            # 组合标题和内容的前200字符
+            texts = [f"{title} {content[:200]}" for title, content in zip(titles, contents)]
+            text_embeddings = np.asarray(
+                self.sentence_model.encode(texts, batch_size=self.SEMANTIC_BATCH_SIZE),
+                dtype=np.float32,
+            )
+            norms = np.linalg.norm(text_embeddings, axis=1, keepdims=True)
+            text_embeddings = text_embeddings / np.where(norms == 0, 1, norms)
+
+            # 取与各公司相关文本的最高相似度，转换为0-100评分
+            max_similarity = (text_embeddings @ self._company_matrix.T).max(axis=1)
+            return np.clip(max_similarity * 100, 0, 100).astype(float)
+
+        except Exception as e:
+            logger.error(f"[增强过滤器] 语义相似度计算失败: {e}")
+            return np.zeros(len(titles))
+
     def calculate_semantic_similarity(self, title: str, content: str) -> float:
         """
         计算语义相似度评分
@@ -117,37 +166,50 @@ class EnhancedNewsFilter(NewsRelevanceFilter):
         Returns:
             float: 语义相似度评分 (0-100)
         """
-        if not self.use_semantic or self.sentence_model is None:
-            return 0
-        
+        semantic_score = float(self.calculate_semantic_similarities([title], [content])[0])
+        logger.debug(f"[增强过滤器] 语义相似度评分: {semantic_score:.1f}")
+        return semantic_score
+
+    def classify_news_relevance_batch(self, titles: List[str], contents: List[str]) -> np.ndarray:
+        """
+        批量分类新闻相关性：按长度排序后分成小批次补齐推理，减少无效padding
+
+        Returns:
+            np.ndarray: 每条新闻的分类相关性评分 (0-100)
+        """
+        if not self.use_local_model or self.classification_model is None or not titles:
+            return np.zeros(len(titles))
+
         try:
-            # 组合标题和内容的前200字符
-            text = f"{title} {content[:200]}"
-            
-            # 计算文本embedding
-            text_embedding = self.sentence_model.encode([text])
-            
-            # 计算与公司相关文本的相似度
-            similarities = []
-            for company_emb in self.company_embedding:
-                similarity = np.dot(text_embedding[0], company_emb) / (
-                    np.linalg.norm(text_embedding[0]) * np.linalg.norm(company_emb)
-                )
-                similarities.append(similarity)
-            
-            # 取最高相似度
-            max_similarity = max(similarities)
-            
-            # 转换为0-100评分
-            semantic_score = max(0, min(100, max_similarity * 100))
-            
-            logger.debug(f"[增强过滤器] 语义相似度评分: {semantic_score:.1f}")
-            return semantic_score
-            
+            import torch
+
+            # 添加公司信息作为上下文
+            texts = [f"关于{self.company_name}({self.stock_code})的新闻: {title} {content[:300]}"
+                     for title, content in zip(titles, contents)]
+            order = np.argsort([len(text) for text in texts], kind='stable')
+            scores = np.zeros(len(texts))
+
+            with torch.inference_mode():
+                for start in range(0, len(texts), self.CLASSIFICATION_BATCH_SIZE):
+                    batch_index = order[start:start + self.CLASSIFICATION_BATCH_SIZE]
+                    inputs = self.tokenizer(
+                        [texts[i] for i in batch_index],
+                        return_tensors="pt",
+                        truncation=True,
+                        padding=True,
+                        max_length=512
+                    )
+                    logits = self.classification_model(**inputs).logits
+                    # 假设第一个类别是"相关"，第二个是"不相关"（需根据具体模型调整）
+                    probabilities = torch.softmax(logits, dim=-1)
+                    scores[batch_index] = probabilities[:, 0].cpu().numpy() * 100
+
+            return scores
+
         except Exception as e:
-            logger.error(f"[增强过滤器] 语义相似度计算失败: {e}")
-            return 0
-    
+            logger.error(f"[增强过滤器] 本地模型分类失败: {e}")
+            return np.zeros(len(titles))
+
     def classify_news_relevance(self, title: str, content: str) -> float:
         """
         使用本地模型分类新闻相关性
@@ -159,48 +221,9 @@ class EnhancedNewsFilter(NewsRelevanceFilter):
         Returns:
             float: 分类相关性评分 (0-100)
         """
-        if not self.use_local_model or self.classification_model is None:
-            return 0
-        
-        try:
-            import torch
-            
-            # 构建分类文本
-            text = f"{title} {content[:300]}"
-            
-            # 添加公司信息作为上下文
-            context_text = f"关于{self.company_name}({self.stock_code})的新闻: {text}"
-            
-            # 分词和编码
-            inputs = self.tokenizer(
-                context_text,
-                return_tensors="pt",
-                truncation=True,
-                padding=True,
-                max_length=512
-            )
-            
-            # 模型推理
-            with torch.no_grad():
-                outputs = self.classification_model(**inputs)
-                logits = outputs.logits
-                
-                # 使用softmax获取概率分布
-                probabilities = torch.softmax(logits, dim=-1)
-                
-                # 假设第一个类别是"相关"，第二个是"不相关"
-                # 这里需要根据具体模型调整
-                relevance_prob = probabilities[0][0].item()  # 相关性概率
-                
-                # 转换为0-100评分
-                classification_score = relevance_prob * 100
-                
-                logger.debug(f"[增强过滤器] 分类模型评分: {classification_score:.1f}")
-                return classification_score
-                
-        except Exception as e:
-            logger.error(f"[增强过滤器] 本地模型分类失败: {e}")
-            return 0
+        classification_score = float(self.classify_news_relevance_batch([title], [content])[0])
+        logger.debug(f"[增强过滤器] 分类模型评分: {classification_score:.1f}")
+        return classification_score
     
     def calculate_enhanced_relevance_score(self, title: str, content: str) -> Dict[str, float]:
         """
@@ -234,11 +257,7 @@ class EnhancedNewsFilter(NewsRelevanceFilter):
             scores['classification_score'] = 0
         
         # 4. 综合评分（加权平均）
-        weights = {
-            'rule': 0.4,      # 规则过滤权重40%
-            'semantic': 0.35,  # 语义相似度权重35%
-            'classification': 0.25  # 分类模型权重25%
-        }
+        weights = self.SCORE_WEIGHTS
         
         final_score = (
             weights['rule'] * rule_score +
@@ -270,27 +289,19 @@ class EnhancedNewsFilter(NewsRelevanceFilter):
         
         logger.info(f"[增强过滤器] 开始增强过滤，原始数量: {len(news_df)}条，最低评分阈值: {min_score}")
         
-        filtered_news = []
-        
-        for idx, row in news_df.iterrows():
-            title = row.get('新闻标题', row.get('标题', ''))
-            content = row.get('新闻内容', row.get('内容', ''))
-            
-            # 计算增强评分
-            scores = self.calculate_enhanced_relevance_score(title, content)
-            
-            if scores['final_score'] >= min_score:
-                row_dict = row.to_dict()
-                row_dict.update(scores)  # 添加所有评分信息
-                filtered_news.append(row_dict)
-                
-                logger.debug(f"[增强过滤器] 保留新闻 (综合评分: {scores['final_score']:.1f}): {title[:50]}...")
-            else:
-                logger.debug(f"[增强过滤器] 过滤新闻 (综合评分: {scores['final_score']:.1f}): {title[:50]}...")
-        
+        titles = [str(t) for t in news_df.get('新闻标题', news_df.get('标题', pd.Series('', index=news_df.index))).fillna('')]
+        contents = [str(c) for c in news_df.get('新闻内容', news_df.get('内容', pd.Series('', index=news_df.index))).fillna('')]
+
+        # 计算增强评分（语义编码和分类模型按批次一次完成）
+        scores = self.calculate_enhanced_relevance_scores(titles, contents)
+        keep = scores['final_score'].to_numpy() >= min_score
+        logger.debug(f"[增强过滤器] 保留 {int(keep.sum())}条，过滤 {int((~keep).sum())}条")
+
         # 创建过滤后的DataFrame
-        if filtered_news:
-            filtered_df = pd.DataFrame(filtered_news)
+        if keep.any():
+            filtered_df = pd.concat(
+                [news_df.reset_index(drop=True), scores], axis=1
+            )[keep].reset_index(drop=True)
             # 按综合评分排序
             filtered_df = filtered_df.sort_values('final_score', ascending=False)
             logger.info(f"[增强过滤器] 增强过滤完成，保留 {len(filtered_df)}条 新闻")
@@ -300,6 +311,26 @@ class EnhancedNewsFilter(NewsRelevanceFilter):
             
         return filtered_df
 
+    def calculate_enhanced_relevance_scores(self, titles: List[str], contents: List[str]) -> pd.DataFrame:
+        """
+        批量计算增强相关性评分，列与 calculate_enhanced_relevance_score 返回的字典一致
+
+        Returns:
+            pd.DataFrame: rule_score, semantic_score, classification_score, final_score
+        """
+        scores = pd.DataFrame({
+            'rule_score': super().calculate_relevance_scores(titles, contents),
+            'semantic_score': self.calculate_semantic_similarities(titles, contents),
+            'classification_score': self.classify_news_relevance_batch(titles, contents),
+        })
+        weights = self.SCORE_WEIGHTS
+        scores['final_score'] = (
+            weights['rule'] * scores['rule_score'] +
+            weights['semantic'] * scores['semantic_score'] +
+            weights['classification'] * scores['classification_score']
+        )
+        return scores
+
 
 def create_enhanced_news_filter(ticker: str, use_semantic: bool = True, use_local_model: bool = False) -> EnhancedNewsFilter:
     """
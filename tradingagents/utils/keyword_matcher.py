@@ -0,0 +1,90 @@
+"""
+多模式关键词匹配器
+把一组关键词编译一次，之后每段文本只扫描一遍就能找出其中出现的全部关键词（含嵌套、重叠的关键词）。
+
+- 安装了 pyahocorasick 时使用其C实现的Aho-Corasick自动机
+- 否则使用编译后的正则：用首字符集合快速跳过不可能匹配的位置，再在每个位置取最长的关键词，
+  同一位置开始的较短关键词必然是最长关键词的前缀，由预先计算的前缀闭包补齐
+"""
+
+import bisect
+import re
+from typing import Dict, FrozenSet, Iterable, List, Sequence, Set
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+# 批量扫描时分隔各条文本的字符，不会出现在关键词中，保证匹配不会跨文本
+_SEPARATOR = '\x00'
+
+
+class KeywordMatcher:
+    """多模式关键词匹配器（区分大小写，大小写规范化由调用方负责）"""
+
+    def __init__(self, keywords: Iterable[str], use_automaton: bool = AHOCORASICK_AVAILABLE):
+        self.keywords = tuple(dict.fromkeys(k for k in keywords if k))
+        if any(_SEPARATOR in k for k in self.keywords):
+            raise ValueError("关键词不能包含NUL字符")
+        self.use_automaton = use_automaton and AHOCORASICK_AVAILABLE and bool(self.keywords)
+
+        if self.use_automaton:
+            self._automaton = ahocorasick.Automaton()
+            for keyword in self.keywords:
+                self._automaton.add_word(keyword, keyword)
+            self._automaton.make_automaton()
+        elif self.keywords:
+            first_chars = ''.join(sorted({k[0] for k in self.keywords}))
+            alternation = '|'.join(re.escape(k) for k in sorted(self.keywords, key=len, reverse=True))
+            # 每次只消耗一个可能的首字符（让正则引擎用字符集快速跳过其余位置），
+            # 再回看该字符并向前尝试匹配最长关键词，这样重叠的关键词也都能找到
+            self._pattern = re.compile(f'[{re.escape(first_chars)}](?<=(?=({alternation})).)')
+            self._prefixes: Dict[str, FrozenSet[str]] = {
+                longest: frozenset(k for k in self.keywords if longest.startswith(k)) for longest in self.keywords
+            }
+
+    def find(self, text: str) -> Set[str]:
+        """返回文本中出现的全部关键词"""
+        found: Set[str] = set()
+        if not self.keywords or not text:
+            return found
+        if self.use_automaton:
+            found.update(keyword for _, keyword in self._automaton.iter(text))
+        else:
+            prefixes = self._prefixes
+            for longest in set(self._pattern.findall(text)):
+                found |= prefixes[longest]
+        return found
+
+    def find_many(self, texts: Sequence[str]) -> List[Set[str]]:
+        """批量匹配：把整列文本拼接后扫描一遍，按位置把匹配结果归还到各条文本"""
+        results: List[Set[str]] = [set() for _ in texts]
+        if not self.keywords or not texts:
+            return results
+
+        # 每条文本在拼接串中的结束位置（即其后分隔符的位置）
+        ends, position = [], -1
+        for text in texts:
+            position += len(text) + 1
+            ends.append(position)
+
+        joined = _SEPARATOR.join(texts)
+        row, bound = 0, ends[0]
+        if self.use_automaton:
+            # 自动机按匹配结束位置的顺序返回
+            for end, keyword in self._automaton.iter(joined):
+                if end > bound:
+                    row = bisect.bisect_left(ends, end, row)
+                    bound = ends[row]
+                results[row].add(keyword)
+        else:
+            prefixes = self._prefixes
+            for match in self._pattern.finditer(joined):
+                start = match.start()
+                if start > bound:
+                    row = bisect.bisect_left(ends, start, row)
+                    bound = ends[row]
+                results[row] |= prefixes[match.group(1)]
+        return results
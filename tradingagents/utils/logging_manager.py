@@ -4,9 +4,11 @@
 提供项目级别的日志配置和管理功能
 """
 
+import atexit
 import logging
 import logging.handlers
 import os
+import queue
 import sys
 from datetime import datetime
 from pathlib import Path
@@ -69,12 +71,57 @@ class StructuredFormatter(logging.Formatter):
         return json.dumps(log_entry, ensure_ascii=False)
 
 
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """有界队列日志处理器
+
+    记录只在调用线程中完成消息合并后放入队列，由 QueueListener 后台线程格式化并写入文件。
+    队列满时按溢出策略处理：
+    - drop_new: 丢弃新记录（默认，业务线程永不阻塞）
+    - drop_oldest: 丢弃队列中最旧的记录
+    - block: 等待队列有空位
+    WARNING及以上级别的记录在队列满时总是等待，不会被丢弃。
+    """
+
+    OVERFLOW_POLICIES = ('drop_new', 'drop_oldest', 'block')
+
+    def __init__(self, log_queue: queue.Queue, overflow: str = 'drop_new'):
+        super().__init__(log_queue)
+        if overflow not in self.OVERFLOW_POLICIES:
+            raise ValueError(f"未知的日志队列溢出策略: {overflow}")
+        self.overflow = overflow
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+            return
+        except queue.Full:
+            pass
+
+        if self.overflow == 'block' or record.levelno >= logging.WARNING:
+            self.queue.put(record)
+        elif self.overflow == 'drop_oldest':
+            try:
+                self.queue.get_nowait()
+                self.dropped += 1
+            except queue.Empty:
+                pass
+            try:
+                self.queue.put_nowait(record)
+            except queue.Full:
+                self.dropped += 1
+        else:
+            self.dropped += 1
+
+
 class TradingAgentsLogger:
     """TradingAgents统一日志管理器"""
     
     def __init__(self, config: Optional[Dict[str, Any]] = None):
         self.config = config or self._load_default_config()
         self.loggers: Dict[str, logging.Logger] = {}
+        self.queue_handler: Optional[BoundedQueueHandler] = None
+        self._queue_listener: Optional[logging.handlers.QueueListener] = None
         self._setup_logging()
     
     def _load_default_config(self) -> Dict[str, Any]:
@@ -112,6 +159,11 @@ class TradingAgentsLogger:
                     'enabled': False,  # 默认关闭，可通过环境变量启用
                     'level': 'INFO',
                     'directory': log_dir
+                },
+                'queue': {
+                    'enabled': False,  # 默认关闭，可通过环境变量 TRADINGAGENTS_LOG_QUEUE=true 启用
+                    'max_size': 10000,
+                    'overflow': 'drop_new'
                 }
             },
             'loggers': {
@@ -197,8 +249,36 @@ class TradingAgentsLogger:
             if self.config['handlers']['structured']['enabled']:
                 self._add_structured_handler(root_logger)
         
+        # 队列模式：文件写入和JSON格式化移到后台线程
+        queue_config = self.config['handlers'].get('queue', {})
+        queue_enabled = (queue_config.get('enabled', False) or
+                         os.getenv('TRADINGAGENTS_LOG_QUEUE', 'false').lower() == 'true')
+        if queue_enabled and root_logger.handlers:
+            self._enable_queue_mode(root_logger, queue_config)
+
         # 配置特定日志器
         self._configure_specific_loggers()
+
+    def _enable_queue_mode(self, logger: logging.Logger, queue_config: Dict[str, Any]):
+        """把已添加的处理器移到 QueueListener 后台线程，日志器只保留一个有界队列处理器"""
+        handlers = list(logger.handlers)
+        logger.handlers.clear()
+
+        log_queue = queue.Queue(maxsize=queue_config.get('max_size', 10000))
+        self.queue_handler = BoundedQueueHandler(log_queue, queue_config.get('overflow', 'drop_new'))
+        logger.addHandler(self.queue_handler)
+
+        self._queue_listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        self._queue_listener.start()
+        atexit.register(self.shutdown)
+
+    def shutdown(self):
+        """停止队列后台线程，写完队列中剩余的日志"""
+        listener, self._queue_listener = self._queue_listener, None
+        if listener is not None:
+            listener.stop()
+            for handler in listener.handlers:
+                handler.flush()
     
     def _add_console_handler(self, logger: logging.Logger):
         """添加控制台处理器"""
@@ -406,5 +486,7 @@ def get_logger(name: str) -> logging.Logger:
 def setup_logging(config: Optional[Dict[str, Any]] = None):
     """设置项目日志系统（便捷函数）"""
     global _logger_manager
+    if _logger_manager is not None:
+        _logger_manager.shutdown()
     _logger_manager = TradingAgentsLogger(config)
     return _logger_manager
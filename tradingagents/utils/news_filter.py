@@ -3,12 +3,15 @@
 用于过滤与特定股票/公司不相关的新闻，提高新闻分析质量
 """
 
+import numpy as np
 import pandas as pd
 import re
 from typing import List, Dict, Tuple
 from datetime import datetime
 import logging
 
+from .keyword_matcher import KeywordMatcher
+
 logger = logging.getLogger(__name__)
 
 class NewsRelevanceFilter:
@@ -47,6 +50,27 @@ class NewsRelevanceFilter:
             '股权激励', '员工持股', '定增', '配股', '送股',
             '资产重组', '借壳上市', '退市', '摘帽', 'ST'
         ]
+
+        # 关键词自动机在首次评分时编译，关键词列表变化后自动重建
+        self._matcher = None
+        self._matcher_key = None
+
+    def _get_keyword_matcher(self) -> KeywordMatcher:
+        """返回覆盖全部关键词列表的多模式匹配器"""
+        key = (tuple(self.strong_keywords), tuple(self.include_keywords), tuple(self.exclude_keywords))
+        if self._matcher is None or key != self._matcher_key:
+            self._matcher = KeywordMatcher(k for keywords in key for k in keywords)
+            self._matcher_key = key
+
+            # 每个关键词在标题/内容中命中时的分值（同一关键词出现在多个列表中时累加）
+            title_points, content_points = {}, {}
+            for keywords, in_title, in_content in zip(key, (30, 15, -40), (15, 8, -20)):
+                for keyword in keywords:
+                    title_points[keyword] = title_points.get(keyword, 0) + in_title
+                    content_points[keyword] = content_points.get(keyword, 0) + in_content
+            self._keyword_points = (title_points, content_points)
+            self._exclude_set = frozenset(self.exclude_keywords)
+        return self._matcher
     
     def calculate_relevance_score(self, title: str, content: str) -> float:
         """
@@ -59,9 +83,28 @@ class NewsRelevanceFilter:
         Returns:
             float: 相关性评分 (0-100)
         """
+        matcher = self._get_keyword_matcher()
+        return self._score_keyword_hits(title, content, matcher.find(title.lower()), matcher.find(content.lower()))
+
+    def calculate_relevance_scores(self, titles: List[str], contents: List[str]) -> List[float]:
+        """
+        批量计算新闻相关性评分，结果与逐条调用 calculate_relevance_score 一致
+
+        Args:
+            titles: 新闻标题列表
+            contents: 新闻内容列表
+
+        Returns:
+            List[float]: 每条新闻的相关性评分 (0-100)
+        """
+        matcher = self._get_keyword_matcher()
+        title_hits = matcher.find_many([title.lower() for title in titles])
+        content_hits = matcher.find_many([content.lower() for content in contents])
+        return [self._score_keyword_hits(*args) for args in zip(titles, contents, title_hits, content_hits)]
+
+    def _score_keyword_hits(self, title: str, content: str, title_hits: set, content_hits: set) -> float:
+        """根据标题/内容中命中的关键词集合计算评分"""
         score = 0
-        title_lower = title.lower()
-        content_lower = content.lower()
         
         # 1. 直接提及公司名称
         if self.company_name in title:
@@ -79,48 +122,26 @@ class NewsRelevanceFilter:
             score += 20  # 内容中出现股票代码，中等分
             logger.debug(f"[过滤器] 内容包含股票代码 '{self.stock_code}': +20分")
             
-        # 3. 强相关关键词检查
-        strong_matches = []
-        for keyword in self.strong_keywords:
-            if keyword in title_lower:
-                score += 30
-                strong_matches.append(keyword)
-            elif keyword in content_lower:
-                score += 15
-                strong_matches.append(keyword)
-        
-        if strong_matches:
-            logger.debug(f"[过滤器] 强相关关键词匹配: {strong_matches}")
-            
-        # 4. 包含关键词检查
-        include_matches = []
-        for keyword in self.include_keywords:
-            if keyword in title_lower:
-                score += 15
-                include_matches.append(keyword)
-            elif keyword in content_lower:
-                score += 8
-                include_matches.append(keyword)
-        
-        if include_matches:
-            logger.debug(f"[过滤器] 相关关键词匹配: {include_matches[:3]}...")  # 只显示前3个
-            
-        # 5. 排除关键词检查（减分）
-        exclude_matches = []
-        for keyword in self.exclude_keywords:
-            if keyword in title_lower:
-                score -= 40  # 标题中出现排除词，大幅减分
-                exclude_matches.append(keyword)
-            elif keyword in content_lower:
-                score -= 20  # 内容中出现排除词，中等减分
-                exclude_matches.append(keyword)
-        
-        if exclude_matches:
-            logger.debug(f"[过滤器] 排除关键词匹配: {exclude_matches[:3]}...")
+        # 3-5. 强相关/包含/排除关键词：标题命中按标题分计，仅内容命中按内容分计
+        title_points, content_points = self._keyword_points
+        score += sum(title_points[keyword] for keyword in title_hits)
+        score += sum(content_points[keyword] for keyword in content_hits - title_hits)
+
+        if logger.isEnabledFor(logging.DEBUG):
+            hits = title_hits | content_hits
+            strong_matches = [k for k in self.strong_keywords if k in hits]
+            include_matches = [k for k in self.include_keywords if k in hits]
+            exclude_matches = [k for k in self.exclude_keywords if k in hits]
+            if strong_matches:
+                logger.debug(f"[过滤器] 强相关关键词匹配: {strong_matches}")
+            if include_matches:
+                logger.debug(f"[过滤器] 相关关键词匹配: {include_matches[:3]}...")  # 只显示前3个
+            if exclude_matches:
+                logger.debug(f"[过滤器] 排除关键词匹配: {exclude_matches[:3]}...")
             
         # 6. 特殊规则：如果标题完全不包含公司信息但包含排除词，严重减分
         if (self.company_name not in title and self.stock_code not in title and 
-            any(keyword in title_lower for keyword in self.exclude_keywords)):
+            not self._exclude_set.isdisjoint(title_hits)):
             score -= 30
             logger.debug(f"[过滤器] 标题无公司信息但含排除词: -30分")
         
@@ -131,13 +152,14 @@ class NewsRelevanceFilter:
         
         return final_score
     
-    def filter_news(self, news_df: pd.DataFrame, min_score: float = 30) -> pd.DataFrame:
+    def filter_news(self, news_df: pd.DataFrame, min_score: float = 30, bulk: bool = True) -> pd.DataFrame:
         """
         过滤新闻DataFrame
         
         Args:
             news_df: 原始新闻DataFrame
             min_score: 最低相关性评分阈值
+            bulk: 是否按整列批量评分（关键词自动机一次扫描整列文本）
             
         Returns:
             pd.DataFrame: 过滤后的新闻DataFrame，按相关性评分排序
@@ -148,6 +170,9 @@ class NewsRelevanceFilter:
         
         logger.info(f"[过滤器] 开始过滤新闻，原始数量: {len(news_df)}条，最低评分阈值: {min_score}")
         
+        if bulk:
+            return self._filter_news_bulk(news_df, min_score)
+
         filtered_news = []
         
         for idx, row in news_df.iterrows():
@@ -177,6 +202,27 @@ class NewsRelevanceFilter:
             logger.warning(f"[过滤器] 所有新闻都被过滤，无符合条件的新闻")
             
         return filtered_df
+
+    def _filter_news_bulk(self, news_df: pd.DataFrame, min_score: float) -> pd.DataFrame:
+        """按整列批量评分过滤，结果与逐行过滤一致"""
+        empty = pd.Series('', index=news_df.index)
+        titles = news_df.get('新闻标题', news_df.get('标题', empty)).fillna('').astype(str).tolist()
+        contents = news_df.get('新闻内容', news_df.get('内容', empty)).fillna('').astype(str).tolist()
+
+        scores = np.asarray(self.calculate_relevance_scores(titles, contents))
+        keep = scores >= min_score
+
+        if keep.any():
+            filtered_df = news_df[keep].reset_index(drop=True)
+            filtered_df['relevance_score'] = scores[keep]
+            # 按相关性评分排序
+            filtered_df = filtered_df.sort_values('relevance_score', ascending=False)
+            logger.info(f"[过滤器] 过滤完成，保留 {len(filtered_df)}条 新闻")
+        else:
+            filtered_df = pd.DataFrame()
+            logger.warning(f"[过滤器] 所有新闻都被过滤，无符合条件的新闻")
+
+        return filtered_df
     
     def get_filter_statistics(self, original_df: pd.DataFrame, filtered_df: pd.DataFrame) -> Dict:
         """
@@ -249,8 +295,10 @@ def get_company_name(ticker: str) -> str:
     """
     # 清理股票代码（移除后缀）
     clean_ticker = ticker.split('.')[0]
-    
-    company_name = STOCK_COMPANY_MAPPING.get(clean_ticker)
+
+    # 优先查本地证券主数据，其次使用内置映射
+    from tradingagents.dataflows.security_master import get_security_name
+    company_name = get_security_name(ticker) or STOCK_COMPANY_MAPPING.get(clean_ticker)
     
     if company_name:
         logger.debug(f"[公司映射] {ticker} -> {company_name}")
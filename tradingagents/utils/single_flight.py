@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+请求合并（single-flight）
+同一时刻相同键的请求只执行一次，其余并发调用等待并共享结果（或异常）；不缓存已完成的结果。
+通过 single_flight_scope 为一次分析建立独立的合并组和计数，未建立时使用进程级默认组。
+"""
+
+import contextvars
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, Iterator
+
+# 导入日志模块
+from tradingagents.utils.logging_manager import get_logger
+logger = get_logger('agents')
+
+
+class _Call:
+    """一次正在执行的请求"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """并发请求合并组（线程安全）"""
+
+    def __init__(self, name: str = "default"):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.executed: Dict[str, int] = defaultdict(int)
+        self.shared: Dict[str, int] = defaultdict(int)
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        执行 fn(*args, **kwargs)；相同 key 的请求正在执行时等待它完成并返回同一结果
+
+        Args:
+            key: 请求键，元组时第一个元素作为统计用的方法名
+        """
+        method = str(key[0]) if isinstance(key, tuple) and key else str(key)
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executed[method] += 1
+            else:
+                self.shared[method] += 1
+
+        if not leader:
+            logger.debug(f"🔗 [请求合并] 等待进行中的相同请求: {key}")
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """每个方法实际执行次数和共享结果（节省的上游请求）次数"""
+        with self._lock:
+            methods = sorted(set(self.executed) | set(self.shared))
+            return {
+                "name": self.name,
+                "executed": sum(self.executed.values()),
+                "saved": sum(self.shared.values()),
+                "in_flight": len(self._calls),
+                "methods": {method: {"executed": self.executed[method], "saved": self.shared[method]}
+                            for method in methods},
+            }
+
+
+_default_group = SingleFlight("global")
+_current_group: contextvars.ContextVar = contextvars.ContextVar("single_flight_group", default=None)
+
+
+def current_single_flight() -> SingleFlight:
+    """当前上下文的合并组（未建立分析范围时为进程级默认组）"""
+    return _current_group.get() or _default_group
+
+
+@contextmanager
+def single_flight_scope(name: str) -> Iterator[SingleFlight]:
+    """为一次分析建立独立的合并组（LangGraph并行节点继承调用方的上下文）"""
+    group = SingleFlight(name)
+    token = _current_group.set(group)
+    try:
+        yield group
+    finally:
+        _current_group.reset(token)
@@ -308,42 +308,52 @@ class StockDataPreparer:
         try:
             # 1. 获取基本信息
             logger.debug(f"📊 [A股数据] 获取{stock_code}基本信息...")
-            from tradingagents.dataflows.interface import get_china_stock_info_unified
-
-            stock_info = get_china_stock_info_unified(stock_code)
-
-            if stock_info and "❌" not in stock_info and "未能获取" not in stock_info:
-                # 解析股票名称
-                if "股票名称:" in stock_info:
-                    lines = stock_info.split('\n')
-                    for line in lines:
-                        if "股票名称:" in line:
-                            stock_name = line.split(':')[1].strip()
-                            break
-
-                # 检查是否为有效的股票名称
-                if stock_name != "未知" and not stock_name.startswith(f"股票{stock_code}"):
-                    has_basic_info = True
-                    logger.info(f"✅ [A股数据] 基本信息获取成功: {stock_code} - {stock_name}")
-                    cache_status += "基本信息已缓存; "
+            # 优先查本地证券主数据（表中存在即为有效代码，无需网络往返）
+            from tradingagents.dataflows.security_master import get_security_master
+            security_master = get_security_master()
+            master_name = security_master.get_name(stock_code)
+            if master_name:
+                stock_name = master_name
+                has_basic_info = True
+                logger.info(f"✅ [A股数据] 基本信息获取成功(证券主数据): {stock_code} - {stock_name}")
+            else:
+                from tradingagents.dataflows.interface import get_china_stock_info_unified
+
+                stock_info = get_china_stock_info_unified(stock_code)
+
+                if stock_info and "❌" not in stock_info and "未能获取" not in stock_info:
+                    # 解析股票名称
+                    if "股票名称:" in stock_info:
+                        lines = stock_info.split('\n')
+                        for line in lines:
+                            if "股票名称:" in line:
+                                stock_name = line.split(':')[1].strip()
+                                break
+
+                    # 检查是否为有效的股票名称
+                    if stock_name != "未知" and not stock_name.startswith(f"股票{stock_code}"):
+                        has_basic_info = True
+                        security_master.upsert(stock_code, stock_name, source="unified_interface")
+                        logger.info(f"✅ [A股数据] 基本信息获取成功: {stock_code} - {stock_name}")
+                        cache_status += "基本信息已缓存; "
+                    else:
+                        logger.warning(f"⚠️ [A股数据] 基本信息无效: {stock_code}")
+                        return StockDataPreparationResult(
+                            is_valid=False,
+                            stock_code=stock_code,
+                            market_type="A股",
+                            error_message=f"股票代码 {stock_code} 不存在或信息无效",
+                            suggestion="请检查股票代码是否正确，或确认该股票是否已上市"
+                        )
                 else:
-                    logger.warning(f"⚠️ [A股数据] 基本信息无效: {stock_code}")
+                    logger.warning(f"⚠️ [A股数据] 无法获取基本信息: {stock_code}")
                     return StockDataPreparationResult(
                         is_valid=False,
                         stock_code=stock_code,
                         market_type="A股",
-                        error_message=f"股票代码 {stock_code} 不存在或信息无效",
+                        error_message=f"无法获取股票 {stock_code} 的基本信息",
                         suggestion="请检查股票代码是否正确，或确认该股票是否已上市"
                     )
-            else:
-                logger.warning(f"⚠️ [A股数据] 无法获取基本信息: {stock_code}")
-                return StockDataPreparationResult(
-                    is_valid=False,
-                    stock_code=stock_code,
-                    market_type="A股",
-                    error_message=f"无法获取股票 {stock_code} 的基本信息",
-                    suggestion="请检查股票代码是否正确，或确认该股票是否已上市"
-                )
 
             # 2. 获取历史数据
             logger.debug(f"📊 [A股数据] 获取{stock_code}历史数据 ({start_date_str} 到 {end_date_str})...")
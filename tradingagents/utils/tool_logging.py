@@ -6,6 +6,7 @@
 
 import time
 import functools
+import logging
 from typing import Any, Dict, Optional, Callable
 from datetime import datetime
 
@@ -19,6 +20,12 @@ logger = get_logger('agents')
 tool_logger = get_logger("tools")
 
 
+def _truncate(value: Any, limit: int) -> str:
+    """转为字符串并截断到 limit 个字符"""
+    text = str(value)
+    return text[:limit] + '...' if len(text) > limit else text
+
+
 def log_tool_call(tool_name: Optional[str] = None, log_args: bool = True, log_result: bool = False):
     """
     工具调用日志装饰器
@@ -36,31 +43,32 @@ def log_tool_call(tool_name: Optional[str] = None, log_args: bool = True, log_re
             
             # 记录开始时间
             start_time = time.time()
-            
-            # 准备参数信息
-            args_info = {}
-            if log_args:
-                # 记录位置参数
-                if args:
-                    args_info['args'] = [str(arg)[:100] + '...' if len(str(arg)) > 100 else str(arg) for arg in args]
-                
-                # 记录关键字参数
-                if kwargs:
-                    args_info['kwargs'] = {
-                        k: str(v)[:100] + '...' if len(str(v)) > 100 else str(v) 
-                        for k, v in kwargs.items()
+
+            # INFO级别未启用时跳过参数格式化和日志记录
+            info_enabled = tool_logger.isEnabledFor(logging.INFO)
+
+            if info_enabled:
+                # 准备参数信息（每个参数只转换一次字符串）
+                args_info = {}
+                if log_args:
+                    # 记录位置参数
+                    if args:
+                        args_info['args'] = [_truncate(arg, 100) for arg in args]
+
+                    # 记录关键字参数
+                    if kwargs:
+                        args_info['kwargs'] = {k: _truncate(v, 100) for k, v in kwargs.items()}
+
+                # 记录工具调用开始
+                tool_logger.info(
+                    f"🔧 [工具调用] {name} - 开始",
+                    extra={
+                        'tool_name': name,
+                        'event_type': 'tool_call_start',
+                        'timestamp': datetime.now().isoformat(),
+                        'args_info': args_info if log_args else None
                     }
-            
-            # 记录工具调用开始
-            tool_logger.info(
-                f"🔧 [工具调用] {name} - 开始",
-                extra={
-                    'tool_name': name,
-                    'event_type': 'tool_call_start',
-                    'timestamp': datetime.now().isoformat(),
-                    'args_info': args_info if log_args else None
-                }
-            )
+                )
             
             try:
                 # 执行工具函数
@@ -69,23 +77,23 @@ def log_tool_call(tool_name: Optional[str] = None, log_args: bool = True, log_re
                 # 计算执行时间
                 duration = time.time() - start_time
                 
-                # 准备结果信息
-                result_info = None
-                if log_result and result is not None:
-                    result_str = str(result)
-                    result_info = result_str[:200] + '...' if len(result_str) > 200 else result_str
-                
-                # 记录工具调用成功
-                tool_logger.info(
-                    f"✅ [工具调用] {name} - 完成 (耗时: {duration:.2f}s)",
-                    extra={
-                        'tool_name': name,
-                        'event_type': 'tool_call_success',
-                        'duration': duration,
-                        'result_info': result_info if log_result else None,
-                        'timestamp': datetime.now().isoformat()
-                    }
-                )
+                if info_enabled:
+                    # 准备结果信息
+                    result_info = None
+                    if log_result and result is not None:
+                        result_info = _truncate(result, 200)
+
+                    # 记录工具调用成功
+                    tool_logger.info(
+                        f"✅ [工具调用] {name} - 完成 (耗时: {duration:.2f}s)",
+                        extra={
+                            'tool_name': name,
+                            'event_type': 'tool_call_success',
+                            'duration': duration,
+                            'result_info': result_info if log_result else None,
+                            'timestamp': datetime.now().isoformat()
+                        }
+                    )
                 
                 return result
                 
@@ -134,6 +134,7 @@ def main():
                             total_records += count
                             st.write(f"**{display_name}**: {count:,} 条记录")
                         except Exception as e:
+                            db_manager.report_failure(mongodb_client, e)
                             st.write(f"**{display_name}**: 获取失败 ({e})")
                 
                 metric_col1, metric_col2 = st.columns(2)
@@ -86,15 +86,15 @@ def render_token_statistics():
         render_overview_metrics(stats, time_range)
         
         # 显示详细图表
-        if records:
-            render_detailed_charts(records, stats)
+        render_detailed_charts(stats)
         
-        # 显示供应商统计
+        # 显示供应商和模型统计
         render_provider_statistics(stats)
+        render_model_statistics(stats)
         
         # 显示成本趋势
         if records:
-            render_cost_trends(records)
+            render_cost_trends(days)
         
         # 显示详细记录表
         render_detailed_records_table(records)
@@ -157,7 +157,7 @@ def render_overview_metrics(stats: Dict[str, Any], time_range: str):
             delta=f"{stats['total_output_tokens']/(stats['total_input_tokens']+stats['total_output_tokens'])*100:.1f}%"
         )
 
-def render_detailed_charts(records: List[UsageRecord], stats: Dict[str, Any]):
+def render_detailed_charts(stats: Dict[str, Any]):
     """渲染详细图表"""
     st.markdown("**📊 详细分析图表**")
     
@@ -185,26 +185,28 @@ def render_detailed_charts(records: List[UsageRecord], stats: Dict[str, Any]):
     with col2:
         st.markdown("**📈 成本vs Token关系**")
         
-        # 创建散点图
-        df_records = pd.DataFrame([
+        # 按模型的滚动统计（每个模型一个点，不再逐条读取记录）
+        df_models = pd.DataFrame([
             {
-                'total_tokens': record.input_tokens + record.output_tokens,
-                'cost': record.cost,
-                'provider': record.provider,
-                'model': record.model_name
+                'total_tokens': data['input_tokens'] + data['output_tokens'],
+                'cost': data['cost'],
+                'requests': data['requests'],
+                'provider': model.split('/', 1)[0],
+                'model': model.split('/', 1)[-1]
             }
-            for record in records
+            for model, data in stats.get('model_stats', {}).items()
         ])
         
-        if not df_records.empty:
+        if not df_models.empty:
             fig_scatter = px.scatter(
-                df_records,
+                df_models,
                 x='total_tokens',
                 y='cost',
+                size='requests',
                 color='provider',
-                hover_data=['model'],
-                title="成本与Token使用量关系",
-                labels={'total_tokens': 'Token总数', 'cost': '成本(¥)'}
+                hover_data=['model', 'requests'],
+                title="各模型成本与Token使用量",
+                labels={'total_tokens': 'Token总数', 'cost': '成本(¥)', 'requests': '调用次数'}
             )
             st.plotly_chart(fig_scatter, use_container_width=True)
 
@@ -262,30 +264,38 @@ def render_provider_statistics(stats: Dict[str, Any]):
         )
         st.plotly_chart(fig_requests, use_container_width=True)
 
-def render_cost_trends(records: List[UsageRecord]):
-    """渲染成本趋势图"""
-    st.markdown("**📈 成本趋势分析**")
+def render_model_statistics(stats: Dict[str, Any]):
+    """渲染模型统计"""
+    model_stats = stats.get('model_stats', {})
+    if not model_stats:
+        return
     
-    # 按日期聚合数据
-    df_records = pd.DataFrame([
+    st.markdown("**🤖 模型统计**")
+    model_df = pd.DataFrame([
         {
-            'date': datetime.fromisoformat(record.timestamp).date(),
-            'cost': record.cost,
-            'tokens': record.input_tokens + record.output_tokens,
-            'provider': record.provider
+            '模型': model,
+            '成本(¥)': f"{data['cost']:.4f}",
+            '调用次数': data['requests'],
+            '输入Token': f"{data['input_tokens']:,}",
+            '输出Token': f"{data['output_tokens']:,}",
+            '平均成本(¥)': f"{data['cost']/data['requests']:.4f}" if data['requests'] > 0 else "0.0000"
         }
-        for record in records
+        for model, data in sorted(model_stats.items(), key=lambda item: -item[1]['cost'])
     ])
+    st.dataframe(model_df, use_container_width=True)
+
+def render_cost_trends(days: int):
+    """渲染成本趋势图"""
+    st.markdown("**📈 成本趋势分析**")
+    
+    # 按日汇总的使用量（直接读取滚动统计，不逐条聚合记录）
+    daily_stats = pd.DataFrame(config_manager.get_daily_usage(days))
     
-    if df_records.empty:
+    if daily_stats.empty:
         st.info("暂无趋势数据")
         return
     
-    # 按日期聚合
-    daily_stats = df_records.groupby('date').agg({
-        'cost': 'sum',
-        'tokens': 'sum'
-    }).reset_index()
+    daily_stats['tokens'] = daily_stats['input_tokens'] + daily_stats['output_tokens']
     
     # 创建双轴图表
     fig = make_subplots(
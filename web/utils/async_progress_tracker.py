@@ -16,6 +16,25 @@ from pathlib import Path
 from tradingagents.utils.logging_manager import get_logger
 logger = get_logger('async_progress')
 
+def _get_redis_client():
+    """从共享连接注册表获取进度存储使用的Redis客户端，不可用时抛出ConnectionError"""
+    from tradingagents.config.connection_registry import get_connection_registry, redis_url
+    url = redis_url(
+        host=os.getenv('REDIS_HOST', 'localhost'),
+        port=int(os.getenv('REDIS_PORT', 6379)),
+        password=os.getenv('REDIS_PASSWORD', None),
+        db=int(os.getenv('REDIS_DB', 0))
+    )
+    client = get_connection_registry().get_redis_client(url, decode_responses=True)
+    if client is None:
+        raise ConnectionError("Redis不可用")
+    return client
+
+def _report_redis_failure(client, error: Exception):
+    """上报进度读写中的Redis错误"""
+    from tradingagents.config.connection_registry import get_connection_registry
+    get_connection_registry().report_failure(client, error)
+
 def safe_serialize(obj):
     """安全序列化对象，处理不可序列化的类型"""
     if hasattr(obj, 'dict'):
@@ -128,34 +147,9 @@ class AsyncProgressTracker:
                 logger.info(f"📊 [异步进度] Redis已禁用，使用文件存储")
                 return False
 
-            import redis
-
-            # 从环境变量获取Redis配置
-            redis_host = os.getenv('REDIS_HOST', 'localhost')
-            redis_port = int(os.getenv('REDIS_PORT', 6379))
-            redis_password = os.getenv('REDIS_PASSWORD', None)
-            redis_db = int(os.getenv('REDIS_DB', 0))
-
-            # 创建Redis连接
-            if redis_password:
-                self.redis_client = redis.Redis(
-                    host=redis_host,
-                    port=redis_port,
-                    password=redis_password,
-                    db=redis_db,
-                    decode_responses=True
-                )
-            else:
-                self.redis_client = redis.Redis(
-                    host=redis_host,
-                    port=redis_port,
-                    db=redis_db,
-                    decode_responses=True
-                )
-
-            # 测试连接
-            self.redis_client.ping()
-            logger.info(f"📊 [异步进度] Redis连接成功: {redis_host}:{redis_port}")
+            self.redis_client = _get_redis_client()
+
+            logger.info(f"📊 [异步进度] Redis连接成功: {os.getenv('REDIS_HOST', 'localhost')}:{os.getenv('REDIS_PORT', 6379)}")
             return True
         except Exception as e:
             logger.warning(f"📊 [异步进度] Redis连接失败，使用文件存储: {e}")
@@ -501,6 +495,8 @@ class AsyncProgressTracker:
 
         except Exception as e:
             logger.error(f"📊 [异步进度] 保存失败: {e}")
+            if self.use_redis:
+                _report_redis_failure(self.redis_client, e)
             # 尝试备用存储方式
             try:
                 if self.use_redis:
@@ -582,38 +578,16 @@ def get_progress_by_id(analysis_id: str) -> Optional[Dict[str, Any]]:
 
         # 如果Redis启用，先尝试Redis
         if redis_enabled:
+            redis_client = None
             try:
-                import redis
-
-                # 从环境变量获取Redis配置
-                redis_host = os.getenv('REDIS_HOST', 'localhost')
-                redis_port = int(os.getenv('REDIS_PORT', 6379))
-                redis_password = os.getenv('REDIS_PASSWORD', None)
-                redis_db = int(os.getenv('REDIS_DB', 0))
-
-                # 创建Redis连接
-                if redis_password:
-                    redis_client = redis.Redis(
-                        host=redis_host,
-                        port=redis_port,
-                        password=redis_password,
-                        db=redis_db,
-                        decode_responses=True
-                    )
-                else:
-                    redis_client = redis.Redis(
-                        host=redis_host,
-                        port=redis_port,
-                        db=redis_db,
-                        decode_responses=True
-                    )
-
+                redis_client = _get_redis_client()
                 key = f"progress:{analysis_id}"
                 data = redis_client.get(key)
                 if data:
                     return json.loads(data)
             except Exception as e:
                 logger.debug(f"📊 [异步进度] Redis读取失败: {e}")
+                _report_redis_failure(redis_client, e)
 
         # 尝试文件
         progress_file = f"./data/progress_{analysis_id}.json"
@@ -646,31 +620,9 @@ def get_latest_analysis_id() -> Optional[str]:
 
         # 如果Redis启用，先尝试从Redis获取
         if redis_enabled:
+            redis_client = None
             try:
-                import redis
-
-                # 从环境变量获取Redis配置
-                redis_host = os.getenv('REDIS_HOST', 'localhost')
-                redis_port = int(os.getenv('REDIS_PORT', 6379))
-                redis_password = os.getenv('REDIS_PASSWORD', None)
-                redis_db = int(os.getenv('REDIS_DB', 0))
-
-                # 创建Redis连接
-                if redis_password:
-                    redis_client = redis.Redis(
-                        host=redis_host,
-                        port=redis_port,
-                        password=redis_password,
-                        db=redis_db,
-                        decode_responses=True
-                    )
-                else:
-                    redis_client = redis.Redis(
-                        host=redis_host,
-                        port=redis_port,
-                        db=redis_db,
-                        decode_responses=True
-                    )
+                redis_client = _get_redis_client()
 
                 # 获取所有progress键
                 keys = redis_client.keys("progress:*")
@@ -700,6 +652,7 @@ def get_latest_analysis_id() -> Optional[str]:
 
             except Exception as e:
                 logger.debug(f"📊 [恢复分析] Redis查找失败: {e}")
+                _report_redis_failure(redis_client, e)
 
         # 如果Redis失败或未启用，尝试从文件查找
         data_dir = Path("data")
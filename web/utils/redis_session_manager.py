@@ -26,7 +26,7 @@ class RedisSessionManager:
             if redis_enabled != 'true':
                 return False
 
-            import redis
+            from tradingagents.config.connection_registry import get_connection_registry, redis_url
 
             # 从环境变量获取Redis配置
             redis_host = os.getenv('REDIS_HOST', 'localhost')
@@ -34,19 +34,14 @@ class RedisSessionManager:
             redis_password = os.getenv('REDIS_PASSWORD', None)
             redis_db = int(os.getenv('REDIS_DB', 0))
             
-            # 创建Redis连接
-            self.redis_client = redis.Redis(
-                host=redis_host,
-                port=redis_port,
-                password=redis_password,
-                db=redis_db,
-                decode_responses=True,
-                socket_timeout=5,
-                socket_connect_timeout=5
+            # 使用共享连接注册表中的Redis客户端（已测试连接）
+            self.redis_client = get_connection_registry().get_redis_client(
+                redis_url(redis_host, redis_port, redis_password, redis_db),
+                timeout=5,
+                decode_responses=True
             )
-            
-            # 测试连接
-            self.redis_client.ping()
+            if self.redis_client is None:
+                raise ConnectionError(f"Redis不可用: {redis_host}:{redis_port}")
             return True
             
         except Exception as e:
@@ -56,6 +51,12 @@ class RedisSessionManager:
                 st.warning(f"⚠️ Redis连接失败，使用文件存储: {e}")
             return False
     
+    def _report_failure(self, error: Exception):
+        """Redis读写出错时上报给共享连接注册表"""
+        if self.use_redis:
+            from tradingagents.config.connection_registry import get_connection_registry
+            get_connection_registry().report_failure(self.redis_client, error)
+    
     def _get_session_key(self) -> str:
         """生成会话键"""
         try:
@@ -123,6 +124,7 @@ class RedisSessionManager:
             return True
             
         except Exception as e:
+            self._report_failure(e)
             st.warning(f"⚠️ 保存会话状态失败: {e}")
             return False
     
@@ -143,6 +145,7 @@ class RedisSessionManager:
             return None
             
         except Exception as e:
+            self._report_failure(e)
             st.warning(f"⚠️ 加载会话状态失败: {e}")
             return None
     
@@ -165,6 +168,7 @@ class RedisSessionManager:
                     del st.session_state[key]
             
         except Exception as e:
+            self._report_failure(e)
             st.warning(f"⚠️ 清除会话状态失败: {e}")
     
     def _save_to_file(self, session_key: str, session_data: Dict[str, Any]):
@@ -242,6 +246,7 @@ class RedisSessionManager:
                         debug_info["session_data"] = None
                         
                 except Exception as e:
+                    self._report_failure(e)
                     debug_info["redis_error"] = str(e)
             
             return debug_info